@@ -0,0 +1,123 @@
+"""
+Created on Sun Oct 18 23:48:05 2026.
+
+This script measures the simulation pipeline end to end with the stand-in solver backend, so it runs
+on machines without Lumerical. Every run uses a fresh interpreter working in a temporary folder with
+its own SQLite database and job queue, so nothing is shared between runs or with the real database.
+
+The steps of a run are a CHARGE simulation, a ring simulated from scratch, the same ring answered
+from the database, and an adaptive critical coupling search reusing the CHARGE and MODE results. The
+latency is the artificial time of every stand-in script, see StandinLumapi.latency_setting, a
+non-zero latency shows what the pipeline overlaps and what the cache avoids.
+
+Usage : python Pipeline.py [repeats] [latency]
+
+@author: AlexTofini
+"""
+
+# Importing relevant packages
+import os
+import sys
+import json
+import tempfile
+import subprocess
+import statistics
+
+# Folder containing the solver modules
+solver_dir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+# Steps of a run, in order
+steps = ['charge', 'ring', 'ring cached', 'critical coupling']
+
+# Code run in the child interpreter, prints the elapsed time of every step as json
+pipeline = '''
+import os
+import time
+import json
+import numpy as np
+import RINGsimulation as sim
+
+elapsed = {}
+start = time.perf_counter()
+charge_file, SimRun = sim.runPNJunctionSimulator(
+    0.25e-6, 0.25e-6, 1e-6, 1e-6, 1e-6, 1e-6, 1e-6, 1e-6, 90e-9, 10e-6, 0, 0, 4, 'Benchmark',
+    'Reverse', 'CL', 'AMF', 'Lateral', 220e-9, 500e-9)
+elapsed['charge'] = time.perf_counter() - start
+
+charge_file = os.path.join(os.getcwd(), 'Database', 'Charge_AMF', charge_file + '.mat')
+ring = (10e-6, 200e-9, 90e-9, 0, 1.5e-6, 1.6e-6, 'CL', charge_file, 200, 220e-9, 500e-9)
+for step in ('ring', 'ring cached'):
+    start = time.perf_counter()
+    sim.runSimulation(*ring)
+    elapsed[step] = time.perf_counter() - start
+
+start = time.perf_counter()
+sim.CriticalCouplingAutomation(10e-6, np.linspace(100e-9, 600e-9, 11), 90e-9, 0, 1.5e-6, 1.6e-6,
+                               'CL', charge_file, 200, 220e-9, 500e-9, search='adaptive')
+elapsed['critical coupling'] = time.perf_counter() - start
+print(json.dumps(elapsed))
+'''
+
+
+def RunPipeline(latency):
+    """
+    Run the pipeline once in a fresh interpreter and temporary folder.
+
+    Parameters
+    ----------
+    latency : str
+        Artificial latency of the stand-in scripts, as RING_STANDIN_LATENCY.
+
+    Returns
+    -------
+    elapsed : dict or str
+        Elapsed time of every step in seconds, or the error message if the run failed.
+
+    """
+    with tempfile.TemporaryDirectory() as folder:
+        env = dict(os.environ)
+        env.update({'RING_LUMAPI_BACKEND': 'standin', 'RING_STANDIN_LATENCY': latency,
+                    'RING_DATABASE_BACKEND': 'sqlite',
+                    'RING_DATABASE_PATH': os.path.join(folder, 'Database.sqlite'),
+                    'RING_JOB_QUEUE_PATH': os.path.join(folder, 'JobQueue.sqlite'),
+                    'PYTHONPATH': os.pathsep.join([solver_dir, env.get('PYTHONPATH', '')])})
+        result = subprocess.run([sys.executable, '-c', pipeline], cwd=folder, env=env,
+                                capture_output=True, text=True)
+    try:
+        elapsed = json.loads(result.stdout.strip().split('\n')[-1])
+    except ValueError:
+        elapsed = 'failed: ' + (result.stderr.strip().split('\n') or [''])[-1]
+    return elapsed
+
+
+def main(repeats, latency):
+    """
+    Print the median elapsed time of every step of the pipeline.
+
+    Parameters
+    ----------
+    repeats : int
+        Number of runs.
+    latency : str
+        Artificial latency of the stand-in scripts, as RING_STANDIN_LATENCY.
+
+    Returns
+    -------
+    None.
+
+    """
+    runs = [RunPipeline(latency) for ii in range(repeats)]
+    failures = [run for run in runs if isinstance(run, str)]
+    if failures != []:
+        print(failures[0])
+        return
+
+    print('Stand-in latency: ' + latency + ' s')
+    print('%-20s %12s' % ('Step', 'Median (ms)'))
+    for step in steps:
+        print('%-20s %12.1f' % (step, 1e3 * statistics.median([run[step] for run in runs])))
+    return
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3, sys.argv[2] if len(sys.argv) > 2 else '0')
@@ -0,0 +1,183 @@
+"""
+Created on Mon Oct 19 01:37:52 2026.
+
+This script measures the lumapi round trips of every solver job with the stand-in solver backend
+
+Every job of lumerical_tools composes its session setup, parameters and analysis script into one
+LumericalScript. The jobs are run twice, with the script sent in one evalScript call and, with
+RING_BATCH_SCRIPTS=0, with every block of the script sent in its own call as the simulation methods
+used to. Each stand-in call waits for the round trip latency, see StandinLumapi.call_latency, and
+the analysis scripts take no time, so the difference is the cost of the evalScript round trips
+alone, the getVar calls returning the results being the same in both modes.
+
+A run is a CHARGE simulation, two rings sharing their waveguide, so the second FDTD and Interconnect
+jobs reuse a warm session, and an NRZ eye, in a fresh interpreter and temporary folder.
+
+Usage : python ScriptRoundTrips.py [repeats] [call latency in s]
+
+@author: AlexTofini
+"""
+
+# Importing relevant packages
+import os
+import sys
+import json
+import tempfile
+import subprocess
+import statistics
+
+# Folder containing the solver modules
+solver_dir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+# Script sending modes compared, RING_BATCH_SCRIPTS value keyed by mode name
+modes = {'batched': '1', 'per block': '0'}
+
+# Code run in the child interpreter, prints the evalScript calls and elapsed time of every job
+pipeline = '''
+import os
+import time
+import json
+import functools
+import threading
+import lumerical_tools
+import StandinLumapi
+import RINGsimulation as sim
+
+jobs = []
+
+# Jobs of different solvers run concurrently, so the calls are counted per thread
+local = threading.local()
+evalScript = StandinLumapi.evalScript
+
+
+def CountedEvalScript(handle, code):
+    local.calls = getattr(local, 'calls', 0) + 1
+    return evalScript(handle, code)
+
+
+def Measure(function):
+    @functools.wraps(function)
+    def measured(*args, **kwargs):
+        local.calls = 0
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        jobs.append((function.__name__, local.calls, time.perf_counter() - start))
+        return result
+    return measured
+
+
+StandinLumapi.evalScript = CountedEvalScript
+for name in ('run_FDTD', 'run_active_bent_wg', 'run_charge', 'run_interconnect',
+             'run_interconnect_EYE_NRZ'):
+    setattr(lumerical_tools, name, Measure(getattr(lumerical_tools, name)))
+
+charge_file, SimRun = sim.runPNJunctionSimulator(
+    0.25e-6, 0.25e-6, 1e-6, 1e-6, 1e-6, 1e-6, 1e-6, 1e-6, 90e-9, 10e-6, 0, 0, 4, 'Benchmark',
+    'Reverse', 'CL', 'AMF', 'Lateral', 220e-9, 500e-9)
+charge_file = os.path.join(os.getcwd(), 'Database', 'Charge_AMF', charge_file + '.mat')
+for gap in (200e-9, 250e-9):
+    ring = sim.runSimulation(10e-6, gap, 90e-9, 0, 1.5e-6, 1.6e-6, 'CL', charge_file, 200,
+                             220e-9, 500e-9)
+sim.runEye('NRZ', 2, 0, float(ring.resonances[1]) + 0.05, 10e-6, 0, 1.5e-6, 1.6e-6, 25, 'no',
+           charge_file, ring, 200)
+print(json.dumps(jobs))
+'''
+
+
+def RunJobs(mode, latency):
+    """
+    Run the jobs once in a fresh interpreter and temporary folder.
+
+    Parameters
+    ----------
+    mode : str
+        RING_BATCH_SCRIPTS value.
+    latency : str
+        Round trip latency of the stand-in calls in s, as RING_STANDIN_CALL_LATENCY.
+
+    Returns
+    -------
+    jobs : list or str
+        (function, evalScript calls, elapsed time in s) of every job in order, or the error
+        message if the run failed.
+
+    """
+    with tempfile.TemporaryDirectory() as folder:
+        env = dict(os.environ)
+        env.update({'RING_LUMAPI_BACKEND': 'standin', 'RING_STANDIN_LATENCY': '0',
+                    'RING_STANDIN_CALL_LATENCY': latency, 'RING_BATCH_SCRIPTS': mode,
+                    'RING_DATABASE_BACKEND': 'sqlite',
+                    'RING_DATABASE_PATH': os.path.join(folder, 'Database.sqlite'),
+                    'RING_JOB_QUEUE_PATH': os.path.join(folder, 'JobQueue.sqlite'),
+                    'PYTHONPATH': os.pathsep.join([solver_dir, env.get('PYTHONPATH', '')])})
+        result = subprocess.run([sys.executable, '-c', pipeline], cwd=folder, env=env,
+                                capture_output=True, text=True)
+    try:
+        jobs = json.loads(result.stdout.strip().split('\n')[-1])
+    except ValueError:
+        jobs = 'failed: ' + (result.stderr.strip().split('\n') or [''])[-1]
+    return jobs
+
+
+def JobKeys(jobs):
+    """
+    Key the jobs of a run by function and occurrence, the order of concurrent jobs can vary.
+
+    Parameters
+    ----------
+    jobs : list
+        Jobs returned by RunJobs().
+
+    Returns
+    -------
+    keyed : dict
+        (evalScript calls, elapsed time in s) keyed by (function, occurrence), in run order.
+
+    """
+    keyed = {}
+    for function, calls, elapsed in jobs:
+        occurrence = sum(1 for key in keyed if key[0] == function)
+        keyed[(function, occurrence)] = (calls, elapsed)
+    return keyed
+
+
+def main(repeats, latency):
+    """
+    Print the evalScript calls and median time of every job for both script sending modes.
+
+    Parameters
+    ----------
+    repeats : int
+        Number of runs per mode.
+    latency : str
+        Round trip latency of the stand-in calls in s, as RING_STANDIN_CALL_LATENCY.
+
+    Returns
+    -------
+    None.
+
+    """
+    results = {}
+    for mode, setting in modes.items():
+        runs = [RunJobs(setting, latency) for ii in range(repeats)]
+        failures = [run for run in runs if isinstance(run, str)]
+        if failures != []:
+            print(mode + ' ' + failures[0])
+            return
+        results[mode] = [JobKeys(run) for run in runs]
+
+    print('Stand-in round trip latency: ' + latency + ' s')
+    print('%-28s %7s %7s %12s %12s %10s' % ('Job', 'Calls', 'Calls', 'Time (ms)', 'Time (ms)',
+                                            'Saved (ms)'))
+    print('%-28s %7s %7s %12s %12s' % ('', 'batched', 'block', 'batched', 'block'))
+    batched, blocks = results['batched'], results['per block']
+    for key in batched[0]:
+        times = [1e3*statistics.median([run[key][1] for run in runs]) for runs in (batched, blocks)]
+        print('%-28s %7d %7d %12.1f %12.1f %10.1f' % (key[0], batched[0][key][0], blocks[0][key][0],
+                                                     times[0], times[1], times[1] - times[0]))
+    return
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3,
+         sys.argv[2] if len(sys.argv) > 2 else '0.02')
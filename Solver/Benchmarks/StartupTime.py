@@ -0,0 +1,132 @@
+"""
+Created on Tue Oct 13 10:02:44 2026.
+
+This script measures the startup cost of the solver modules. Every measurement runs in a fresh
+interpreter so nothing is shared between runs.
+
+Each module is timed twice. The lazy time is the plain import, as done by RINGgui.py when the user
+only browses cached results. The eager time also opens the database connection and imports
+lumapi when the module pulled them in, which is what every import paid before both were deferred
+to first use. Without a Lumerical install, the eager import goes through the stand-in solver
+backend, RING_LUMAPI_BACKEND=standin, and the eager time includes the stand-in models instead.
+
+Usage : python StartupTime.py [repeats]
+
+@author: AlexTofini
+"""
+
+# Importing relevant packages
+import os
+import sys
+import platform
+import subprocess
+import statistics
+
+# Folder containing the solver modules
+solver_dir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+# Modules to time, in increasing order of what they pull in
+modules = ['ConnectToDatabase', 'lumerical_tools', 'RINGsimulation']
+
+# Folder of the Lumerical Python API, as searched by lumerical_tools
+if platform.system() == 'Windows':
+    lumapi_path = 'C:/Program Files/Lumerical/v212/api/python'
+else:
+    lumapi_path = '/CMC/tools/lumerical/v211/api/python'
+
+# Code run in the child interpreter, prints the elapsed time or the reason it failed
+timer = '''
+import time
+start = time.perf_counter()
+try:
+    import {module}
+    if {eager}:
+        import sys
+        if 'ConnectToDatabase' in sys.modules:
+            sys.modules['ConnectToDatabase'].backend.get()
+        if 'lumerical_tools' in sys.modules:
+            sys.modules['lumerical_tools'].lumapi.load()
+    print(time.perf_counter() - start)
+except Exception as e:
+    print('failed: ' + type(e).__name__ + ': ' + str(e))
+'''
+
+
+def SolverBackend():
+    """
+    Return the solver backend imported by the eager runs.
+
+    Returns
+    -------
+    backend : str
+        RING_LUMAPI_BACKEND, or standin when it selects Lumerical and lumapi is not installed.
+
+    """
+    backend = os.environ.get('RING_LUMAPI_BACKEND', 'lumerical')
+    if backend == 'lumerical' and not os.path.exists(os.path.join(lumapi_path, 'lumapi.py')):
+        print('lumapi not found at ' + lumapi_path + ', eager runs use the stand-in backend')
+        backend = 'standin'
+    return backend
+
+
+def TimeImport(module, eager, backend):
+    """
+    Time the import of a module in a fresh interpreter.
+
+    Parameters
+    ----------
+    module : str
+        Name of the module to import.
+    eager : bool
+        Also connect to the database and import lumapi.
+    backend : str
+        Solver backend, as RING_LUMAPI_BACKEND.
+
+    Returns
+    -------
+    elapsed : float or str
+        Elapsed time in seconds, or the error message if the import failed.
+
+    """
+    env = dict(os.environ, RING_LUMAPI_BACKEND=backend)
+    result = subprocess.run([sys.executable, '-c', timer.format(module=module, eager=eager)],
+                            cwd=solver_dir, env=env, capture_output=True, text=True)
+    output = result.stdout.strip().split('\n')[-1]
+    try:
+        elapsed = float(output)
+    except ValueError:
+        elapsed = output
+    return elapsed
+
+
+def main(repeats):
+    """
+    Print the median lazy and eager startup time of every module.
+
+    Parameters
+    ----------
+    repeats : int
+        Number of runs per measurement.
+
+    Returns
+    -------
+    None.
+
+    """
+    backend = SolverBackend()
+    print('%-20s %12s %12s' % ('Module', 'Lazy (ms)', 'Eager (ms)'))
+    for module in modules:
+        row = []
+        for eager in (False, True):
+            runs = [TimeImport(module, eager, backend) for ii in range(repeats)]
+            failures = [run for run in runs if isinstance(run, str)]
+            if failures != []:
+                row.append(failures[0])
+            else:
+                row.append('%12.1f' % (1e3 * statistics.median(runs)))
+        print('%-20s %12s %12s' % (module, row[0], row[1]))
+    return
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
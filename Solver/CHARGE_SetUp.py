@@ -7,6 +7,8 @@ This scrip sets up the CHARGE simulation for the PN junction simulations
 """
 # Import dependencies
 import lumerical_tools
+import JobQueue
+import Tracing
 import os
 import ConnectToDatabase as database
 
@@ -43,6 +45,7 @@ def simulateForAMF(parameters, simulation_setup, charge_setup):
                                       charge_setup.vmin, charge_setup.vmax, charge_setup.bias,
                                       simulation_setup.Band, charge_setup.foundry,
                                       charge_setup.doping_error)
+    Tracing.tracer.cache(result != [])
     if result != []:
         # If matching record exists, use the results
         print("Database contains a record for current PN Junction")
@@ -56,9 +59,9 @@ def simulateForAMF(parameters, simulation_setup, charge_setup):
         # If no matching record exists, use LumAPI to create the CHARGE simulation
         print("Database does not contains a record for current PN Junction")
 
-        # Execute simulation using LumAPI
-        capacitance_avg, resistance_avg, bandwidth_avg = lumerical_tools.run_charge(
-            parameters, simulation_setup, charge_setup)
+        # Submitting the CHARGE simulation to the job queue and waiting for its result
+        capacitance_avg, resistance_avg, bandwidth_avg = JobQueue.job_queue.run(
+            'device', lumerical_tools.run_charge, parameters, simulation_setup, charge_setup)
 
         # Determine next identification ID in the table to save the new record to
         nextID = database.FindNextIndex('Charge_AMF')
@@ -87,6 +90,8 @@ def simulateForAMF(parameters, simulation_setup, charge_setup):
         # User specified the file name
         filename = charge_setup.save_name
         SimRun = True
+        Tracing.tracer.record(os.path.join(cwd, 'Database', 'Charge_' + charge_setup.foundry,
+                                           filename + '.mat'))
 
     return filename, SimRun
 
@@ -121,7 +126,9 @@ def simulateForAIM(parameters, simulation_setup, charge_setup):
                                       charge_setup.pp_width, charge_setup.np_width,
                                       charge_setup.ppp_width, charge_setup.npp_width,
                                       charge_setup.vmin, charge_setup.vmax, charge_setup.bias,
-                                      simulation_setup.Band, charge_setup.foundry)
+                                      simulation_setup.Band, charge_setup.foundry,
+                                      charge_setup.doping_error)
+    Tracing.tracer.cache(result != [])
     if result != []:
         # If matching record exists, use the results
         print("Database contains a record for current PN Junction")
@@ -135,9 +142,9 @@ def simulateForAIM(parameters, simulation_setup, charge_setup):
         # If no matching record exists, use LumAPI to create the CHARGE simulation
         print("Database does not contains a record for current PN Junction")
 
-        # Execute simulation using LumAPI
-        capacitance_avg, resistance_avg, bandwidth_avg = lumerical_tools.run_charge(
-            parameters, simulation_setup, charge_setup)
+        # Submitting the CHARGE simulation to the job queue and waiting for its result
+        capacitance_avg, resistance_avg, bandwidth_avg = JobQueue.job_queue.run(
+            'device', lumerical_tools.run_charge, parameters, simulation_setup, charge_setup)
 
         # Determine next identification ID in the table to save the new record to
         nextID = database.FindNextIndex('Charge_AIM')
@@ -154,7 +161,8 @@ def simulateForAIM(parameters, simulation_setup, charge_setup):
                                  charge_setup.vmax, charge_setup.charge_datapoints,
                                  charge_setup.bias, simulation_setup.Band,
                                  charge_setup.foundry, capacitance_avg, resistance_avg,
-                                 bandwidth_avg)
+                                 bandwidth_avg, charge_setup.doping_error)
+
         # Cleaning up charge database temporary save files
         cwd = os.getcwd()
         if os.path.exists(cwd + "\\Database\\Charge_AIM\\ChargeSim.ldev"):
@@ -165,6 +173,8 @@ def simulateForAIM(parameters, simulation_setup, charge_setup):
         # User specified the file name
         filename = charge_setup.save_name
         SimRun = True
+        Tracing.tracer.record(os.path.join(cwd, 'Database', 'Charge_' + charge_setup.foundry,
+                                           filename + '.mat'))
 
     return filename, SimRun
 
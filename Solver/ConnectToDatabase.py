@@ -7,24 +7,473 @@ This script contains all the queries to connect to the SQL database, and has the
 """
 
 # Importing relevant packages
-import pyodbc
 import os
+import re
 import shutil
+import struct
+import hashlib
+import json
+import threading
+import functools
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import DatabaseBackends
+import Tracing
+
+
+class TracedBackend():
+    """
+    A class to represent the database backend with every query and write recorded as a span.
+
+    Spans are named after the statement and its table, e.g. 'SELECT Coupler Table', in the
+    database category.
+
+    ...
+
+    """
+
+    def __init__(self, backend):
+        """
+        Construct the wrapper.
+
+        Parameters
+        ----------
+            backend : LazyBackend
+                Backend executing the statements.
+        """
+        self.backend = backend
+
+    def span(self, sql):
+        """Return the span of a statement, named after its first keyword and table."""
+        table = re.search(r'(?:FROM|INTO|UPDATE)\s+(\[[^\]]+\]|\w+)', sql, re.IGNORECASE)
+        name = sql.split()[0].upper() + (' ' + table.group(1).strip('[]') if table else '')
+        return Tracing.tracer.span(name, 'database')
+
+    def fetchall(self, sql, params=()):
+        """Execute a query and return all matching rows."""
+        with self.span(sql):
+            return self.backend.fetchall(sql, params)
+
+    def execute(self, sql, params=()):
+        """Execute a command that modifies the database and commit it."""
+        with self.span(sql):
+            return self.backend.execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        """Execute the same command for every set of parameters inside a single transaction."""
+        with self.span(sql):
+            return self.backend.executemany(sql, seq_of_params)
+
+    def executebatch(self, commands):
+        """Execute several commands inside a single transaction."""
+        with Tracing.tracer.span('BATCH', 'database', statements=len(commands)):
+            return self.backend.executebatch(commands)
+
+    def reserve_ids(self, table, field, count):
+        """Atomically reserve a block of consecutive IDs from the sequence of a table."""
+        with Tracing.tracer.span('RESERVE ' + table, 'database'):
+            return self.backend.reserve_ids(table, field, count)
+
+    def __getattr__(self, name):
+        """Forward the other attributes to the backend."""
+        # Special attributes are looked up by copy and pickle before __init__ has run
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.backend, name)
+
+
+# Defining connection to database, the backend is chosen by DatabaseBackends.CreateBackend() and
+# only connected on the first query, every statement is traced
+backend = TracedBackend(DatabaseBackends.LazyBackend())
+
+# Binary array format, magic + dtype code + number of dimensions followed by the shape
+array_magic = b'RMA1'
+array_header = struct.Struct('<4sBB')
+array_dtypes = ['<f8', '<f4', '<i8']
+
+# Data type used when saving arrays, float32 halves the size of large spectra
+array_dtype = '<f8'
+
+# Array columns of every table, used by MigrateTextArrays()
+array_columns = {
+    'Coupler Table': ('Coupler_ID', ['Frequency', 'Coupling_Coefficient']),
+    'Waveguide Table': ('Waveguide_ID', ['Voltage', 'Real_Neff', 'Imag_Neff', 'Absorption_Loss',
+                                         'Phase']),
+    'Charge AMF Table': ('Charge_ID', ['Capacitance', 'Resistance', 'Bandwidth']),
+    'Charge AIM Table': ('Charge_ID', ['Capacitance', 'Resistance', 'Bandwidth']),
+    'Transmission Table': ('Transmission_ID', ['Resonances', 'FSRs', '[3dB_Bandwidths]',
+                                               'Q_Factors', 'Insertion_Losses']),
+}
+
+# Integrity checks, (name, filename query, delete command, result folder, file type, parameters)
+integrity_checks = [
+    ('Transmission', 'SELECT Filename FROM [Transmission Table];',
+     'DELETE FROM [Transmission Table] WHERE Filename = ?;', 'Transmission', '.mat', ()),
+    ('Waveguide', 'SELECT Filename FROM [Waveguide Table];',
+     'DELETE FROM [Waveguide Table] WHERE Filename = ?;', 'Mode', '.ldf', ()),
+    ('Charge AMF', 'SELECT Filename FROM [Charge AMF Table];',
+     'DELETE FROM [Charge AMF Table] WHERE Filename = ?;', 'Charge_AMF', '.mat', ()),
+    ('Charge AIM', 'SELECT Filename FROM [Charge AIM Table];',
+     'DELETE FROM [Charge AIM Table] WHERE Filename = ?;', 'Charge_AIM', '.mat', ()),
+    ('Eye_NRZ', 'SELECT Filename FROM [Eye Data] WHERE Type = ?;',
+     'DELETE FROM [Eye Data] WHERE Type = ? AND Filename = ?;', 'Eye_NRZ', '.mat', ('NRZ',)),
+    ('Eye_PAM4', 'SELECT Filename FROM [Eye Data] WHERE Type = ?;',
+     'DELETE FROM [Eye Data] WHERE Type = ? AND Filename = ?;', 'Eye_PAM4', '.mat', ('PAM4',)),
+]
+
+# Manifest of validated result files kept in the Database folder by CheckDatabaseIntegrity()
+integrity_manifest = 'IntegrityManifest.json'
+
+# Maximum number of query results kept in memory by the query cache
+query_cache_size = int(os.environ.get('RING_QUERY_CACHE_SIZE', '512'))
+
+
+class QueryCache:
+    """
+    A class to represent a bounded LRU cache of query results.
+
+    Results are keyed on the query name and its canonicalized arguments, and every entry remembers
+    the table it was read from so a write only evicts the results of that table.
+    """
+
+    def __init__(self, maxsize):
+        """
+        Construct the query cache.
+
+        Parameters
+        ----------
+        maxsize : int
+            Maximum number of results kept, 0 disables the cache.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """
+        Fetch a cached result and mark it as recently used.
+
+        Parameters
+        ----------
+        key : tuple
+            Canonical key of the query.
+
+        Returns
+        -------
+        result : list or None
+            Copy of the cached result, None on a miss.
+
+        """
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits = self.hits + 1
+                return list(self.entries[key][1])
+            self.misses = self.misses + 1
+            return None
+
+    def put(self, key, table, result):
+        """
+        Store a query result, evicting the least recently used entry when full.
+
+        Parameters
+        ----------
+        key : tuple
+            Canonical key of the query.
+        table : str
+            Table the result was read from.
+        result : list
+            Query result.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.maxsize <= 0:
+            return
+        with self.lock:
+            self.entries[key] = (table, list(result))
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, table=None):
+        """
+        Drop the cached results of a table, or every result when no table is given.
+
+        Parameters
+        ----------
+        table : str, optional
+            Table that was written to. The default is None.
+
+        Returns
+        -------
+        None.
+
+        """
+        with self.lock:
+            if table is None:
+                self.entries.clear()
+            else:
+                for key in [key for key, entry in self.entries.items() if entry[0] == table]:
+                    del self.entries[key]
+            self.invalidations = self.invalidations + 1
+
+    def info(self):
+        """
+        Return the counters of the cache.
+
+        Returns
+        -------
+        info : dict
+            Hits, misses, hit rate, invalidations, current size and maximum size.
+
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            info = {'hits': self.hits, 'misses': self.misses,
+                    'hit_rate': self.hits / lookups if lookups else 0.0,
+                    'invalidations': self.invalidations, 'size': len(self.entries),
+                    'maxsize': self.maxsize}
+        return info
+
+
+# Defining the shared query cache
+query_cache = QueryCache(query_cache_size)
+
+
+def CanonicalKey(value):
+    """
+    Convert query arguments into a hashable key that is identical for equal values.
+
+    NumPy scalars become Python numbers, whole floats become ints and sequences become tuples, so
+    5, 5.0 and np.float64(5) share one entry. Values are not rounded, the queries match exactly.
+
+    Parameters
+    ----------
+    value : object
+        Argument, or tuple of arguments, of a query.
+
+    Returns
+    -------
+    key : object
+        Hashable canonical form of the value.
+
+    """
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, float):
+        if value.is_integer():
+            return int(value)
+        return value
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return tuple(CanonicalKey(item) for item in value)
+    return value
+
+
+def CachedQuery(table_arg=None, tables=None):
+    """
+    Decorate a Query* function so its results are served from the query cache.
+
+    Empty results are not cached, a missing record is about to be simulated and written, possibly by
+    another worker sharing the database.
+
+    Parameters
+    ----------
+    table_arg : str, optional
+        Name of the foundry argument when the table depends on it. The default is None.
+    tables : dict or str, optional
+        Table read by the query, or a dict from foundry to table. The default is None.
+
+    Returns
+    -------
+    decorator : function
+        Decorator wrapping the query function.
+
+    """
+    def decorator(function):
+        names = function.__code__.co_varnames[:function.__code__.co_argcount]
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            # Binding the arguments by name so positional and keyword calls share one entry
+            bound = dict(zip(names, args))
+            bound.update(kwargs)
+            key = (function.__name__, CanonicalKey(tuple(bound.get(name) for name in names)))
+            if table_arg is None:
+                table = tables
+            else:
+                table = tables.get(bound.get(table_arg))
 
-# Defining connection to database (This will have to be changed when hosted at UBC)
-cnn_string = (
-    r'Driver={Microsoft Access Driver (*.mdb, *.accdb)};'
-    r'DBQ=C:\Users\AlexTofini\Documents\GitHub\Ring-Modulator-Automation-GUI\Solver\Database'
-    r'\Database.accdb '
-)
-cnn = pyodbc.connect(cnn_string)
-cursor = cnn.cursor()
+            result = query_cache.get(key)
+            if result is None:
+                result = function(*args, **kwargs)
+                if result:
+                    query_cache.put(key, table, result)
+            return result
+        return wrapper
+    return decorator
+
+
+def QueryCacheInfo():
+    """
+    Return the hit and miss counters of the query cache.
+
+    Returns
+    -------
+    info : dict
+        Hits, misses, hit rate, invalidations, current size and maximum size.
+
+    """
+    return query_cache.info()
+
+
+def ClearQueryCache():
+    """
+    Drop every cached query result, needed after the database is edited outside this module.
+
+    Returns
+    -------
+    None.
+
+    """
+    query_cache.invalidate()
+    return
 
 
+# Quantization step of every numeric design parameter used to build the canonical record keys,
+# values closer than one step share a key, units are SI (m, V) and % for the doping error
+key_quantization = {
+    'radius': 1e-10, 'gap': 1e-10, 'coupling_length': 1e-10, 'slab_height': 1e-10,
+    'wg_height': 1e-10, 'wg_width': 1e-10,
+    'p_width_core': 1e-10, 'n_width_core': 1e-10, 'p_width_slab': 1e-10, 'n_width_slab': 1e-10,
+    'pp_width': 1e-10, 'np_width': 1e-10, 'ppp_width': 1e-10, 'npp_width': 1e-10,
+    'v_min': 1e-3, 'v_max': 1e-3, 'doping_error': 1e-3,
+}
+
+# Parameters composing the key of each keyed table, in order
+coupler_key_fields = ('radius', 'gap', 'coupling_length', 'slab_height', 'band', 'wg_height',
+                      'wg_width')
+charge_key_fields = ('PN_type', 'slab_height', 'wg_height', 'wg_width', 'radius',
+                     'coupling_length', 'p_width_core', 'n_width_core', 'p_width_slab',
+                     'n_width_slab', 'pp_width', 'np_width', 'ppp_width', 'npp_width', 'v_min',
+                     'v_max', 'bias', 'band', 'doping_error')
+
+# Columns holding the key parameters of each keyed table, same order as the key fields
+key_columns = {
+    'Coupler Table': ('Coupler_ID', coupler_key_fields,
+                      'Radius, Gap, Coupling_Length, Slab_Height, Optical_Band, '
+                      'Waveguide_Height, Waveguide_Width'),
+    'Charge AMF Table': ('Charge_ID', charge_key_fields,
+                         'Type, Slab_Height, Waveguide_Height, Waveguide_Width, Radius, '
+                         'Coupling_Length, P_Width_Core, N_Width_Core, P_Width_Slab, '
+                         'N_Width_Slab, [P+_Width], [N+_Width], [P++_Width], [N++_Width], '
+                         'Min_Voltage, Max_Voltage, Bias, Optical_Band, Doping_Error'),
+    'Charge AIM Table': ('Charge_ID', charge_key_fields,
+                         'Type, Slab_Height, Waveguide_Height, Waveguide_Width, Radius, '
+                         'Coupling_Length, P1Al_Width_Core, N1Al_Width_Core, P1Al_Width_Slab, '
+                         'N1Al_Width_Slab, P4Al_Width, N3Al_Width, P5Al_Width, N5Al_Width, '
+                         'Min_Voltage, Max_Voltage, Bias, Optical_Band, Doping_Error'),
+}
+
+# Set once the records written before keys existed have been keyed
+key_backfill_done = threading.Event()
+
+
+def ParameterKey(fields, values):
+    """
+    Build the canonical key of a design from its parameters.
+
+    Numeric parameters are rounded to an integer number of quantization steps from key_quantization,
+    so 2.5e-07 and 2.4999999999e-07 give the same key, text parameters are used as is. The
+    canonical text is hashed so the key has a fixed length and can be indexed by both backends.
+
+    Parameters
+    ----------
+    fields : tuple
+        Names of the parameters, used to look up their quantization step.
+    values : tuple
+        Values of the parameters.
+
+    Returns
+    -------
+    key : str
+        40 character hexadecimal key.
+
+    """
+    parts = []
+    for field, value in zip(fields, values):
+        if isinstance(value, np.generic):
+            value = value.item()
+        if field in key_quantization and value is not None and not isinstance(value, str):
+            steps = int(round(float(value) / key_quantization[field]))
+            parts.append('%s=%d' % (field, steps))
+        else:
+            parts.append('%s=%s' % (field, value))
+    key = hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+    return key
+
+
+def BackfillParameterKeys():
+    """
+    Compute the Param_Key of every record written before keys were introduced.
+
+    Runs once per process, the lookup only scans the rows whose key is still Null.
+
+    Returns
+    -------
+    keyed : int
+        Number of records that received a key.
+
+    """
+    keyed = 0
+    if key_backfill_done.is_set():
+        return keyed
+
+    for table, (id_field, fields, columns) in key_columns.items():
+        sql = (
+            'SELECT %s, %s '
+            'FROM [%s] '
+            'WHERE Param_Key IS NULL;'
+        ) % (id_field, columns, table)
+        result = backend.fetchall(sql)
+
+        # Writing all the keys of this table in one transaction
+        updates = [(ParameterKey(fields, tuple(row[1:])), row[0]) for row in result]
+        sql = (
+            'UPDATE [%s] '
+            'SET Param_Key = ? '
+            'WHERE %s = ?;'
+        ) % (table, id_field)
+        if updates != []:
+            backend.executemany(sql, updates)
+            keyed = keyed + len(updates)
+            print('Keyed ' + str(len(updates)) + ' ' + table + ' records')
+
+    key_backfill_done.set()
+    return keyed
+
+
+@CachedQuery(tables='Coupler Table')
 def QueryCouplers(radius, gap, coupling_length, slab_height, band, wg_height, wg_width):
     """
     Query coupler table for matching record.
 
+    Designs are matched on their canonical ParameterKey(), so values within the quantization step
+    of a stored record reuse it.
+
     Parameters
     ----------
     radius : float
@@ -51,17 +500,17 @@ def QueryCouplers(radius, gap, coupling_length, slab_height, band, wg_height, wg
     """
     # Defining SQL command
     sql = (
-        'SELECT [Coupler Table].*'
-        'FROM [Coupler Table]'
-        'WHERE ((([Coupler Table].Radius)=%s) AND (([Coupler Table].Gap)=%s) '
-        'AND (([Coupler Table].Coupling_Length)=%s) AND (([Coupler Table].Slab_Height)=%s) '
-        'AND (([Coupler Table].Optical_Band)=\'%s\') AND (([Coupler Table].Waveguide_Height)=%s) '
-        'AND (([Coupler Table].Waveguide_Width)=%s));'
-    ) % (radius, gap, coupling_length, slab_height, band, wg_height, wg_width)
+        'SELECT Coupler_ID, Radius, Gap, Coupling_Length, Slab_Height, Optical_Band, '
+        'Waveguide_Height, Waveguide_Width, Frequency, Coupling_Coefficient '
+        'FROM [Coupler Table] '
+        'WHERE Param_Key = ?;'
+    )
+    key = ParameterKey(coupler_key_fields, (radius, gap, coupling_length, slab_height, band,
+                                            wg_height, wg_width))
 
     # Executing querry and fetching reults
-    cursor.execute(sql)
-    result = cursor.fetchall()
+    BackfillParameterKeys()
+    result = backend.fetchall(sql, (key,))
     return result
 
 
@@ -102,17 +551,22 @@ def WriteToCouplers(ID, radius, gap, coupling_length, slab_height, band, wg_heig
     # Defining SQL command
     sql = (
         'INSERT INTO [Coupler Table] ( Coupler_ID, Radius, Gap, Coupling_Length, Slab_Height, '
-        'Optical_Band, Waveguide_Height, Waveguide_Width, Frequency, Coupling_Coefficient )'
-        'SELECT %s AS Expr1, %s AS Expr2, %s AS Expr3, %s AS Expr4, \'%s\' AS Expr5, '
-        '\'%s\' AS Expr6, %s AS Expr7, %s AS Expr8, \'%s\' AS Expr9, \'%s\' AS Expr10;'
-    ) % (ID, radius, gap, coupling_length, slab_height, band, wg_height, wg_width, f, CC)
+        'Optical_Band, Waveguide_Height, Waveguide_Width, Frequency, Coupling_Coefficient, '
+        'Param_Key ) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);'
+    )
+    key = ParameterKey(coupler_key_fields, (radius, gap, coupling_length, slab_height, band,
+                                            wg_height, wg_width))
+    params = (ID, radius, gap, coupling_length, slab_height, band, wg_height, wg_width,
+              StoreArray(f), StoreArray(CC), key)
 
     # Executing querry and commiting to table
-    cursor.execute(sql)
-    cursor.commit()
+    backend.execute(sql, params)
+    query_cache.invalidate('Coupler Table')
     return
 
 
+@CachedQuery(tables='Waveguide Table')
 def QueryWaveguides(band, charge_ID, foundry):
     """
     Query waveguide table for matching record.
@@ -134,27 +588,26 @@ def QueryWaveguides(band, charge_ID, foundry):
     # Defining SQL command depending on foundry
     if foundry == 'AMF':
         sql = (
-            'SELECT [Waveguide Table].* '
-            'FROM [Charge AMF Table] LEFT JOIN [Waveguide Table] ON '
-            '[Charge AMF Table].Charge_ID = [Waveguide Table].Charge_ID_AMF '
-            'WHERE (([Waveguide Table].Charge_ID_AMF)=%s); '
-        ) % (charge_ID)
+            'SELECT Waveguide_ID, Charge_ID_AMF, Charge_ID_AIM, Filename, Voltage, Real_Neff, '
+            'Imag_Neff, Absorption_Loss, Phase, Neff, Group_Index '
+            'FROM [Waveguide Table] '
+            'WHERE Charge_ID_AMF = ?;'
+        )
     elif foundry == 'AIM':
         sql = (
-            'SELECT [Waveguide Table].* '
-            'FROM [Charge AIM Table] LEFT JOIN [Waveguide Table] ON '
-            '[Charge AIM Table].Charge_ID = [Waveguide Table].Charge_ID_AIM '
-            'WHERE (([Waveguide Table].Charge_ID_AIM)=%s); '
-        ) % (charge_ID)
+            'SELECT Waveguide_ID, Charge_ID_AMF, Charge_ID_AIM, Filename, Voltage, Real_Neff, '
+            'Imag_Neff, Absorption_Loss, Phase, Neff, Group_Index '
+            'FROM [Waveguide Table] '
+            'WHERE Charge_ID_AIM = ?;'
+        )
 
     # Executing querry and fetching reults
-    cursor.execute(sql)
-    result = cursor.fetchall()
+    result = backend.fetchall(sql, (charge_ID,))
     return result
 
 
 def WriteToWaveguides(ID, charge_ID, voltage,
-                      dneff_real, dneff_imag, absorp_loss, phase, foundry):
+                      dneff_real, dneff_imag, absorp_loss, phase, foundry, neff=None, ng=None):
     """
     Append query used to add record to waveguide table.
 
@@ -177,6 +630,10 @@ def WriteToWaveguides(ID, charge_ID, voltage,
     foundry : str
         Foundry that the device is being simulated for.
         Options : [AMF, AIM]
+    neff : float, optional
+        Effective index of the unbiased waveguide at the band center. The default is None.
+    ng : float, optional
+        Group index of the unbiased waveguide at the band center. The default is None.
 
     Returns
     -------
@@ -186,31 +643,27 @@ def WriteToWaveguides(ID, charge_ID, voltage,
     # Defining waveguide filename based off integer ID
     waveguide_filename = 'Waveguide_' + str(ID)
 
-    # Defining SQL command based of the foundry
+    # Defining SQL command
+    sql = (
+        'INSERT INTO [Waveguide Table] ( Waveguide_ID, '
+        'Charge_ID_AMF, Charge_ID_AIM, Filename, Voltage, Real_Neff, Imag_Neff, '
+        'Absorption_Loss, Phase, Neff, Group_Index ) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);'
+    )
+
+    # Only the charge ID column of the foundry is populated, the other one is left Null
     if foundry == 'AMF':
-        sql = (
-            'INSERT INTO [Waveguide Table] ( Waveguide_ID, '
-            'Charge_ID_AMF, Charge_ID_AIM, Filename, Voltage, Real_Neff, Imag_Neff, '
-            'Absorption_Loss, Phase )'
-            'SELECT %s AS Expr1, %s AS Expr2, '
-            '%s AS Expr3, \'%s\' AS Expr4, \'%s\' AS Expr5, \'%s\' AS Expr6, \'%s\' AS Expr7, '
-            '\'%s\' AS Expr8, \'%s\' AS Expr9;'
-        ) % (ID, charge_ID, 'Null', waveguide_filename, voltage,
-             dneff_real, dneff_imag, absorp_loss, phase)
+        params = (ID, charge_ID, None, waveguide_filename, StoreArray(voltage),
+                  StoreArray(dneff_real), StoreArray(dneff_imag), StoreArray(absorp_loss),
+                  StoreArray(phase), neff, ng)
     elif foundry == 'AIM':
-        sql = (
-            'INSERT INTO [Waveguide Table] ( Waveguide_ID, '
-            'Charge_ID_AMF, Charge_ID_AIM, Filename, Voltage, Real_Neff, Imag_Neff, '
-            'Absorption_Loss, Phase )'
-            'SELECT %s AS Expr1, %s AS Expr2, '
-            '%s AS Expr3, \'%s\' AS Expr4, \'%s\' AS Expr5, \'%s\' AS Expr6, \'%s\' AS Expr7, '
-            '\'%s\' AS Expr8, \'%s\' AS Expr9;'
-        ) % (ID, 'Null', charge_ID, waveguide_filename, voltage,
-             dneff_real, dneff_imag, absorp_loss, phase)
+        params = (ID, None, charge_ID, waveguide_filename, StoreArray(voltage),
+                  StoreArray(dneff_real), StoreArray(dneff_imag), StoreArray(absorp_loss),
+                  StoreArray(phase), neff, ng)
 
     # Executing querry and commiting results
-    cursor.execute(sql)
-    cursor.commit()
+    backend.execute(sql, params)
+    query_cache.invalidate('Waveguide Table')
 
     return
 
@@ -219,6 +672,8 @@ def FindNextIndex(Table_name):
     """
     Find the next integer ID in the passed in table for appending.
 
+    The ID is reserved through ReserveIDs(), so two workers never receive the same ID.
+
     Parameters
     ----------
     Table_name : str
@@ -226,8 +681,33 @@ def FindNextIndex(Table_name):
 
     Returns
     -------
-    nextID : TYPE
-        DESCRIPTION.
+    nextID : int
+        Reserved integer ID for the new record.
+
+    """
+    nextID = ReserveIDs(Table_name)[0]
+    return nextID
+
+
+def ReserveIDs(Table_name, count=1):
+    """
+    Atomically reserve a block of consecutive integer IDs in the passed in table.
+
+    The backend keeps a sequence per table, so a reservation is a single row update no matter how
+    many records the table holds. Reserved IDs are never handed out again, even if the record is
+    never written.
+
+    Parameters
+    ----------
+    Table_name : str
+        Name of table to reserve integer IDs for the primary key.
+    count : int, optional
+        Number of IDs to reserve. The default is 1.
+
+    Returns
+    -------
+    IDs : list
+        List of reserved integer IDs.
 
     """
     # Creating list of options for table names and their corresponding field and table name syntax
@@ -239,36 +719,18 @@ def FindNextIndex(Table_name):
         table = 'Charge AMF Table'
     elif Table_name == 'Charge_AIM':
         field = 'Charge_ID'
-        table = 'Charge AIM Table '
+        table = 'Charge AIM Table'
     else:
         field = Table_name + '_ID'
         table = Table_name + ' Table'
 
-    # Defining SQL command
-    sql = (
-        'SELECT [%s].%s '
-        'FROM [%s];'
-    ) % (table, field, table)
-
-    # Executing query and fetching results
-    cursor.execute(sql)
-    result = cursor.fetchall()
-
-    # Initializing ID tracker
-    max_ID = 0
-
-    # If result is not empty, determine maximum ID. NextID is max +1
-    if result != []:
-        for ii in range(len(result)):
-            if result[ii][0] > max_ID:
-                max_ID = result[ii][0]
-        nextID = max_ID + 1
-    else:
-        nextID = 1
-
-    return nextID
+    # Reserving the block from the table sequence
+    firstID = backend.reserve_ids(table, field, count)
+    IDs = list(range(firstID, firstID + count))
+    return IDs
 
 
+@CachedQuery(table_arg='foundry', tables={'AMF': 'Charge AMF Table', 'AIM': 'Charge AIM Table'})
 def QueryChargeSims(PN_type, slab_height, wg_height, wg_width, radius, coupling_length,
                     p_width_core, n_width_core, p_width_slab, n_width_slab, pp_width,
                     np_width, ppp_width, npp_width, v_min, v_max, bias, band, foundry,
@@ -276,6 +738,9 @@ def QueryChargeSims(PN_type, slab_height, wg_height, wg_width, radius, coupling_
     """
     Query CHARGE tables for matching record.
 
+    Junctions are matched on their canonical ParameterKey(), so values within the quantization step
+    of a stored record reuse it.
+
     Parameters
     ----------
     PN_type : str
@@ -332,54 +797,36 @@ def QueryChargeSims(PN_type, slab_height, wg_height, wg_width, radius, coupling_
     # Defining SQL command based off foundry
     if foundry == 'AMF':
         sql = (
-            'SELECT [Charge AMF Table].*'
-            'FROM [Charge AMF Table]'
-            'WHERE ((([Charge AMF Table].Type)=\'%s\') AND (([Charge AMF Table].Slab_Height)=%s) '
-            'AND (([Charge AMF Table].Waveguide_Height)=%s) '
-            'AND (([Charge AMF Table].Waveguide_Width)=%s) '
-            'AND (([Charge AMF Table].Radius)=%s) AND (([Charge AMF Table].Coupling_Length)=%s) '
-            'AND (([Charge AMF Table].P_Width_Core)=%s) AND (([Charge AMF Table].N_Width_Core)=%s) '
-            'AND (([Charge AMF Table].P_Width_Slab)=%s) AND (([Charge AMF Table].N_Width_Slab)=%s) '
-            'AND (([Charge AMF Table].[P+_Width])=%s) AND (([Charge AMF Table].[N+_Width])=%s) '
-            'AND (([Charge AMF Table].[P++_Width])=%s) AND (([Charge AMF Table].[N++_Width])=%s) '
-            'AND (([Charge AMF Table].Min_Voltage)=%s) AND (([Charge AMF Table].Max_Voltage)=%s) '
-            'AND (([Charge AMF Table].Bias)=\'%s\') '
-            'AND (([Charge AMF Table].Optical_Band)=\'%s\') '
-            'AND (([Charge AMF Table].Doping_Error)=%s));'
-        ) % (PN_type, slab_height, wg_height, wg_width, radius, coupling_length, p_width_core,
-             n_width_core, p_width_slab, n_width_slab, pp_width, np_width, ppp_width, npp_width,
-             v_min, v_max, bias, band, doping_error)
+            'SELECT Charge_ID, Type, Slab_Height, Waveguide_Height, Waveguide_Width, Radius, '
+            'Coupling_Length, P_Width_Core, N_Width_Core, P_Width_Slab, N_Width_Slab, '
+            '[P+_Width], [N+_Width], [P++_Width], [N++_Width], Filename, Min_Voltage, Max_Voltage, '
+            'N, Bias, Optical_Band, Capacitance, Resistance, Bandwidth, Doping_Error '
+            'FROM [Charge AMF Table] '
+            'WHERE Param_Key = ?;'
+        )
     elif foundry == 'AIM':
         sql = (
-            'SELECT [Charge AIM Table].*'
-            'FROM [Charge AIM Table]'
-            'WHERE ((([Charge AIM Table].Type)=\'%s\') AND (([Charge AIM Table].Slab_Height)=%s) '
-            'AND (([Charge AMF Table].Waveguide_Height)=%s) '
-            'AND (([Charge AMF Table].Waveguide_Width)=%s) '
-            'AND (([Charge AIM Table].Radius)=%s) AND (([Charge AIM Table].Coupling_Length)=%s) '
-            'AND (([Charge AIM Table].P1Al_Width_Core)=%s) '
-            'AND (([Charge AIM Table].N1Al_Width_Core)=%s) '
-            'AND (([Charge AIM Table].P1Al_Width_Slab)=%s) '
-            'AND (([Charge AIM Table].N1Al_Width_Slab)=%s) '
-            'AND (([Charge AIM Table].P4Al_Width)=%s) '
-            'AND (([Charge AIM Table].N3Al_Width)=%s) '
-            'AND (([Charge AIM Table].P5Al_Width)=%s) '
-            'AND (([Charge AIM Table].N5Al_Width)=%s) '
-            'AND (([Charge AIM Table].Min_Voltage)=%s) '
-            'AND (([Charge AIM Table].Max_Voltage)=%s) '
-            'AND (([Charge AIM Table].Bias)=\'%s\') '
-            'AND (([Charge AIM Table].Optical_Band)=\'%s\') '
-            'AND (([Charge AIM Table].Doping_Error)=%s));'
-        ) % (PN_type, slab_height, wg_height, wg_width, radius, coupling_length, p_width_core,
-             n_width_core, p_width_slab, n_width_slab, pp_width, np_width, ppp_width, npp_width,
-             v_min, v_max, bias, band, doping_error)
+            'SELECT Charge_ID, Type, Slab_Height, Waveguide_Height, Waveguide_Width, Radius, '
+            'Coupling_Length, P1Al_Width_Core, N1Al_Width_Core, P1Al_Width_Slab, '
+            'N1Al_Width_Slab, P4Al_Width, N3Al_Width, P5Al_Width, N5Al_Width, Filename, '
+            'Min_Voltage, Max_Voltage, N, Bias, Optical_Band, Capacitance, Resistance, Bandwidth, '
+            'Doping_Error '
+            'FROM [Charge AIM Table] '
+            'WHERE Param_Key = ?;'
+        )
+    key = ParameterKey(charge_key_fields, (PN_type, slab_height, wg_height, wg_width, radius,
+                                           coupling_length, p_width_core, n_width_core,
+                                           p_width_slab, n_width_slab, pp_width, np_width,
+                                           ppp_width, npp_width, v_min, v_max, bias, band,
+                                           doping_error))
 
     # Executing query and fetching results
-    cursor.execute(sql)
-    result = cursor.fetchall()
+    BackfillParameterKeys()
+    result = backend.fetchall(sql, (key,))
     return result
 
 
+@CachedQuery(table_arg='foundry', tables={'AMF': 'Charge AMF Table', 'AIM': 'Charge AIM Table'})
 def QueryChargeFile(charge_file, foundry):
     """
     Query CHARGE table for matching .mat filename.
@@ -401,20 +848,26 @@ def QueryChargeFile(charge_file, foundry):
     # Defining SQL command based off foundry
     if foundry == 'AMF':
         sql = (
-            'SELECT [Charge AMF Table].*'
-            'FROM [Charge AMF Table]'
-            'WHERE ((([Charge AMF Table].Filename)=\'%s\'));'
-        ) % (charge_file)
+            'SELECT Charge_ID, Type, Slab_Height, Waveguide_Height, Waveguide_Width, Radius, '
+            'Coupling_Length, P_Width_Core, N_Width_Core, P_Width_Slab, N_Width_Slab, '
+            '[P+_Width], [N+_Width], [P++_Width], [N++_Width], Filename, Min_Voltage, Max_Voltage, '
+            'N, Bias, Optical_Band, Capacitance, Resistance, Bandwidth, Doping_Error '
+            'FROM [Charge AMF Table] '
+            'WHERE Filename = ?;'
+        )
     elif foundry == 'AIM':
         sql = (
-            'SELECT [Charge AIM Table].*'
-            'FROM [Charge AIM Table]'
-            'WHERE ((([Charge AIM Table].Filename)=\'%s\'));'
-        ) % (charge_file)
+            'SELECT Charge_ID, Type, Slab_Height, Waveguide_Height, Waveguide_Width, Radius, '
+            'Coupling_Length, P1Al_Width_Core, N1Al_Width_Core, P1Al_Width_Slab, '
+            'N1Al_Width_Slab, P4Al_Width, N3Al_Width, P5Al_Width, N5Al_Width, Filename, '
+            'Min_Voltage, Max_Voltage, N, Bias, Optical_Band, Capacitance, Resistance, Bandwidth, '
+            'Doping_Error '
+            'FROM [Charge AIM Table] '
+            'WHERE Filename = ?;'
+        )
 
     # Executing query and fetching results
-    cursor.execute(sql)
-    result = cursor.fetchall()
+    result = backend.fetchall(sql, (charge_file,))
     return result
 
 
@@ -495,39 +948,35 @@ def WriteChargeSims(ID, PN_type, slab_height, wg_height, wg_width, radius, coupl
             'Waveguide_Width, Radius, '
             'Coupling_Length, P_Width_Core, N_Width_Core, P_Width_Slab, N_Width_Slab, '
             '[P+_Width], [N+_Width], [P++_Width], [N++_Width], Filename, Min_Voltage, Max_Voltage, '
-            'N, Bias, Optical_Band, Capacitance, Resistance, Bandwidth, Doping_Error )'
-            'SELECT %s AS Expr1, \'%s\' AS Expr2, %s AS Expr3, %s AS Expr4, %s AS Expr5, '
-            '%s AS Expr6, %s AS Expr7, '
-            '%s AS Expr8, %s AS Expr9, %s AS Expr10, %s AS Expr11, %s AS Expr12, %s AS Expr13, '
-            '%s AS Expr14, %s AS Expr15, \'%s\' AS Expr16, %s AS Expr17, %s AS Expr18, '
-            '%s AS Expr19, \'%s\' AS Expr20, \'%s\' AS Expr21, \'%s\' AS Expr22, \'%s\' AS Expr23, '
-            '\'%s\' AS Expr24, %s AS Expr25;'
-        ) % (ID, PN_type, slab_height, wg_height, wg_width, radius, coupling_length, p_width_core,
-             n_width_core, p_width_slab, n_width_slab, pp_width, np_width, ppp_width,
-             npp_width, save_name, v_min, v_max, N, bias, band, capacitance, resistance, bandwidth,
-             doping_error)
+            'N, Bias, Optical_Band, Capacitance, Resistance, Bandwidth, Doping_Error, '
+            'Param_Key ) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);'
+        )
     elif foundry == 'AIM':
         sql = (
             'INSERT INTO [Charge AIM Table] ( Charge_ID, Type, Slab_Height, Waveguide_Height, '
             'Waveguide_Width, Radius, '
             'Coupling_Length, P1Al_Width_Core, N1Al_Width_Core, P1Al_Width_Slab, N1Al_Width_Slab, '
             'P4Al_Width, N3Al_Width, P5Al_Width, N5Al_Width, Filename, Min_Voltage, Max_Voltage, '
-            'N, Bias, Optical_Band, Capacitance, Resistance, Bandwidth, Doping_Error )'
-            'SELECT %s AS Expr1, \'%s\' AS Expr2, %s AS Expr3, %s AS Expr4, %s AS Expr5, '
-            '%s AS Expr6, %s AS Expr7, '
-            '%s AS Expr8, %s AS Expr9, %s AS Expr10, %s AS Expr11, %s AS Expr12, %s AS Expr13, '
-            '%s AS Expr14, %s AS Expr15, \'%s\' AS Expr16, %s AS Expr17, %s AS Expr18, '
-            '%s AS Expr19, \'%s\' AS Expr20, \'%s\' AS Expr21, \'%s\' AS Expr22, \'%s\' AS Expr23, '
-            '\'%s\' AS Expr24, %s AS Expr25;'
-        ) % (ID, PN_type, slab_height, wg_height, wg_width, radius, coupling_length, p_width_core,
-             n_width_core, p_width_slab, n_width_slab, pp_width, np_width, ppp_width,
-             npp_width, save_name, v_min, v_max, N, bias, band, capacitance, resistance, bandwidth,
-             doping_error)
-    cursor.execute(sql)
-    cursor.commit()
+            'N, Bias, Optical_Band, Capacitance, Resistance, Bandwidth, Doping_Error, '
+            'Param_Key ) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);'
+        )
+    params = (ID, PN_type, slab_height, wg_height, wg_width, radius, coupling_length, p_width_core,
+              n_width_core, p_width_slab, n_width_slab, pp_width, np_width, ppp_width,
+              npp_width, save_name, v_min, v_max, N, bias, band, StoreArray(capacitance),
+              StoreArray(resistance), StoreArray(bandwidth), doping_error,
+              ParameterKey(charge_key_fields, (PN_type, slab_height, wg_height, wg_width, radius,
+                                               coupling_length, p_width_core, n_width_core,
+                                               p_width_slab, n_width_slab, pp_width, np_width,
+                                               ppp_width, npp_width, v_min, v_max, bias, band,
+                                               doping_error)))
+    backend.execute(sql, params)
+    query_cache.invalidate('Charge %s Table' % foundry)
     return
 
 
+@CachedQuery(tables='Transmission Table')
 def QueryTransmission(waveguide_ID, coupler_ID, prop_loss):
     """
     Query transmission table for matching record.
@@ -548,16 +997,13 @@ def QueryTransmission(waveguide_ID, coupler_ID, prop_loss):
 
     """
     sql = (
-        'SELECT [Transmission Table].Transmission_ID, [Transmission Table].Filename '
+        'SELECT Transmission_ID, Filename '
         'FROM [Transmission Table] '
-        'WHERE ((([Transmission Table].Waveguide_ID)=%s) '
-        'AND (([Transmission Table].Coupler_ID)=%s) '
-        'AND (([Transmission Table].Propagation_loss)=%s));'
-    ) % (waveguide_ID, coupler_ID, prop_loss)
+        'WHERE Waveguide_ID = ? AND Coupler_ID = ? AND Propagation_Loss = ?;'
+    )
 
     # Executing query and fetching results
-    cursor.execute(sql)
-    result = cursor.fetchall()
+    result = backend.fetchall(sql, (waveguide_ID, coupler_ID, prop_loss))
     return result
 
 
@@ -596,18 +1042,20 @@ def WriteTransmission(waveguide_ID, coupler_ID, transmission_ID, transmission_fi
     """
     sql = (
         'INSERT INTO [Transmission Table] (Waveguide_ID, Coupler_ID, Transmission_ID, Filename, '
-        'Propagation_Loss, Resonances, FSRs, 3dB_Bandwidths, Q_Factors, Insertion_Losses ) '
-        'SELECT %s AS Expr1, %s AS Expr2, %s AS Expr3, \'%s\' AS Expr4, %s AS Expr5, '
-        '\'%s\' AS Expr6, \'%s\' AS Expr7, \'%s\' AS Expr8, \'%s\' AS Expr9, \'%s\' AS Expr10;'
-    ) % (waveguide_ID, coupler_ID, transmission_ID, transmission_file, prop_loss, resonances, FSRs,
-         bandwidths_3dB, QFactors, InsertionLosses)
+        'Propagation_Loss, Resonances, FSRs, [3dB_Bandwidths], Q_Factors, Insertion_Losses ) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);'
+    )
+    params = (waveguide_ID, coupler_ID, transmission_ID, transmission_file, prop_loss,
+              StoreArray(resonances), StoreArray(FSRs), StoreArray(bandwidths_3dB),
+              StoreArray(QFactors), StoreArray(InsertionLosses))
 
     # Executing query and commiting results
-    cursor.execute(sql)
-    cursor.commit()
+    backend.execute(sql, params)
+    query_cache.invalidate('Transmission Table')
     return
 
 
+@CachedQuery(table_arg='foundry', tables={'AMF': 'Charge AMF Table', 'AIM': 'Charge AIM Table'})
 def FindChargeID(charge_file, foundry):
     """
     Query CHARGE table for integer ID corresponding to passed in charge file.
@@ -626,30 +1074,30 @@ def FindChargeID(charge_file, foundry):
         Query results from CHARGE table based off supplied charge filename.
 
     """
-    # Defining filename based off supplied charge_file
-    file = charge_file.split('\\')[-1]
+    # Defining filename based off supplied charge_file, accepting Windows and POSIX separators
+    file = charge_file.replace('\\', '/').split('/')[-1]
     file = file.split('.')[0]
 
     # Defining SQL command based of foundry
     if foundry == 'AMF':
         sql = (
-            'SELECT [Charge AMF Table].Charge_ID '
-            'FROM [Charge AMF Table]'
-            'WHERE ((([Charge AMF Table].Filename)=\'%s\'));'
-        ) % (file)
+            'SELECT Charge_ID '
+            'FROM [Charge AMF Table] '
+            'WHERE Filename = ?;'
+        )
     elif foundry == 'AIM':
         sql = (
-            'SELECT [Charge AIM Table].Charge_ID '
-            'FROM [Charge AIM Table]'
-            'WHERE ((([Charge AIM Table].Filename)=\'%s\'));'
-        ) % (file)
+            'SELECT Charge_ID '
+            'FROM [Charge AIM Table] '
+            'WHERE Filename = ?;'
+        )
 
     # Executing query and fetching results
-    cursor.execute(sql)
-    result = cursor.fetchall()
+    result = backend.fetchall(sql, (file,))
     return result
 
 
+@CachedQuery(tables='Eye Table')
 def QueryEyeTable(waveguide_ID, coupler_ID, prop_loss):
     """
     Query eye table for matching record.
@@ -671,15 +1119,13 @@ def QueryEyeTable(waveguide_ID, coupler_ID, prop_loss):
     """
     # Defining SQL command
     sql = (
-        'SELECT [Eye Table].Eye_ID '
+        'SELECT Eye_ID '
         'FROM [Eye Table] '
-        'WHERE ((([Eye Table].Waveguide_ID)=%s) AND (([Eye Table].Coupler_ID)=%s) '
-        'AND (([Eye Table].Propagation_Loss)=%s));'
-    ) % (waveguide_ID, coupler_ID, prop_loss)
+        'WHERE Waveguide_ID = ? AND Coupler_ID = ? AND Propagation_Loss = ?;'
+    )
 
     # Executing query and fetching results
-    cursor.execute(sql)
-    result = cursor.fetchall()
+    result = backend.fetchall(sql, (waveguide_ID, coupler_ID, prop_loss))
     return result
 
 
@@ -706,15 +1152,16 @@ def WriteToEyeTable(ID, waveguide_ID, coupler_ID, prop_loss):
     # Defining SQL command
     sql = (
         'INSERT INTO [Eye Table] ( Eye_ID, Waveguide_ID, Coupler_ID, Propagation_Loss ) '
-        'SELECT %s AS Expr1, %s AS Expr2, %s AS Expr3, %s AS Expr4;'
-    ) % (ID, waveguide_ID, coupler_ID, prop_loss)
+        'VALUES (?, ?, ?, ?);'
+    )
 
     # Executing query and fetching results
-    cursor.execute(sql)
-    cursor.commit()
+    backend.execute(sql, (ID, waveguide_ID, coupler_ID, prop_loss))
+    query_cache.invalidate('Eye Table')
     return
 
 
+@CachedQuery(tables='Eye Data')
 def QueryEyeData(eye_ID, laser_wavelength, vmin, vmax, bitrate, eye_type, SNLC):
     """
     Query eye data table for matching records associated with the eye table.
@@ -746,17 +1193,45 @@ def QueryEyeData(eye_ID, laser_wavelength, vmin, vmax, bitrate, eye_type, SNLC):
     """
     # Defining SQL command
     sql = (
-        'SELECT [Eye Data].* '
+        'SELECT Eye_ID, Laser_Wavelength, Min_Voltage, Max_Voltage, Bitrate, Filename, Type, '
+        'SNLC, Eye_Data_ID '
         'FROM [Eye Data] '
-        'WHERE ((([Eye Data].Eye_ID)=%s) AND (([Eye Data].Laser_Wavelength)=%s) '
-        'AND (([Eye Data].Min_Voltage)=%s) AND (([Eye Data].Max_Voltage)=%s) '
-        'AND (([Eye Data].Bitrate)=%s) AND (([Eye Data].Type)=\'%s\') '
-        'AND (([Eye Data].SNLC)=\'%s\'));'
-    ) % (eye_ID, laser_wavelength, vmin, vmax, bitrate, eye_type, SNLC)
+        'WHERE Eye_ID = ? AND Laser_Wavelength = ? AND Min_Voltage = ? AND Max_Voltage = ? '
+        'AND Bitrate = ? AND Type = ? AND SNLC = ?;'
+    )
+    params = (eye_ID, laser_wavelength, vmin, vmax, bitrate, eye_type, SNLC)
 
     # Executing querry and fetching results
-    cursor.execute(sql)
-    result = cursor.fetchall()
+    result = backend.fetchall(sql, params)
+    return result
+
+
+@CachedQuery(tables='Eye Data')
+def QueryEyeDataAll(eye_ID):
+    """
+    Query eye data table for every record associated with an eye table record.
+
+    Parameters
+    ----------
+    eye_ID : int
+        Integer ID of eye table data.
+
+    Returns
+    -------
+    result : list
+        Query results from eye data table, same columns as QueryEyeData().
+
+    """
+    # Defining SQL command
+    sql = (
+        'SELECT Eye_ID, Laser_Wavelength, Min_Voltage, Max_Voltage, Bitrate, Filename, Type, '
+        'SNLC, Eye_Data_ID '
+        'FROM [Eye Data] '
+        'WHERE Eye_ID = ?;'
+    )
+
+    # Executing querry and fetching results
+    result = backend.fetchall(sql, (eye_ID,))
     return result
 
 
@@ -795,15 +1270,15 @@ def WriteToEyeData(eye_ID, laser_wavelength, vmin, vmax, bitrate,
     """
     # Defining SQL command
     sql = (
-        'INSERT INTO[Eye Data](Eye_ID, Laser_Wavelength, Min_Voltage, Max_Voltage, Bitrate, '
-        'Filename, Type, SNLC, EYE_Data_ID) '
-        'SELECT %s AS Expr1, %s AS Expr2, %s AS Expr3, %s AS Expr4, %s AS Expr5, \'%s\' AS Expr6, '
-        '\'%s\' AS Expr7, \'%s\' AS Expr8, %s AS Expr9;'
-    ) % (eye_ID, laser_wavelength, vmin, vmax, bitrate, filename, eye_type, SNLC, eye_data_ID)
+        'INSERT INTO [Eye Data] (Eye_ID, Laser_Wavelength, Min_Voltage, Max_Voltage, Bitrate, '
+        'Filename, Type, SNLC, Eye_Data_ID) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);'
+    )
+    params = (eye_ID, laser_wavelength, vmin, vmax, bitrate, filename, eye_type, SNLC, eye_data_ID)
 
     # Executing query and committing results
-    cursor.execute(sql)
-    cursor.commit()
+    backend.execute(sql, params)
+    query_cache.invalidate('Eye Data')
     return
 
 
@@ -836,6 +1311,152 @@ def ParseStringArray(strArray):
     return array
 
 
+def EncodeArray(values, dtype=None):
+    """
+    Encode an array into the binary format stored in the database.
+
+    Parameters
+    ----------
+    values : list or array
+        Values to encode, any shape.
+    dtype : str, optional
+        Stored data type.
+        Options : ['<f8', '<f4', '<i8']
+        The default is array_dtype.
+
+    Returns
+    -------
+    blob : bytes
+        Header with the data type and shape followed by the raw little-endian data.
+
+    """
+    if dtype is None:
+        dtype = array_dtype
+    array = np.ascontiguousarray(values, dtype=dtype)
+
+    # Header is padded to a multiple of 8 bytes so the data stays aligned
+    header = array_header.pack(array_magic, array_dtypes.index(dtype), array.ndim)
+    header = header + struct.pack('<%dI' % array.ndim, *array.shape)
+    header = header + b'\x00' * (-len(header) % 8)
+    return header + array.tobytes()
+
+
+def DecodeArray(blob):
+    """
+    Decode an array stored with EncodeArray() without copying the data.
+
+    Parameters
+    ----------
+    blob : bytes
+        Binary array read from the database.
+
+    Returns
+    -------
+    array : array
+        Read-only array viewing the blob.
+
+    """
+    magic, dtype_code, ndim = array_header.unpack_from(blob, 0)
+    if magic != array_magic:
+        raise ValueError('Database value is not an encoded array')
+    shape = struct.unpack_from('<%dI' % ndim, blob, array_header.size)
+
+    # Locating the start of the data from the padded header length
+    offset = array_header.size + 4 * ndim
+    offset = offset + (-offset % 8)
+    array = np.frombuffer(blob, dtype=array_dtypes[dtype_code], offset=offset)
+    return array.reshape(shape)
+
+
+def ParseArray(value):
+    """
+    Parse an array column read from the database, binary or legacy text.
+
+    Parameters
+    ----------
+    value : bytes or str
+        Value of an array column.
+
+    Returns
+    -------
+    array : array
+        Parsed array.
+
+    """
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return DecodeArray(value)
+
+    # Legacy rows store str(list), converting all elements in one call
+    value = value.replace('[', '').replace(']', '').strip()
+    if value == '':
+        return np.zeros(0)
+    return np.array(value.split(','), dtype=float)
+
+
+def StoreArray(values):
+    """
+    Convert an array into the value written to an array column.
+
+    Parameters
+    ----------
+    values : list or array
+        Values to store.
+
+    Returns
+    -------
+    value : bytes or str
+        Encoded array if the backend supports binary columns, otherwise str(list).
+
+    """
+    if backend.binary_arrays:
+        return EncodeArray(values)
+    return str(np.asarray(values).tolist())
+
+
+def MigrateTextArrays():
+    """
+    Convert every array still stored as text into the binary format.
+
+    Only backends with binary array columns are migrated, Access keeps the text format.
+
+    Returns
+    -------
+    migrated : int
+        Number of values converted.
+
+    """
+    migrated = 0
+    if not backend.binary_arrays:
+        print('The ' + backend.name + ' backend stores arrays as text, nothing to migrate')
+        return migrated
+
+    for table, (id_field, columns) in array_columns.items():
+        for column in columns:
+            # Selecting only the rows that still hold text
+            sql = (
+                'SELECT %s, %s '
+                'FROM [%s] '
+                'WHERE typeof(%s) = \'text\';'
+            ) % (id_field, column, table, column)
+            result = backend.fetchall(sql)
+
+            # Rewriting all the rows of this column in one transaction
+            updates = [(EncodeArray(ParseArray(row[1])), row[0]) for row in result]
+            sql = (
+                'UPDATE [%s] '
+                'SET %s = ? '
+                'WHERE %s = ?;'
+            ) % (table, column, id_field)
+            if updates != []:
+                backend.executemany(sql, updates)
+                migrated = migrated + len(updates)
+                print('Migrated ' + str(len(updates)) + ' ' + table + ' ' + column + ' values')
+
+    # Cached results still hold the old text values
+    query_cache.invalidate()
+    return migrated
+
+
 def CreateTempInterconnectData(freq, CC, dNeff, coupler_ID, waveguide_ID, folder):
     """
     Create temporary datafiles for Interconnect to load into the components forming the ring.
@@ -865,7 +1486,8 @@ def CreateTempInterconnectData(freq, CC, dNeff, coupler_ID, waveguide_ID, folder
     """
     # Saving current working directory and defining path to folder
     cwd = os.getcwd()
-    path = cwd + "\\Database\\" + folder
+    path = os.path.join(cwd, 'Database', folder)
+    os.makedirs(path, exist_ok=True)
 
     # Initialize empty list of lines for temporary coupler datafile
     lines_coupler = []
@@ -875,7 +1497,7 @@ def CreateTempInterconnectData(freq, CC, dNeff, coupler_ID, waveguide_ID, folder
         lines_coupler.append(str(freq[ii]) + ' ' + str(CC[ii]))
 
     # Creating temporary coupler datafile
-    with open(path + '\\coupler_' + str(coupler_ID) + '.txt', 'w') as f:
+    with open(os.path.join(path, 'coupler_' + str(coupler_ID) + '.txt'), 'w') as f:
         for line in lines_coupler:
             f.write(line)
             f.write('\n')
@@ -889,7 +1511,7 @@ def CreateTempInterconnectData(freq, CC, dNeff, coupler_ID, waveguide_ID, folder
                                str(dNeff[1][ii]) + ' ' + str(dNeff[2][ii]))
 
     # Creating temporary waveguide datafile
-    with open(path + '\\waveguide_' + str(waveguide_ID) + '.txt', 'w') as f:
+    with open(os.path.join(path, 'waveguide_' + str(waveguide_ID) + '.txt'), 'w') as f:
         for line in lines_waveguide:
             f.write(line)
             f.write('\n')
@@ -924,227 +1546,194 @@ def DestroyTempInterconnectData(coupler_ID, waveguide_ID, transmission_ID, folde
     cwd = os.getcwd()
 
     # Cleaning up all temporary files
-    if os.path.exists(cwd + "\\Database\\" + folder + "\\coupler_" + str(coupler_ID) + '.txt'):
-        os.remove(cwd + "\\Database\\" + folder + "\\coupler_" + str(coupler_ID) + '.txt')
-    if os.path.exists((cwd + "\\Database\\" + folder + "\\waveguide_"
-                       + str(waveguide_ID) + '.txt')):
-        os.remove((cwd + "\\Database\\" + folder + "\\waveguide_"
-                   + str(waveguide_ID) + '.txt'))
-    if os.path.exists((cwd + "\\Database\\" + folder + "\\" + filename + '_'
-                       + str(transmission_ID) + '.icp')):
-        os.remove(cwd + "\\Database\\" + folder + "\\" + filename + '_' +
-                  str(transmission_ID) + '.icp')
-    if os.path.exists((cwd + "\\Database\\" + folder + "\\" + filename + '_'
-                       + str(transmission_ID) + '.ich')):
-        os.remove(cwd + "\\Database\\" + folder + "\\" + filename + '_' +
-                  str(transmission_ID) + '.ich')
+    path = os.path.join(cwd, 'Database', folder)
+    for name in ['coupler_' + str(coupler_ID) + '.txt', 'waveguide_' + str(waveguide_ID) + '.txt',
+                 filename + '_' + str(transmission_ID) + '.icp',
+                 filename + '_' + str(transmission_ID) + '.ich']:
+        if os.path.exists(os.path.join(path, name)):
+            os.remove(os.path.join(path, name))
 
     # If folder is transmission, remove the sweep results
     if folder == 'Transmission':
         # Deleting voltage sweep folder to save space and keep database clean
-        sweepfolder = cwd + "\\Database\\" + folder + "\\" + filename + '_' + \
-            str(transmission_ID) + '_voltage_sweep'
-        try:
-            shutil.rmtree(sweepfolder)
-        except OSError as e:
-            print("Error: %s - %s." % (e.filename, e.strerror))
+        sweepfolder = os.path.join(path, filename + '_' + str(transmission_ID) + '_voltage_sweep')
+        if os.path.isdir(sweepfolder):
+            try:
+                shutil.rmtree(sweepfolder)
+            except OSError as e:
+                print("Error: %s - %s." % (e.filename, e.strerror))
 
     return
 
 
-def CheckDatabaseIntegrity():
+def CheckDatabaseIntegrity(dry_run=False, verbose=False):
     """
-    Integrity checker than manages the information matching between Access and the folders.
+    Integrity checker than manages the information matching between the database and the folders.
+
+    Every table is read with a single query and every result folder is listed once, the orphans are
+    found as set differences. Files are validated only when they are new or their size or
+    modification time changed since the last run, according to the manifest saved in the Database
+    folder. Invalid files are treated as missing. All record deletions happen in one transaction.
+
+    Parameters
+    ----------
+    dry_run : bool, optional
+        Only report what would be deleted, nothing is changed. The default is False.
+    verbose : bool, optional
+        Print every orphan record and file instead of a summary per table. The default is False.
 
     Returns
     -------
-    None.
+    report : dict
+        Per table counts and lists of 'missing_files', 'orphan_files' and 'invalid_files'.
 
     """
-    def IntegrityCore(name):
-        """
-        Integrity system for core ring simulation.
+    database_path = os.path.join(os.getcwd(), 'Database')
+    manifest_file = os.path.join(database_path, integrity_manifest)
 
-        Parameters
-        ----------
-        name : str
-            Name of result type to inforce integrity on.
+    # Loading manifest of files validated by previous runs
+    manifest = {}
+    if os.path.exists(manifest_file):
+        try:
+            with open(manifest_file, 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            print('Integrity manifest is unreadable, validating every file')
+            manifest = {}
+
+    # Listing all result folders in parallel, the listing is I/O bound
+    with ThreadPoolExecutor(max_workers=len(integrity_checks)) as executor:
+        listings = list(executor.map(
+            lambda check: ListResultFolder(os.path.join(database_path, check[3]), check[4]),
+            integrity_checks))
+
+    report = {}
+    commands = []
+    new_manifest = {}
+    for check, listing in zip(integrity_checks, listings):
+        name, select_sql, delete_sql, directory, filetype, params = check
+
+        # One query per table
+        records = set(row[0] for row in backend.fetchall(select_sql, params))
+
+        # Validating only the files that are new or changed since the last run
+        invalid_files = []
+        for filename, (file, size, mtime) in listing.items():
+            key = directory + '/' + file
+            if manifest.get(key) != [size, mtime]:
+                if not ValidateResultFile(os.path.join(database_path, directory, file), size):
+                    invalid_files.append(file)
+                    continue
+            new_manifest[key] = [size, mtime]
+        for file in invalid_files:
+            del listing[file.split('.')[0]]
+
+        # Set differences between database records and result files
+        missing_files = sorted(records - set(listing))
+        orphan_files = sorted(listing[filename][0] for filename in set(listing) - records)
+        report[name] = {'records': len(records), 'files': len(listing),
+                        'missing_files': missing_files, 'orphan_files': orphan_files,
+                        'invalid_files': invalid_files}
+
+        if missing_files != []:
+            commands.append((delete_sql, [params + (filename,) for filename in missing_files]))
+
+        if verbose:
+            for filename in missing_files:
+                print('Missing ' + name + ' datafile for: ' + filename)
+            for file in orphan_files:
+                print('Missing ' + name + ' database record for: ' + file)
+            for file in invalid_files:
+                print('Invalid ' + name + ' datafile: ' + file)
+        print('%s integrity: %d records, %d files, %d missing datafiles, %d orphan files, '
+              '%d invalid files' % (name, len(records), len(listing), len(missing_files),
+                                    len(orphan_files), len(invalid_files)))
+
+    if dry_run:
+        print('Dry run, nothing was deleted')
+        return report
+
+    # Deleting all records without datafiles in one transaction
+    if commands != []:
+        backend.executebatch(commands)
+        query_cache.invalidate()
+
+    # Deleting datafiles without records, and invalid datafiles whose records were just removed
+    for name, directory in [(check[0], check[3]) for check in integrity_checks]:
+        for file in report[name]['orphan_files'] + report[name]['invalid_files']:
+            try:
+                os.remove(os.path.join(database_path, directory, file))
+            except OSError as e:
+                print("Error: %s - %s." % (e.filename, e.strerror))
+            new_manifest.pop(directory + '/' + file, None)
+
+    # Saving manifest, written to a temporary file first so a crash cannot corrupt it
+    if os.path.isdir(database_path):
+        with open(manifest_file + '.tmp', 'w') as f:
+            json.dump(new_manifest, f)
+        os.replace(manifest_file + '.tmp', manifest_file)
+
+    return report
+
+
+def ListResultFolder(path, filetype):
+    """
+    List the result files of a folder with their size and modification time.
 
-        Returns
-        -------
-        None.
+    Parameters
+    ----------
+    path : str
+        Path to the result folder.
+    filetype : str
+        Extension of the result files.
 
-        """
-        # Pseudo dictionairy to defirentiate different database tables
-        if name == 'Transmission':
-            directory = 'Transmission'
-            filetype = '.mat'
-            file_database_index = 0
-        elif name == 'Waveguide':
-            directory = 'Mode'
-            filetype = '.ldf'
-            file_database_index = 3
-        elif name == 'Charge AMF':
-            directory = 'Charge_AMF'
-            filetype = '.mat'
-            file_database_index = 15
-        elif name == 'Charge AIM':
-            directory = 'Charge_AIM'
-            filetype = '.mat'
-            file_database_index = 15
-        else:
-            return
+    Returns
+    -------
+    listing : dict
+        Maps the filename without extension to (file, size, mtime).
 
-        # Saving current working directory
-        cwd = os.getcwd()
+    """
+    listing = {}
+    if not os.path.isdir(path):
+        return listing
 
-        # Defining generic SQL command to grab table results
-        sql = (
-            'SELECT [%s Table].*'
-            'FROM [%s Table];'
-        ) % (name, name)
-
-        # Executing querry and saving results
-        cursor.execute(sql)
-        result = cursor.fetchall()
-
-        # Iterating through all transmission records and searching for matching file in folders
-        for ii in range(len(result)):
-            filename = result[ii][file_database_index]
-            # Searching folder for following file name
-            if os.path.exists(cwd + "\\Database\\" + directory + "\\" + filename + filetype):
-                print(name + " integrity check 1 passed")
-            else:
-                print("Missing " + name + " datafile for: " + filename)
-                print("Deleting corresponding database record")
-                # Defining delete querry to clean up database
-                sql = (
-                    'DELETE [%s Table].*, [%s Table].Filename '
-                    'FROM [%s Table] '
-                    'WHERE ((([%s Table].Filename)=\'%s\'));'
-                ) % (name, name, name, name, filename)
-                # Executing querry and commiting results
-                cursor.execute(sql)
-                cursor.commit()
-
-        # Now iterating through all files in transmission folder and searching for matching record
-        for root, dirs, files in os.walk(cwd + "\\Database\\" + directory):
-            # Iterating through all files found
-            for file in files:
-                if file.endswith(filetype):
-                    filename = file.split('.')[0]
-                    # Defining querry to search database directory for matching file
-                    sql = (
-                        'SELECT [%s Table].* '
-                        'FROM [%s Table] '
-                        'WHERE ((([%s Table].Filename)=\'%s\'));'
-                    ) % (name, name, name, filename)
-
-                    # Executing querry and fetching results
-                    cursor.execute(sql)
-                    result = cursor.fetchall()
-
-                    # If no matching record is present, delete the files
-                    if result == []:
-                        print("Missing " + name + " database record for: " + file)
-                        print("Deleting corresponding datafile")
-                        os.remove(cwd + "\\Database\\" + directory + "\\" + file)
-                    else:
-                        print(name + " integrity check 2 passed")
-
-    def IntegrityEye(name):
-        """
-        Integrity system for eye diagram simulations.
+    # scandir returns the file attributes with the listing on Windows, no extra stat per file
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.name.endswith(filetype) and entry.is_file():
+                stat = entry.stat()
+                listing[entry.name.split('.')[0]] = (entry.name, stat.st_size, stat.st_mtime_ns)
+    return listing
 
-        Parameters
-        ----------
-        name : str
-            Name of eye type to inforce integrity on.
 
-        Returns
-        -------
-        None.
+def ValidateResultFile(path, size):
+    """
+    Check that a result file is complete enough to be used.
 
-        """
-        # Pseudo dictionairy to defirentiate different database tables
-        directory = name
-        filetype = '.mat'
-        file_database_index = 5
-        if name == 'Eye_NRZ':
-            Eye_type = 'NRZ'
-        elif name == 'Eye_PAM4':
-            Eye_type = 'PAM4'
-        else:
-            return
+    .mat files must start with the MATLAB v5 header or the HDF5 signature used by v7.3 files, other
+    files only need to be non-empty.
 
-        # Saving current working directory
-        cwd = os.getcwd()
+    Parameters
+    ----------
+    path : str
+        Path to the result file.
+    size : int
+        Size of the file in bytes.
 
-        # Defining querry to search for all eye data
-        sql = (
-            'SELECT [Eye Data].* '
-            'FROM [Eye Data] '
-            'WHERE ((([Eye Data].Type)=\'%s\'));'
-        ) % (Eye_type)
-
-        # Executing querry and fetching resultsi
-        cursor.execute(sql)
-        result = cursor.fetchall()
-
-        # Iterating through all transmission records and searching for matching file in folders
-        for ii in range(len(result)):
-            filename = result[ii][file_database_index]
-            # Searching folder for following file name
-            if os.path.exists(cwd + "\\Database\\" + directory + "\\" + filename + filetype):
-                print(name + " integrity check 1 passed")
-            else:
-                print("Missing " + name + " datafile for: " + filename)
-                print("Deleting corresponding database record")
-
-                # Defining querry to delete results from eye table and data table
-                sql = (
-                    'DELETE [Eye Data].*, [Eye Data].Filename '
-                    'FROM [Eye Data] '
-                    'WHERE ((([Eye Data].Filename)=\'%s\'));'
-                ) % (filename)
-
-                # Executing querry and commiting results
-                cursor.execute(sql)
-                cursor.commit()
-
-        # Now iterating through all files in transmission folder and searching for matching record
-        for root, dirs, files in os.walk(cwd + "\\Database\\" + directory):
-            # Iterating through all files found
-            for file in files:
-                if file.endswith(filetype):
-                    # Searching database directory for matching file
-                    filename = file.split('.')[0]
-
-                    # Defining querry to grab all data from eye data table
-                    sql = (
-                        'SELECT [Eye Data].* '
-                        'FROM [Eye Data] '
-                        'WHERE ((([Eye Data].Filename)=\'%s\'));'
-                    ) % (filename)
-
-                    # Executing querry and fetching results
-                    cursor.execute(sql)
-                    result = cursor.fetchall()
-
-                    # If no record is present, then deleete the corresponding data in the folders
-                    if result == []:
-                        print("Missing " + name + " database record for: " + file)
-                        print("Deleting corresponding datafile")
-                        os.remove(cwd + "\\Database\\" + directory + "\\" + file)
-                    else:
-                        print(name + " integrity check 2 passed")
-
-    # Calling integrity scripts to inforce integrity
-    IntegrityCore('Transmission')
-    IntegrityCore('Waveguide')
-    IntegrityCore('Charge AMF')
-    IntegrityCore('Charge AIM')
-    IntegrityEye('Eye_NRZ')
-    IntegrityEye('Eye_PAM4')
+    Returns
+    -------
+    valid : bool
+        True if the file passes the check.
 
-    return
+    """
+    if size == 0:
+        return False
+    if not path.endswith('.mat'):
+        return True
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(8)
+    except OSError:
+        return False
+    valid = header.startswith(b'MATLAB') or header == b'\x89HDF\r\n\x1a\n'
+    return valid
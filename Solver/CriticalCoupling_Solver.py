@@ -7,40 +7,84 @@ This script handles the critical coupling sweep automation
 """
 # Import dependencies
 import math
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import FDTD_SetUp as FDTD
+import lumerical_tools
+import ConnectToDatabase as database
 import numpy as np
 from scipy.interpolate import interp1d
 
 
-def runSweep(parameters, simulation_setup):
+def runSweep(parameters, simulation_setup, max_workers=None):
     """
     Execute coupling region gap sweep in FDTD.
 
+    Gaps already in the database are served inline. The remaining gaps are independent, so they
+    are simulated concurrently, each worker holding one FDTD session from the session pool, and the
+    results are saved by the calling thread as they complete. Gaps sharing a database key are
+    only simulated once.
+
     Parameters
     ----------
     parameters : class
         Physical parameter class containing relevant about the physical parameters of the ring.
     simulation_setup : class
         Simulation class containing relevant information about the simulation settings.
+    max_workers : int, optional
+        Number of concurrent FDTD simulations. The default is None, which uses the FDTD session
+        limit of the session pool, i.e. the number of available licenses.
 
     Returns
     -------
     Coupling_Coefficients : list
-        List of coupling coefficient results for the swept gaps.
+        List of coupling coefficient results for the swept gaps, in the order of parameters.gap.
     coupler_IDs : list
         List of coupler IDs either returned via query or stored after simulation execution.
 
     """
     # Initialize lists
-    Coupling_Coefficients = []
-    coupler_IDs = []
+    Coupling_Coefficients = [None]*len(parameters.gap)
+    coupler_IDs = [None]*len(parameters.gap)
 
-    # Iterate through gaps and run FDTD coupling method that will either query results or simulate
+    # Querying every gap, grouping the missing ones by database key
+    missing = {}
     for ii in range(len(parameters.gap)):
-        Coupling_Coefficient, coupler_ID = FDTD.calculate_coupling_coefficient(
-            parameters, simulation_setup, gap=parameters.gap[ii])
-        Coupling_Coefficients.append(Coupling_Coefficient)
-        coupler_IDs.append(coupler_ID)
+        Coupling_Coefficients[ii], coupler_IDs[ii] = FDTD.query_coupling_coefficient(
+            parameters, simulation_setup, parameters.gap[ii])
+        if coupler_IDs[ii] is None:
+            key = database.ParameterKey(database.coupler_key_fields,
+                                        (parameters.radius, parameters.gap[ii],
+                                         parameters.coupling_length, parameters.slab_height,
+                                         simulation_setup.Band, parameters.wg_height,
+                                         parameters.wg_width))
+            missing.setdefault(key, []).append(ii)
+
+    if missing == {}:
+        return Coupling_Coefficients, coupler_IDs
+
+    # Bounding the workers by the number of FDTD sessions that may be open at the same time
+    if max_workers is None:
+        max_workers = lumerical_tools.session_pool.limit('fdtd')
+    max_workers = max(1, min(max_workers, len(missing)))
+    print("Simulating " + str(len(missing)) + " gaps with " + str(max_workers) + " FDTD sessions")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        for indices in missing.values():
+            future = executor.submit(FDTD.simulate_coupling_coefficient, parameters,
+                                     simulation_setup, parameters.gap[indices[0]])
+            futures[future] = indices
+
+        # Saving results from this thread so the database writes are not concurrent
+        for future in as_completed(futures):
+            indices = futures[future]
+            f, CC = future.result()
+            coupler_ID = FDTD.save_coupling_coefficient(parameters, simulation_setup,
+                                                        parameters.gap[indices[0]], f, CC)
+            for ii in indices:
+                Coupling_Coefficients[ii] = [f, CC]
+                coupler_IDs[ii] = coupler_ID
+
     return Coupling_Coefficients, coupler_IDs
 
 
@@ -65,25 +109,9 @@ def FindOptimalGap(gaps, sweep_results, simulation_setup, power_coupling):
         Gap that will achieve critical coupling.
 
     """
-    # Initialize list for power coupling coefficients
-    power_coupling_coefficients = []
-
-    # Defining speed of light to convert frequency to wavelength
-    c = 299792458
-
-    # Loading optical band and defining central wavelength to achieve critical coupling for
-    band = simulation_setup.Band
-    if band == 'CL':
-        Center_wavl = 1550e-9
-    else:
-        Center_wavl = 1310e-9
-
     # Populate power coupling list with value corresponding closest to the central wavelength
-    for ii in range(len(sweep_results)):
-        frequencies = sweep_results[ii][0]
-        wavelengths = [c/x for x in frequencies]
-        indx = min(range(len(wavelengths)), key=lambda i: abs(wavelengths[i]-Center_wavl))
-        power_coupling_coefficients.append(sweep_results[ii][1][indx])
+    power_coupling_coefficients = [CenterPowerCoupling(sweep_results[ii], simulation_setup)
+                                   for ii in range(len(sweep_results))]
 
     # Setting up interpolation function to get nm resolution for gaps
     f = interp1d(gaps, power_coupling_coefficients, kind='cubic')
@@ -106,6 +134,151 @@ def FindOptimalGap(gaps, sweep_results, simulation_setup, power_coupling):
     return optimal_gap
 
 
+def CenterPowerCoupling(Coupling_Coefficient, simulation_setup):
+    """
+    Return the power coupling at the center wavelength of the optical band.
+
+    Parameters
+    ----------
+    Coupling_Coefficient : list
+        Coupling coefficient result.
+        Index 0 : frequency component
+        Index 1 : Coupling componennt
+    simulation_setup : class
+        Simulation class containing relevant information about the simulation settings.
+
+    Returns
+    -------
+    power_coupling : float
+        Power coupling at the sample closest to the center wavelength.
+
+    """
+    # Defining speed of light to convert frequency to wavelength
+    c = 299792458
+
+    # Loading optical band and defining central wavelength to achieve critical coupling for
+    if simulation_setup.Band == 'CL':
+        Center_wavl = 1550e-9
+    else:
+        Center_wavl = 1310e-9
+
+    wavelengths = c/np.asarray(Coupling_Coefficient[0], dtype=float)
+    indx = int(np.argmin(np.abs(wavelengths - Center_wavl)))
+    power_coupling = float(Coupling_Coefficient[1][indx])
+    return power_coupling
+
+
+def AdaptiveGapSearch(parameters, simulation_setup, power_coupling, gap_min=100e-9,
+                      gap_max=600e-9, gap_tolerance=1e-9, gap_step=50e-9, max_evaluations=10):
+    """
+    Search for the critically coupled gap with as few FDTD simulations as possible.
+
+    Power coupling decreases monotonically with the gap, close to exponentially, so the root of
+    log(kappa/kappa_target) is nearly linear in the gap. The search starts in the middle of the gap
+    range, steps towards the target to bracket the root, then refines with secant steps, falling
+    back to bisection whenever a secant step leaves the bracket. Gaps are snapped to the tolerance
+    grid, so the search stops when a step lands on a gap already simulated, and the final coupler
+    simulation of the automation is served from the database.
+
+    Parameters
+    ----------
+    parameters : class
+        Physical parameter class containing relevant about the physical parameters of the ring.
+    simulation_setup : class
+        Simulation class containing relevant information about the simulation settings.
+    power_coupling : float
+        Theoretically required power coupling i.e. kappa value to achieve critical coupling.
+    gap_min : float, optional
+        Smallest gap considered. The default is 100e-9.
+    gap_max : float, optional
+        Largest gap considered. The default is 600e-9.
+    gap_tolerance : float, optional
+        Resolution of the returned gap. The default is 1e-9.
+    gap_step : float, optional
+        Initial step used to bracket the root. The default is 50e-9.
+    max_evaluations : int, optional
+        Maximum number of coupler evaluations. The default is 10.
+
+    Returns
+    -------
+    optimal_gap : float
+        Gap that will achieve critical coupling, clipped to the gap range.
+    evaluations : list
+        List of (gap, power coupling) pairs evaluated, in order.
+
+    """
+    target = math.log(max(power_coupling, 1e-12))
+    evaluations = []
+    residuals = {}
+
+    def snap(gap):
+        # Clipping to the range and rounding to the tolerance grid
+        gap = min(max(gap, gap_min), gap_max)
+        return round(round(gap/gap_tolerance)*gap_tolerance, 12)
+
+    def evaluate(gap):
+        # Querying the database or simulating the coupler at this gap
+        Coupling_Coefficient, coupler_ID = FDTD.calculate_coupling_coefficient(
+            parameters, simulation_setup, gap=gap)
+        kappa = CenterPowerCoupling(Coupling_Coefficient, simulation_setup)
+        evaluations.append((gap, kappa))
+        residuals[gap] = math.log(max(kappa, 1e-12)) - target
+        print("Gap %.1f nm gives power coupling %.4g, target %.4g"
+              % (gap*1e9, kappa, power_coupling))
+        return residuals[gap]
+
+    # Starting in the middle of the range and stepping towards the target
+    gap_1 = snap((gap_min + gap_max)/2)
+    residual_1 = evaluate(gap_1)
+    if residual_1 > 0:
+        # Too much coupling, the gap has to grow
+        gap_2 = snap(gap_1 + gap_step)
+    else:
+        gap_2 = snap(gap_1 - gap_step)
+
+    while len(evaluations) < max_evaluations and gap_2 not in residuals:
+        residual_2 = evaluate(gap_2)
+        if residual_2 == 0:
+            break
+
+        # Bracket from every evaluation so far, the residual decreases with the gap
+        lower = [gap for gap in residuals if residuals[gap] > 0]
+        upper = [gap for gap in residuals if residuals[gap] < 0]
+        bracketed = lower != [] and upper != []
+
+        # Secant step in log(kappa)
+        if residual_2 != residual_1:
+            gap_new = gap_2 - residual_2*(gap_2 - gap_1)/(residual_2 - residual_1)
+        else:
+            gap_new = None
+
+        if bracketed:
+            gap_lo = max(lower)
+            gap_hi = min(upper)
+            if gap_hi - gap_lo <= gap_tolerance:
+                break
+            if gap_new is None or not gap_lo < gap_new < gap_hi:
+                # Bisection safeguard
+                gap_new = (gap_lo + gap_hi)/2
+        else:
+            # Not bracketed yet, the secant must move the right way or the step doubles
+            direction = 1 if residual_2 > 0 else -1
+            if gap_new is None or (gap_new - gap_2)*direction <= 0:
+                gap_new = gap_2 + direction*2*abs(gap_2 - gap_1)
+            if snap(gap_new) == gap_2:
+                print("Critical coupling lies outside the gap range, using the closest gap")
+                break
+
+        gap_1, residual_1 = gap_2, residual_2
+        gap_2 = snap(gap_new)
+
+    # The evaluated gap closest to the target in log(kappa)
+    optimal_gap = min(residuals, key=lambda gap: abs(residuals[gap]))
+    print("Critical gap found after " + str(len(evaluations)) + " coupler evaluations")
+
+    return optimal_gap, evaluations
+
+
 def EstimateCC_Condition(parameters, simulation_setup, saved_results):
     """
     Estimate required power coupling, i.e. Kappa to achieve critical coupling.
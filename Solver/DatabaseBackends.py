@@ -0,0 +1,593 @@
+"""
+Created on Mon Oct 12 09:14:51 2026.
+
+This script contains the storage adapters used by ConnectToDatabase to talk to the database.
+
+Two backends are provided. The Access backend is the original pyodbc connection to the .accdb
+file and only works on Windows. The SQLite backend uses the standard library, works on every
+platform and creates composite indexes on all the columns used by the lookup queries.
+
+All the queries in ConnectToDatabase are written with bracket quoted names and '?' placeholders,
+which both Access and SQLite understand, so the same SQL is sent to either backend.
+
+@author: AlexTofini
+"""
+
+# Importing relevant packages
+import os
+import platform
+import sqlite3
+import threading
+
+# Folder containing the database files and result folders
+database_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'Database')
+
+# Tables used by the simulation pipeline, columns are listed in the same order as the Access tables
+sqlite_schema = (
+    'CREATE TABLE IF NOT EXISTS [Coupler Table] ('
+    'Coupler_ID INTEGER PRIMARY KEY, Radius REAL, Gap REAL, Coupling_Length REAL, '
+    'Slab_Height REAL, Optical_Band TEXT, Waveguide_Height REAL, Waveguide_Width REAL, '
+    'Frequency BLOB, Coupling_Coefficient BLOB);',
+
+    'CREATE TABLE IF NOT EXISTS [Waveguide Table] ('
+    'Waveguide_ID INTEGER PRIMARY KEY, Charge_ID_AMF INTEGER, Charge_ID_AIM INTEGER, '
+    'Filename TEXT, Voltage BLOB, Real_Neff BLOB, Imag_Neff BLOB, Absorption_Loss BLOB, '
+    'Phase BLOB, Neff REAL, Group_Index REAL);',
+
+    'CREATE TABLE IF NOT EXISTS [Charge AMF Table] ('
+    'Charge_ID INTEGER PRIMARY KEY, Type TEXT, Slab_Height REAL, Waveguide_Height REAL, '
+    'Waveguide_Width REAL, Radius REAL, Coupling_Length REAL, P_Width_Core REAL, '
+    'N_Width_Core REAL, P_Width_Slab REAL, N_Width_Slab REAL, [P+_Width] REAL, [N+_Width] REAL, '
+    '[P++_Width] REAL, [N++_Width] REAL, Filename TEXT, Min_Voltage REAL, Max_Voltage REAL, '
+    'N INTEGER, Bias TEXT, Optical_Band TEXT, Capacitance BLOB, Resistance BLOB, Bandwidth BLOB, '
+    'Doping_Error REAL);',
+
+    'CREATE TABLE IF NOT EXISTS [Charge AIM Table] ('
+    'Charge_ID INTEGER PRIMARY KEY, Type TEXT, Slab_Height REAL, Waveguide_Height REAL, '
+    'Waveguide_Width REAL, Radius REAL, Coupling_Length REAL, P1Al_Width_Core REAL, '
+    'N1Al_Width_Core REAL, P1Al_Width_Slab REAL, N1Al_Width_Slab REAL, P4Al_Width REAL, '
+    'N3Al_Width REAL, P5Al_Width REAL, N5Al_Width REAL, Filename TEXT, Min_Voltage REAL, '
+    'Max_Voltage REAL, N INTEGER, Bias TEXT, Optical_Band TEXT, Capacitance BLOB, Resistance BLOB, '
+    'Bandwidth BLOB, Doping_Error REAL);',
+
+    'CREATE TABLE IF NOT EXISTS [Transmission Table] ('
+    'Waveguide_ID INTEGER, Coupler_ID INTEGER, Transmission_ID INTEGER PRIMARY KEY, '
+    'Filename TEXT, Propagation_Loss REAL, Resonances BLOB, FSRs BLOB, [3dB_Bandwidths] BLOB, '
+    'Q_Factors BLOB, Insertion_Losses BLOB);',
+
+    'CREATE TABLE IF NOT EXISTS [Eye Table] ('
+    'Eye_ID INTEGER PRIMARY KEY, Waveguide_ID INTEGER, Coupler_ID INTEGER, '
+    'Propagation_Loss REAL);',
+
+    'CREATE TABLE IF NOT EXISTS [Eye Data] ('
+    'Eye_ID INTEGER, Laser_Wavelength REAL, Min_Voltage REAL, Max_Voltage REAL, Bitrate REAL, '
+    'Filename TEXT, Type TEXT, SNLC TEXT, Eye_Data_ID INTEGER PRIMARY KEY);',
+
+    'CREATE TABLE IF NOT EXISTS [ID Sequences] ('
+    'Table_Name TEXT PRIMARY KEY, Next_ID INTEGER);',
+)
+
+# Composite indexes matching the WHERE clauses of the lookup queries, the coupler and CHARGE lookups
+# use the Param_Key index created by ensure_key_columns()
+sqlite_indexes = (
+    'CREATE INDEX IF NOT EXISTS Waveguide_Charge_AMF ON [Waveguide Table] (Charge_ID_AMF);',
+    'CREATE INDEX IF NOT EXISTS Waveguide_Charge_AIM ON [Waveguide Table] (Charge_ID_AIM);',
+    'CREATE INDEX IF NOT EXISTS Waveguide_Filename ON [Waveguide Table] (Filename);',
+    'CREATE INDEX IF NOT EXISTS Charge_AMF_Filename ON [Charge AMF Table] (Filename);',
+    'CREATE INDEX IF NOT EXISTS Charge_AIM_Filename ON [Charge AIM Table] (Filename);',
+    'CREATE INDEX IF NOT EXISTS Transmission_Lookup ON [Transmission Table] '
+    '(Waveguide_ID, Coupler_ID, Propagation_Loss);',
+    'CREATE INDEX IF NOT EXISTS Transmission_Filename ON [Transmission Table] (Filename);',
+    'CREATE INDEX IF NOT EXISTS Eye_Lookup ON [Eye Table] '
+    '(Waveguide_ID, Coupler_ID, Propagation_Loss);',
+    'CREATE INDEX IF NOT EXISTS Eye_Data_Lookup ON [Eye Data] '
+    '(Eye_ID, Laser_Wavelength, Min_Voltage, Max_Voltage, Bitrate, Type, SNLC);',
+    'CREATE INDEX IF NOT EXISTS Eye_Data_Filename ON [Eye Data] (Type, Filename);',
+)
+
+# Tables holding a hashed Param_Key column built by ConnectToDatabase.ParameterKey()
+keyed_tables = ('Coupler Table', 'Charge AMF Table', 'Charge AIM Table')
+
+# Columns added to existing databases by ensure_key_columns(), (table, column, Access type), the
+# unbiased effective and group index of the waveguide are Null in older records
+added_columns = (('Waveguide Table', 'Neff', 'DOUBLE'),
+                 ('Waveguide Table', 'Group_Index', 'DOUBLE'))
+
+
+class DatabaseBackend():
+    """
+    A class to represent the storage adapter interface used by ConnectToDatabase.
+
+    ...
+
+    """
+
+    name = ''
+
+    # True if array columns can hold the binary format of ConnectToDatabase.EncodeArray()
+    binary_arrays = False
+
+    def fetchall(self, sql, params=()):
+        """
+        Execute a query and return all matching rows.
+
+        Parameters
+        ----------
+        sql : str
+            SQL command using '?' placeholders.
+        params : tuple, optional
+            Values bound to the placeholders. The default is ().
+
+        Returns
+        -------
+        result : list
+            List of rows returned by the query.
+
+        """
+        raise NotImplementedError
+
+    def execute(self, sql, params=()):
+        """
+        Execute a command that modifies the database and commit it.
+
+        Parameters
+        ----------
+        sql : str
+            SQL command using '?' placeholders.
+        params : tuple, optional
+            Values bound to the placeholders. The default is ().
+
+        Returns
+        -------
+        None.
+
+        """
+        raise NotImplementedError
+
+    def executemany(self, sql, seq_of_params):
+        """
+        Execute the same command for every set of parameters inside a single transaction.
+
+        Parameters
+        ----------
+        sql : str
+            SQL command using '?' placeholders.
+        seq_of_params : list
+            List of parameter tuples bound to the placeholders.
+
+        Returns
+        -------
+        None.
+
+        """
+        raise NotImplementedError
+
+    def executebatch(self, commands):
+        """
+        Execute several commands, each with a list of parameter sets, inside a single transaction.
+
+        Parameters
+        ----------
+        commands : list
+            List of (sql, seq_of_params) pairs.
+
+        Returns
+        -------
+        None.
+
+        """
+        raise NotImplementedError
+
+    def reserve_ids(self, table, field, count):
+        """
+        Atomically reserve a block of consecutive IDs from the sequence of a table.
+
+        The sequence is seeded from the largest ID in the table the first time it is used and never
+        falls behind records written with explicit IDs.
+
+        Parameters
+        ----------
+        table : str
+            Name of the table.
+        field : str
+            Primary key field of the table.
+        count : int
+            Number of IDs to reserve.
+
+        Returns
+        -------
+        firstID : int
+            First ID of the reserved block.
+
+        """
+        raise NotImplementedError
+
+    def ensure_key_columns(self):
+        """
+        Add the indexed Param_Key column to the keyed tables and the added_columns to the tables of
+        databases created before they existed.
+
+        Returns
+        -------
+        None.
+
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Close the connections held by the backend.
+
+        Returns
+        -------
+        None.
+
+        """
+        raise NotImplementedError
+
+
+class AccessBackend(DatabaseBackend):
+    """
+    A class to represent the Microsoft Access storage adapter, only available on Windows.
+
+    ...
+
+    """
+
+    name = 'access'
+
+    def __init__(self, path):
+        """
+        Open the ODBC connection to the Access database.
+
+        Parameters
+        ----------
+            path : str
+                Path to the .accdb file.
+        """
+        # pyodbc is only needed for Access so it is imported here
+        import pyodbc
+
+        cnn_string = (
+            r'Driver={Microsoft Access Driver (*.mdb, *.accdb)};'
+            r'DBQ=' + path + ';'
+        )
+        self.path = path
+        self.cnn = pyodbc.connect(cnn_string)
+        self.cursor = self.cnn.cursor()
+
+        # The Access driver is not thread safe so every call goes through this lock
+        self.lock = threading.Lock()
+
+        # Creating the ID sequence table if it is missing
+        if not self.cursor.tables(table='ID Sequences').fetchall():
+            self.cursor.execute('CREATE TABLE [ID Sequences] '
+                                '(Table_Name TEXT(64) PRIMARY KEY, Next_ID LONG);')
+            self.cnn.commit()
+        self.ensure_key_columns()
+
+    def fetchall(self, sql, params=()):
+        """Execute a query and return all matching rows."""
+        with self.lock:
+            self.cursor.execute(sql, params)
+            return self.cursor.fetchall()
+
+    def execute(self, sql, params=()):
+        """Execute a command that modifies the database and commit it."""
+        with self.lock:
+            self.cursor.execute(sql, params)
+            self.cnn.commit()
+
+    def executemany(self, sql, seq_of_params):
+        """Execute the same command for every set of parameters inside a single transaction."""
+        with self.lock:
+            try:
+                for params in seq_of_params:
+                    self.cursor.execute(sql, params)
+                self.cnn.commit()
+            except Exception:
+                self.cnn.rollback()
+                raise
+
+    def executebatch(self, commands):
+        """Execute several commands inside a single transaction."""
+        with self.lock:
+            try:
+                for sql, seq_of_params in commands:
+                    for params in seq_of_params:
+                        self.cursor.execute(sql, params)
+                self.cnn.commit()
+            except Exception:
+                self.cnn.rollback()
+                raise
+
+    def reserve_ids(self, table, field, count):
+        """Atomically reserve a block of consecutive IDs from the sequence of a table."""
+        with self.lock:
+            try:
+                # Updating first so the sequence row is locked for other Access clients
+                self.cursor.execute('UPDATE [ID Sequences] SET Next_ID = Next_ID + ? '
+                                    'WHERE Table_Name = ?;', (count, table))
+                if self.cursor.rowcount == 0:
+                    self.cursor.execute('INSERT INTO [ID Sequences] (Table_Name, Next_ID) '
+                                        'VALUES (?, ?);', (table, 1 + count))
+                nextID = self.cursor.execute('SELECT Next_ID FROM [ID Sequences] '
+                                             'WHERE Table_Name = ?;', (table,)).fetchone()[0]
+
+                # Moving the sequence past records written with explicit IDs
+                maxID = self.cursor.execute('SELECT MAX(%s) FROM [%s];'
+                                            % (field, table)).fetchone()[0]
+                if maxID is not None and nextID - count <= maxID:
+                    nextID = maxID + 1 + count
+                    self.cursor.execute('UPDATE [ID Sequences] SET Next_ID = ? '
+                                        'WHERE Table_Name = ?;', (nextID, table))
+                self.cnn.commit()
+            except Exception:
+                self.cnn.rollback()
+                raise
+        return nextID - count
+
+    def ensure_key_columns(self):
+        """Add the indexed Param_Key column to the keyed tables and the added_columns."""
+        with self.lock:
+            for table in keyed_tables:
+                if not self.cursor.columns(table=table, column='Param_Key').fetchall():
+                    self.cursor.execute('ALTER TABLE [%s] ADD COLUMN Param_Key TEXT(40);' % table)
+                    self.cursor.execute('CREATE INDEX [%s Param_Key] ON [%s] (Param_Key);'
+                                        % (table, table))
+                    self.cnn.commit()
+            for table, column, kind in added_columns:
+                if not self.cursor.columns(table=table, column=column).fetchall():
+                    self.cursor.execute('ALTER TABLE [%s] ADD COLUMN %s %s;'
+                                        % (table, column, kind))
+                    self.cnn.commit()
+
+    def close(self):
+        """Close the connections held by the backend."""
+        with self.lock:
+            self.cnn.close()
+
+
+class SQLiteBackend(DatabaseBackend):
+    """
+    A class to represent the SQLite storage adapter.
+
+    Every thread gets its own connection so simulation workers do not share a cursor.
+
+    ...
+
+    """
+
+    name = 'sqlite'
+    binary_arrays = True
+
+    def __init__(self, path):
+        """
+        Open the SQLite database and create the tables and indexes if they are missing.
+
+        Parameters
+        ----------
+            path : str
+                Path to the SQLite file, ':memory:' is not supported since every thread would
+                see a different database.
+        """
+        self.path = path
+        self.local = threading.local()
+        self.connections = []
+        self.lock = threading.Lock()
+
+        # Creating tables and lookup indexes
+        cnn = self.connection()
+        with cnn:
+            for sql in sqlite_schema + sqlite_indexes:
+                cnn.execute(sql)
+        self.ensure_key_columns()
+
+    def connection(self):
+        """
+        Return the connection owned by the calling thread, opening it on first use.
+
+        Returns
+        -------
+        cnn : sqlite3.Connection
+            Connection for the calling thread.
+
+        """
+        cnn = getattr(self.local, 'cnn', None)
+        if cnn is None:
+            cnn = sqlite3.connect(self.path, timeout=30)
+            # WAL lets readers work while another worker is writing
+            cnn.execute('PRAGMA journal_mode=WAL;')
+            cnn.execute('PRAGMA synchronous=NORMAL;')
+            self.local.cnn = cnn
+            with self.lock:
+                self.connections.append(cnn)
+        return cnn
+
+    def fetchall(self, sql, params=()):
+        """Execute a query and return all matching rows."""
+        return self.connection().execute(sql, params).fetchall()
+
+    def execute(self, sql, params=()):
+        """Execute a command that modifies the database and commit it."""
+        cnn = self.connection()
+        with cnn:
+            cnn.execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        """Execute the same command for every set of parameters inside a single transaction."""
+        cnn = self.connection()
+        with cnn:
+            cnn.executemany(sql, seq_of_params)
+
+    def executebatch(self, commands):
+        """Execute several commands inside a single transaction."""
+        cnn = self.connection()
+        with cnn:
+            for sql, seq_of_params in commands:
+                cnn.executemany(sql, seq_of_params)
+
+    def reserve_ids(self, table, field, count):
+        """Atomically reserve a block of consecutive IDs from the sequence of a table."""
+        cnn = self.connection()
+
+        # BEGIN IMMEDIATE takes the write lock up front so two workers cannot read the same value
+        cnn.execute('BEGIN IMMEDIATE;')
+        try:
+            row = cnn.execute('SELECT Next_ID FROM [ID Sequences] WHERE Table_Name = ?;',
+                              (table,)).fetchone()
+
+            # MAX on the integer primary key is a single index lookup
+            maxID = cnn.execute('SELECT MAX(%s) FROM [%s];' % (field, table)).fetchone()[0]
+            firstID = 1
+            if row is not None:
+                firstID = row[0]
+            if maxID is not None and firstID <= maxID:
+                firstID = maxID + 1
+
+            cnn.execute('INSERT OR REPLACE INTO [ID Sequences] (Table_Name, Next_ID) '
+                        'VALUES (?, ?);', (table, firstID + count))
+            cnn.commit()
+        except Exception:
+            cnn.rollback()
+            raise
+        return firstID
+
+    def ensure_key_columns(self):
+        """Add the indexed Param_Key column to the keyed tables and the added_columns."""
+        cnn = self.connection()
+        with cnn:
+            for table in keyed_tables:
+                columns = [row[1] for row in cnn.execute('PRAGMA table_info([%s]);' % table)]
+                if 'Param_Key' not in columns:
+                    cnn.execute('ALTER TABLE [%s] ADD COLUMN Param_Key TEXT;' % table)
+                cnn.execute('CREATE INDEX IF NOT EXISTS [%s Param_Key] ON [%s] (Param_Key);'
+                            % (table, table))
+
+            for table, column, kind in added_columns:
+                columns = [row[1] for row in cnn.execute('PRAGMA table_info([%s]);' % table)]
+                if column not in columns:
+                    cnn.execute('ALTER TABLE [%s] ADD COLUMN %s REAL;' % (table, column))
+
+            # Dropping the column lookup indexes replaced by the key index
+            for index in ('Coupler_Lookup', 'Charge_AMF_Lookup', 'Charge_AIM_Lookup'):
+                cnn.execute('DROP INDEX IF EXISTS %s;' % index)
+
+    def close(self):
+        """Close the connections held by the backend."""
+        with self.lock:
+            for cnn in self.connections:
+                cnn.close()
+            self.connections = []
+        self.local = threading.local()
+
+
+class LazyBackend():
+    """
+    A class to represent a storage backend that is only connected on first use.
+
+    Opening the database takes a noticeable time for Access, so the connection is deferred until
+    the first query instead of happening when ConnectToDatabase is imported.
+
+    ...
+
+    """
+
+    def __init__(self, kind=None, path=None):
+        """
+        Construct the accessor without connecting.
+
+        Parameters
+        ----------
+            kind : str, optional
+                Backend type passed to CreateBackend(). The default is None.
+            path : str, optional
+                Database path passed to CreateBackend(). The default is None.
+        """
+        self.kind = kind
+        self.path = path
+        self.backend = None
+        self.lock = threading.Lock()
+
+    def get(self):
+        """
+        Return the connected backend, creating it on first use.
+
+        Returns
+        -------
+        backend : DatabaseBackend
+            Connected storage backend.
+
+        """
+        with self.lock:
+            if self.backend is None:
+                self.backend = CreateBackend(self.kind, self.path)
+        return self.backend
+
+    def connected(self):
+        """
+        Return True if the backend has been created.
+
+        Returns
+        -------
+        connected : bool
+            True once the first query has been made.
+
+        """
+        return self.backend is not None
+
+    def __getattr__(self, name):
+        """Forward attribute access to the backend, connecting on first use."""
+        # Special attributes are looked up by copy and pickle before __init__ has run
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.get(), name)
+
+
+def CreateBackend(kind=None, path=None):
+    """
+    Create the storage backend used by ConnectToDatabase.
+
+    Parameters
+    ----------
+    kind : str, optional
+        Backend type.
+        Options : [access, sqlite]
+        Defaults to the RING_DATABASE_BACKEND environment variable, then to access on Windows and
+        sqlite everywhere else.
+    path : str, optional
+        Path to the database file. Defaults to the RING_DATABASE_PATH environment variable, then to
+        Database.accdb or Database.sqlite inside the Database folder.
+
+    Returns
+    -------
+    backend : DatabaseBackend
+        Connected storage backend.
+
+    """
+    # Determining backend type
+    if kind is None:
+        kind = os.environ.get('RING_DATABASE_BACKEND', '')
+    if kind == '':
+        if platform.system() == 'Windows':
+            kind = 'access'
+        else:
+            kind = 'sqlite'
+    kind = kind.lower()
+
+    # Determining database location
+    if path is None:
+        path = os.environ.get('RING_DATABASE_PATH', None)
+
+    if kind == 'access':
+        if path is None:
+            path = os.path.join(database_dir, 'Database.accdb')
+        backend = AccessBackend(path)
+    elif kind == 'sqlite':
+        if path is None:
+            path = os.path.join(database_dir, 'Database.sqlite')
+        backend = SQLiteBackend(path)
+    else:
+        raise ValueError('Unknown database backend: ' + kind)
+
+    return backend
@@ -0,0 +1,306 @@
+"""
+Created on Sun Oct 18 09:27:15 2026.
+
+This script extracts quantitative metrics from NRZ and PAM4 eye diagrams
+
+Eyes are taken either from the stored .mat eye results or from any amplitude/time arrays, e.g. the
+output of EyeSimulator. Every sample is folded by the bit period into one of a fixed number of time
+slices. The decision thresholds are found by a few Lloyd iterations on the amplitude, and for every
+threshold and slice the eye opening is the gap between the lowest sample above the threshold and the
+highest sample below it. All eyes of a batch are flattened together and reduced with bincount and
+ufunc.at, so ranking hundreds of designs is a single call.
+
+Metrics, per eye:
+    eye_height : smallest inner eye opening at the best sampling slice.
+    eye_width : time over which every eye is open by more than a fraction of the level spacing.
+    extinction_ratio : ratio of the top and bottom level means in dB.
+    OMA : difference of the top and bottom level means.
+    TDECQ : TDECQ-lite in dB, the penalty of the eye compared to an ideal eye with the same OMA at
+        the target symbol error rate. The extra Gaussian noise the eye tolerates is computed at the
+        best slice from the level means and standard deviations, with no reference equalizer.
+
+@author: AlexTofini
+"""
+
+# Importing relevant packages
+import h5py
+import numpy as np
+
+# Q value for the TDECQ target symbol error rate of 4.8e-4
+tdecq_Q = 3.414
+
+# Number of signal levels per eye type
+eye_levels = {'NRZ': 2, 'PAM4': 4}
+
+
+def LoadEye(filename):
+    """
+    Load an eye diagram stored by Interconnect.
+
+    Parameters
+    ----------
+    filename : str
+        Path of the .mat eye result.
+
+    Returns
+    -------
+    amplitude : array
+        Amplitude samples.
+    time : array
+        Time samples in s.
+
+    """
+    with h5py.File(filename, 'r') as data:
+        amplitude = np.squeeze(np.array(data.get('result/amplitude__a.u._')))
+        time = np.squeeze(np.array(data.get('result/time')))
+    return amplitude, time
+
+
+def EyeMetrics(amplitude, time, bitrate, eye_type='NRZ', slices=32, window=0.1, iterations=5,
+               width_fraction=0.1):
+    """
+    Compute the metrics of a batch of eye diagrams.
+
+    Parameters
+    ----------
+    amplitude : array or list
+        Amplitude samples. A single eye is an array of up to two dimensions. A batch is either an
+        array of shape (eyes, traces, samples), e.g. the output of EyeSimulator, or a list of eyes
+        of different sizes, e.g. several stored eyes.
+    time : array or list
+        Time samples in s, same layout as amplitude or broadcasting against it, e.g. one time
+        vector of shape (eyes, samples) for a batch.
+    bitrate : float or array
+        Bitrate of every eye in Gb/s.
+    eye_type : str, optional
+        Eye diagram type.
+        Options: [NRZ, PAM4]. The default is 'NRZ'.
+    slices : int, optional
+        Number of time slices per bit period. The default is 32.
+    window : float, optional
+        Fraction of the bit period around the best slice used for the level statistics.
+        The default is 0.1.
+    iterations : int, optional
+        Number of Lloyd iterations used to place the decision thresholds. The default is 5.
+    width_fraction : float, optional
+        Opening, as a fraction of the level spacing, above which a slice counts towards the eye
+        width. The default is 0.1.
+
+    Returns
+    -------
+    metrics : structured array
+        One record per eye with fields eye_height, eye_width, extinction_ratio, OMA, TDECQ,
+        sampling_phase (best slice as a fraction of the bit period), level_mean and level_std
+        (one value per level, lowest first), eye_heights and eye_widths (one value per
+        threshold, lowest first).
+
+    """
+    L = eye_levels[eye_type]
+    eye, amplitude, time = FlattenEyes(amplitude, time)
+    eyes = int(eye.max()) + 1 if eye.size > 0 else 0
+    bitrate = np.resize(np.asarray(bitrate, dtype=float).ravel(), eyes)
+
+    # Folding by the bit period into time slices
+    phase = np.mod(time*bitrate[eye]*1e9, 1)
+    slice_index = np.minimum((phase*slices).astype(int), slices - 1)
+
+    # Initial level means from the quantiles of every eye, then Lloyd iterations on the thresholds
+    order = np.lexsort((amplitude, eye))
+    counts = np.bincount(eye, minlength=eyes)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    quantiles = (np.arange(L) + 0.5)/L
+    positions = starts[:, np.newaxis] + (quantiles[np.newaxis, :]*(counts[:, np.newaxis] - 1))
+    means = amplitude[order][positions.astype(int)]
+    for ii in range(iterations):
+        thresholds = (means[:, 1:] + means[:, :-1])/2
+        level = LevelIndex(amplitude, thresholds[eye])
+        means = GroupMean(eye*L + level, amplitude, eyes*L, means.ravel()).reshape(eyes, L)
+    thresholds = (means[:, 1:] + means[:, :-1])/2
+
+    # Inner eye opening of every threshold in every slice
+    groups = eyes*slices
+    cell = eye*slices + slice_index
+    gaps = np.empty((eyes, slices, L - 1))
+    for kk in range(L - 1):
+        above = amplitude > thresholds[eye, kk]
+        lowest_above = np.full(groups, np.inf)
+        highest_below = np.full(groups, -np.inf)
+        np.minimum.at(lowest_above, cell[above], amplitude[above])
+        np.maximum.at(highest_below, cell[~above], amplitude[~above])
+        gaps[:, :, kk] = (lowest_above - highest_below).reshape(eyes, slices)
+
+    # Empty slices carry no information
+    gaps[~np.isfinite(gaps)] = np.nan
+    with np.errstate(invalid='ignore'):
+        open_gaps = np.where(gaps > 0, gaps, 0)
+
+    # Best sampling slice, the one with the largest smallest opening
+    best = np.argmax(np.min(open_gaps, axis=2), axis=1)
+    eye_heights = open_gaps[np.arange(eyes), best]
+
+    # The eye counts as open where the opening exceeds a fraction of the level spacing
+    spacing = (means[:, 1:] - means[:, :-1])[:, np.newaxis, :]
+    eye_widths = np.sum(open_gaps > width_fraction*spacing, axis=1)/slices/(bitrate[:, np.newaxis]
+                                                                             * 1e9)
+
+    # Level statistics in a window around the best slice
+    distance = np.abs(np.mod(slice_index - best[eye] + slices/2, slices) - slices/2)
+    near = distance <= max(window*slices/2, 0.5)
+    level = LevelIndex(amplitude[near], thresholds[eye[near]])
+    group = eye[near]*L + level
+    level_mean = GroupMean(group, amplitude[near], eyes*L, means.ravel()).reshape(eyes, L)
+    level_square = GroupMean(group, amplitude[near]**2, eyes*L,
+                             means.ravel()**2).reshape(eyes, L)
+    level_std = np.sqrt(np.maximum(level_square - level_mean**2, 0))
+
+    # Extinction ratio and OMA
+    top = level_mean[:, -1]
+    bottom = level_mean[:, 0]
+    OMA = top - bottom
+    with np.errstate(divide='ignore', invalid='ignore'):
+        extinction_ratio = 10*np.log10(top/bottom)
+
+    # TDECQ-lite, the Gaussian noise each threshold tolerates at the target error rate
+    distances = np.stack([thresholds - level_mean[:, :-1], level_mean[:, 1:] - thresholds], axis=2)
+    sigmas = np.stack([level_std[:, :-1], level_std[:, 1:]], axis=2)
+    tolerated = (distances/tdecq_Q)**2 - sigmas**2
+    sigma_G = np.sqrt(np.maximum(np.min(tolerated, axis=(1, 2)), 0))
+    sigma_ideal = OMA/(2*(L - 1)*tdecq_Q)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        TDECQ = np.where(sigma_G > 0, 10*np.log10(sigma_ideal/sigma_G), np.inf)
+
+    # Filling the structured array
+    metrics = np.zeros(eyes, dtype=MetricsType(L))
+    metrics['eye_height'] = np.min(eye_heights, axis=1)
+    metrics['eye_width'] = np.min(eye_widths, axis=1)
+    metrics['extinction_ratio'] = extinction_ratio
+    metrics['OMA'] = OMA
+    metrics['TDECQ'] = TDECQ
+    metrics['sampling_phase'] = (best + 0.5)/slices
+    metrics['level_mean'] = level_mean
+    metrics['level_std'] = level_std
+    metrics['eye_heights'] = eye_heights
+    metrics['eye_widths'] = eye_widths
+    return metrics
+
+
+def MetricsType(L):
+    """
+    Return the structured array type of the metrics.
+
+    Parameters
+    ----------
+    L : int
+        Number of signal levels.
+
+    Returns
+    -------
+    dtype
+        Structured array type.
+
+    """
+    return np.dtype([
+        ('eye_height', float),
+        ('eye_width', float),
+        ('extinction_ratio', float),
+        ('OMA', float),
+        ('TDECQ', float),
+        ('sampling_phase', float),
+        ('level_mean', float, (L,)),
+        ('level_std', float, (L,)),
+        ('eye_heights', float, (L - 1,)),
+        ('eye_widths', float, (L - 1,)),
+    ])
+
+
+def FlattenEyes(amplitude, time):
+    """
+    Flatten a batch of eyes into one array of samples tagged with their eye index.
+
+    Parameters
+    ----------
+    amplitude : array or list
+        Amplitude samples, see EyeMetrics.
+    time : array or list
+        Time samples, see EyeMetrics.
+
+    Returns
+    -------
+    eye : array
+        Eye index of every sample.
+    amplitude : array
+        Amplitude of every sample.
+    time : array
+        Time of every sample.
+
+    """
+    if isinstance(amplitude, (list, tuple)):
+        if not isinstance(time, (list, tuple)):
+            time = [time]*len(amplitude)
+        pairs = [np.broadcast_arrays(np.asarray(a, dtype=float), np.asarray(t, dtype=float))
+                 for a, t in zip(amplitude, time)]
+        eye = np.concatenate([np.full(a.size, ii) for ii, (a, t) in enumerate(pairs)])
+        amplitude = np.concatenate([a.ravel() for a, t in pairs])
+        time = np.concatenate([t.ravel() for a, t in pairs])
+        return eye, amplitude, time
+
+    amplitude = np.asarray(amplitude, dtype=float)
+    time = np.asarray(time, dtype=float)
+    if amplitude.ndim < 3:
+        # A single eye
+        amplitude, time = np.broadcast_arrays(amplitude, time)
+        amplitude = amplitude.reshape(1, -1)
+        time = time.reshape(1, -1)
+    elif time.ndim == 2:
+        # One time vector per eye, broadcast along the traces
+        time = time[:, np.newaxis, :]
+    amplitude, time = np.broadcast_arrays(amplitude, time)
+    eyes = amplitude.shape[0]
+    eye = np.repeat(np.arange(eyes), amplitude[0].size)
+    return eye, amplitude.ravel(), time.ravel()
+
+
+def LevelIndex(amplitude, thresholds):
+    """
+    Classify samples into signal levels.
+
+    Parameters
+    ----------
+    amplitude : array
+        Amplitude of every sample.
+    thresholds : array
+        Increasing decision thresholds of every sample, shape (samples, levels - 1).
+
+    Returns
+    -------
+    level : array
+        Level index of every sample.
+
+    """
+    return np.sum(amplitude[:, np.newaxis] > thresholds, axis=1)
+
+
+def GroupMean(group, values, groups, default):
+    """
+    Return the mean of values per group, using a default for empty groups.
+
+    Parameters
+    ----------
+    group : array
+        Group index of every value.
+    values : array
+        Values to average.
+    groups : int
+        Number of groups.
+    default : array
+        Value of every group used when it is empty.
+
+    Returns
+    -------
+    mean : array
+        Mean of every group.
+
+    """
+    count = np.bincount(group, minlength=groups)
+    total = np.bincount(group, weights=values, minlength=groups)
+    return np.where(count > 0, total/np.maximum(count, 1), default)
@@ -0,0 +1,315 @@
+"""
+Created on Sat Oct 17 10:36:52 2026.
+
+This script contains a time domain NRZ/PAM4 eye diagram simulator that runs without Interconnect
+
+The drive signal is a PRBS symbol stream (Gray coded pairs of bits for PAM4) held for one bit
+period at the requested voltage levels. It is low pass filtered by the PN junction RC time constant
+taken from the stored CHARGE capacitance and resistance, mapped through the static transmission of
+the ring at the laser wavelength, T(V), and low pass filtered again by the photon lifetime of the
+ring, tau = Q*lambda/(2*pi*c). Both filters are first order and applied in the frequency domain, the
+stream is periodic so the result is the steady state with no start up transient. The output power
+is then folded into one bit period per trace.
+
+Every function works on a batch of operating points at once, all sharing the same symbol stream,
+which is what makes design explorations of hundreds of eyes practical. This is a quasi static model,
+the ring dynamics are reduced to a single time constant, so Interconnect remains the reference for
+final eyes.
+
+@author: AlexTofini
+"""
+
+# Importing relevant packages
+import functools
+import numpy as np
+
+# Defining speed of light
+c = 299792458
+
+# Feedback taps of the PRBS generators, per order
+prbs_taps = {7: (7, 6), 9: (9, 5), 11: (11, 9), 15: (15, 14), 23: (23, 18), 31: (31, 28)}
+
+# PAM4 level of every pair of bits, Gray coded
+pam4_gray = np.array([0, 1, 3, 2])
+
+
+@functools.lru_cache(maxsize=None)
+def PRBS(order=7):
+    """
+    Generate one period of a maximum length PRBS sequence.
+
+    Parameters
+    ----------
+    order : int, optional
+        Order of the generator polynomial.
+        Options: [7, 9, 11, 15, 23, 31]. The default is 7.
+
+    Returns
+    -------
+    bits : array
+        2**order - 1 bits, read only since it is cached.
+
+    """
+    tap_a, tap_b = prbs_taps[order]
+    length = 2**order - 1
+    bits = np.zeros(length + order, dtype=np.uint8)
+    bits[:order] = 1
+
+    # The recurrence b[n] = b[n - a] xor b[n - b] only looks tap_b samples back, so every block
+    # of tap_b samples can be computed at once
+    for start in range(order, length + order, tap_b):
+        stop = min(start + tap_b, length + order)
+        bits[start:stop] = bits[start - tap_a:stop - tap_a] ^ bits[start - tap_b:stop - tap_b]
+
+    bits = bits[order:]
+    bits.flags.writeable = False
+    return bits
+
+
+def SymbolStream(eye_type, sequence_length=256, order=7):
+    """
+    Generate the symbol stream used for the eye diagrams.
+
+    Parameters
+    ----------
+    eye_type : str
+        Eye diagram type.
+        Options: [NRZ, PAM4].
+    sequence_length : int, optional
+        Number of symbols. The default is 256, as in the Interconnect eye scripts.
+    order : int, optional
+        PRBS order. The default is 7.
+
+    Returns
+    -------
+    symbols : array
+        Symbol index of every bit period, 0 to 1 for NRZ and 0 to 3 for PAM4.
+
+    """
+    bits = PRBS(order)
+    if eye_type == 'NRZ':
+        return np.resize(bits, sequence_length).astype(int)
+
+    # Pairs of consecutive bits, the PRBS period is odd so every pair appears
+    pairs = np.resize(bits, 2*sequence_length).reshape(sequence_length, 2).astype(int)
+    return pam4_gray[2*pairs[:, 0] + pairs[:, 1]]
+
+
+def PhotonLifetime(Q, wavelength):
+    """
+    Return the photon lifetime of the ring.
+
+    Parameters
+    ----------
+    Q : float or array
+        Loaded quality factor.
+    wavelength : float or array
+        Resonance wavelength in m.
+
+    Returns
+    -------
+    tau : float or array
+        Photon lifetime in s.
+
+    """
+    return np.asarray(Q, dtype=float)*np.asarray(wavelength, dtype=float)/(2*np.pi*c)
+
+
+def SimulateEyes(voltage, T, wavelength, laser_wavl, voltage_levels, bitrate, tau_RC, tau_photon,
+                 eye_type='NRZ', samples_per_bit=32, sequence_length=256, order=7):
+    """
+    Simulate a batch of eye diagrams.
+
+    Parameters
+    ----------
+    voltage : array
+        Voltages of the transmission sweep, i.e. the rows of T.
+    T : array
+        Transmission in dB, shape (voltage, wavelength).
+    wavelength : array
+        Wavelength samples of T, increasing.
+    laser_wavl : float or array
+        Laser wavelength of every eye, same units as wavelength.
+    voltage_levels : array
+        Drive voltage levels, shape (eyes, 2) for NRZ or (eyes, 4) for PAM4, a single row is
+        shared by every eye.
+    bitrate : float or array
+        Bitrate of every eye in Gb/s.
+    tau_RC : float or array
+        RC time constant of the PN junction in s, 0 disables the filter.
+    tau_photon : float or array
+        Photon lifetime of the ring in s, 0 disables the filter.
+    eye_type : str, optional
+        Eye diagram type.
+        Options: [NRZ, PAM4]. The default is 'NRZ'.
+    samples_per_bit : int, optional
+        Time samples per bit period. The default is 32.
+    sequence_length : int, optional
+        Number of symbols. The default is 256.
+    order : int, optional
+        PRBS order. The default is 7.
+
+    Returns
+    -------
+    amplitude : array
+        Received optical power relative to the laser power, shape (eyes, symbols, samples_per_bit),
+        one trace per bit period, the bit transitions sit at the edges of every trace.
+    time : array
+        Time of every sample within the bit period in s, shape (eyes, samples_per_bit).
+
+    """
+    voltage = np.asarray(voltage, dtype=float)
+    T = np.asarray(T, dtype=float)
+    wavelength = np.asarray(wavelength, dtype=float)
+    voltage_levels = np.atleast_2d(np.asarray(voltage_levels, dtype=float))
+    laser_wavl, bitrate, tau_RC, tau_photon = [
+        np.ravel(x) for x in np.broadcast_arrays(*[np.asarray(x, dtype=float) for x in
+                                                   (laser_wavl, bitrate, tau_RC, tau_photon)])]
+    eyes = max(len(laser_wavl), voltage_levels.shape[0])
+    laser_wavl, bitrate, tau_RC, tau_photon = [np.resize(x, eyes) for x in
+                                               (laser_wavl, bitrate, tau_RC, tau_photon)]
+    voltage_levels = np.broadcast_to(voltage_levels, (eyes, voltage_levels.shape[1]))
+
+    # Drive signal, every symbol held for one bit period
+    symbols = SymbolStream(eye_type, sequence_length, order)
+    drive = np.repeat(voltage_levels[:, symbols], samples_per_bit, axis=1)
+    points = drive.shape[1]
+
+    # Frequencies of the periodic stream, the sample period depends on the bitrate of every eye
+    f = np.fft.rfftfreq(points)[np.newaxis, :]*(bitrate*1e9*samples_per_bit)[:, np.newaxis]
+
+    # PN junction RC filter
+    H_RC = 1/(1 + 2j*np.pi*f*tau_RC[:, np.newaxis])
+    drive = np.fft.irfft(np.fft.rfft(drive, axis=1)*H_RC, points, axis=1)
+
+    # Static transmission vs voltage at the wavelength sample closest to every laser wavelength
+    order_V = np.argsort(voltage)
+    voltage = voltage[order_V]
+    indx = np.clip(np.searchsorted(wavelength, laser_wavl), 1, len(wavelength) - 1)
+    below = np.abs(wavelength[indx - 1] - laser_wavl) <= np.abs(wavelength[indx] - laser_wavl)
+    indx = np.where(below, indx - 1, indx)
+    curve = 10**(T[order_V][:, indx].T/10)
+
+    # Mapping the filtered drive through the transmission curve of every eye
+    drive = np.clip(drive, voltage[0], voltage[-1])
+    segment = np.clip(np.searchsorted(voltage, drive) - 1, 0, len(voltage) - 2)
+    fraction = (drive - voltage[segment])/(voltage[segment + 1] - voltage[segment])
+    left = np.take_along_axis(curve, segment, axis=1)
+    right = np.take_along_axis(curve, segment + 1, axis=1)
+    power = left + fraction*(right - left)
+
+    # Photon lifetime filter of the ring
+    H_photon = 1/(1 + 2j*np.pi*f*tau_photon[:, np.newaxis])
+    power = np.fft.irfft(np.fft.rfft(power, axis=1)*H_photon, points, axis=1)
+
+    # Folding into one trace per bit period
+    amplitude = power.reshape(eyes, len(symbols), samples_per_bit)
+    time = (np.arange(samples_per_bit)/samples_per_bit)[np.newaxis, :]/(bitrate[:, np.newaxis]*1e9)
+    return amplitude, time
+
+
+def SimulateEye(simulation_setup, saved_results, voltage_levels, samples_per_bit=32,
+                sequence_length=256):
+    """
+    Simulate the eye diagram of the current ring, as Interconnect_SetUp.Eye_Diagrams does.
+
+    Parameters
+    ----------
+    simulation_setup : class
+        Simulation class containing relevant information about the simulation settings.
+    saved_results : class
+        Class object containing the transmission, CHARGE and figure of merit results.
+    voltage_levels : list
+        Drive voltage levels, [Vmin, Vmax] for NRZ or [V0, V1, V2, V3] for PAM4.
+    samples_per_bit : int, optional
+        Time samples per bit period. The default is 32.
+    sequence_length : int, optional
+        Number of symbols. The default is 256.
+
+    Returns
+    -------
+    list
+        List containing : [amplitude, time].
+            amplitude : array
+                Received power, shape (symbols, samples_per_bit).
+            time : array
+                Time of every sample within the bit period in s, same shape as amplitude.
+
+    """
+    tau_RC, tau_photon = TimeConstants(simulation_setup, saved_results, voltage_levels)
+    amplitude, time = SimulateEyes(SweepVoltages(saved_results), saved_results.T,
+                                   saved_results.wavelength, simulation_setup.laser_wavl,
+                                   voltage_levels, simulation_setup.bitrate, tau_RC, tau_photon,
+                                   simulation_setup.eye_type, samples_per_bit, sequence_length)
+    return [amplitude[0], np.broadcast_to(time[0], amplitude[0].shape)]
+
+
+def SweepVoltages(saved_results):
+    """
+    Return the voltages of the rows of the stored transmission.
+
+    Parameters
+    ----------
+    saved_results : class
+        Class object containing the transmission and waveguide results.
+
+    Returns
+    -------
+    voltage : array
+        Voltage of every row of saved_results.T.
+
+    """
+    rows = np.shape(saved_results.T)[0]
+    voltage = np.asarray(saved_results.dNeff[0], dtype=float)
+    if len(voltage) != rows:
+        voltage = np.linspace(voltage[0], voltage[-1], rows)
+    return voltage
+
+
+def TimeConstants(simulation_setup, saved_results, voltage_levels):
+    """
+    Derive the RC and photon lifetime time constants of the current ring.
+
+    The RC time constant is the product of the stored capacitance and resistance, both per unit
+    length, at the middle of the voltage swing. The photon lifetime uses the loaded Q of the 0V
+    resonance closest to the laser wavelength.
+
+    Parameters
+    ----------
+    simulation_setup : class
+        Simulation class containing relevant information about the simulation settings.
+    saved_results : class
+        Class object containing the CHARGE and figure of merit results.
+    voltage_levels : list
+        Drive voltage levels.
+
+    Returns
+    -------
+    tau_RC : float
+        RC time constant in s, 0 if no CHARGE results are loaded.
+    tau_photon : float
+        Photon lifetime in s, 0 if no resonance has a measured Q.
+
+    """
+    # RC time constant at the middle of the swing
+    tau_RC = 0.0
+    RC = np.asarray(saved_results.capacitance, dtype=float)*np.asarray(saved_results.resistance,
+                                                                        dtype=float)
+    if RC.size > 0:
+        if RC.size > 1 and len(saved_results.phase_shift) > 0:
+            V = np.asarray(saved_results.phase_shift[0], dtype=float)
+            order = np.argsort(V)
+            tau_RC = float(np.interp(np.mean(voltage_levels), V[order], RC[order]))
+        else:
+            tau_RC = float(RC.ravel()[0])
+
+    # Photon lifetime of the closest resonance
+    tau_photon = 0.0
+    resonances = np.asarray(saved_results.resonances, dtype=float)
+    QFactors = np.asarray(saved_results.QFactors, dtype=float)
+    if resonances.size > 0 and QFactors.size == resonances.size:
+        indx = int(np.argmin(np.abs(resonances - simulation_setup.laser_wavl)))
+        if np.isfinite(QFactors[indx]):
+            tau_photon = float(PhotonLifetime(QFactors[indx], resonances[indx]*1e-9))
+
+    return tau_RC, tau_photon
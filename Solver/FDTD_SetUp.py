@@ -8,6 +8,8 @@ This script sets up the FDTD simulation for the ring coupling region
 
 # Import dependencies
 import lumerical_tools
+import JobQueue
+import Tracing
 import ConnectToDatabase as database
 
 
@@ -37,69 +39,119 @@ def calculate_coupling_coefficient(parameters, simulation_setup, **kwargs):
     # Optional arguement that controls wether the parameter class object is used to build the device
     # or if a gap override is used as a sweep parameter
     gap = kwargs.get('gap', None)
-    if gap is not None:
-        sweep = True
-    else:
-        sweep = False
+    if gap is None:
+        gap = parameters.gap
 
     # Searching for exact file match to start prcoess
-    if sweep:
-        # Gap override is passed from sweep function
-        result = database.QueryCouplers(parameters.radius, gap,
-                                        parameters.coupling_length, parameters.slab_height,
-                                        simulation_setup.Band, parameters.wg_height,
-                                        parameters.wg_width)
-
-        if result != []:
-            # If matching record exists in the database, use that data
-            print("Database contains a coupling record for current ring parameters")
-            coupler_ID = result[0][0]
-            f = database.ParseStringArray(result[0][7])
-            CC = database.ParseStringArray(result[0][8])
-        else:
-            # If no matching record exists in the database, build the FDTD simulation
-            print("Datase does not contain a coupling record for the current ring parameters")
-            print("Executing FDTD simulation")
-
-            # Call LumAPI to build FDTD simulation
-            f, CC = lumerical_tools.run_FDTD(parameters, simulation_setup, gap=gap)
-
-            # Determine the next ID in the coupler table for saving
-            nextID = database.FindNextIndex('Coupler')
-
-            # Now executing append query to  save the data
-            database.WriteToCouplers(nextID, parameters.radius, gap,
-                                     parameters.coupling_length, parameters.slab_height,
-                                     simulation_setup.Band, parameters.wg_height,
-                                     parameters.wg_width, f, CC)
-            coupler_ID = nextID
-
-    if not sweep:
-        # No gap override present so using parameter class object to build entire coupler
-        result = database.QueryCouplers(parameters.radius, parameters.gap,
-                                        parameters.coupling_length, parameters.slab_height,
-                                        simulation_setup.Band, parameters.wg_height,
-                                        parameters.wg_width)
-        if result != []:
-            print("Database contains a coupling record for current ring parameters")
-            coupler_ID = result[0][0]
-            f = database.ParseStringArray(result[0][7])
-            CC = database.ParseStringArray(result[0][8])
-        else:
-            print("Datase does not contain a coupling record for the current ring parameters")
-            print("Executing FDTD simulation")
-            f, CC = lumerical_tools.run_FDTD(parameters, simulation_setup)
-
-            nextID = database.FindNextIndex('Coupler')
-
-            # Now executing append query to  save the data
-            database.WriteToCouplers(nextID, parameters.radius, parameters.gap,
-                                     parameters.coupling_length, parameters.slab_height,
-                                     simulation_setup.Band, parameters.wg_height,
-                                     parameters.wg_width, f, CC)
-            coupler_ID = nextID
-
-    # Combined results into list
-    Coupling_Coefficients = [f, CC]
+    Coupling_Coefficients, coupler_ID = query_coupling_coefficient(parameters, simulation_setup,
+                                                                   gap)
+    Tracing.tracer.cache(coupler_ID is not None)
+    if coupler_ID is None:
+        # If no matching record exists in the database, build the FDTD simulation
+        f, CC = simulate_coupling_coefficient(parameters, simulation_setup, gap)
+        coupler_ID = save_coupling_coefficient(parameters, simulation_setup, gap, f, CC)
+        Coupling_Coefficients = [f, CC]
 
     return Coupling_Coefficients, coupler_ID
+
+
+def query_coupling_coefficient(parameters, simulation_setup, gap):
+    """
+    Query the coupler table for the coupling coefficient of a gap.
+
+    Parameters
+    ----------
+    parameters : class
+        Physical parameter class containing relevant about the physical parameters of the ring.
+    simulation_setup : class
+        Simulation class containing relevant information about the simulation settings.
+    gap : float
+        Gap used for the coupling region.
+
+    Returns
+    -------
+    Coupling_Coefficients : list
+        List containing the frequency and coupling components, None if no record exists.
+    coupler_ID : int
+        Integer ID of the matching record, None if no record exists.
+
+    """
+    result = database.QueryCouplers(parameters.radius, gap,
+                                    parameters.coupling_length, parameters.slab_height,
+                                    simulation_setup.Band, parameters.wg_height,
+                                    parameters.wg_width)
+    if result == []:
+        return None, None
+
+    # If matching record exists in the database, use that data
+    print("Database contains a coupling record for current ring parameters")
+    coupler_ID = result[0][0]
+    f = database.ParseArray(result[0][8])
+    CC = database.ParseArray(result[0][9])
+    return [f, CC], coupler_ID
+
+
+def simulate_coupling_coefficient(parameters, simulation_setup, gap):
+    """
+    Run the FDTD simulation of the coupling region for a gap, nothing is saved.
+
+    Safe to call from several threads, every call takes its own session from the session pool.
+
+    Parameters
+    ----------
+    parameters : class
+        Physical parameter class containing relevant about the physical parameters of the ring.
+    simulation_setup : class
+        Simulation class containing relevant information about the simulation settings.
+    gap : float
+        Gap used for the coupling region.
+
+    Returns
+    -------
+    f : list
+        Frequency result of coupling result.
+    CC : list
+        Power coupling component of coupling result.
+
+    """
+    print("Datase does not contain a coupling record for the current ring parameters")
+    print("Executing FDTD simulation")
+
+    # Submitting the FDTD simulation to the job queue and waiting for its result
+    f, CC = JobQueue.job_queue.run('fdtd', lumerical_tools.run_FDTD, parameters, simulation_setup,
+                                   gap=gap)
+    return f, CC
+
+
+def save_coupling_coefficient(parameters, simulation_setup, gap, f, CC):
+    """
+    Save a coupling coefficient result to the coupler table.
+
+    Parameters
+    ----------
+    parameters : class
+        Physical parameter class containing relevant about the physical parameters of the ring.
+    simulation_setup : class
+        Simulation class containing relevant information about the simulation settings.
+    gap : float
+        Gap used for the coupling region.
+    f : list
+        Frequency result of coupling result.
+    CC : list
+        Power coupling component of coupling result.
+
+    Returns
+    -------
+    coupler_ID : int
+        Integer ID of the new record.
+
+    """
+    # Determine the next ID in the coupler table for saving
+    nextID = database.FindNextIndex('Coupler')
+
+    # Now executing append query to  save the data
+    database.WriteToCouplers(nextID, parameters.radius, gap,
+                             parameters.coupling_length, parameters.slab_height,
+                             simulation_setup.Band, parameters.wg_height,
+                             parameters.wg_width, f, CC)
+    return nextID
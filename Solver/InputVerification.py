@@ -7,6 +7,148 @@ values are appropriate
 @author: AlexTofini
 """
 import os
+from pathlib import Path
+
+# Rules of the design parameters, shared by the GUI checks and the batch runner. Values are in the
+# GUI units, min_allowed tells if the minimum itself is valid and default replaces an empty value
+# or one below the minimum instead of rejecting it
+design_rules = {
+    'radius': {'label': 'Radius', 'units': 'um', 'scale': 1e-6,
+               'min': 5, 'min_allowed': True, 'max': 100, 'default': None},
+    'gap': {'label': 'Gap', 'units': 'nm', 'scale': 1e-9,
+            'min': 0, 'min_allowed': False, 'max': 1000, 'default': None},
+    'slab_height': {'label': 'Slab Height', 'units': 'nm', 'scale': 1e-9,
+                    'min': 0, 'min_allowed': False, 'max': 110, 'default': None},
+    'wg_height': {'label': 'Waveguide Height', 'units': 'nm', 'scale': 1e-9,
+                  'min': 0, 'min_allowed': False, 'max': None, 'default': None},
+    'wg_width': {'label': 'Waveguide Width', 'units': 'nm', 'scale': 1e-9,
+                 'min': 0, 'min_allowed': False, 'max': None, 'default': None},
+    'coupling_length': {'label': 'Coupling Length', 'units': 'um', 'scale': 1e-6,
+                        'min': 0, 'min_allowed': False, 'max': 100, 'default': 0},
+    'prop_loss': {'label': 'Propagation Loss', 'units': 'dB/cm', 'scale': 100,
+                  'min': 0, 'min_allowed': True, 'max': None, 'default': None},
+}
+
+# Wavelength span of every optical band
+# Options: [CL, O]
+band_limits = {'CL': (1500e-9, 1600e-9), 'O': (1260e-9, 1400e-9)}
+
+
+def ValidateDesignValue(name, text):
+    """
+    Check a design parameter against its rules, without any GUI element.
+
+    Parameters
+    ----------
+    name : str
+        Design parameter, key of design_rules.
+    text : str or float
+        Value in the GUI units, as typed by the user or read from a design list.
+
+    Returns
+    -------
+    value : float
+        Parsed value, None if the value is missing or not a number.
+    message : str
+        Reason the value is rejected, '' if it is valid.
+
+    """
+    rule = design_rules[name]
+
+    # Checking if the value is specified
+    if text is None or str(text).strip() == '':
+        if rule['default'] is not None:
+            return rule['default'], ''
+        return None, rule['label'] + ' Not Specified'
+
+    # Attempt to convert value to float
+    try:
+        value = float(text)
+    except ValueError:
+        return None, 'Invalid ' + rule['label']
+
+    # Checking the limits
+    if value < rule['min'] or (value == rule['min'] and not rule['min_allowed']):
+        if rule['default'] is not None:
+            return rule['default'], ''
+        return value, (rule['label'] + ' must be ' + ('>= ' if rule['min_allowed'] else '> ') +
+                       '%g' % rule['min'] + ' ' + rule['units'])
+    if rule['max'] is not None and value > rule['max']:
+        return value, rule['label'] + ' must be <= ' + '%g' % rule['max'] + ' ' + rule['units']
+    return value, ''
+
+
+def ToSI(name, value):
+    """
+    Convert a design parameter from the GUI units to the units of the simulation pipeline.
+
+    Parameters
+    ----------
+    name : str
+        Design parameter, key of design_rules.
+    value : float
+        Value in the GUI units.
+
+    Returns
+    -------
+    float
+        Value in m, or dB/m for the propagation loss, rounded as the database keys.
+
+    """
+    return round(value*design_rules[name]['scale'], 10)
+
+
+def ValidateBand(Band):
+    """
+    Check an optical band and return its wavelength span, without any GUI element.
+
+    Parameters
+    ----------
+    Band : str
+        Optical band.
+        Options: [CL, O].
+
+    Returns
+    -------
+    LambdaStart : float
+        Start wavelength of optical band, None if the band is unknown.
+    LambdaEnd : float
+        End wavelength of optical band, None if the band is unknown.
+    message : str
+        Reason the band is rejected, '' if it is valid.
+
+    """
+    if Band not in band_limits:
+        return None, None, 'Unknown Optical Band ' + str(Band)
+    LambdaStart, LambdaEnd = band_limits[Band]
+    return LambdaStart, LambdaEnd, ''
+
+
+def ValidateChargeFile(path):
+    """
+    Check a CHARGE result file, without any GUI element.
+
+    Parameters
+    ----------
+    path : str
+        Path of the Matlab data file (.mat) of the PN junction.
+
+    Returns
+    -------
+    file : Path
+        Path object of the file.
+    message : str
+        Reason the file is rejected, '' if it is valid.
+
+    """
+    file = Path(path)
+
+    # Check if file is actually a file with a .mat extension
+    if not file.is_file():
+        return file, 'Failed to load CHARGE'
+    if str(file).split('\\')[-1].split('.')[-1] != 'mat':
+        return file, 'Selected file is not a .mat file'
+    return file, ''
 
 
 def CheckRadius(x0, y0, values, graph, radius_text, radius_warning):
@@ -38,64 +180,31 @@ def CheckRadius(x0, y0, values, graph, radius_text, radius_warning):
         Text displayed on graph to denote radius specified by user.
 
     """
-    # Initialize radius value
-    Radius = None
+    # Checking the radius against the design rules
+    Radius, message = ValidateDesignValue('radius', values['-RADIUS-'])
+    if message == '':
+        print("Saving Radius as:" + str(Radius))
 
-    # Attempt to convert value inside radius textbox to float
-    try:
-        # Checking if radius box is not empty
-        if values['-RADIUS-'] != '':
-            # Populating radius
-            Radius = float(values['-RADIUS-'])
-
-            if Radius < 5.0:
-
-                # Updating measurement label to be unknown
-                graph.delete_figure(radius_text)
-                radius_text = graph.DrawText('?? [um]', (x0+120, y0+25),
-                                             color="blue", font=None, angle=0,
-                                             text_location="center")
-
-                # Setting boolean tracker to 1 and removing any warnings
-                bool_radius = 0
-                radius_warning.Update('Warning Message: Radius must be > 5 um', visible=True)
-            elif Radius > 100:
-                # Updating measurement label to be unknown
-                graph.delete_figure(radius_text)
-                radius_text = graph.DrawText('?? [um]', (x0+120, y0+25),
-                                             color="blue", font=None, angle=0,
-                                             text_location="center")
-
-                # Setting boolean tracker to 1 and removing any warnings
-                bool_radius = 0
-                radius_warning.Update('Warning Message: Radius must be <= 100 um', visible=True)
-            else:
-                print("Saving Radius as:" + str(Radius))
-
-                # Removing previous radius measurement and making a new one
-                graph.delete_figure(radius_text)
-                radius_text = graph.DrawText(
-                    str(Radius)+' [um]', (x0+120, y0+25), color="blue",
-                    font=None, angle=0, text_location="center")
-
-                # Setting boolean tracker to 1 and removing any warnings
-                bool_radius = 1
-                radius_warning.Update('Warning Message: ', visible=False)
-        else:
-            # Setting boolean tracker to 0 and adding warning that radius is not specified
-            bool_radius = 0
-            radius_warning.Update('Warning Message: Radius Not Specified', visible=True)
+        # Removing previous radius measurement and making a new one
+        graph.delete_figure(radius_text)
+        radius_text = graph.DrawText(
+            str(Radius)+' [um]', (x0+120, y0+25), color="blue",
+            font=None, angle=0, text_location="center")
 
-    # If convertion to float fails, instruct user to fix error
-    except ValueError:
-        # Boolean tracker set to 0 and adding warning for invalid radius
+        # Setting boolean tracker to 1 and removing any warnings
+        bool_radius = 1
+        radius_warning.Update('Warning Message: ', visible=False)
+    else:
+        # Setting boolean tracker to 0 and adding the warning
         bool_radius = 0
-        radius_warning.Update('Warning Message: Invalid Radius', visible=True)
+        radius_warning.Update('Warning Message: ' + message, visible=True)
 
-        # Updating measurement label to be unknown
-        graph.delete_figure(radius_text)
-        radius_text = graph.DrawText('?? [um]', (x0+120, y0+25),
-                                     color="blue", font=None, angle=0, text_location="center")
+        # Updating measurement label to be unknown if a value was supplied
+        if values['-RADIUS-'] != '':
+            graph.delete_figure(radius_text)
+            radius_text = graph.DrawText('?? [um]', (x0+120, y0+25),
+                                         color="blue", font=None, angle=0,
+                                         text_location="center")
 
     return bool_radius, Radius, radius_text
 
@@ -149,61 +258,31 @@ def CheckGap(x0, y0, values, graph, gap_text, gap_warning, drawing_radius, drawi
         gap_text = graph.DrawText('SWEEPING [nm]', (x0+75, y0-drawing_radius-drawing_gap/2),
                                   color="blue", font=None, angle=0, text_location="center")
     else:
+        # Checking the gap against the design rules
+        Gap, message = ValidateDesignValue('gap', values['-GAP-'])
+        if message == '':
+            print("Saving Gap as:" + str(Gap))
 
-        # Attempt to convert value inside gap textbox to float
-        try:
-            # Checking if gap box is not empty
-            if values['-GAP-'] != '':
-                # Populating gap
-                Gap = float(values['-GAP-'])
-                if Gap <= 0:
-
-                    # Updating measurement label to be unknown
-                    graph.delete_figure(gap_text)
-                    gap_text = graph.DrawText('?? [nm]', (x0+75, y0-drawing_radius-drawing_gap/2),
-                                              color="blue", font=None, angle=0,
-                                              text_location="center")
-
-                    # Setting the boolean tracker to 1 and removing any warnings
-                    bool_gap = 0
-                    gap_warning.Update('Warning Message: Gap must be > 0 nm', visible=True)
-                elif Gap > 1000:
-                    # Updating measurement label to be unknown
-                    graph.delete_figure(gap_text)
-                    gap_text = graph.DrawText('?? [nm]', (x0+75, y0-drawing_radius-drawing_gap/2),
-                                              color="blue", font=None, angle=0,
-                                              text_location="center")
-
-                    # Setting the boolean tracker to 1 and removing any warnings
-                    bool_gap = 0
-                    gap_warning.Update('Warning Message: Gap must be <= 1000 nm', visible=True)
-                else:
-                    print("Saving Gap as:" + str(Gap))
-
-                    # Removing previous gap measurement and making a new one
-                    graph.delete_figure(gap_text)
-                    gap_text = graph.DrawText(str(
-                        Gap)+' [nm]', (x0+75, y0-drawing_radius-drawing_gap/2), color="blue",
-                        font=None, angle=0, text_location="center")
-
-                    # Setting the boolean tracker to 1 and removing any warnings
-                    bool_gap = 1
-                    gap_warning.Update('Warning Message: ', visible=False)
-            else:
-                # Setting boolean tracker to 0 and adding warning that gap is not specified
-                bool_gap = 0
-                gap_warning.Update('Warning Message: Gap Not Specified', visible=True)
+            # Removing previous gap measurement and making a new one
+            graph.delete_figure(gap_text)
+            gap_text = graph.DrawText(str(
+                Gap)+' [nm]', (x0+75, y0-drawing_radius-drawing_gap/2), color="blue",
+                font=None, angle=0, text_location="center")
 
-        # If convertion to float fails, instruct user to fix error
-        except ValueError:
-            # Boolean tracker set to 0 and adding warning for invalid gap
+            # Setting the boolean tracker to 1 and removing any warnings
+            bool_gap = 1
+            gap_warning.Update('Warning Message: ', visible=False)
+        else:
+            # Setting the boolean tracker to 0 and adding the warning
             bool_gap = 0
-            gap_warning.Update('Warning Message: Invalid Gap', visible=True)
+            gap_warning.Update('Warning Message: ' + message, visible=True)
 
-            # Updating measurement label to be unknown
-            graph.delete_figure(gap_text)
-            gap_text = graph.DrawText('?? [nm]', (x0+75, y0-drawing_radius-drawing_gap/2),
-                                      color="blue", font=None, angle=0, text_location="center")
+            # Updating measurement label to be unknown if a value was supplied
+            if values['-GAP-'] != '':
+                graph.delete_figure(gap_text)
+                gap_text = graph.DrawText('?? [nm]', (x0+75, y0-drawing_radius-drawing_gap/2),
+                                          color="blue", font=None, angle=0,
+                                          text_location="center")
 
     return bool_gap, Gap, gap_text
 
@@ -227,41 +306,18 @@ def CheckSlab(values, slab_warning):
         Slab height of waveguide.
 
     """
-    # Initialize slab height
-    slab_height = None
-
-    # Attempt to convert value inside slab height textbox to float
-    try:
-        # Checking if slab heighth box is not empty
-        if values['-SLAB-'] != '':
-            # Populating slab height
-            slab_height = float(values['-SLAB-'])
-
-            if slab_height <= 0:
-                # Boolean tracker set to 0 and add warning for invalid slab height
-                bool_slab = 0
-                slab_warning.Update('Warning Message: Slab Height must be > 0 nm', visible=True)
-            elif slab_height > 110:
-                # Boolean tracker set to 0 and add warning for invalid slab height
-                bool_slab = 0
-                slab_warning.Update('Warning Message: Slab Height must be <= 110 nm', visible=True)
-
-            else:
-                print("Saving slab_height as:" + str(slab_height))
-                # Setting the boolean tracker to 1 and removing any warnings
-                bool_slab = 1
-                slab_warning.Update('Warning Message: ', visible=False)
-
-        else:
-            # Setting boolean tracker to 0 and adding warning that slab height is not specified
-            bool_slab = 0
-            slab_warning.Update('Warning Message: Slab Height Not Specified', visible=True)
-
-    # If convertion to float fails, instruct user to fix error
-    except ValueError:
-        # Boolean tracker set to 0 and add warning for invalid slab height
+    # Checking the slab height against the design rules
+    slab_height, message = ValidateDesignValue('slab_height', values['-SLAB-'])
+    if message == '':
+        print("Saving slab_height as:" + str(slab_height))
+
+        # Setting the boolean tracker to 1 and removing any warnings
+        bool_slab = 1
+        slab_warning.Update('Warning Message: ', visible=False)
+    else:
+        # Boolean tracker set to 0 and add the warning
         bool_slab = 0
-        slab_warning.Update('Warning Message: Invalid Slab Height', visible=True)
+        slab_warning.Update('Warning Message: ' + message, visible=True)
 
     return bool_slab, slab_height
 
@@ -285,39 +341,18 @@ def CheckWaveguideHeight(values, wg_height_warning):
         Wavegyude height.
 
     """
-    # Initialize waveguide height
-    wg_height = None
-
-    # Attempt to convert value inside slab height textbox to float
-    try:
-        # Checking if slab heighth box is not empty
-        if values['-WAVEGUIDE_HEIGHT-'] != '':
-            # Populating slab height
-            wg_height = float(values['-WAVEGUIDE_HEIGHT-'])
-
-            if wg_height <= 0:
-                # Boolean tracker set to 0 and add warning for invalid waveguide height
-                bool_wg_height = 0
-                wg_height_warning.Update(
-                    'Warning Message: Waveguide Height must be > 0 nm', visible=True)
-
-            else:
-                print("Saving wg_height as:" + str(wg_height))
-                # Setting the boolean tracker to 1 and removing any warnings
-                bool_wg_height = 1
-                wg_height_warning.Update('Warning Message: ', visible=False)
-
-        else:
-            # Setting boolean tracker to 0 and adding warning that waveguide height is not specified
-            bool_wg_height = 0
-            wg_height_warning.Update(
-                'Warning Message: Waveguide Height Not Specified', visible=True)
-
-    # If convertion to float fails, instruct user to fix error
-    except ValueError:
-        # Boolean tracker set to 0 and add warning for invalid waveguide height
+    # Checking the waveguide height against the design rules
+    wg_height, message = ValidateDesignValue('wg_height', values['-WAVEGUIDE_HEIGHT-'])
+    if message == '':
+        print("Saving wg_height as:" + str(wg_height))
+
+        # Setting the boolean tracker to 1 and removing any warnings
+        bool_wg_height = 1
+        wg_height_warning.Update('Warning Message: ', visible=False)
+    else:
+        # Boolean tracker set to 0 and add the warning
         bool_wg_height = 0
-        wg_height_warning.Update('Warning Message: Invalid Waveguide Height', visible=True)
+        wg_height_warning.Update('Warning Message: ' + message, visible=True)
 
     return bool_wg_height, wg_height
 
@@ -341,38 +376,18 @@ def CheckWaveguideWidth(values, wg_width_warning):
         Wavegyude height.
 
     """
-    # Initialize waveguide width
-    wg_width = None
-
-    # Attempt to convert value inside slab height textbox to float
-    try:
-        # Checking if slab heighth box is not empty
-        if values['-WAVEGUIDE_WIDTH-'] != '':
-            # Populating slab height
-            wg_width = float(values['-WAVEGUIDE_WIDTH-'])
-
-            if wg_width <= 0:
-                # Boolean tracker set to 0 and add warning for invalid waveguide width
-                bool_wg_width = 0
-                wg_width_warning.Update(
-                    'Warning Message: Waveguide Width must be > 0 nm', visible=True)
-            else:
-                print("Saving wg_width as:" + str(wg_width))
-                # Setting the boolean tracker to 1 and removing any warnings
-                bool_wg_width = 1
-                wg_width_warning.Update('Warning Message: ', visible=False)
-
-        else:
-            # Setting boolean tracker to 0 and adding warning that waveguide width is not specified
-            bool_wg_width = 0
-            wg_width_warning.Update(
-                'Warning Message: Waveguide Width Not Specified', visible=True)
-
-    # If convertion to float fails, instruct user to fix error
-    except ValueError:
-        # Boolean tracker set to 0 and add warning for invalid waveguide width
+    # Checking the waveguide width against the design rules
+    wg_width, message = ValidateDesignValue('wg_width', values['-WAVEGUIDE_WIDTH-'])
+    if message == '':
+        print("Saving wg_width as:" + str(wg_width))
+
+        # Setting the boolean tracker to 1 and removing any warnings
+        bool_wg_width = 1
+        wg_width_warning.Update('Warning Message: ', visible=False)
+    else:
+        # Boolean tracker set to 0 and add the warning
         bool_wg_width = 0
-        wg_width.Update('Warning Message: Invalid Waveguide Width', visible=True)
+        wg_width_warning.Update('Warning Message: ' + message, visible=True)
 
     return bool_wg_width, wg_width
 
@@ -647,19 +662,13 @@ def CheckBand(values):
         Optical band either : [CL, O].
 
     """
-    # Initializing start and end wavelenths i.e. lambda
-    LambdaStart = None
-    LambdaEnd = None
-
     # Checking radio buttons to determine which is selected
+    Band = None
     if values['-CL_BAND-']:
-        LambdaStart = 1500e-9
-        LambdaEnd = 1600e-9
         Band = 'CL'
     if values['-O_BAND-']:
-        LambdaStart = 1260e-9
-        LambdaEnd = 1400e-9
         Band = 'O'
+    LambdaStart, LambdaEnd, message = ValidateBand(Band)
     return LambdaStart, LambdaEnd, Band
 
 
@@ -703,37 +712,19 @@ def CheckPropLoss(values, prop_loss_warning):
         User specified propagation loss.
 
     """
-    # Initializing propagation loss
-    prop_loss = None
-
-    # Attempt to convert value inside propgation loss textbox to float
-    try:
-        # Checking if propagation loss textbox is not empty
-        if values['-PROP_LOSS-'] != '':
-            # Populating propgation loss
-            prop_loss = float(values['-PROP_LOSS-'])*100  # converting to db/m instead of db/cm
-            if prop_loss < 0:
-                # Boolean tracker set to 0 here also and invalid propagation loss warning added
-                bool_prop_loss = 0
-                prop_loss_warning.Update(
-                    'Warning Message: Propagation Loss must be >=0', visible=True)
-            else:
-                print("Saving Propagation loss as:" + str(prop_loss))
-
-                # Setting boolean tracker to 1 and removing any warnings
-                bool_prop_loss = 1
-                prop_loss_warning.Update('Warning Message: ', visible=False)
-        else:
-            # Setting boolean tracker to 0 and adding warning that propagation loss is not specified
-            bool_prop_loss = 0
-            prop_loss_warning.Update(
-                'Warning Message: Propagation Loss Not Specified', visible=True)
-
-    # If convertion to float fails, instruct user to fix error
-    except ValueError:
-        # Boolean tracker set to 0 here also and invalid propagation loss warning added
+    # Checking the propagation loss against the design rules
+    prop_loss, message = ValidateDesignValue('prop_loss', values['-PROP_LOSS-'])
+    if message == '':
+        prop_loss = ToSI('prop_loss', prop_loss)  # converting to db/m instead of db/cm
+        print("Saving Propagation loss as:" + str(prop_loss))
+
+        # Setting boolean tracker to 1 and removing any warnings
+        bool_prop_loss = 1
+        prop_loss_warning.Update('Warning Message: ', visible=False)
+    else:
+        # Boolean tracker set to 0 here also and the warning added
         bool_prop_loss = 0
-        prop_loss_warning.Update('Warning Message: Invalid Propagation Loss', visible=True)
+        prop_loss_warning.Update('Warning Message: ' + message, visible=True)
 
     return bool_prop_loss, prop_loss
 
@@ -1459,27 +1450,16 @@ def CheckChargeFile(values, charge_file_warning, bool_define_charge):
         Matlab data file (.mat) file that corresponds to PN junction data that the user loaded.
 
     """
-    # Import pathlib for file searching
-    from pathlib import Path
-
     # Initialize boolean tracker as default
     bool_load_charge = 0
 
-    # Extract path from dictionairy
-    path = values['-CHARGE_FILE-']
-
-    # Convert path to file
-    file = Path(path)
-
-    # Check if file is actually a file
-    if file.is_file():
-        # Checking if file extension is a .mat file
-        if str(file).split('\\')[-1].split('.')[-1] == 'mat':
-            bool_load_charge = 1
-            charge_file_warning.Update('', visible=False)
-        else:
-            charge_file_warning.Update('Warning Message: Selected file is not a .mat file',
-                                       visible=True)
+    # Checking the path from dictionairy
+    file, message = ValidateChargeFile(values['-CHARGE_FILE-'])
+    if message == '':
+        bool_load_charge = 1
+        charge_file_warning.Update('', visible=False)
+    elif file.is_file():
+        charge_file_warning.Update('Warning Message: ' + message, visible=True)
     else:
         # If user has not recently defined a charge, warn user of no loaded .mat
         if bool_define_charge == 0:
@@ -1670,7 +1650,7 @@ def check_variability_range(values, Variability_Dict):
 
 
 def update_variability(values, Variability_Dict, selected_dimensions,
-                       corner_analysis_warning, desired_dimensions=2):
+                       corner_analysis_warning):
     """
     Update selected variables for variability analysis and return display text.
 
@@ -1682,9 +1662,7 @@ def update_variability(values, Variability_Dict, selected_dimensions,
     Variability_Dict : dict
         Dictionairy containing all variability set up information
     selected_dimensions : int
-        Number of selected dimensions in the variability analysis.
-    desired_dimensions : int [optional]
-        Desired number of dimensions in the variability analysis. Default is 2 for now
+        Number of selected dimensions in the variability analysis, every one needs a range.
 
     Returns
     -------
@@ -1711,7 +1689,7 @@ def update_variability(values, Variability_Dict, selected_dimensions,
                         Displayed.append(key)
                     break
 
-    if len(Displayed) == desired_dimensions:
+    if 0 < len(Displayed) == selected_dimensions:
         bool_corner_analyis_ready = 1
         corner_analysis_warning.Update('', visible=False)
 # =============================================================================
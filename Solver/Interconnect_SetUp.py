@@ -7,12 +7,18 @@ This script sets up the Interconnect simulation for the completed ring transmiss
 """
 # Import dependencies
 import lumerical_tools
+import JobQueue
+import Tracing
 import os
+import copy
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import numpy as np
 import h5py
 import ConnectToDatabase as database
-from scipy.interpolate import interp1d
-from scipy.signal import find_peaks
+import RingEngine
+import ResonanceFOM
+import EyeSimulator
+import EyeAnalysis
 
 
 def Build_Ring(parameters, simulation_setup, charge_setup, saved_results):
@@ -46,9 +52,17 @@ def Build_Ring(parameters, simulation_setup, charge_setup, saved_results):
     transmission_path = '/Database/' + folder
     directory = cwd+transmission_path
 
+    if getattr(simulation_setup, 'ring_engine', 'interconnect') == 'numpy':
+        # The native engine takes milliseconds, so nothing is queried or stored
+        print("Computing ring transmission with the NumPy engine")
+        wavelength, voltage, T = RingEngine.Transmission(parameters, simulation_setup,
+                                                         charge_setup, saved_results)
+        return ExtractTransmissionFOMs(wavelength, T, saved_results)
+
     # Querying transmission table for matching record
     result = database.QueryTransmission(saved_results.waveguide_ID, saved_results.coupler_ID,
                                         simulation_setup.propagation_loss)
+    Tracing.tracer.cache(result != [])
 
     if result != []:
         # If a transmission record exists, use the results instead of simulating
@@ -70,70 +84,33 @@ def Build_Ring(parameters, simulation_setup, charge_setup, saved_results):
                                             saved_results.coupler_ID, saved_results.waveguide_ID,
                                             folder)
 
-        # Running simulation
-        lumerical_tools.run_interconnect(parameters, simulation_setup, charge_setup,
-                                         saved_results, nextID)
+        # Submitting the simulation to the job queue and waiting for its result
+        JobQueue.job_queue.run('interconnect', lumerical_tools.run_interconnect, parameters,
+                               simulation_setup, charge_setup, saved_results, nextID)
 
         # Deleting temporary files
         database.DestroyTempInterconnectData(
             saved_results.coupler_ID, saved_results.waveguide_ID,
             transmission_ID, folder)
+        Tracing.tracer.record(directory + '/' + transmission_file + '.mat')
 
     # Analyzing results and storing in lists
-    data = h5py.File(directory+'/'+transmission_file + '.mat', 'r')
-    raw = data.get('result')
-    raw = np.array(raw)
-    wavelength = data.get('result/wavelength')
-    wavelength = np.array(wavelength)
-    wavelength = np.squeeze(wavelength)
-    voltage = data.get('result/voltage')
-    voltage = np.array(voltage)
-    voltage = np.squeeze(voltage)
-    T = data.get('result/TE_gain__dB_')
-    T = np.array(T)
-    T = np.squeeze(T)
+    with Tracing.tracer.span('parse', 'mat', file=transmission_file):
+        data = h5py.File(directory+'/'+transmission_file + '.mat', 'r')
+        raw = data.get('result')
+        raw = np.array(raw)
+        wavelength = data.get('result/wavelength')
+        wavelength = np.array(wavelength)
+        wavelength = np.squeeze(wavelength)
+        voltage = data.get('result/voltage')
+        voltage = np.array(voltage)
+        voltage = np.squeeze(voltage)
+        T = data.get('result/TE_gain__dB_')
+        T = np.array(T)
+        T = np.squeeze(T)
 
     # Extracting FOMs to display to save to database and display to the user
-
-    # Isolating non biased data, aka 0V
-    non_biased_T = T[0, :]
-    wavelength = wavelength*1e9
-
-    # Solving list of resonances
-    height = 0.01
-    [indx, peaks] = find_peaks(-1*non_biased_T, height)
-    # plt.plot(wavelength[indx], non_biased_T[indx], "x")
-    resonance_array = wavelength[indx]
-    for ii in range(len(resonance_array)):
-        resonance_array[ii] = round(resonance_array[ii], 3)
-    saved_results.resonances = str(resonance_array.tolist())
-
-    # Solving list of FSRs
-    FSR_list = [0] * (len(resonance_array)-1)
-    for i in range(len(FSR_list)):
-        FSR_list[i] = abs(round(resonance_array[i+1]-resonance_array[i], 2))
-
-    saved_results.FSRs = str(FSR_list)
-
-    # Solving list of 3dB bandwidths
-    three_dB_bandwidth = [0] * (len(resonance_array))
-    three_dB_line = [-3]*len(non_biased_T)
-    idx = np.argwhere(np.diff(np.sign(three_dB_line - non_biased_T))).flatten()
-    three_dB_intersections = wavelength[idx]
-    for i in range(int(len(three_dB_intersections)/2)):
-        three_dB_bandwidth[i] = round(
-            np.abs(three_dB_intersections[2*i+1] - three_dB_intersections[2*i]), 3)
-    saved_results.bandwidths_3dB = str(three_dB_bandwidth)
-
-    # Getting quality factors
-    Qfactor = resonance_array/three_dB_bandwidth
-    Qfactor = np.around(Qfactor, decimals=-2)
-    Qfactor = Qfactor.astype(int)
-    saved_results.QFactors = str(Qfactor.tolist())
-
-    # Getting insertion loss Results
-    ILs = np.round(np.array(peaks['peak_heights']), 2)
-    saved_results.InsertionLosses = str(ILs.tolist())
+    [wavelength, T] = ExtractTransmissionFOMs(wavelength, T, saved_results)
 
     # Saving to database if the simulation was executed
     if result == []:
@@ -148,6 +125,44 @@ def Build_Ring(parameters, simulation_setup, charge_setup, saved_results):
     return [wavelength, T]
 
 
+def ExtractTransmissionFOMs(wavelength, T, saved_results, fit=False):
+    """
+    Extract the resonances, FSRs, 3dB bandwidths, Q factors and insertion losses of the spectra.
+
+    The figures of merit of every voltage are stored in saved_results.FOMs, the 0V ones are also
+    stored as the lists saved to the transmission table.
+
+    Parameters
+    ----------
+    wavelength : array
+        Wavelength samples in m.
+    T : array
+        Transmission in dB, shape (voltage, wavelength).
+    saved_results : class
+        Class object where the extracted figures of merit are stored.
+    fit : bool, optional
+        Refine the figures of merit with Lorentzian fits. The default is False.
+
+    Returns
+    -------
+    list
+        List containing : [wavelength, T], the wavelength converted to nm.
+
+    """
+    wavelength = wavelength*1e9
+
+    with Tracing.tracer.span('foms', 'analysis', fit=fit):
+        # Extracting the figures of merit of every voltage at once
+        saved_results.FOMs = ResonanceFOM.ExtractFOMs(wavelength, T, fit=fit)
+
+        # Isolating non biased data, aka 0V
+        [saved_results.resonances, saved_results.FSRs, saved_results.bandwidths_3dB,
+         saved_results.QFactors, saved_results.InsertionLosses] = ResonanceFOM.SummarizeRow(
+             saved_results.FOMs, 0)
+
+    return [wavelength, T]
+
+
 def Eye_Diagrams(parameters, simulation_setup, saved_results):
     """
     Create eye diagram simulations based off user specified values.
@@ -171,6 +186,15 @@ def Eye_Diagrams(parameters, simulation_setup, saved_results):
                 List of time values that form the eye diagram
 
     """
+    if getattr(simulation_setup, 'ring_engine', 'interconnect') == 'numpy':
+        # The native eye simulator takes milliseconds, so nothing is queried or stored
+        print("Computing " + simulation_setup.eye_type + " eye diagram with the NumPy engine")
+        if simulation_setup.eye_type == 'PAM4':
+            voltage_levels = saved_results.NonLinVoltages
+        else:
+            voltage_levels = [simulation_setup.eye_vmin, simulation_setup.eye_vmax]
+        return EyeSimulator.SimulateEye(simulation_setup, saved_results, voltage_levels)
+
     # Saving current working directory
     cwd = os.getcwd()
 
@@ -205,6 +229,7 @@ def Eye_Diagrams(parameters, simulation_setup, saved_results):
                                  simulation_setup.propagation_loss)
         # no need to querry eye data table since we know it is empty
         result = []
+    Tracing.tracer.cache(result != [])
 
     if result != []:
         # If an eye data record is present, use it instead of simulating
@@ -225,13 +250,13 @@ def Eye_Diagrams(parameters, simulation_setup, saved_results):
                                             saved_results.coupler_ID, saved_results.waveguide_ID,
                                             folder)
 
-        # Run corresponding LumAPI simulation script depending on eye type
+        # Submit corresponding LumAPI simulation script depending on eye type to the job queue
         if Eye_type == 'NRZ':
-            lumerical_tools.run_interconnect_EYE_NRZ(
-                parameters, simulation_setup, saved_results, nextID)
+            JobQueue.job_queue.run('interconnect', lumerical_tools.run_interconnect_EYE_NRZ,
+                                   parameters, simulation_setup, saved_results, nextID)
         elif Eye_type == 'PAM4':
-            lumerical_tools.run_interconnect_EYE_PAM4(
-                parameters, simulation_setup, saved_results, nextID)
+            JobQueue.job_queue.run('interconnect', lumerical_tools.run_interconnect_EYE_PAM4,
+                                   parameters, simulation_setup, saved_results, nextID)
 
         # Deleting temporary files
         database.DestroyTempInterconnectData(
@@ -244,21 +269,166 @@ def Eye_Diagrams(parameters, simulation_setup, saved_results):
                                 simulation_setup.eye_vmax, simulation_setup.bitrate,
                                 Eye_file, Eye_type, simulation_setup.staticNonLinCorrec,
                                 Eye_Data_ID)
+        Tracing.tracer.record(data_directory + '/' + Eye_file + '.mat')
 
     # Extract results from .mat file and convert to lists
-    data = h5py.File(data_directory+'/'+Eye_file + '.mat', 'r')
-    raw = data.get('result')
-    raw = np.array(raw)
-    amplitude = data.get('result/amplitude__a.u._')
-    amplitude = np.array(amplitude)
-    amplitude = np.squeeze(amplitude)
-    time = data.get('result/time')
-    time = np.array(time)
-    time = np.squeeze(time)
+    with Tracing.tracer.span('parse', 'mat', file=Eye_file):
+        data = h5py.File(data_directory+'/'+Eye_file + '.mat', 'r')
+        raw = data.get('result')
+        raw = np.array(raw)
+        amplitude = data.get('result/amplitude__a.u._')
+        amplitude = np.array(amplitude)
+        amplitude = np.squeeze(amplitude)
+        time = data.get('result/time')
+        time = np.array(time)
+        time = np.squeeze(time)
 
     return [amplitude, time]
 
 
+def Eye_Atlas(parameters, simulation_setup, saved_results, points, max_workers=None):
+    """
+    Create the eye diagrams of many operating points, yielding them as they complete.
+
+    The eye data table is read once for the whole batch. Points already in the database are
+    yielded first, the missing ones are simulated on a pool of Interconnect sessions and saved by
+    the calling thread as they complete. Points sharing the same settings are only simulated once.
+
+    Parameters
+    ----------
+    parameters : class
+        Physical parameter class containing relevant about the physical parameters of the ring.
+    simulation_setup : class
+        Simulation class containing the settings shared by every point, i.e. eye type, static
+        non-linearity correction, propagation loss and wavelength range.
+    saved_results : class
+        Class object containing previous simulation results from component simulations.
+    points : list
+        List of dicts with keys laser_wavl, eye_vmin, eye_vmax, bitrate and voltage_levels.
+    max_workers : int, optional
+        Number of concurrent Interconnect simulations. The default is None, which uses the
+        Interconnect session limit of the session pool.
+
+    Yields
+    ------
+    index : int
+        Index of the point in points.
+    amplitude : array
+        Eye diagram amplitude.
+    time : array
+        Eye diagram time.
+    cached : bool
+        True if the eye was read from the database.
+
+    """
+    Eye_type = simulation_setup.eye_type
+    SNLC = simulation_setup.staticNonLinCorrec
+
+    def point_setup(point):
+        # Copies of the shared classes holding the settings of one point
+        point_simulation = copy.copy(simulation_setup)
+        point_simulation.laser_wavl = point['laser_wavl']
+        point_simulation.eye_vmin = point['eye_vmin']
+        point_simulation.eye_vmax = point['eye_vmax']
+        point_simulation.bitrate = point['bitrate']
+        point_results = copy.copy(saved_results)
+        point_results.NonLinVoltages = point['voltage_levels']
+        return point_simulation, point_results
+
+    if getattr(simulation_setup, 'ring_engine', 'interconnect') == 'numpy':
+        # The native eye simulator runs the whole batch at once, nothing is stored
+        print("Computing " + str(len(points)) + " " + Eye_type + " eyes with the NumPy engine")
+        tau = np.array([EyeSimulator.TimeConstants(*point_setup(point),
+                                                   point['voltage_levels']) for point in points])
+        amplitude, time = EyeSimulator.SimulateEyes(
+            EyeSimulator.SweepVoltages(saved_results), saved_results.T, saved_results.wavelength,
+            [point['laser_wavl'] for point in points],
+            [point['voltage_levels'] for point in points],
+            [point['bitrate'] for point in points], tau[:, 0], tau[:, 1], Eye_type)
+        for ii in range(len(points)):
+            yield ii, amplitude[ii], np.broadcast_to(time[ii], amplitude[ii].shape), False
+        return
+
+    # Using eye type to determine folder location for saving
+    if Eye_type == 'NRZ':
+        folder = 'Eye_NRZ'
+        run = lumerical_tools.run_interconnect_EYE_NRZ
+    else:
+        folder = 'Eye_PAM4'
+        run = lumerical_tools.run_interconnect_EYE_PAM4
+    data_directory = os.getcwd() + '/Database/' + folder
+
+    # Eye table record shared by every point
+    Eye_result = database.QueryEyeTable(saved_results.waveguide_ID, saved_results.coupler_ID,
+                                        simulation_setup.propagation_loss)
+    if Eye_result != []:
+        Eye_ID = Eye_result[0][0]
+        records = database.QueryEyeDataAll(Eye_ID)
+    else:
+        Eye_ID = database.FindNextIndex('Eye')
+        database.WriteToEyeTable(Eye_ID, saved_results.waveguide_ID, saved_results.coupler_ID,
+                                 simulation_setup.propagation_loss)
+        records = []
+
+    # Matching every point against the stored records in one pass
+    stored = {(row[1], row[2], row[3], row[4], row[6], row[7]): row[5] for row in records}
+    missing = {}
+    for ii, point in enumerate(points):
+        key = (point['laser_wavl'], point['eye_vmin'], point['eye_vmax'], point['bitrate'],
+               Eye_type, SNLC)
+        Tracing.tracer.cache(key in stored)
+        if key in stored:
+            with Tracing.tracer.span('parse', 'mat', file=stored[key]):
+                amplitude, time = EyeAnalysis.LoadEye(data_directory + '/' + stored[key] + '.mat')
+            yield ii, amplitude, time, True
+        else:
+            missing.setdefault(key, []).append(ii)
+
+    if missing == {}:
+        return
+
+    # Reserving one eye data ID per missing point
+    IDs = database.ReserveIDs('Eye_Data', len(missing))
+    if max_workers is None:
+        max_workers = lumerical_tools.session_pool.limit('interconnect')
+    max_workers = max(1, min(max_workers, len(missing)))
+    print("Simulating " + str(len(missing)) + " " + Eye_type + " eyes with " + str(max_workers)
+          + " Interconnect sessions")
+
+    # Temporary files are shared by every simulation, so they live until the whole batch is done
+    database.CreateTempInterconnectData(saved_results.f, saved_results.CC, saved_results.dNeff,
+                                        saved_results.coupler_ID, saved_results.waveguide_ID,
+                                        folder)
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {}
+            for (key, indices), Eye_Data_ID in zip(missing.items(), IDs):
+                point_simulation, point_results = point_setup(points[indices[0]])
+                future = executor.submit(Tracing.tracer.bind(JobQueue.job_queue.run),
+                                         'interconnect', run, parameters, point_simulation,
+                                         point_results, Eye_Data_ID)
+                futures[future] = (key, indices, Eye_Data_ID)
+
+            # Saving results from this thread so the database writes are not concurrent
+            for future in as_completed(futures):
+                key, indices, Eye_Data_ID = futures[future]
+                future.result()
+                Eye_file = 'Eye_' + Eye_type + '_' + str(Eye_Data_ID)
+                database.WriteToEyeData(Eye_ID, key[0], key[1], key[2], key[3], Eye_file,
+                                        Eye_type, SNLC, Eye_Data_ID)
+                Tracing.tracer.record(data_directory + '/' + Eye_file + '.mat')
+                with Tracing.tracer.span('parse', 'mat', file=Eye_file):
+                    amplitude, time = EyeAnalysis.LoadEye(data_directory + '/' + Eye_file
+                                                          + '.mat')
+                for ii in indices:
+                    yield ii, amplitude, time, False
+    finally:
+        # Deleting temporary files
+        for Eye_Data_ID in IDs:
+            database.DestroyTempInterconnectData(saved_results.coupler_ID,
+                                                 saved_results.waveguide_ID, Eye_Data_ID, folder)
+
+
 def PAM4_Voltage(simulation_setup, saved_results, charge_setup):
     """
     Determine voltage levels used in the PAM4 modulation.
@@ -278,8 +448,6 @@ def PAM4_Voltage(simulation_setup, saved_results, charge_setup):
     None.
 
     """
-    # Import depencendies
-
     # The are the requested voltage levels for the eye diagram
     eye_vmin = simulation_setup.eye_vmin
     eye_vmax = simulation_setup.eye_vmax
@@ -307,92 +475,145 @@ def PAM4_Voltage(simulation_setup, saved_results, charge_setup):
         V3 = v_space[3]
     else:
         # Yes correction, use automation algorithm to create non-linear voltages
-        indx = min(range(len(wavelength)), key=lambda i: abs(wavelength[i]-laser))
-        shift_curve = []
-        for ii in range(len(T)):
-            shift_curve.append(T[ii, indx])
-
-        # Interpolating to high res
-        f = interp1d(voltage, shift_curve, kind='linear')
-        voltage_interp = np.linspace(voltage[0], voltage[-1], num=10000, endpoint=True)
-        shift_curve_interp = f(voltage_interp)
-
-        # restricting data within the boundaries of the eye diagram voltages
-        shift_curve_trunc = []
-        voltage_trunc = []
-        for ii in range(len(voltage_interp)):
-            if voltage_interp[ii] >= eye_vmin and voltage_interp[ii] <= eye_vmax:
-                voltage_trunc.append(voltage_interp[ii])
-                shift_curve_trunc.append(shift_curve_interp[ii])
-
-        max_shift = max(shift_curve_trunc)
-        min_shift = min(shift_curve_trunc)
-
-        max_index = shift_curve_trunc.index(max_shift)
-        min_index = shift_curve_trunc.index(min_shift)
-
-        region_of_interest = shift_curve_trunc[min_index:max_index]
-        droped_indices = min_index-1
-
-        shift_levels = np.linspace(min_shift, max_shift, 4)
-
-        # Finding voltage levels
-        voltage_levels = []
-        for ii in range(len(shift_levels)):
-            indx = min(range(len(region_of_interest)), key=lambda j: abs(
-                region_of_interest[j]-shift_levels[ii]))
-            voltage_levels.append(round(voltage_trunc[droped_indices+indx], 3))
-
-        V0 = voltage_levels[0]
-        V1 = voltage_levels[1]
-        V2 = voltage_levels[2]
-        V3 = voltage_levels[3]
-
-        # TODO(REMOVE THIS ) since it is for thesis plotting only
-
-# =============================================================================
-
-# =============================================================================
-#         plt.plot(voltage_interp, shift_curve_interp, label='Transmission @ Laser Wavelength')
-#         plt.xlim([min(voltage), max(voltage)])
-#         #plt.ylim([-27.5, 0])
-#         plt.axvline(x=eye_vmin, color='r', label='Min.Request Eye Voltage')
-#         plt.axvline(x=eye_vmax, color='r', label='Max. Requested Eye Voltage')
-#         plt.xlabel("Voltage [V]", fontsize=14)
-#         plt.ylabel('Transmission [dBm]', fontsize=14)
-#         plt.xticks(fontsize=14)
-#         plt.yticks(fontsize=14)
-#         plt.title("Non-Linearity Visualization (Case 1)", fontsize=14)
-#         for ii in range(len(voltage_levels)):
-#             plt.scatter(voltage_levels[ii], shift_levels[ii], color='k')
-#
-#
-#         for ii in range(len(shift_levels)):
-#             if ii == 0:
-#                 plt.axhline(y=shift_levels[ii], color='k', linestyle='dashed',
-#                             label='Equidistant Transmission Levels')
-#             else:
-#                 plt.axhline(y=shift_levels[ii], color='k', linestyle='dashed',
-#                             label='_nolegend_')
-#         plt.legend(loc='lower right')
-#         plt.savefig('case1.svg')
-#
-#
-#         plt.figure()
-#         for ii in range(len(T)):
-#             plt.plot(wavelength, T[ii, :], label='_nolegend_')
-#         plt.axvline(x=laser, color='r', label='Laser Wavelength')
-#         xrange = 0.25
-#         plt.xlim([laser-xrange/2, laser+xrange/2])
-#         plt.ylim([-40, 0])
-#         plt.xticks(fontsize=14)
-#         plt.yticks(fontsize=14)
-#         plt.title("Transmission Shifts (Case 2)", fontsize=14)
-#         plt.xlabel('Wavelength [um]', fontsize=14)
-#         plt.ylabel("Transmission [dBm]", fontsize=14)
-#         plt.legend(loc = 'lower right')
-#         plt.savefig('case2_laser.svg')
-# =============================================================================
-# =============================================================================
+        [V0, V1, V2, V3] = PAM4_VoltageLevels(voltage, T, wavelength, laser,
+                                              eye_vmin, eye_vmax).tolist()
 
     return [V0, V1, V2, V3]
+
+
+def PAM4_VoltageLevels(voltage, T, wavelength, laser_wavl, eye_vmin, eye_vmax, grid_points=10000):
+    """
+    Determine the statically corrected PAM4 voltage levels for many operating points at once.
+
+    The transmission at the laser wavelength is linear between the CHARGE sweep voltages, so its
+    extrema inside the eye voltage window lie on the sweep voltages or on the window edges. The
+    curve between the minimum and the maximum is made monotonic and inverted exactly at the four
+    equidistant transmission levels, replacing the 10000 point grid search. The exact levels are
+    then placed on the voltage grid of that search, taking the sample before the closest one as it
+    did, so the levels match the previous 3 decimal output.
+
+    Parameters
+    ----------
+    voltage : array
+        Voltages of the CHARGE sweep, i.e. the rows of T.
+    T : array
+        Transmission in dB, shape (voltage, wavelength).
+    wavelength : array
+        Wavelength samples of T, increasing.
+    laser_wavl : float or array
+        Laser wavelength(s), same units as wavelength.
+    eye_vmin : float or array
+        Minimum eye diagram voltage(s).
+    eye_vmax : float or array
+        Maximum eye diagram voltage(s).
+    grid_points : int, optional
+        Number of samples of the legacy voltage grid, None keeps the exact levels. The default is
+        10000.
+
+    Returns
+    -------
+    voltage_levels : array
+        Voltage levels rounded to 3 decimals, shape of the broadcast laser_wavl, eye_vmin and
+        eye_vmax followed by 4, from the lowest to the highest transmission level.
+
+    """
+    voltage = np.asarray(voltage, dtype=float)
+    T = np.asarray(T, dtype=float)
+    wavelength = np.asarray(wavelength, dtype=float)
+    laser_wavl, eye_vmin, eye_vmax = np.broadcast_arrays(np.asarray(laser_wavl, dtype=float),
+                                                         np.asarray(eye_vmin, dtype=float),
+                                                         np.asarray(eye_vmax, dtype=float))
+    shape = laser_wavl.shape
+    laser_wavl = laser_wavl.ravel()
+    cases = len(laser_wavl)
+
+    # Legacy grid, spanning the sweep in its original direction
+    first = float(voltage[0])
+    if grid_points is not None:
+        step = (float(voltage[-1]) - first)/(grid_points - 1)
+
+    # Sorting the sweep by voltage
+    order = np.argsort(voltage)
+    voltage = voltage[order]
+    T = T[order]
+    N = len(voltage)
+
+    # Transmission vs voltage at the wavelength sample closest to every laser wavelength
+    indx = np.clip(np.searchsorted(wavelength, laser_wavl), 1, len(wavelength) - 1)
+    below = np.abs(wavelength[indx - 1] - laser_wavl) <= np.abs(wavelength[indx] - laser_wavl)
+    indx = np.where(below, indx - 1, indx)
+    curve = T[:, indx].T
+
+    # Window limits inside the sweep, and the transmission on them
+    lo = np.clip(np.minimum(eye_vmin, eye_vmax).ravel(), voltage[0], voltage[-1])
+    hi = np.clip(np.maximum(eye_vmin, eye_vmax).ravel(), voltage[0], voltage[-1])
+    rows = np.arange(cases)
+
+    def interpolate(v):
+        # Transmission of every case at v, v has one row per case
+        case = rows.reshape((-1,) + (1,)*(np.ndim(v) - 1))
+        segment = np.clip(np.searchsorted(voltage, v) - 1, 0, N - 2)
+        fraction = (v - voltage[segment])/(voltage[segment + 1] - voltage[segment])
+        return curve[case, segment] + fraction*(curve[case, segment + 1] - curve[case, segment])
+
+    # Knots of the truncated curve, sweep voltages clipped to the window
+    knots = np.clip(voltage[np.newaxis, :], lo[:, np.newaxis], hi[:, np.newaxis])
+    y = np.where(voltage < lo[:, np.newaxis], interpolate(lo)[:, np.newaxis],
+                 np.where(voltage > hi[:, np.newaxis], interpolate(hi)[:, np.newaxis], curve))
+
+    # Orienting every case so the curve runs from its minimum towards its maximum
+    min_index = np.argmin(y, axis=1)
+    max_index = np.argmax(y, axis=1)
+    flip = max_index < min_index
+    knots = np.where(flip[:, np.newaxis], knots[:, ::-1], knots)
+    y = np.where(flip[:, np.newaxis], y[:, ::-1], y)
+    start = np.where(flip, N - 1 - min_index, min_index)
+
+    # Monotonic envelope starting at the minimum
+    y = np.where(np.arange(N)[np.newaxis, :] >= start[:, np.newaxis], y, -np.inf)
+    y = np.maximum.accumulate(y, axis=1)
+    levels = np.linspace(y[rows, start], y[:, -1], 4, axis=1)
+    end = np.argmax(y >= y[:, -1:], axis=1)
+
+    legacy = grid_points is not None and step != 0
+    if legacy:
+        # Grid samples inside the window
+        k_edges = np.stack([(lo - first)/step, (hi - first)/step], axis=1)
+        k_min = np.ceil(np.min(k_edges, axis=1) - 1e-9)[:, np.newaxis]
+        k_max = np.floor(np.max(k_edges, axis=1) + 1e-9)[:, np.newaxis]
+
+        def snap(v, target):
+            # Grid sample next to v whose transmission is closest to target
+            below = np.clip(np.floor((v - first)/step), k_min, k_max)
+            above = np.clip(below + 1, k_min, k_max)
+            error_below = np.abs(interpolate(first + below*step) - target)
+            error_above = np.abs(interpolate(first + above*step) - target)
+            return np.where(error_above < error_below, above, below)
+
+        # Levels spanning the extrema of the grid samples, as the grid search did
+        k_start = snap(knots[rows, start][:, np.newaxis], levels[:, :1])
+        k_end = snap(knots[rows, end][:, np.newaxis], levels[:, -1:])
+        levels = np.linspace(interpolate(first + k_start*step)[:, 0],
+                             interpolate(first + k_end*step)[:, 0], 4, axis=1)
+
+    # Inverting the envelope at every level, j is the first knot reaching the level
+    j = np.sum(y[:, np.newaxis, :] < levels[:, :, np.newaxis], axis=2)
+    j = np.clip(j, start[:, np.newaxis], N - 1)
+    previous = np.maximum(j - 1, start[:, np.newaxis])
+    y_j = np.take_along_axis(y, j, axis=1)
+    y_previous = np.take_along_axis(y, previous, axis=1)
+    v_j = np.take_along_axis(knots, j, axis=1)
+    v_previous = np.take_along_axis(knots, previous, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fraction = np.where(y_j > y_previous, (levels - y_previous)/(y_j - y_previous), 0)
+    voltage_levels = v_previous + fraction*(v_j - v_previous)
+
+    if legacy:
+        # The grid search excluded the maximum sample and returned the sample before the closest
+        k_end = k_end - np.sign(k_end - k_start)
+        k = np.clip(snap(voltage_levels, levels), np.minimum(k_start, k_end),
+                    np.maximum(k_start, k_end))
+        voltage_levels = first + np.clip(k - 1, k_min, k_max)*step
+    voltage_levels = np.round(voltage_levels, 3)
+
+    return voltage_levels.reshape(shape + (4,))
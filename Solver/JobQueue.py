@@ -0,0 +1,587 @@
+"""
+Created on Sun Oct 18 22:31:05 2026.
+
+This script contains the persistent job queue the pipeline submits its solver jobs to
+
+The setup modules submit every FDTD, MODE, CHARGE and Interconnect call as a job and wait for its
+result, instead of calling lumerical_tools directly. Jobs are stored in a local SQLite file, so
+they survive the process:
+
+    - Priorities : queued jobs start by priority class (interactive, normal, batch), then in the
+      order they were submitted.
+    - Concurrency : at most limits[solver] jobs of a solver run at the same time, by default the
+      session limits of lumerical_tools.session_pool.
+    - Timeouts : a job running longer than its timeout has its solver sessions closed, which also
+      ends the hung lumapi call, and counts as a failed attempt.
+    - Retries : a failed attempt is queued again until the job has used its attempts.
+    - Sharing : a job submitted with the key of a queued or running job waits for that job instead
+      of running the solver twice. Finished jobs are never reused, since the files they wrote may
+      be gone, and are deleted job_retention seconds after they finish.
+    - Abandonment : the process running a job and the processes waiting on it keep heartbeats. A
+      running job whose runner stopped beating, or a queued job nobody waits on any more, is marked
+      abandoned instead of being run again, since the database record of a job is written by the
+      process that waits on it. A waiter still alive submits the job again.
+
+Job functions and arguments are pickled, so a job must be a module level function.
+
+Environment variables :
+    RING_JOB_QUEUE : 0 runs the jobs directly in the calling thread, without the queue.
+    RING_JOB_QUEUE_PATH : queue file, default Database/JobQueue.sqlite.
+    RING_JOB_PRIORITY : default priority class of the jobs submitted by the process.
+    RING_JOB_TIMEOUT : default timeout in seconds, 0 for none.
+    RING_JOB_ATTEMPTS : default number of attempts of a job.
+    RING_JOB_RETENTION : seconds a finished job is kept before it is deleted.
+
+@author: AlexTofini
+"""
+
+# Importing relevant packages
+import os
+import time
+import pickle
+import socket
+import hashlib
+import sqlite3
+import importlib
+import threading
+import atexit
+import lumerical_tools
+import Tracing
+from DatabaseBackends import database_dir
+
+# Priority classes, lower values start first
+job_priorities = {'interactive': 0, 'normal': 1, 'batch': 2}
+default_priority = os.environ.get('RING_JOB_PRIORITY', 'normal')
+
+# Jobs are run through the queue unless disabled
+queue_enabled = os.environ.get('RING_JOB_QUEUE', '1') != '0'
+queue_path = os.environ.get('RING_JOB_QUEUE_PATH', os.path.join(database_dir, 'JobQueue.sqlite'))
+
+# Default timeout in seconds and number of attempts of a job
+job_timeout = float(os.environ.get('RING_JOB_TIMEOUT', '0')) or None
+job_attempts = max(1, int(os.environ.get('RING_JOB_ATTEMPTS', '3')))
+
+# Seconds between heartbeats, and without heartbeat after which a job is abandoned
+heartbeat_interval = 5
+heartbeat_timeout = 60
+
+# Seconds a done, failed or abandoned job is kept, its result and error stay readable meanwhile
+job_retention = float(os.environ.get('RING_JOB_RETENTION', '600'))
+
+# Seconds between checks of jobs run by another process
+poll_interval = 1
+
+# Statuses of the jobs a new submission can wait for
+pending_statuses = ('queued', 'running')
+
+# Queue table and lookup indexes
+queue_schema = [
+    'CREATE TABLE IF NOT EXISTS Jobs (Job_ID INTEGER PRIMARY KEY AUTOINCREMENT, Job_Key TEXT, '
+    'Solver TEXT, Priority INTEGER, Status TEXT, Function TEXT, Arguments BLOB, Result BLOB, '
+    'Error TEXT, Attempts INTEGER DEFAULT 0, Max_Attempts INTEGER, Timeout REAL, Owner TEXT, '
+    'Submitted REAL, Started REAL, Finished REAL, Heartbeat REAL, Waited REAL);',
+    'CREATE INDEX IF NOT EXISTS Job_Order ON Jobs (Status, Priority, Job_ID);',
+    'CREATE INDEX IF NOT EXISTS Job_Lookup ON Jobs (Job_Key);',
+]
+
+
+class JobFailed(Exception):
+    """Raised when a job used all its attempts and its last error could not be restored."""
+
+
+class JobAbandoned(JobFailed):
+    """Raised to the waiters of a job abandoned because its runner or waiters stopped beating."""
+
+
+class JobQueue():
+    """
+    A class to represent the persistent queue of solver jobs and its dispatcher.
+
+    The dispatcher is a thread started with the first job. It claims the queued jobs the solver
+    limits allow, runs each in its own thread, enforces the timeouts and beats for its running
+    jobs. Callers block in wait() until their job is done or failed.
+
+    ...
+
+    """
+
+    def __init__(self, path, limits=None):
+        """
+        Construct the queue, the file is opened and its table created on first use.
+
+        Parameters
+        ----------
+            path : str
+                Path to the SQLite queue file.
+            limits : dict, optional
+                Maximum number of running jobs per solver. The default is None, which follows the
+                session limits of lumerical_tools.session_pool.
+        """
+        self.path = path
+        self.limits = limits
+        self.owner = socket.gethostname() + ':' + str(os.getpid())
+        self.local = threading.local()
+        self.condition = threading.Condition()
+        self.running = {}
+        self.contexts = {}
+        self.finished = set()
+        self.dispatcher = None
+        self.stopped = False
+        self.ready = False
+        self.lock = threading.Lock()
+
+    def connection(self):
+        """
+        Return the connection owned by the calling thread, opening it on first use.
+
+        Returns
+        -------
+        cnn : sqlite3.Connection
+            Connection for the calling thread.
+
+        """
+        cnn = getattr(self.local, 'cnn', None)
+        if cnn is None:
+            cnn = sqlite3.connect(self.path, timeout=30)
+            cnn.execute('PRAGMA journal_mode=WAL;')
+            self.local.cnn = cnn
+
+            # Creating the table and indexes with the first connection, queue files created
+            # before the waiter heartbeat get its column
+            with self.lock:
+                if not self.ready:
+                    with cnn:
+                        for sql in queue_schema:
+                            cnn.execute(sql)
+                        columns = [row[1] for row in cnn.execute('PRAGMA table_info(Jobs);')]
+                        if 'Waited' not in columns:
+                            cnn.execute('ALTER TABLE Jobs ADD COLUMN Waited REAL;')
+                    self.ready = True
+        return cnn
+
+    def limit(self, solver):
+        """
+        Return the maximum number of running jobs of a solver.
+
+        Parameters
+        ----------
+        solver : str
+            Solver type.
+
+        Returns
+        -------
+        limit : int
+            Maximum number of running jobs.
+
+        """
+        if self.limits is None:
+            return lumerical_tools.session_pool.limit(solver)
+        return max(1, self.limits.get(solver, 1))
+
+    def submit(self, solver, function, *args, priority=None, timeout=None, attempts=None,
+               key=None, **kwargs):
+        """
+        Add a job to the queue, unless a job with the same key is queued or running.
+
+        Parameters
+        ----------
+        solver : str
+            Solver type of the job, the one its sessions are counted against.
+            Options : [fdtd, mode, device, interconnect]
+        function : callable
+            Module level function run by the job.
+        *args : any
+            Positional arguments of the function, pickled at submission.
+        priority : str, optional
+            Priority class, key of job_priorities. The default is None, default_priority.
+        timeout : float, optional
+            Wall clock limit of an attempt in seconds. The default is None, job_timeout.
+        attempts : int, optional
+            Maximum number of attempts. The default is None, job_attempts.
+        key : str, optional
+            Identity of the job. The default is None, which hashes the function and arguments.
+        **kwargs : any
+            Keyword arguments of the function.
+
+        Returns
+        -------
+        job_ID : int
+            ID of the job in the queue.
+
+        """
+        arguments = pickle.dumps((function.__module__, function.__qualname__, args, kwargs))
+        if key is None:
+            key = hashlib.sha1(arguments).hexdigest()
+        if priority is None:
+            priority = default_priority
+        if timeout is None:
+            timeout = job_timeout
+        if attempts is None:
+            attempts = job_attempts
+
+        # Waiting for a pending job with the same key, finished jobs are not reused since the
+        # files they wrote may have been deleted since
+        cnn = self.connection()
+        now = time.time()
+        with cnn:
+            row = cnn.execute('SELECT Job_ID FROM Jobs WHERE Job_Key = ? AND Status IN (?, ?) '
+                              'ORDER BY Job_ID DESC LIMIT 1;',
+                              (key,) + pending_statuses).fetchone()
+            if row is not None:
+                job_ID = row[0]
+                cnn.execute('UPDATE Jobs SET Waited = ? WHERE Job_ID = ?;', (now, job_ID))
+            else:
+                job_ID = cnn.execute(
+                    'INSERT INTO Jobs (Job_Key, Solver, Priority, Status, Function, Arguments, '
+                    'Max_Attempts, Timeout, Submitted, Waited) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);',
+                    (key, solver, job_priorities[priority], 'queued',
+                     function.__module__ + '.' + function.__qualname__, arguments, attempts,
+                     timeout, now, now)).lastrowid
+
+        # The job is traced as part of the span of its first submitter in this process
+        with self.condition:
+            self.contexts.setdefault(job_ID, Tracing.tracer.context())
+        self.start()
+        with self.condition:
+            self.condition.notify_all()
+        return job_ID
+
+    def wait(self, job_ID):
+        """
+        Wait for a job to complete.
+
+        Parameters
+        ----------
+        job_ID : int
+            ID returned by submit().
+
+        Raises
+        ------
+        Exception
+            The error of the last attempt if the job failed, JobFailed if it cannot be restored or
+            the job was deleted, JobAbandoned if the job was abandoned.
+
+        Returns
+        -------
+        result : any
+            Return value of the job function.
+
+        """
+        cnn = self.connection()
+        while True:
+            row = cnn.execute('SELECT Status, Result, Error FROM Jobs WHERE Job_ID = ?;',
+                              (job_ID,)).fetchone()
+            status, result, error = row if row is not None else ('deleted', None, None)
+            if status not in pending_statuses:
+                with self.condition:
+                    self.contexts.pop(job_ID, None)
+                    self.finished.discard(job_ID)
+            if status == 'deleted':
+                raise JobFailed('Job ' + str(job_ID) + ' was deleted from the queue')
+            if status == 'abandoned':
+                raise JobAbandoned('Job ' + str(job_ID) + ' was abandoned: ' + str(error))
+            if status == 'done':
+                return pickle.loads(result)
+            if status == 'failed':
+                if result is not None:
+                    raise pickle.loads(result)
+                raise JobFailed('Job ' + str(job_ID) + ' failed: ' + str(error))
+
+            # Waiting for this process to finish the job, or polling for another process
+            with self.condition:
+                if job_ID not in self.finished:
+                    self.condition.wait(poll_interval)
+
+    def run(self, solver, function, *args, **kwargs):
+        """
+        Submit a job and wait for its result, see submit() for the arguments.
+
+        A job abandoned while this process waits on it is submitted again, the caller is alive
+        to use its result. With RING_JOB_QUEUE=0 the function is called directly.
+
+        Returns
+        -------
+        result : any
+            Return value of the job function.
+
+        """
+        with Tracing.tracer.span(solver, 'queue', function=function.__qualname__):
+            if not queue_enabled:
+                kwargs = {key: value for key, value in kwargs.items()
+                          if key not in ('priority', 'timeout', 'attempts', 'key')}
+                return function(*args, **kwargs)
+            while True:
+                try:
+                    return self.wait(self.submit(solver, function, *args, **kwargs))
+                except JobAbandoned as e:
+                    print(str(e) + ', submitting it again')
+
+    def start(self):
+        """
+        Start the dispatcher thread if it is not running.
+
+        Returns
+        -------
+        None.
+
+        """
+        with self.condition:
+            if self.dispatcher is None or not self.dispatcher.is_alive():
+                self.stopped = False
+                self.dispatcher = threading.Thread(target=self.dispatch, name='JobQueue',
+                                                   daemon=True)
+                self.dispatcher.start()
+        return
+
+    def stop(self):
+        """
+        Stop the dispatcher, running jobs finish but no job is started.
+
+        Returns
+        -------
+        None.
+
+        """
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+        return
+
+    def dispatch(self):
+        """
+        Dispatcher loop, claiming and starting jobs, enforcing timeouts and beating.
+
+        Returns
+        -------
+        None.
+
+        """
+        cnn = self.connection()
+        last_beat = 0
+        while True:
+            with self.condition:
+                if self.stopped:
+                    return
+            now = time.time()
+
+            # Beating for the jobs run and waited on, abandoning the jobs of stopped processes
+            # and deleting the old finished jobs
+            if now - last_beat >= heartbeat_interval:
+                last_beat = now
+                with self.condition:
+                    running = list(self.running)
+                    waited = list(self.contexts)
+                with cnn:
+                    cnn.executemany('UPDATE Jobs SET Heartbeat = ? WHERE Job_ID = ?;',
+                                    [(now, job_ID) for job_ID in running])
+                    cnn.executemany('UPDATE Jobs SET Waited = ? WHERE Job_ID = ?;',
+                                    [(now, job_ID) for job_ID in waited])
+                    cnn.execute("UPDATE Jobs SET Status = 'abandoned', Owner = NULL, Finished = ?, "
+                                "Error = 'Owner stopped responding' WHERE Status = 'running' AND "
+                                "Heartbeat < ?;", (now, now - heartbeat_timeout))
+                    cnn.execute("UPDATE Jobs SET Status = 'abandoned', Finished = ?, Error = "
+                                "'No process waits on the job' WHERE Status = 'queued' AND "
+                                "Waited < ?;", (now, now - heartbeat_timeout))
+                    cnn.execute("DELETE FROM Jobs WHERE Status NOT IN (?, ?) AND Finished < ?;",
+                                pending_statuses + (now - job_retention,))
+
+            # Killing the jobs past their timeout
+            with self.condition:
+                expired = [(job_ID, job) for job_ID, job in self.running.items()
+                           if job['deadline'] is not None and now > job['deadline']]
+            for job_ID, job in expired:
+                self.timeout(job_ID, job)
+
+            self.claim(cnn, now)
+
+            # Sleeping until a job is submitted or finishes, or the next deadline or heartbeat
+            with self.condition:
+                deadlines = [job['deadline'] for job in self.running.values()
+                             if job['deadline'] is not None]
+                delay = min([heartbeat_interval] + [deadline - time.time()
+                                                    for deadline in deadlines])
+                if not self.stopped:
+                    self.condition.wait(max(0.01, delay))
+
+    def claim(self, cnn, now):
+        """
+        Claim and start the queued jobs allowed by the solver limits, by priority.
+
+        Parameters
+        ----------
+        cnn : sqlite3.Connection
+            Connection of the dispatcher.
+        now : float
+            Current time.
+
+        Returns
+        -------
+        None.
+
+        """
+        with self.condition:
+            counts = {}
+            for job in self.running.values():
+                counts[job['solver']] = counts.get(job['solver'], 0) + 1
+
+        rows = cnn.execute("SELECT Job_ID, Solver, Timeout FROM Jobs WHERE Status = 'queued' "
+                           "ORDER BY Priority, Job_ID;").fetchall()
+        for job_ID, solver, timeout in rows:
+            if counts.get(solver, 0) >= self.limit(solver):
+                continue
+
+            # Claiming atomically, another process may be claiming the same job
+            with cnn:
+                claimed = cnn.execute(
+                    "UPDATE Jobs SET Status = 'running', Owner = ?, Attempts = Attempts + 1, "
+                    "Started = ?, Heartbeat = ? WHERE Job_ID = ? AND Status = 'queued';",
+                    (self.owner, now, now, job_ID)).rowcount
+            if claimed == 0:
+                continue
+            attempt = cnn.execute('SELECT Attempts FROM Jobs WHERE Job_ID = ?;',
+                                  (job_ID,)).fetchone()[0]
+
+            counts[solver] = counts.get(solver, 0) + 1
+            with self.condition:
+                self.finished.discard(job_ID)
+                self.running[job_ID] = {'solver': solver, 'attempt': attempt,
+                                        'deadline': now + timeout if timeout else None}
+            threading.Thread(target=self.execute, args=(job_ID, attempt),
+                             name='Job ' + str(job_ID), daemon=True).start()
+        return
+
+    def execute(self, job_ID, attempt):
+        """
+        Run an attempt of a job and record its outcome.
+
+        Parameters
+        ----------
+        job_ID : int
+            ID of the job.
+        attempt : int
+            Attempt number, the outcome of an attempt that timed out is ignored.
+
+        Returns
+        -------
+        None.
+
+        """
+        cnn = self.connection()
+        arguments = cnn.execute('SELECT Arguments FROM Jobs WHERE Job_ID = ?;',
+                                (job_ID,)).fetchone()[0]
+
+        with self.condition:
+            context = self.contexts.get(job_ID)
+
+        # The sessions opened by the job are registered to it so a timeout can close them
+        lumerical_tools.session_owner.job = (job_ID, attempt)
+        try:
+            module, name, args, kwargs = pickle.loads(arguments)
+            function = importlib.import_module(module)
+            for part in name.split('.'):
+                function = getattr(function, part)
+            with Tracing.tracer.attach(context), Tracing.tracer.span(name, 'job', job=job_ID,
+                                                                       attempt=attempt):
+                result = function(*args, **kwargs)
+        except Exception as e:
+            print('Job ' + str(job_ID) + ' attempt ' + str(attempt) + ' failed: ' + repr(e))
+            self.record(job_ID, attempt, error=e)
+        else:
+            self.record(job_ID, attempt, result=result)
+        finally:
+            lumerical_tools.session_owner.job = None
+        return
+
+    def timeout(self, job_ID, job):
+        """
+        Close the sessions of a job past its timeout and record the failed attempt.
+
+        Parameters
+        ----------
+        job_ID : int
+            ID of the job.
+        job : dict
+            Running job description.
+
+        Returns
+        -------
+        None.
+
+        """
+        print('Job ' + str(job_ID) + ' timed out, closing its ' + job['solver'] + ' sessions')
+        lumerical_tools.session_pool.kill((job_ID, job['attempt']))
+        self.record(job_ID, job['attempt'], error=TimeoutError(
+            'Job ' + str(job_ID) + ' exceeded its timeout'))
+        return
+
+    def record(self, job_ID, attempt, result=None, error=None):
+        """
+        Record the outcome of an attempt, queuing the job again if it failed and has attempts left.
+
+        Parameters
+        ----------
+        job_ID : int
+            ID of the job.
+        attempt : int
+            Attempt number, ignored if it is not the running attempt of the job.
+        result : any, optional
+            Return value of the job function. The default is None.
+        error : Exception, optional
+            Error of the attempt. The default is None, the attempt succeeded.
+
+        Returns
+        -------
+        None.
+
+        """
+        with self.condition:
+            job = self.running.get(job_ID)
+            if job is None or job['attempt'] != attempt:
+                return
+            del self.running[job_ID]
+
+        cnn = self.connection()
+        with cnn:
+            if error is None:
+                # The arguments are only needed to run the job again
+                cnn.execute("UPDATE Jobs SET Status = 'done', Result = ?, Error = NULL, "
+                            "Arguments = NULL, Finished = ? WHERE Job_ID = ?;",
+                            (pickle.dumps(result), time.time(), job_ID))
+            else:
+                try:
+                    blob = pickle.dumps(error)
+                except Exception:
+                    blob = None
+                cnn.execute("UPDATE Jobs SET Status = CASE WHEN Attempts < Max_Attempts "
+                            "THEN 'queued' ELSE 'failed' END, Result = ?, Error = ?, "
+                            "Finished = ?, Owner = NULL WHERE Job_ID = ?;",
+                            (blob, repr(error), time.time(), job_ID))
+            status = cnn.execute('SELECT Status FROM Jobs WHERE Job_ID = ?;',
+                                 (job_ID,)).fetchone()[0]
+
+        # Waking the waiters of this process, a job queued again for its next attempt is not
+        # finished and is only marked for the jobs still waited on, wait() removes the mark
+        with self.condition:
+            if status not in pending_statuses and job_ID in self.contexts:
+                self.finished.add(job_ID)
+            self.condition.notify_all()
+        return
+
+    def status(self):
+        """
+        Count the jobs of the queue by status.
+
+        Returns
+        -------
+        counts : dict
+            Number of jobs keyed by status.
+
+        """
+        rows = self.connection().execute('SELECT Status, COUNT(*) FROM Jobs GROUP BY Status;')
+        return dict(rows.fetchall())
+
+
+# Queue shared by all setup modules, its dispatcher stops when Python exits
+job_queue = JobQueue(queue_path)
+atexit.register(job_queue.stop)
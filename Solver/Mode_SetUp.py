@@ -6,7 +6,10 @@ This script sets up the MODE simulation for the waveguide simulations
 @author: AlexTofini
 """
 # Import dependencies
+import os
 import lumerical_tools
+import JobQueue
+import Tracing
 import ConnectToDatabase as database
 
 
@@ -36,6 +39,11 @@ def Active_Bent_Waveguide(parameters, simulation_setup, charge_setup):
         Absorption loss at 0 applied volts.
     waveguide_ID : int
         Integer ID used to differentiate different records in waveguide table.
+    index : list
+        Effective index and group index of the unbiased waveguide at the band center, None for
+        records written before they were stored.
+        Index 0 : neff
+        Index 1 : ng
 
     """
     # Determing CHARGE ID used to querry waveguide table
@@ -45,31 +53,37 @@ def Active_Bent_Waveguide(parameters, simulation_setup, charge_setup):
 
     # Query waveguide table for matching record
     result = database.QueryWaveguides(simulation_setup.Band, charge_ID, charge_setup.foundry)
+    Tracing.tracer.cache(result != [])
     if result != []:
         # If a matching record is found, parse the string array into useable values
         print("Database contains a waveguide record for current ring parameters")
         waveguide_ID = result[0][0]
-        voltage = database.ParseStringArray(result[0][4])
-        dneff_real = database.ParseStringArray(result[0][5])
-        dneff_imag = database.ParseStringArray(result[0][6])
-        absorption_losses = database.ParseStringArray(result[0][7])
-        phase = database.ParseStringArray(result[0][8])
+        voltage = database.ParseArray(result[0][4])
+        dneff_real = database.ParseArray(result[0][5])
+        dneff_imag = database.ParseArray(result[0][6])
+        absorption_losses = database.ParseArray(result[0][7])
+        phase = database.ParseArray(result[0][8])
+        neff, ng = result[0][9], result[0][10]
     else:
         # If no matching records are found, run simulation using LumAPI
         print("Datase does not contain a waveguide record for the current ring parameters")
         print("Executing FDTD simulation")
         nextID = database.FindNextIndex('Waveguide')
 
-        # Call MODE simulation with LumAPI
+        # Submitting the MODE simulation to the job queue and waiting for its result
         [voltage, dneff_real, dneff_imag,
-         phase, absorption_losses] = lumerical_tools.run_active_bent_wg(
-            parameters, simulation_setup, charge_setup, nextID)
+         phase, absorption_losses, neff, ng] = JobQueue.job_queue.run(
+            'mode', lumerical_tools.run_active_bent_wg, parameters, simulation_setup,
+            charge_setup, nextID)
 
         # Executing append query to save new record
         database.WriteToWaveguides(nextID, charge_ID, voltage, dneff_real, dneff_imag,
-                                   absorption_losses, phase, charge_setup.foundry)
+                                   absorption_losses, phase, charge_setup.foundry, neff, ng)
         waveguide_ID = nextID
+        Tracing.tracer.record(os.path.join(os.getcwd(), 'Database', 'Mode',
+                                           'Waveguide_' + str(waveguide_ID) + '.ldf'))
 
     dNeff = [voltage, dneff_real, dneff_imag]
     phase_shift = [voltage, phase]
-    return dNeff, absorption_losses, phase_shift, waveguide_ID
+    index = [neff, ng]
+    return dNeff, absorption_losses, phase_shift, waveguide_ID, index
@@ -0,0 +1,439 @@
+"""
+Created on Sun Oct 18 21:04:17 2026.
+
+This script runs lists of ring designs from the command line, without PySimpleGUI
+
+Every design of the list is checked with the same rules and converted to SI units with the same
+conversions as the GUI (InputVerification.design_rules), then run through the simulation pipeline,
+runSimulation or, when the gap is left empty, CriticalCouplingAutomation. Designs are run
+concurrently, at most --workers at a time, and a failing design is reported without stopping the
+others. The results table lists the status and figures of merit of every design, and every design
+that ran gets a folder with its transmission spectra, resonance figures of merit and span summary.
+The spans of the whole batch are written to trace.jsonl and, for chrome://tracing or Perfetto, to
+trace_chrome.json, see Tracing.
+
+Design list columns, in the GUI units, as a csv file or as a YAML list of mappings (PyYAML needed):
+    name : str, optional, default design_<row>
+    radius : float [um]
+    gap : float [nm], empty for critical coupling
+    slab_height : float [nm]
+    coupling_length : float [um], empty or 0 for a point coupler
+    wg_height : float [nm]
+    wg_width : float [nm]
+    band : str, CL or O
+    prop_loss : float [dB/cm]
+    charge_file : str, path of the CHARGE .mat file
+
+Usage : python RINGbatch.py designs.csv [--output BatchResults] [--workers N]
+                                        [--search adaptive|sweep] [--gap-tolerance nm]
+                                        [--priority batch|normal|interactive]
+
+Solver jobs are submitted to JobQueue with the batch priority by default, so designs run from the
+GUI at the same time start first.
+
+Run from the Solver folder, the database and result folders are relative to it as for RINGgui.py.
+
+@author: AlexTofini
+"""
+
+# Importing relevant packages
+import os
+import re
+import csv
+import sys
+import json
+import time
+import argparse
+import numpy as np
+import RINGsimulation as sim
+import InputVerification as verify
+import ResonanceFOM
+import EyeSimulator
+import StageGraph
+import JobQueue
+import Tracing
+import Variability
+
+# Columns of a design list, in order
+design_columns = ('name', 'radius', 'gap', 'slab_height', 'coupling_length', 'wg_height',
+                  'wg_width', 'band', 'prop_loss', 'charge_file')
+
+# Figures of merit of the results table, fields of the Variability table
+result_foms = ('resonance', 'FSR', 'bandwidth_3dB', 'Q', 'insertion_loss', 'extinction', 'tuning')
+
+# Columns of the results table, in order
+result_columns = (('name', 'status', 'message', 'elapsed') + design_columns[1:] +
+                  ('critical_gap', 'coupler_ID', 'waveguide_ID') + result_foms + ('folder',))
+
+# Gaps bounding the critical gap search, as in the GUI
+critical_gaps = np.linspace(100e-9, 600e-9, 11)
+
+
+def ReadDesigns(filename):
+    """
+    Read a design list.
+
+    Parameters
+    ----------
+    filename : str
+        Path of a csv file, or of a YAML file (.yaml, .yml) holding a list of designs or a mapping
+        with a designs list and optional defaults shared by every design.
+
+    Raises
+    ------
+    ValueError
+        If the YAML file does not hold a list of designs.
+
+    Returns
+    -------
+    designs : list
+        One dict per design keyed by column, rows without any value and rows whose name starts
+        with # are skipped.
+
+    """
+    if filename.lower().endswith(('.yaml', '.yml')):
+        # PyYAML is only needed for YAML design lists so it is imported here
+        import yaml
+        with open(filename) as file:
+            content = yaml.safe_load(file)
+        defaults = {}
+        if isinstance(content, dict):
+            defaults = content.get('defaults', {}) or {}
+            content = content.get('designs')
+        if not isinstance(content, list):
+            raise ValueError(filename + " does not contain a list of designs")
+        designs = [dict(defaults, **design) for design in content]
+    else:
+        with open(filename, newline='') as file:
+            designs = [{key.strip(): value for key, value in row.items() if key is not None}
+                       for row in csv.DictReader(file)]
+
+    return [design for design in designs
+            if any(str(value).strip() not in ('', 'None') for value in design.values())
+            and not str(design.get('name') or '').startswith('#')]
+
+
+def ValidateDesign(design, index):
+    """
+    Check a design and convert it to the arguments of the simulation pipeline.
+
+    Parameters
+    ----------
+    design : dict
+        Design read by ReadDesigns(), values in the GUI units.
+    index : int
+        Row of the design, used for its default name.
+
+    Returns
+    -------
+    settings : dict
+        Name, GUI values and SI values of the design, SI values are suffixed _SI. The gap is None
+        for critical coupling.
+    errors : list
+        Reason of every rejected value, empty if the design is valid.
+
+    """
+    name = str(design.get('name') or '').strip() or 'design_' + str(index)
+    settings = {'name': name}
+    errors = []
+
+    for key in ('radius', 'gap', 'slab_height', 'coupling_length', 'wg_height', 'wg_width',
+                'prop_loss'):
+        text = design.get(key)
+        if key == 'gap' and (text is None or str(text).strip() in ('', 'critical')):
+            # Leaving the gap empty enforces critical coupling as the GUI checkbox
+            settings['gap'] = None
+            settings['gap_SI'] = None
+            continue
+        value, message = verify.ValidateDesignValue(key, text)
+        if message != '':
+            errors.append(message)
+            continue
+        settings[key] = value
+        settings[key + '_SI'] = verify.ToSI(key, value)
+
+    Band = str(design.get('band') or '').strip().upper()
+    settings['band'] = Band
+    settings['lambda_start'], settings['lambda_end'], message = verify.ValidateBand(Band)
+    if message != '':
+        errors.append(message)
+
+    settings['charge_file'], message = verify.ValidateChargeFile(
+        str(design.get('charge_file') or '').strip())
+    if message != '':
+        errors.append(message + ' ' + str(settings['charge_file']))
+    elif sim.QueryChargeRecord(settings['charge_file'])[0] == []:
+        # The ring setup reads the junction settings from the CHARGE record of the file
+        errors.append('CHARGE file not in database ' + str(settings['charge_file']))
+    return settings, errors
+
+
+def RunDesign(settings, search, gap_tolerance):
+    """
+    Run the simulation pipeline of a validated design.
+
+    Parameters
+    ----------
+    settings : dict
+        Design settings returned by ValidateDesign().
+    search : str
+        Critical gap search method for designs without a gap.
+        Options : [sweep, adaptive]
+    gap_tolerance : float
+        Resolution of the critical gap for the adaptive search.
+
+    Returns
+    -------
+    saved_results : class
+        Populated saved_results class of the design.
+
+    """
+    if settings['gap_SI'] is None:
+        return sim.CriticalCouplingAutomation(
+            settings['radius_SI'], critical_gaps, settings['slab_height_SI'],
+            settings['coupling_length_SI'], settings['lambda_start'], settings['lambda_end'],
+            settings['band'], settings['charge_file'], settings['prop_loss_SI'],
+            settings['wg_height_SI'], settings['wg_width_SI'], search=search,
+            gap_tolerance=gap_tolerance)
+    return sim.runSimulation(
+        settings['radius_SI'], settings['gap_SI'], settings['slab_height_SI'],
+        settings['coupling_length_SI'], settings['lambda_start'], settings['lambda_end'],
+        settings['band'], settings['charge_file'], settings['prop_loss_SI'],
+        settings['wg_height_SI'], settings['wg_width_SI'])
+
+
+def DesignStage(settings, search, gap_tolerance, output):
+    """
+    Batch stage running a design and writing its artifacts, failures are returned, not raised.
+
+    Parameters
+    ----------
+    settings : dict
+        Design settings returned by ValidateDesign().
+    search : str
+        Critical gap search method, see RunDesign().
+    gap_tolerance : float
+        Resolution of the critical gap for the adaptive search.
+    output : str
+        Folder of the batch results.
+
+    Returns
+    -------
+    row : dict
+        Row of the results table.
+
+    """
+    row = ResultRow(settings, 'ok', '')
+    start = time.perf_counter()
+    try:
+        saved_results = RunDesign(settings, search, gap_tolerance)
+        row['folder'] = WriteArtifacts(output, settings, saved_results)
+    except Exception as e:
+        print("Design " + settings['name'] + " failed: " + repr(e))
+        row['status'] = 'failed'
+        row['message'] = repr(e)
+        row['elapsed'] = round(time.perf_counter() - start, 3)
+        return row
+
+    # Figures of merit of the resonance closest to the band center, as in the variability table
+    fom = Variability.FOMTable({}, np.zeros((1, 0)), [saved_results])[0]
+    for field in result_foms:
+        row[field] = fom[field]
+    if settings['gap_SI'] is None:
+        row['critical_gap'] = round(saved_results.CriticalCoupleGap/1e-9, 3)
+    row['coupler_ID'] = saved_results.coupler_ID
+    row['waveguide_ID'] = saved_results.waveguide_ID
+    row['elapsed'] = round(time.perf_counter() - start, 3)
+    return row
+
+
+def ResultRow(settings, status, message):
+    """
+    Start the results table row of a design.
+
+    Parameters
+    ----------
+    settings : dict
+        Design settings returned by ValidateDesign().
+    status : str
+        Outcome of the design.
+        Options: [ok, failed, invalid].
+    message : str
+        Reason of the failure, '' if none.
+
+    Returns
+    -------
+    row : dict
+        Row keyed by result_columns, the design values in the GUI units.
+
+    """
+    row = {column: '' for column in result_columns}
+    row.update({key: settings[key] for key in design_columns
+                if key in settings and settings[key] is not None})
+    row['status'] = status
+    row['message'] = message
+    return row
+
+
+def WriteArtifacts(output, settings, saved_results):
+    """
+    Write the spectra and figures of merit of a design to its own folder.
+
+    Parameters
+    ----------
+    output : str
+        Folder of the batch results.
+    settings : dict
+        Design settings returned by ValidateDesign().
+    saved_results : class
+        Populated saved_results class of the design.
+
+    Returns
+    -------
+    folder : str
+        Folder of the design, design.json holds its settings and database IDs, transmission.csv its
+        spectra, one column per voltage, foms.csv the figures of merit of every resonance and
+        trace.json the span summary of its simulation run.
+
+    """
+    folder = os.path.join(output, re.sub(r'[^\w.-]', '_', settings['name']))
+    os.makedirs(folder, exist_ok=True)
+
+    # Design settings and the database records it used
+    summary = {key: str(value) if key == 'charge_file' else value
+               for key, value in settings.items()}
+    summary['critical_gap_SI'] = saved_results.CriticalCoupleGap
+    summary['coupler_ID'] = saved_results.coupler_ID
+    summary['waveguide_ID'] = saved_results.waveguide_ID
+    with open(os.path.join(folder, 'design.json'), 'w') as file:
+        json.dump(summary, file, indent=4, default=str)
+
+    # Transmission of every voltage of the sweep
+    T = np.atleast_2d(saved_results.T)
+    voltage = EyeSimulator.SweepVoltages(saved_results)
+    with open(os.path.join(folder, 'transmission.csv'), 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['wavelength_nm'] + ['T_dB_' + '%g' % v + 'V' for v in voltage])
+        for ii, wavelength in enumerate(np.asarray(saved_results.wavelength, dtype=float)):
+            writer.writerow([wavelength] + T[:, ii].tolist())
+
+    # Figures of merit of every resonance
+    foms = ResonanceFOM.ExtractFOMs(saved_results.wavelength, T)
+    with open(os.path.join(folder, 'foms.csv'), 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(foms.dtype.names)
+        for record in foms:
+            writer.writerow(record.tolist())
+
+    # Time and cache hits of every stage of the simulation run
+    with open(os.path.join(folder, 'trace.json'), 'w') as file:
+        json.dump(saved_results.trace, file, indent=1)
+    return folder
+
+
+def runBatch(designs, output='BatchResults', workers=None, search='adaptive', gap_tolerance=1e-9):
+    """
+    Validate and run a design list, writing the results table and the design artifacts.
+
+    Parameters
+    ----------
+    designs : list
+        Designs returned by ReadDesigns().
+    output : str, optional
+        Folder of the batch results. The default is 'BatchResults'.
+    workers : int, optional
+        Maximum number of designs running at the same time. The default is None, which uses
+        RING_STAGE_WORKERS if set and otherwise runs every design at once, the solver sessions
+        staying within the license limits of lumerical_tools.session_pool.
+    search : str, optional
+        Critical gap search method for designs without a gap.
+        Options : [sweep, adaptive]. The default is 'adaptive', as in the GUI.
+    gap_tolerance : float, optional
+        Resolution of the critical gap for the adaptive search. The default is 1e-9.
+
+    Returns
+    -------
+    rows : list
+        Row of every design, in the order of the list, see result_columns. The table is also
+        written to results.csv in the output folder, and the spans of the batch to trace.jsonl
+        and trace_chrome.json.
+
+    """
+    os.makedirs(output, exist_ok=True)
+
+    # Validating every design first so a typo is reported before hours of simulation
+    rows = [None]*len(designs)
+    graph = StageGraph.StageGraph(workers)
+    indices = {}
+    for index, design in enumerate(designs):
+        settings, errors = ValidateDesign(design, index)
+        if settings['name'] in indices:
+            errors.append('Duplicate design name')
+        if errors != []:
+            print("Design " + settings['name'] + " is invalid: " + '; '.join(errors))
+            rows[index] = ResultRow(settings, 'invalid', '; '.join(errors))
+            continue
+        indices[settings['name']] = index
+        graph.add(settings['name'], DesignStage, settings, search, gap_tolerance, output)
+
+    print("Running " + str(len(graph.stages)) + " of " + str(len(designs)) + " designs")
+    with Tracing.tracer.run('batch', designs=len(designs)):
+        for name, row in graph.run().items():
+            rows[indices[name]] = row
+
+    # Writing the spans of every design, the design runs are nested in the batch run
+    Tracing.tracer.export_jsonl(os.path.join(output, 'trace.jsonl'))
+    Tracing.tracer.export_chrome(os.path.join(output, 'trace_chrome.json'))
+    print(Tracing.FormatSummary(Tracing.tracer.summary()))
+
+    # Writing the results table
+    with open(os.path.join(output, 'results.csv'), 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=result_columns)
+        writer.writeheader()
+        writer.writerows(rows)
+    return rows
+
+
+def main(argv=None):
+    """
+    Run a design list from the command line.
+
+    Parameters
+    ----------
+    argv : list, optional
+        Command line arguments. The default is None, which uses sys.argv.
+
+    Returns
+    -------
+    int
+        Exit status, 1 if a design is invalid or failed.
+
+    """
+    parser = argparse.ArgumentParser(description='Run a list of ring designs without the GUI.')
+    parser.add_argument('designs', help='csv or YAML design list, values in the GUI units')
+    parser.add_argument('--output', default='BatchResults',
+                        help='folder of the results table and design artifacts')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='maximum number of designs running at the same time')
+    parser.add_argument('--search', default='adaptive', choices=('adaptive', 'sweep'),
+                        help='critical gap search of the designs without a gap')
+    parser.add_argument('--gap-tolerance', type=float, default=1,
+                        help='critical gap resolution of the adaptive search [nm]')
+    parser.add_argument('--priority', default='batch', choices=tuple(JobQueue.job_priorities),
+                        help='priority class of the solver jobs')
+    arguments = parser.parse_args(argv)
+    JobQueue.default_priority = arguments.priority
+
+    designs = ReadDesigns(arguments.designs)
+    rows = runBatch(designs, arguments.output, arguments.workers, arguments.search,
+                    verify.ToSI('gap', abs(arguments.gap_tolerance)) or 1e-9)
+
+    statuses = [row['status'] for row in rows]
+    print(str(statuses.count('ok')) + " designs completed, " + str(statuses.count('failed')) +
+          " failed, " + str(statuses.count('invalid')) + " invalid, results in " +
+          os.path.join(arguments.output, 'results.csv'))
+    return 0 if statuses.count('ok') == len(rows) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -11,14 +11,17 @@ import textwrap
 import PySimpleGUI as sg
 import numpy as np
 import RINGsimulation as sim
-from scipy.signal import find_peaks
+import Variability
+import YieldAnalysis
+import ResonanceFOM
 import InputVerification as verify
 import Draw as draw
 import ConnectToDatabase as database
+import JobQueue
+import Tracing
 import matplotlib.pyplot as plt
 import math
 import matplotlib
-from pathlib import Path
 # Setting the interactive plot window
 matplotlib.use('TkAgg')
 
@@ -63,7 +66,7 @@ def toggle_PN_Plot_Options(show):
     Bandwidth_plot_button.update(visible=show)
 
 
-def toggle_Corner_Analysis_Results(show):
+def toggle_Corner_Analysis_Results(show, labels=None):
     """
     Toggle the corner analysis result optionsin the result tab.
 
@@ -71,17 +74,43 @@ def toggle_Corner_Analysis_Results(show):
     ----------
     show : bool
         Boolean control to dictate whether the corner analysis results should be visible
+    labels : list, optional
+        Labels of the process samples listed after the nominal result. The default is None, which
+        keeps the current list.
 
     Returns
     -------
     None.
 
     """
-    Nominal_plot.update(visible=show)
-    BL_plot.update(visible=show)
-    BR_plot.update(visible=show)
-    TL_plot.update(visible=show)
-    TR_plot.update(visible=show)
+    sample_text.update(visible=show)
+    if labels is not None:
+        sample_selector.update(values=['Nominal'] + labels, value='Nominal', visible=show)
+    else:
+        sample_selector.update(visible=show)
+
+
+def SelectedResults(values):
+    """
+    Return the result class selected in the result tab.
+
+    Parameters
+    ----------
+    values : dictionary
+        Dictionairy containing all the values present in the GUI.
+
+    Returns
+    -------
+    sample_results : class
+        Result class of the nominal ring or of the selected process sample.
+    sample_label : str
+        Label of the selection, used as plot identifier.
+
+    """
+    sample_label = values.get('-SAMPLE-', 'Nominal')
+    if sample_label in variability_results:
+        return variability_results[sample_label], sample_label
+    return saved_results, 'Nominal'
 
 
 def update_text_results(str1, str2, str3, str4, str5):
@@ -261,63 +290,46 @@ def plot_T(saved_results, identifier='Nominal'):
     fig.canvas.manager.window.attributes('-topmost', 1)
 
     # Extracting FOMs to display to user
+    foms = ResonanceFOM.ExtractFOMs(wavelength, T)
+    resonance_list, FSR_list, three_dB_bandwidth, Qfactor, ILs = ResonanceFOM.SummarizeRow(foms)
 
-    # Isolating non biased data, aka 0V
-    non_biased_T = T[0, :]
-
-    # Solving list of resonances
-    height = 0.01
-    [indx, peaks] = find_peaks(-1*non_biased_T, height)
-    plt.plot(wavelength[indx], non_biased_T[indx], "x")
-    resonance_list = wavelength[indx]
-    result1_str = 'Resonance [nm]: [ '
-    for i in range(len(resonance_list)):
-        result1_str = result1_str + str(round(resonance_list[i], 3)) + ', '
-    result1_str = result1_str + ']'
-    result1_str = textwrap.wrap(result1_str, 40)
+    # Marking the non biased resonances, aka 0V
+    non_biased = foms[foms['voltage_index'] == 0]
+    plt.plot(non_biased['resonance'], -non_biased['insertion_loss'], "x")
 
-    # Solving list of FSRs
-    FSR_list = [0] * (len(resonance_list)-1)
-    result2_str = 'FSR [nm]: [ '
-    for i in range(len(FSR_list)):
-        FSR_list[i] = round(resonance_list[i+1]-resonance_list[i], 2)
-        result2_str = result2_str + str(FSR_list[i]) + ', '
-
-    result2_str = result2_str + ']'
-
-    # Solving list of 3dB bandwidths
-    three_dB_bandwidth = [0] * (len(resonance_list))
-    three_dB_line = [-3]*len(non_biased_T)
-    idx = np.argwhere(np.diff(np.sign(three_dB_line - non_biased_T))).flatten()
-    three_dB_intersections = wavelength[idx]
-    result3_str = '3 dB Bandwidth [nm]: [ '
-    for i in range(int(len(three_dB_intersections)/2)):
-        print(i)
-        three_dB_bandwidth[i] = round(
-            np.abs(three_dB_intersections[2*i+1] - three_dB_intersections[2*i]), 3)
-        result3_str = result3_str + str(three_dB_bandwidth[i]) + ', '
-
-    result3_str = result3_str + ']'
-
-    # Solving list of quality factors
-    Qfactor = resonance_list/three_dB_bandwidth
-    Qfactor = np.around(Qfactor, decimals=-2)
-    Qfactor = Qfactor.astype(int)
-    result4_str = 'Q: [ '
-    for i in range(len(Qfactor)):
-        result4_str = result4_str + str(Qfactor[i]) + ', '
-
-    result4_str = result4_str + ']'
-
-    # Getting insertion loss Results
-    result5_str = 'Insertion Loss [dB]: [ '
-    ILs = np.round(np.array(peaks['peak_heights']), 2)
-    result5_str = result5_str + str(ILs) + ' ]'
+    # Formatting the results
+    result1_str = 'Resonance [nm]: [ ' + ''.join(str(x) + ', ' for x in resonance_list) + ']'
+    result1_str = textwrap.wrap(result1_str, 40)
+    result2_str = 'FSR [nm]: [ ' + ''.join(str(x) + ', ' for x in FSR_list) + ']'
+    result3_str = ('3 dB Bandwidth [nm]: [ ' + ''.join(str(x) + ', ' for x in three_dB_bandwidth)
+                   + ']')
+    result4_str = 'Q: [ ' + ''.join(FormatQ(x) + ', ' for x in Qfactor) + ']'
+    result5_str = 'Insertion Loss [dB]: [ ' + str(ILs) + ' ]'
 
     # Updating the displayed results
     update_text_results(result1_str, result2_str, result3_str, result4_str, result5_str)
 
 
+def FormatQ(Q):
+    """
+    Format a quality factor for display.
+
+    Parameters
+    ----------
+    Q : float
+        Quality factor, NaN when the bandwidth could not be measured.
+
+    Returns
+    -------
+    str
+        Q as an integer, or 'N/A'.
+
+    """
+    if math.isnan(Q):
+        return 'N/A'
+    return str(int(Q))
+
+
 def plot_Phase(saved_results, identifier='Nominal'):
     """
     Plot PN junction phase chnage.
@@ -557,7 +569,11 @@ main_tab = [
                  default=False,
                  visible=True,
                  change_submits=True,
-                 key='-CRITICAL_COUPLE-')],
+                 key='-CRITICAL_COUPLE-'),
+     sg.Text('Gap Tolerance [nm]'),
+     sg.Input('1',
+              s=(box_size, 1),
+              key='-GAP_TOLERANCE-')],
     [sg.Checkbox('Perform Corner Analysis',
                  default=False,
                  visible=True,
@@ -770,7 +786,7 @@ sz = (10, 20)
 col1_color = 'grey',
 col2_color = 'green',
 col1 = [
-    [sg.Text("Select 2 Desired Variables & Specify Variability")],
+    [sg.Text("Select Desired Variables & Specify Variability")],
     [sg.Checkbox('Waveguide Height',
                  default=False,
                  visible=True,
@@ -831,6 +847,28 @@ col1 = [
              visible=False,
              key='-DOPING_CONCENTRATION_RANGE_WARNING-')
      ],
+    [sg.Text('Sampling'),
+     sg.Combo(list(Variability.sampling_methods),
+              default_value='Corners',
+              readonly=True,
+              key='-VARIABILITY_METHOD-'),
+     sg.Text('Samples'),
+     sg.Input(key='-VARIABILITY_SAMPLES-', s=(box_size, 1),
+              visible=True),
+     sg.Text(' [Latin Hypercube & Sobol only]')],
+    [sg.Text('Distribution'),
+     sg.Combo(list(YieldAnalysis.distribution_types),
+              default_value='Normal',
+              readonly=True,
+              key='-YIELD_DISTRIBUTION-'),
+     sg.Text('Resonance Tolerance'),
+     sg.Input(key='-YIELD_RESONANCE-', s=(box_size, 1),
+              visible=True),
+     sg.Text(' [nm]'),
+     sg.Text('Min Extinction'),
+     sg.Input(key='-YIELD_EXTINCTION-', s=(box_size, 1),
+              visible=True),
+     sg.Text(' [dB] [Monte Carlo only, range = 3 sigma for Normal]')],
     [sg.Button('Update',
                visible=True,
                button_color=('black', 'green'),
@@ -844,36 +882,15 @@ variability_tab = [[sg.Column(col1, element_justification='c')]]
 
 # Creating elements on result window
 results_tab = [
-    [sg.Radio('Nominal',
-              "RADIO_Corner",
-              default=True,
-              visible=False,
-              enable_events=False,
-              key='-NOMINAL-'),
-     sg.Radio('Bottom Left Corner',
-              "RADIO_Corner",
-              default=False,
-              visible=False,
-              enable_events=False,
-              key='-CORNER_BL-'),
-     sg.Radio('Bottom Right Corner',
-              "RADIO_Corner",
-              default=False,
-              visible=False,
-              enable_events=False,
-              key='-CORNER_BR-'),
-     sg.Radio('Top Left Corner',
-              "RADIO_Corner",
-              default=False,
-              visible=False,
-              enable_events=False,
-              key='-CORNER_TL-'),
-     sg.Radio('Top Right Corner',
-              "RADIO_Corner",
-              default=False,
+    [sg.Text('Sample',
+             visible=False,
+             key='-SAMPLE_TEXT-'),
+     sg.Combo(['Nominal'],
+              default_value='Nominal',
+              readonly=True,
               visible=False,
-              enable_events=False,
-              key='-CORNER_TR-')],
+              size=(60, 1),
+              key='-SAMPLE-')],
     [sg.B('Coupling Coefficient',
           disabled=True,
           key='-CC-'),
@@ -1060,11 +1077,8 @@ Resistance_plot_button = window['-RESISTANCE-']
 Bandwidth_plot_button = window['-BANDWIDTH-']
 
 # Creating handels for the corner analysis result options
-Nominal_plot = window['-NOMINAL-']
-BL_plot = window['-CORNER_BL-']
-BR_plot = window['-CORNER_BR-']
-TL_plot = window['-CORNER_TL-']
-TR_plot = window['-CORNER_TR-']
+sample_text = window['-SAMPLE_TEXT-']
+sample_selector = window['-SAMPLE-']
 
 # Creating handles for variability checkboxes
 waveguide_height_var_box = window['-VARIABILITY_WAVEGUIDE_HEIGHT-']
@@ -1212,11 +1226,20 @@ bool_slab_height_variability = 0
 bool_doping_concentration_variability = 0
 bool_corner_analyis_ready = 0
 
+# Solver jobs submitted from the GUI start before the queued batch jobs
+JobQueue.default_priority = 'interactive'
+
 # Creating Variability Dictionairy
 Variability_Dict = {}
 
-# Adding variability counter to limit simulation space to 2 currently
-variability_dimensions = 2
+# Any subset of the process parameters can be varied
+variability_dimensions = len(Variability.process_parameters)
+sampling_method = 'corners'
+sampling_count = None
+yield_distribution = 'normal'
+resonance_tolerance = None
+min_extinction = None
+variability_results = {}
 selected_dimensions = 0
 setting1 = ''
 setting2 = ''
@@ -1413,17 +1436,35 @@ while True:
         # Updating warning message for variability analysis checkbox
         variability_variables_text.Update(variability_display_text)
 
+        # Reading the sampling settings, the number of samples only applies to random sampling
+        sampling_method = Variability.sampling_methods[values['-VARIABILITY_METHOD-']]
+        try:
+            sampling_count = max(1, int(values['-VARIABILITY_SAMPLES-']))
+        except ValueError:
+            sampling_count = None
+
+        # Reading the Monte Carlo yield settings, an empty specification is not checked
+        yield_distribution = YieldAnalysis.distribution_types[values['-YIELD_DISTRIBUTION-']]
+        try:
+            resonance_tolerance = abs(float(values['-YIELD_RESONANCE-']))
+        except ValueError:
+            resonance_tolerance = None
+        try:
+            min_extinction = float(values['-YIELD_EXTINCTION-'])
+        except ValueError:
+            min_extinction = None
+
         # Defining variables to either be used in the charge simulation or ring
 
     elif event == '-RUN_CHARGE-':
         # This event handles the charge simulation execution
 
         # Converting to SI units in case it wasnt already done
-        Radius_SI = round(Radius*1e-6, 10)
-        slab_height_SI = round(slab_height*1e-9, 10)
-        CouplingLength_SI = round(CouplingLength*1e-6, 10)
-        wg_width_SI = round(wg_width*1e-9, 10)
-        wg_height_SI = round(wg_height*1e-9, 10)
+        Radius_SI = verify.ToSI('radius', Radius)
+        slab_height_SI = verify.ToSI('slab_height', slab_height)
+        CouplingLength_SI = verify.ToSI('coupling_length', CouplingLength)
+        wg_width_SI = verify.ToSI('wg_width', wg_width)
+        wg_height_SI = verify.ToSI('wg_height', wg_height)
 
         try:
             # Simulating charge distribution
@@ -1437,524 +1478,26 @@ while True:
                                                              bias, band, foundry, PN_Type,
                                                              wg_height_SI, wg_width_SI)
             if values['-CORNER_ANALYSIS-']:
-                # Repeating 4 times for all corners
+                # Repeating for every process sample
                 if not SimRun:
                     save_name = CHARGE_FILE
 
-                # Intializing variability analysis variables that can be passed to charge solver
-                var_wg_height_SI = [round(wg_height_SI -
-                                          Variability_Dict['Waveguide Height Range']*1e-9, 10),
-                                    round(wg_height_SI +
-                                          Variability_Dict['Waveguide Height Range']*1e-9, 10)]
-                var_wg_width_SI = [round(wg_width_SI -
-                                         Variability_Dict['Waveguide Width Range']*1e-9, 10),
-                                   round(wg_width_SI +
-                                         Variability_Dict['Waveguide Width Range']*1e-9, 10)]
-                var_slab_height_SI = [round(slab_height_SI -
-                                            Variability_Dict['Slab Height Range']*1e-9, 10),
-                                      round(slab_height_SI +
-                                            Variability_Dict['Slab Height Range']*1e-9, 10)]
-                var_doping_error = [-Variability_Dict['Doping Concentration Range'],
-                                    Variability_Dict['Doping Concentration Range']]
-
-                # Since there are 4 variables possible for the variability analysis and we are doing
-                # subsets of 2, there exists 6 possible combinations, therefore six cases are shown
-                # This could be coded in a cleaner way if the functions were rewritten, TODO()
-
-                # Listing cases.
-                # Case: 1 = wg_height x wg_width
-                # Case: 2 = wg_height x slab_height
-                # Case: 3 = wg_height x doping_concentration
-                # Case: 4 = wg_width x slab_height
-                # Case: 5 = wg_width x doping_concentration
-                # Case: 6 = slab_height x doping_concentration
-
-                # Case 1
-                if (Variability_Dict['[ID] Waveguide Height'] and
-                        Variability_Dict['[ID] Waveguide Width']):
-
-                    # Constructing bottom left corner
-                    identifier_BL = ('_wg_height-' + str(Variability_Dict['Waveguide Height Range'])
-                                     + Variability_Dict['Waveguide Height Units'] +
-                                     '_wg_width-' + str(Variability_Dict['Waveguide Width Range']) +
-                                     Variability_Dict['Waveguide Width Units'])
-                    identifier_BL = identifier_BL.replace('.', 'p')
-                    CHARGE_FILE_BL, _ = sim.runPNJunctionSimulator(p_width_core, n_width_core,
-                                                                   p_width_slab, n_width_slab,
-                                                                   pp_width, np_width,
-                                                                   ppp_width, npp_width,
-                                                                   slab_height_SI, Radius_SI,
-                                                                   CouplingLength_SI,
-                                                                   vmin_charge,
-                                                                   vmax_charge,
-                                                                   save_name + identifier_BL,
-                                                                   bias, band, foundry,
-                                                                   PN_Type,
-                                                                   var_wg_height_SI[0],
-                                                                   var_wg_width_SI[0])
-
-                    # Constructing bottom right corner
-                    identifier_BR = ('_wg_height+' + str(Variability_Dict['Waveguide Height Range'])
-                                     + Variability_Dict['Waveguide Height Units'] +
-                                     '_wg_width-' + str(Variability_Dict['Waveguide Width Range']) +
-                                     Variability_Dict['Waveguide Width Units'])
-                    identifier_BR = identifier_BR.replace('.', 'p')
-                    CHARGE_FILE_BR, _ = sim.runPNJunctionSimulator(p_width_core, n_width_core,
-                                                                   p_width_slab, n_width_slab,
-                                                                   pp_width, np_width,
-                                                                   ppp_width, npp_width,
-                                                                   slab_height_SI, Radius_SI,
-                                                                   CouplingLength_SI, vmin_charge,
-                                                                   vmax_charge,
-                                                                   save_name + identifier_BR,
-                                                                   bias, band, foundry, PN_Type,
-                                                                   var_wg_height_SI[0],
-                                                                   var_wg_width_SI[1])
-
-                    # Constructing bottom left corner
-                    identifier_TL = ('_wg_height-' + str(Variability_Dict['Waveguide Height Range'])
-                                     + Variability_Dict['Waveguide Height Units'] +
-                                     '_wg_width+' + str(Variability_Dict['Waveguide Width Range']) +
-                                     Variability_Dict['Waveguide Width Units'])
-                    identifier_TL = identifier_TL.replace('.', 'p')
-                    CHARGE_FILE_TL, _ = sim.runPNJunctionSimulator(p_width_core, n_width_core,
-                                                                   p_width_slab, n_width_slab,
-                                                                   pp_width, np_width,
-                                                                   ppp_width, npp_width,
-                                                                   slab_height_SI, Radius_SI,
-                                                                   CouplingLength_SI, vmin_charge,
-                                                                   vmax_charge,
-                                                                   save_name + identifier_TL,
-                                                                   bias, band, foundry, PN_Type,
-                                                                   var_wg_height_SI[1],
-                                                                   var_wg_width_SI[0])
-
-                    # Constructing bottom left corner
-                    identifier_TR = ('_wg_height+' + str(Variability_Dict['Waveguide Height Range'])
-                                     + Variability_Dict['Waveguide Height Units'] +
-                                     '_wg_width+' + str(Variability_Dict['Waveguide Width Range']) +
-                                     Variability_Dict['Waveguide Width Units'])
-                    identifier_TR = identifier_TR.replace('.', 'p')
-                    CHARGE_FILE_TR, _ = sim.runPNJunctionSimulator(p_width_core, n_width_core,
-                                                                   p_width_slab, n_width_slab,
-                                                                   pp_width, np_width,
-                                                                   ppp_width, npp_width,
-                                                                   slab_height_SI, Radius_SI,
-                                                                   CouplingLength_SI, vmin_charge,
-                                                                   vmax_charge,
-                                                                   save_name + identifier_TR,
-                                                                   bias, band, foundry, PN_Type,
-                                                                   var_wg_height_SI[1],
-                                                                   var_wg_width_SI[1])
-                # Case 2
-                elif (Variability_Dict['[ID] Waveguide Height'] and
-                        Variability_Dict['[ID] Slab Height']):
-
-                    # Constructing bottom left corner
-                    identifier_BL = ('_wg_height-' + str(Variability_Dict['Waveguide Height Range'])
-                                     + Variability_Dict['Waveguide Height Units'] +
-                                     '_slab_height-' + str(Variability_Dict['Slab Height Range']) +
-                                     Variability_Dict['Slab Height Units'])
-                    identifier_BL = identifier_BL.replace('.', 'p')
-                    CHARGE_FILE_BL, _ = sim.runPNJunctionSimulator(p_width_core, n_width_core,
-                                                                   p_width_slab, n_width_slab,
-                                                                   pp_width, np_width,
-                                                                   ppp_width, npp_width,
-                                                                   var_slab_height_SI[0], Radius_SI,
-                                                                   CouplingLength_SI,
-                                                                   vmin_charge,
-                                                                   vmax_charge,
-                                                                   save_name + identifier_BL,
-                                                                   bias, band, foundry,
-                                                                   PN_Type,
-                                                                   var_wg_height_SI[0],
-                                                                   wg_width_SI)
-
-                    # Constructing bottom right corner
-                    identifier_BR = ('_wg_height+' + str(Variability_Dict['Waveguide Height Range'])
-                                     + Variability_Dict['Waveguide Height Units'] +
-                                     '_slab_height-' + str(Variability_Dict['Slab Height Range']) +
-                                     Variability_Dict['Slab Height Units'])
-                    identifier_BR = identifier_BR.replace('.', 'p')
-                    CHARGE_FILE_BR, _ = sim.runPNJunctionSimulator(p_width_core, n_width_core,
-                                                                   p_width_slab, n_width_slab,
-                                                                   pp_width, np_width,
-                                                                   ppp_width, npp_width,
-                                                                   var_slab_height_SI[1], Radius_SI,
-                                                                   CouplingLength_SI, vmin_charge,
-                                                                   vmax_charge,
-                                                                   save_name + identifier_BR,
-                                                                   bias, band, foundry, PN_Type,
-                                                                   var_wg_height_SI[0],
-                                                                   wg_width_SI)
-
-                    # Constructing bottom left corner
-                    identifier_TL = ('_wg_height-' + str(Variability_Dict['Waveguide Height Range'])
-                                     + Variability_Dict['Waveguide Height Units'] +
-                                     '_slab_height+' + str(Variability_Dict['Slab Height Range']) +
-                                     Variability_Dict['Slab Height Units'])
-                    identifier_TL = identifier_TL.replace('.', 'p')
-                    CHARGE_FILE_TL, _ = sim.runPNJunctionSimulator(p_width_core, n_width_core,
-                                                                   p_width_slab, n_width_slab,
-                                                                   pp_width, np_width,
-                                                                   ppp_width, npp_width,
-                                                                   var_slab_height_SI[0], Radius_SI,
-                                                                   CouplingLength_SI, vmin_charge,
-                                                                   vmax_charge,
-                                                                   save_name + identifier_TL,
-                                                                   bias, band, foundry, PN_Type,
-                                                                   var_wg_height_SI[1],
-                                                                   wg_width_SI)
-
-                    # Constructing bottom left corner
-                    identifier_TR = ('_wg_height+' + str(Variability_Dict['Waveguide Height Range'])
-                                     + Variability_Dict['Waveguide Height Units'] +
-                                     '_slab_height+' + str(Variability_Dict['Slab Height Range']) +
-                                     Variability_Dict['Slab Height Units'])
-                    identifier_TR = identifier_TR.replace('.', 'p')
-                    CHARGE_FILE_TR, _ = sim.runPNJunctionSimulator(p_width_core, n_width_core,
-                                                                   p_width_slab, n_width_slab,
-                                                                   pp_width, np_width,
-                                                                   ppp_width, npp_width,
-                                                                   var_slab_height_SI[1], Radius_SI,
-                                                                   CouplingLength_SI, vmin_charge,
-                                                                   vmax_charge,
-                                                                   save_name + identifier_TR,
-                                                                   bias, band, foundry, PN_Type,
-                                                                   var_wg_height_SI[1],
-                                                                   wg_width_SI)
-                # Case 3
-                elif (Variability_Dict['[ID] Waveguide Height'] and
-                        Variability_Dict['[ID] Doping Concentration']):
-
-                    # Constructing bottom left corner
-                    identifier_BL = ('_wg_height-' + str(Variability_Dict['Waveguide Height Range'])
-                                     + Variability_Dict['Waveguide Height Units'] +
-                                     '_doping-' +
-                                     str(Variability_Dict['Doping Concentration Range']) +
-                                     Variability_Dict['Doping Concentration Units'])
-                    identifier_BL = identifier_BL.replace('.', 'p')
-                    CHARGE_FILE_BL, _ = sim.runPNJunctionSimulator(p_width_core, n_width_core,
-                                                                   p_width_slab, n_width_slab,
-                                                                   pp_width, np_width,
-                                                                   ppp_width, npp_width,
-                                                                   slab_height_SI, Radius_SI,
-                                                                   CouplingLength_SI,
-                                                                   vmin_charge,
-                                                                   vmax_charge,
-                                                                   save_name + identifier_BL,
-                                                                   bias, band, foundry,
-                                                                   PN_Type,
-                                                                   var_wg_height_SI[0],
-                                                                   wg_width_SI,
-                                                                   var_doping_error[0])
-
-                    # Constructing bottom right corner
-                    identifier_BR = ('_wg_height+' + str(Variability_Dict['Waveguide Height Range'])
-                                     + Variability_Dict['Waveguide Height Units'] +
-                                     '_doping-' +
-                                     str(Variability_Dict['Doping Concentration Range']) +
-                                     Variability_Dict['Doping Concentration Units'])
-                    identifier_BR = identifier_BR.replace('.', 'p')
-                    CHARGE_FILE_BR, _ = sim.runPNJunctionSimulator(p_width_core, n_width_core,
-                                                                   p_width_slab, n_width_slab,
-                                                                   pp_width, np_width,
-                                                                   ppp_width, npp_width,
-                                                                   slab_height_SI, Radius_SI,
-                                                                   CouplingLength_SI, vmin_charge,
-                                                                   vmax_charge,
-                                                                   save_name + identifier_BR,
-                                                                   bias, band, foundry, PN_Type,
-                                                                   var_wg_height_SI[0],
-                                                                   wg_width_SI,
-                                                                   var_doping_error[1])
-
-                    # Constructing bottom left corner
-                    identifier_TL = ('_wg_height-' + str(Variability_Dict['Waveguide Height Range'])
-                                     + Variability_Dict['Waveguide Height Units'] +
-                                     '_doping+' +
-                                     str(Variability_Dict['Doping Concentration Range']) +
-                                     Variability_Dict['Doping Concentration Units'])
-                    identifier_TL = identifier_TL.replace('.', 'p')
-                    CHARGE_FILE_TL, _ = sim.runPNJunctionSimulator(p_width_core, n_width_core,
-                                                                   p_width_slab, n_width_slab,
-                                                                   pp_width, np_width,
-                                                                   ppp_width, npp_width,
-                                                                   slab_height_SI, Radius_SI,
-                                                                   CouplingLength_SI, vmin_charge,
-                                                                   vmax_charge,
-                                                                   save_name + identifier_TL,
-                                                                   bias, band, foundry, PN_Type,
-                                                                   var_wg_height_SI[1],
-                                                                   wg_width_SI,
-                                                                   var_doping_error[0])
-
-                    # Constructing bottom left corner
-                    identifier_TR = ('_wg_height+' + str(Variability_Dict['Waveguide Height Range'])
-                                     + Variability_Dict['Waveguide Height Units'] +
-                                     '_doping+' +
-                                     str(Variability_Dict['Doping Concentration Range']) +
-                                     Variability_Dict['Doping Concentration Units'])
-                    identifier_TR = identifier_TR.replace('.', 'p')
-                    CHARGE_FILE_TR, _ = sim.runPNJunctionSimulator(p_width_core, n_width_core,
-                                                                   p_width_slab, n_width_slab,
-                                                                   pp_width, np_width,
-                                                                   ppp_width, npp_width,
-                                                                   slab_height_SI, Radius_SI,
-                                                                   CouplingLength_SI, vmin_charge,
-                                                                   vmax_charge,
-                                                                   save_name + identifier_TR,
-                                                                   bias, band, foundry, PN_Type,
-                                                                   var_wg_height_SI[1],
-                                                                   wg_width_SI,
-                                                                   var_doping_error[1])
-                # Case 4
-                elif (Variability_Dict['[ID] Waveguide Width'] and
-                        Variability_Dict['[ID] Slab Height']):
-
-                    # Constructing bottom left corner
-                    identifier_BL = ('_wg_width-' + str(Variability_Dict['Waveguide Width Range'])
-                                     + Variability_Dict['Waveguide Width Units'] +
-                                     '_slab_height-' + str(Variability_Dict['Slab Height Range']) +
-                                     Variability_Dict['Slab Height Units'])
-                    identifier_BL = identifier_BL.replace('.', 'p')
-                    CHARGE_FILE_BL, _ = sim.runPNJunctionSimulator(p_width_core, n_width_core,
-                                                                   p_width_slab, n_width_slab,
-                                                                   pp_width, np_width,
-                                                                   ppp_width, npp_width,
-                                                                   var_slab_height_SI[0], Radius_SI,
-                                                                   CouplingLength_SI,
-                                                                   vmin_charge,
-                                                                   vmax_charge,
-                                                                   save_name + identifier_BL,
-                                                                   bias, band, foundry,
-                                                                   PN_Type,
-                                                                   wg_height_SI,
-                                                                   var_wg_width_SI[0])
-
-                    # Constructing bottom right corner
-                    identifier_BR = ('_wg_width+' + str(Variability_Dict['Waveguide Width Range'])
-                                     + Variability_Dict['Waveguide Width Units'] +
-                                     '_slab_height-' + str(Variability_Dict['Slab Height Range']) +
-                                     Variability_Dict['Slab Height Units'])
-                    identifier_BR = identifier_BR.replace('.', 'p')
-                    CHARGE_FILE_BR, _ = sim.runPNJunctionSimulator(p_width_core, n_width_core,
-                                                                   p_width_slab, n_width_slab,
-                                                                   pp_width, np_width,
-                                                                   ppp_width, npp_width,
-                                                                   var_slab_height_SI[1], Radius_SI,
-                                                                   CouplingLength_SI, vmin_charge,
-                                                                   vmax_charge,
-                                                                   save_name + identifier_BR,
-                                                                   bias, band, foundry, PN_Type,
-                                                                   wg_height_SI,
-                                                                   var_wg_width_SI[0])
-
-                    # Constructing bottom left corner
-                    identifier_TL = ('_wg_width-' + str(Variability_Dict['Waveguide Width Range'])
-                                     + Variability_Dict['Waveguide Width Units'] +
-                                     '_slab_height+' + str(Variability_Dict['Slab Height Range']) +
-                                     Variability_Dict['Slab Height Units'])
-                    identifier_TL = identifier_TL.replace('.', 'p')
-                    CHARGE_FILE_TL, _ = sim.runPNJunctionSimulator(p_width_core, n_width_core,
-                                                                   p_width_slab, n_width_slab,
-                                                                   pp_width, np_width,
-                                                                   ppp_width, npp_width,
-                                                                   var_slab_height_SI[0], Radius_SI,
-                                                                   CouplingLength_SI, vmin_charge,
-                                                                   vmax_charge,
-                                                                   save_name + identifier_TL,
-                                                                   bias, band, foundry, PN_Type,
-                                                                   wg_height_SI,
-                                                                   var_wg_width_SI[1])
-
-                    # Constructing bottom left corner
-                    identifier_TR = ('_wg_width+' + str(Variability_Dict['Waveguide Width Range'])
-                                     + Variability_Dict['Waveguide Width Units'] +
-                                     '_slab_height+' + str(Variability_Dict['Slab Height Range']) +
-                                     Variability_Dict['Slab Height Units'])
-                    identifier_TR = identifier_TR.replace('.', 'p')
-                    CHARGE_FILE_TR, _ = sim.runPNJunctionSimulator(p_width_core, n_width_core,
-                                                                   p_width_slab, n_width_slab,
-                                                                   pp_width, np_width,
-                                                                   ppp_width, npp_width,
-                                                                   var_slab_height_SI[1], Radius_SI,
-                                                                   CouplingLength_SI, vmin_charge,
-                                                                   vmax_charge,
-                                                                   save_name + identifier_TR,
-                                                                   bias, band, foundry, PN_Type,
-                                                                   wg_height_SI,
-                                                                   var_wg_width_SI[1])
-                # Case 5
-                elif (Variability_Dict['[ID] Waveguide Width'] and
-                        Variability_Dict['[ID] Doping Concentration']):
-
-                    # Constructing bottom left corner
-                    identifier_BL = ('_wg_width-' + str(Variability_Dict['Waveguide Width Range'])
-                                     + Variability_Dict['Waveguide Width Units'] +
-                                     '_doping-' +
-                                     str(Variability_Dict['Doping Concentration Range']) +
-                                     Variability_Dict['Doping Concentration Units'])
-                    identifier_BL = identifier_BL.replace('.', 'p')
-                    CHARGE_FILE_BL, _ = sim.runPNJunctionSimulator(p_width_core, n_width_core,
-                                                                   p_width_slab, n_width_slab,
-                                                                   pp_width, np_width,
-                                                                   ppp_width, npp_width,
-                                                                   slab_height_SI, Radius_SI,
-                                                                   CouplingLength_SI,
-                                                                   vmin_charge,
-                                                                   vmax_charge,
-                                                                   save_name + identifier_BL,
-                                                                   bias, band, foundry,
-                                                                   PN_Type,
-                                                                   wg_height_SI,
-                                                                   var_wg_width_SI[0],
-                                                                   var_doping_error[0])
-
-                    # Constructing bottom right corner
-                    identifier_BR = ('_wg_width+' + str(Variability_Dict['Waveguide Width Range'])
-                                     + Variability_Dict['Waveguide Width Units'] +
-                                     '_doping-' +
-                                     str(Variability_Dict['Doping Concentration Range']) +
-                                     Variability_Dict['Doping Concentration Units'])
-                    identifier_BR = identifier_BR.replace('.', 'p')
-                    CHARGE_FILE_BR, _ = sim.runPNJunctionSimulator(p_width_core, n_width_core,
-                                                                   p_width_slab, n_width_slab,
-                                                                   pp_width, np_width,
-                                                                   ppp_width, npp_width,
-                                                                   slab_height_SI, Radius_SI,
-                                                                   CouplingLength_SI, vmin_charge,
-                                                                   vmax_charge,
-                                                                   save_name + identifier_BR,
-                                                                   bias, band, foundry, PN_Type,
-                                                                   wg_height_SI,
-                                                                   var_wg_width_SI[0],
-                                                                   var_doping_error[1])
-
-                    # Constructing bottom left corner
-                    identifier_TL = ('_wg_width-' + str(Variability_Dict['Waveguide Width Range'])
-                                     + Variability_Dict['Waveguide Width Units'] +
-                                     '_doping+' +
-                                     str(Variability_Dict['Doping Concentration Range']) +
-                                     Variability_Dict['Doping Concentration Units'])
-                    identifier_TL = identifier_TL.replace('.', 'p')
-                    CHARGE_FILE_TL, _ = sim.runPNJunctionSimulator(p_width_core, n_width_core,
-                                                                   p_width_slab, n_width_slab,
-                                                                   pp_width, np_width,
-                                                                   ppp_width, npp_width,
-                                                                   slab_height_SI, Radius_SI,
-                                                                   CouplingLength_SI, vmin_charge,
-                                                                   vmax_charge,
-                                                                   save_name + identifier_TL,
-                                                                   bias, band, foundry, PN_Type,
-                                                                   wg_height_SI,
-                                                                   var_wg_width_SI[1],
-                                                                   var_doping_error[0])
-
-                    # Constructing bottom left corner
-                    identifier_TR = ('_wg_width+' + str(Variability_Dict['Waveguide Width Range'])
-                                     + Variability_Dict['Waveguide Width Units'] +
-                                     '_doping+' +
-                                     str(Variability_Dict['Doping Concentration Range']) +
-                                     Variability_Dict['Doping Concentration Units'])
-                    identifier_TR = identifier_TR.replace('.', 'p')
-                    CHARGE_FILE_TR, _ = sim.runPNJunctionSimulator(p_width_core, n_width_core,
-                                                                   p_width_slab, n_width_slab,
-                                                                   pp_width, np_width,
-                                                                   ppp_width, npp_width,
-                                                                   slab_height_SI, Radius_SI,
-                                                                   CouplingLength_SI, vmin_charge,
-                                                                   vmax_charge,
-                                                                   save_name + identifier_TR,
-                                                                   bias, band, foundry, PN_Type,
-                                                                   wg_height_SI,
-                                                                   var_wg_width_SI[1],
-                                                                   var_doping_error[1])
-                # Case 6
-                elif (Variability_Dict['[ID] Slab Height'] and
-                        Variability_Dict['[ID] Doping Concentration']):
-
-                    # Constructing bottom left corner
-                    identifier_BL = ('_slab_height-' + str(Variability_Dict['Slab Height Range'])
-                                     + Variability_Dict['Slab Height Units'] +
-                                     '_doping-' +
-                                     str(Variability_Dict['Doping Concentration Range']) +
-                                     Variability_Dict['Doping Concentration Units'])
-                    identifier_BL = identifier_BL.replace('.', 'p')
-                    CHARGE_FILE_BL, _ = sim.runPNJunctionSimulator(p_width_core, n_width_core,
-                                                                   p_width_slab, n_width_slab,
-                                                                   pp_width, np_width,
-                                                                   ppp_width, npp_width,
-                                                                   var_slab_height_SI[0], Radius_SI,
-                                                                   CouplingLength_SI,
-                                                                   vmin_charge,
-                                                                   vmax_charge,
-                                                                   save_name + identifier_BL,
-                                                                   bias, band, foundry,
-                                                                   PN_Type,
-                                                                   wg_height_SI,
-                                                                   wg_width_SI,
-                                                                   var_doping_error[0])
-
-                    # Constructing bottom right corner
-                    identifier_BR = ('_slab_height+' + str(Variability_Dict['Slab Height Range'])
-                                     + Variability_Dict['Slab Height Units'] +
-                                     '_doping-' +
-                                     str(Variability_Dict['Doping Concentration Range']) +
-                                     Variability_Dict['Doping Concentration Units'])
-                    identifier_BR = identifier_BR.replace('.', 'p')
-                    CHARGE_FILE_BR, _ = sim.runPNJunctionSimulator(p_width_core, n_width_core,
-                                                                   p_width_slab, n_width_slab,
-                                                                   pp_width, np_width,
-                                                                   ppp_width, npp_width,
-                                                                   var_slab_height_SI[0], Radius_SI,
-                                                                   CouplingLength_SI, vmin_charge,
-                                                                   vmax_charge,
-                                                                   save_name + identifier_BR,
-                                                                   bias, band, foundry, PN_Type,
-                                                                   wg_height_SI,
-                                                                   wg_width_SI,
-                                                                   var_doping_error[1])
-
-                    # Constructing bottom left corner
-                    identifier_TL = ('_slab_height-' + str(Variability_Dict['Slab Height Range'])
-                                     + Variability_Dict['Slab Height Units'] +
-                                     '_doping+' +
-                                     str(Variability_Dict['Doping Concentration Range']) +
-                                     Variability_Dict['Doping Concentration Units'])
-                    identifier_TL = identifier_TL.replace('.', 'p')
-                    CHARGE_FILE_TL, _ = sim.runPNJunctionSimulator(p_width_core, n_width_core,
-                                                                   p_width_slab, n_width_slab,
-                                                                   pp_width, np_width,
-                                                                   ppp_width, npp_width,
-                                                                   var_slab_height_SI[1], Radius_SI,
-                                                                   CouplingLength_SI, vmin_charge,
-                                                                   vmax_charge,
-                                                                   save_name + identifier_TL,
-                                                                   bias, band, foundry, PN_Type,
-                                                                   wg_height_SI,
-                                                                   wg_width_SI,
-                                                                   var_doping_error[0])
-
-                    # Constructing bottom left corner
-                    identifier_TR = ('_slab_height+' + str(Variability_Dict['Slab Height Range'])
-                                     + Variability_Dict['Slab Height Units'] +
-                                     '_doping+' +
-                                     str(Variability_Dict['Doping Concentration Range']) +
-                                     Variability_Dict['Doping Concentration Units'])
-                    identifier_TR = identifier_TR.replace('.', 'p')
-                    CHARGE_FILE_TR, _ = sim.runPNJunctionSimulator(p_width_core, n_width_core,
-                                                                   p_width_slab, n_width_slab,
-                                                                   pp_width, np_width,
-                                                                   ppp_width, npp_width,
-                                                                   var_slab_height_SI[1], Radius_SI,
-                                                                   CouplingLength_SI, vmin_charge,
-                                                                   vmax_charge,
-                                                                   save_name + identifier_TR,
-                                                                   bias, band, foundry, PN_Type,
-                                                                   wg_height_SI,
-                                                                   wg_width_SI,
-                                                                   var_doping_error[1])
+                # Generating the process samples, seeded so the ring run generates the same ones
+                dimensions = Variability.Dimensions(Variability_Dict)
+                samples = Variability.Samples(dimensions, sampling_method, sampling_count)
+
+                # Simulating the PN junction of every distinct sample concurrently
+                charge_arguments = {
+                    'p_width_core': p_width_core, 'n_width_core': n_width_core,
+                    'p_width_slab': p_width_slab, 'n_width_slab': n_width_slab,
+                    'pp_width': pp_width, 'np_width': np_width,
+                    'ppp_width': ppp_width, 'npp_width': npp_width,
+                    'slab_height': slab_height_SI, 'radius': Radius_SI,
+                    'coupling_length': CouplingLength_SI, 'vmin': vmin_charge,
+                    'vmax': vmax_charge, 'save_name': save_name, 'bias': bias, 'band': band,
+                    'foundry': foundry, 'PN_type': PN_Type, 'wg_height': wg_height_SI,
+                    'wg_width': wg_width_SI}
+                Variability.runChargeSamples(dimensions, samples, charge_arguments)
 
             # Set bool to false to allow for verifcation process to double check it is correct
             bool_charge = 0
@@ -1979,31 +1522,42 @@ while True:
 
             # This event runs the simulation depending on the supplied settings
             print("Running Simulation")
+
+            # Forgetting the process samples of the previous run
+            variability_results = {}
             print("Current Physical Parameters: R=" + str(Radius) +
                   "[um]_G=" + str(Gap) + "[nm]_Slab=" + str(slab_height) +
                   "[nm]_L=" + str(CouplingLength) + "[um]")
 
             # Converting to SI units for saving
-            Radius_SI = round(Radius*1e-6, 10)
-            slab_height_SI = round(slab_height*1e-9, 10)
-            CouplingLength_SI = round(CouplingLength*1e-6, 10)
-            wg_width_SI = round(wg_width*1e-9, 10)
-            wg_height_SI = round(wg_height*1e-9, 10)
+            Radius_SI = verify.ToSI('radius', Radius)
+            slab_height_SI = verify.ToSI('slab_height', slab_height)
+            CouplingLength_SI = verify.ToSI('coupling_length', CouplingLength)
+            wg_width_SI = verify.ToSI('wg_width', wg_width)
+            wg_height_SI = verify.ToSI('wg_height', wg_height)
 
             # Gap is unique since it can be swept for critical coupling
             if bool_critical_couple == 1:
+                # Gap range of the adaptive critical gap search
                 Gap_SI = np.linspace(100e-9, 600e-9, 11)
+                try:
+                    gap_tolerance_SI = round(abs(float(values['-GAP_TOLERANCE-']))*1e-9, 10)
+                except ValueError:
+                    gap_tolerance_SI = 1e-9
+                if gap_tolerance_SI == 0:
+                    gap_tolerance_SI = 1e-9
 
                 # This executes the critical coupling sweep
                 saved_results = sim.CriticalCouplingAutomation(
                     Radius_SI, Gap_SI, slab_height_SI,
                     CouplingLength_SI, LambdaStart, LambdaEnd,
                     band, CHARGE_file, prop_loss,
-                    wg_height_SI, wg_width_SI)
+                    wg_height_SI, wg_width_SI,
+                    search='adaptive', gap_tolerance=gap_tolerance_SI)
 
                 gap_box.update(str(round(saved_results.CriticalCoupleGap/1e-9)))
             else:
-                Gap_SI = round(Gap*1e-9, 10)
+                Gap_SI = verify.ToSI('gap', Gap)
 
                 # This executes a single iteration of the script
                 saved_results = sim.runSimulation(
@@ -2012,581 +1566,68 @@ while True:
                     wg_height_SI, wg_width_SI)
 
             if values['-CORNER_ANALYSIS-']:
-                # Executing 4 extra simulations
-                # The 2 paramters varied are depicted in the the variability dictionairy
-                # Intializing variability analysis variables that can be passed to charge solver
-                var_wg_height_SI = [round(wg_height_SI -
-                                          Variability_Dict['Waveguide Height Range']*1e-9, 10),
-                                    round(wg_height_SI +
-                                          Variability_Dict['Waveguide Height Range']*1e-9, 10)]
-                var_wg_width_SI = [round(wg_width_SI -
-                                         Variability_Dict['Waveguide Width Range']*1e-9, 10),
-                                   round(wg_width_SI +
-                                         Variability_Dict['Waveguide Width Range']*1e-9, 10)]
-                var_slab_height_SI = [round(slab_height_SI -
-                                            Variability_Dict['Slab Height Range']*1e-9, 10),
-                                      round(slab_height_SI +
-                                            Variability_Dict['Slab Height Range']*1e-9, 10)]
-                var_doping_error = [-Variability_Dict['Doping Concentration Range'],
-                                    Variability_Dict['Doping Concentration Range']]
-
-                # Since there are 4 variables possible for the variability analysis and we are doing
-                # subsets of 2, there exists 6 possible combinations, therefore six cases are shown
-                # This could be coded in a cleaner way if the functions were rewritten, TODO()
-
-                # Listing cases.
-                # Case: 1 = wg_height x wg_width
-                # Case: 2 = wg_height x slab_height
-                # Case: 3 = wg_height x doping_concentration
-                # Case: 4 = wg_width x slab_height
-                # Case: 5 = wg_width x doping_concentration
-                # Case: 6 = slab_height x doping_concentration
-
-                # Case 1
-                if (Variability_Dict['[ID] Waveguide Height'] and
-                        Variability_Dict['[ID] Waveguide Width']):
-
-                    # Defining identifiers to locate charge simulation files for corners
-                    identifier_BL = ('_wg_height-' + str(Variability_Dict['Waveguide Height Range'])
-                                     + Variability_Dict['Waveguide Height Units'] +
-                                     '_wg_width-' + str(Variability_Dict['Waveguide Width Range']) +
-                                     Variability_Dict['Waveguide Width Units'])
-
-                    identifier_BR = ('_wg_height+' + str(Variability_Dict['Waveguide Height Range'])
-                                     + Variability_Dict['Waveguide Height Units'] +
-                                     '_wg_width-' + str(Variability_Dict['Waveguide Width Range']) +
-                                     Variability_Dict['Waveguide Width Units'])
-
-                    identifier_TL = ('_wg_height-' + str(Variability_Dict['Waveguide Height Range'])
-                                     + Variability_Dict['Waveguide Height Units'] +
-                                     '_wg_width+' + str(Variability_Dict['Waveguide Width Range']) +
-                                     Variability_Dict['Waveguide Width Units'])
-
-                    identifier_TR = ('_wg_height+' + str(Variability_Dict['Waveguide Height Range'])
-                                     + Variability_Dict['Waveguide Height Units'] +
-                                     '_wg_width+' + str(Variability_Dict['Waveguide Width Range']) +
-                                     Variability_Dict['Waveguide Width Units'])
-
-                    identifier_BL = identifier_BL.replace('.', 'p')
-                    identifier_BR = identifier_BR.replace('.', 'p')
-                    identifier_TL = identifier_TL.replace('.', 'p')
-                    identifier_TR = identifier_TR.replace('.', 'p')
-
-                    # Constucting path to file from name, this got a little convoluted
-                    charge_file = str(CHARGE_file).split('\\')[-1]
-                    charge_file = charge_file.split('.')[0]
-                    CHARGE_file_BL = Path(str(CHARGE_file).replace(
-                        charge_file, charge_file + identifier_BL))
-                    CHARGE_file_BR = Path(str(CHARGE_file).replace(
-                        charge_file, charge_file + identifier_BR))
-                    CHARGE_file_TL = Path(str(CHARGE_file).replace(
-                        charge_file, charge_file + identifier_TL))
-                    CHARGE_file_TR = Path(str(CHARGE_file).replace(
-                        charge_file, charge_file + identifier_TR))
-
-                    if bool_critical_couple == 1:
-                        saved_results_BL = sim.CriticalCouplingAutomation(
-                            Radius_SI, Gap_SI, slab_height_SI, CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BL, prop_loss,
-                            var_wg_height_SI[0], var_wg_width_SI[0])
-                        Gap_BL = round(saved_results_BL.CriticalCoupleGap/1e-9)
-                    else:
-                        saved_results_BL = sim.runSimulation(
-                            Radius_SI, Gap_SI, slab_height_SI, CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BL, prop_loss,
-                            var_wg_height_SI[0], var_wg_width_SI[0])
-                    if bool_critical_couple == 1:
-                        saved_results_BR = sim.CriticalCouplingAutomation(
-                            Radius_SI, Gap_SI, slab_height_SI, CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BL, prop_loss,
-                            var_wg_height_SI[0], var_wg_width_SI[1])
-                        Gap_BR = round(saved_results_BR.CriticalCoupleGap/1e-9)
-                    else:
-                        saved_results_BR = sim.runSimulation(
-                            Radius_SI, Gap_SI, slab_height_SI, CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BR, prop_loss,
-                            var_wg_height_SI[0], var_wg_width_SI[1])
-                    if bool_critical_couple == 1:
-                        saved_results_TL = sim.CriticalCouplingAutomation(
-                            Radius_SI, Gap_SI, slab_height_SI, CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BL, prop_loss,
-                            var_wg_height_SI[1], var_wg_width_SI[0])
-                        Gap_TL = round(saved_results_TL.CriticalCoupleGap/1e-9)
-                    else:
-                        saved_results_TL = sim.runSimulation(
-                            Radius_SI, Gap_SI, slab_height_SI, CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_TL, prop_loss,
-                            var_wg_height_SI[1], var_wg_width_SI[0])
-                    if bool_critical_couple == 1:
-                        saved_results_TR = sim.CriticalCouplingAutomation(
-                            Radius_SI, Gap_SI, slab_height_SI, CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BL, prop_loss,
-                            var_wg_height_SI[1], var_wg_width_SI[1])
-                        Gap_TR = round(saved_results_TR.CriticalCoupleGap/1e-9)
-                    else:
-                        saved_results_TR = sim.runSimulation(
-                            Radius_SI, Gap_SI, slab_height_SI, CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_TR, prop_loss,
-                            var_wg_height_SI[1], var_wg_width_SI[1])
-                # Case 2
-                elif (Variability_Dict['[ID] Waveguide Height'] and
-                        Variability_Dict['[ID] Slab Height']):
-
-                    # Defining identifiers to locate charge simulation files for corners
-                    identifier_BL = ('_wg_height-' + str(Variability_Dict['Waveguide Height Range'])
-                                     + Variability_Dict['Waveguide Height Units'] +
-                                     '_slab_height-' + str(Variability_Dict['Slab Height Range']) +
-                                     Variability_Dict['Slab Height Units'])
-
-                    identifier_BR = ('_wg_height+' + str(Variability_Dict['Waveguide Height Range'])
-                                     + Variability_Dict['Waveguide Height Units'] +
-                                     '_slab_height-' + str(Variability_Dict['Slab Height Range']) +
-                                     Variability_Dict['Slab Height Units'])
-
-                    identifier_TL = ('_wg_height-' + str(Variability_Dict['Waveguide Height Range'])
-                                     + Variability_Dict['Waveguide Height Units'] +
-                                     '_slab_height+' + str(Variability_Dict['Slab Height Range']) +
-                                     Variability_Dict['Slab Height Units'])
-
-                    identifier_TR = ('_wg_height+' + str(Variability_Dict['Waveguide Height Range'])
-                                     + Variability_Dict['Waveguide Height Units'] +
-                                     '_slab_height+' + str(Variability_Dict['Slab Height Range']) +
-                                     Variability_Dict['Slab Height Units'])
-
-                    identifier_BL = identifier_BL.replace('.', 'p')
-                    identifier_BR = identifier_BR.replace('.', 'p')
-                    identifier_TL = identifier_TL.replace('.', 'p')
-                    identifier_TR = identifier_TR.replace('.', 'p')
-
-                    # Constucting path to file from name, this got a little convoluted
-                    charge_file = str(CHARGE_file).split('\\')[-1]
-                    charge_file = charge_file.split('.')[0]
-                    CHARGE_file_BL = Path(str(CHARGE_file).replace(
-                        charge_file, charge_file + identifier_BL))
-                    CHARGE_file_BR = Path(str(CHARGE_file).replace(
-                        charge_file, charge_file + identifier_BR))
-                    CHARGE_file_TL = Path(str(CHARGE_file).replace(
-                        charge_file, charge_file + identifier_TL))
-                    CHARGE_file_TR = Path(str(CHARGE_file).replace(
-                        charge_file, charge_file + identifier_TR))
-
-                    if bool_critical_couple == 1:
-                        saved_results_BL = sim.CriticalCouplingAutomation(
-                            Radius_SI, Gap_SI, var_slab_height_SI[0], CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BL, prop_loss,
-                            var_wg_height_SI[0], wg_width_SI)
-                        Gap_BL = round(saved_results_BL.CriticalCoupleGap/1e-9)
-                    else:
-                        saved_results_BL = sim.runSimulation(
-                            Radius_SI, Gap_SI, var_slab_height_SI[0], CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BL, prop_loss,
-                            var_wg_height_SI[0], wg_width_SI)
-                    if bool_critical_couple == 1:
-                        saved_results_BR = sim.CriticalCouplingAutomation(
-                            Radius_SI, Gap_SI, var_slab_height_SI[1], CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BL, prop_loss,
-                            var_wg_height_SI[0], wg_width_SI)
-                        Gap_BR = round(saved_results_BR.CriticalCoupleGap/1e-9)
-                    else:
-                        saved_results_BR = sim.runSimulation(
-                            Radius_SI, Gap_SI, var_slab_height_SI[1], CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BR, prop_loss,
-                            var_wg_height_SI[0], wg_width_SI)
-                    if bool_critical_couple == 1:
-                        saved_results_TL = sim.CriticalCouplingAutomation(
-                            Radius_SI, Gap_SI, var_slab_height_SI[0], CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BL, prop_loss,
-                            var_wg_height_SI[1], wg_width_SI)
-                        Gap_TL = round(saved_results_TL.CriticalCoupleGap/1e-9)
-                    else:
-                        saved_results_TL = sim.runSimulation(
-                            Radius_SI, Gap_SI, var_slab_height_SI[0], CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_TL, prop_loss,
-                            var_wg_height_SI[1], wg_width_SI)
-                    if bool_critical_couple == 1:
-                        saved_results_TR = sim.CriticalCouplingAutomation(
-                            Radius_SI, Gap_SI, var_slab_height_SI[1], CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BL, prop_loss,
-                            var_wg_height_SI[1], wg_width_SI)
-                        Gap_TR = round(saved_results_TR.CriticalCoupleGap/1e-9)
-                    else:
-                        saved_results_TR = sim.runSimulation(
-                            Radius_SI, Gap_SI, var_slab_height_SI[1], CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_TR, prop_loss,
-                            var_wg_height_SI[1], wg_width_SI)
-                # Case 3
-                elif (Variability_Dict['[ID] Waveguide Height'] and
-                        Variability_Dict['[ID] Doping Concentration']):
-
-                    # Defining identifiers to locate charge simulation files for corners
-                    identifier_BL = ('_wg_height-' + str(Variability_Dict['Waveguide Height Range'])
-                                     + Variability_Dict['Waveguide Height Units'] +
-                                     '_doping-' +
-                                     str(Variability_Dict['Doping Concentration Range']) +
-                                     Variability_Dict['Doping Concentration Units'])
-
-                    identifier_BR = ('_wg_height+' + str(Variability_Dict['Waveguide Height Range'])
-                                     + Variability_Dict['Waveguide Height Units'] +
-                                     '_doping-' +
-                                     str(Variability_Dict['Doping Concentration Range']) +
-                                     Variability_Dict['Doping Concentration Units'])
-
-                    identifier_TL = ('_wg_height-' + str(Variability_Dict['Waveguide Height Range'])
-                                     + Variability_Dict['Waveguide Height Units'] +
-                                     '_doping+' +
-                                     str(Variability_Dict['Doping Concentration Range']) +
-                                     Variability_Dict['Doping Concentration Units'])
-
-                    identifier_TR = ('_wg_height+' + str(Variability_Dict['Waveguide Height Range'])
-                                     + Variability_Dict['Waveguide Height Units'] +
-                                     '_doping+' +
-                                     str(Variability_Dict['Doping Concentration Range']) +
-                                     Variability_Dict['Doping Concentration Units'])
-
-                    identifier_BL = identifier_BL.replace('.', 'p')
-                    identifier_BR = identifier_BR.replace('.', 'p')
-                    identifier_TL = identifier_TL.replace('.', 'p')
-                    identifier_TR = identifier_TR.replace('.', 'p')
-
-                    # Constucting path to file from name, this got a little convoluted
-                    charge_file = str(CHARGE_file).split('\\')[-1]
-                    charge_file = charge_file.split('.')[0]
-                    CHARGE_file_BL = Path(str(CHARGE_file).replace(
-                        charge_file, charge_file + identifier_BL))
-                    CHARGE_file_BR = Path(str(CHARGE_file).replace(
-                        charge_file, charge_file + identifier_BR))
-                    CHARGE_file_TL = Path(str(CHARGE_file).replace(
-                        charge_file, charge_file + identifier_TL))
-                    CHARGE_file_TR = Path(str(CHARGE_file).replace(
-                        charge_file, charge_file + identifier_TR))
-
-                    if bool_critical_couple == 1:
-                        saved_results_BL = sim.CriticalCouplingAutomation(
-                            Radius_SI, Gap_SI, slab_height_SI, CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BL, prop_loss,
-                            var_wg_height_SI[0], wg_width_SI)
-                        Gap_BL = round(saved_results_BL.CriticalCoupleGap/1e-9)
-                    else:
-                        saved_results_BL = sim.runSimulation(
-                            Radius_SI, Gap_SI, slab_height_SI, CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BL, prop_loss,
-                            var_wg_height_SI[0], wg_width_SI)
-                    if bool_critical_couple == 1:
-                        saved_results_BR = sim.CriticalCouplingAutomation(
-                            Radius_SI, Gap_SI, slab_height_SI, CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BL, prop_loss,
-                            var_wg_height_SI[0], wg_width_SI)
-                        Gap_BR = round(saved_results_BR.CriticalCoupleGap/1e-9)
-                    else:
-                        saved_results_BR = sim.runSimulation(
-                            Radius_SI, Gap_SI, slab_height_SI, CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BR, prop_loss,
-                            var_wg_height_SI[0], wg_width_SI)
-                    if bool_critical_couple == 1:
-                        saved_results_TL = sim.CriticalCouplingAutomation(
-                            Radius_SI, Gap_SI, slab_height_SI, CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BL, prop_loss,
-                            var_wg_height_SI[1], wg_width_SI)
-                        Gap_TL = round(saved_results_TL.CriticalCoupleGap/1e-9)
-                    else:
-                        saved_results_TL = sim.runSimulation(
-                            Radius_SI, Gap_SI, slab_height_SI, CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_TL, prop_loss,
-                            var_wg_height_SI[1], wg_width_SI)
-                    if bool_critical_couple == 1:
-                        saved_results_TR = sim.CriticalCouplingAutomation(
-                            Radius_SI, Gap_SI, slab_height_SI, CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BL, prop_loss,
-                            var_wg_height_SI[1], wg_width_SI)
-                        Gap_TR = round(saved_results_TR.CriticalCoupleGap/1e-9)
-                    else:
-                        saved_results_TR = sim.runSimulation(
-                            Radius_SI, Gap_SI, slab_height_SI, CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_TR, prop_loss,
-                            var_wg_height_SI[1], wg_width_SI)
-
-                # Case 4
-                elif (Variability_Dict['[ID] Waveguide Width'] and
-                        Variability_Dict['[ID] Slab Height']):
-
-                    # Defining identifiers to locate charge simulation files for corners
-                    identifier_BL = ('_wg_width-' + str(Variability_Dict['Waveguide Width Range'])
-                                     + Variability_Dict['Waveguide Width Units'] +
-                                     '_slab_height-' + str(Variability_Dict['Slab Height Range']) +
-                                     Variability_Dict['Slab Height Units'])
-
-                    identifier_BR = ('_wg_width+' + str(Variability_Dict['Waveguide Width Range'])
-                                     + Variability_Dict['Waveguide Width Units'] +
-                                     '_slab_height-' + str(Variability_Dict['Slab Height Range']) +
-                                     Variability_Dict['Slab Height Units'])
-
-                    identifier_TL = ('_wg_width-' + str(Variability_Dict['Waveguide Width Range'])
-                                     + Variability_Dict['Waveguide Width Units'] +
-                                     '_slab_height+' + str(Variability_Dict['Slab Height Range']) +
-                                     Variability_Dict['Slab Height Units'])
-
-                    identifier_TR = ('_wg_width+' + str(Variability_Dict['Waveguide Width Range'])
-                                     + Variability_Dict['Waveguide Width Units'] +
-                                     '_slab_height+' + str(Variability_Dict['Slab Height Range']) +
-                                     Variability_Dict['Slab Height Units'])
-
-                    identifier_BL = identifier_BL.replace('.', 'p')
-                    identifier_BR = identifier_BR.replace('.', 'p')
-                    identifier_TL = identifier_TL.replace('.', 'p')
-                    identifier_TR = identifier_TR.replace('.', 'p')
-
-                    # Constucting path to file from name, this got a little convoluted
-                    charge_file = str(CHARGE_file).split('\\')[-1]
-                    charge_file = charge_file.split('.')[0]
-                    CHARGE_file_BL = Path(str(CHARGE_file).replace(
-                        charge_file, charge_file + identifier_BL))
-                    CHARGE_file_BR = Path(str(CHARGE_file).replace(
-                        charge_file, charge_file + identifier_BR))
-                    CHARGE_file_TL = Path(str(CHARGE_file).replace(
-                        charge_file, charge_file + identifier_TL))
-                    CHARGE_file_TR = Path(str(CHARGE_file).replace(
-                        charge_file, charge_file + identifier_TR))
-
-                    if bool_critical_couple == 1:
-                        saved_results_BL = sim.CriticalCouplingAutomation(
-                            Radius_SI, Gap_SI, var_slab_height_SI[0], CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BL, prop_loss,
-                            wg_height_SI, var_wg_width_SI[0])
-                        Gap_BL = round(saved_results_BL.CriticalCoupleGap/1e-9)
-                    else:
-                        saved_results_BL = sim.runSimulation(
-                            Radius_SI, Gap_SI, var_slab_height_SI[0], CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BL, prop_loss,
-                            wg_height_SI, var_wg_width_SI[0])
-                    if bool_critical_couple == 1:
-                        saved_results_BR = sim.CriticalCouplingAutomation(
-                            Radius_SI, Gap_SI, var_slab_height_SI[1], CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BL, prop_loss,
-                            wg_height_SI, var_wg_width_SI[0])
-                        Gap_BR = round(saved_results_BR.CriticalCoupleGap/1e-9)
-                    else:
-                        saved_results_BR = sim.runSimulation(
-                            Radius_SI, Gap_SI, var_slab_height_SI[1], CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BR, prop_loss,
-                            wg_height_SI, var_wg_width_SI[0])
-                    if bool_critical_couple == 1:
-                        saved_results_TL = sim.CriticalCouplingAutomation(
-                            Radius_SI, Gap_SI, var_slab_height_SI[0], CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BL, prop_loss,
-                            wg_height_SI, var_wg_width_SI[1])
-                        Gap_TL = round(saved_results_TL.CriticalCoupleGap/1e-9)
-                    else:
-                        saved_results_TL = sim.runSimulation(
-                            Radius_SI, Gap_SI, var_slab_height_SI[0], CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_TL, prop_loss,
-                            wg_height_SI, var_wg_width_SI[1])
-                    if bool_critical_couple == 1:
-                        saved_results_TR = sim.CriticalCouplingAutomation(
-                            Radius_SI, Gap_SI, var_slab_height_SI[1], CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BL, prop_loss,
-                            wg_height_SI, var_wg_width_SI[1])
-                        Gap_TR = round(saved_results_TR.CriticalCoupleGap/1e-9)
-                    else:
-                        saved_results_TR = sim.runSimulation(
-                            Radius_SI, Gap_SI, var_slab_height_SI[1], CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_TR, prop_loss,
-                            wg_height_SI, var_wg_width_SI[1])
-                # Case 5
-                elif (Variability_Dict['[ID] Waveguide Width'] and
-                        Variability_Dict['[ID] Doping Concentration']):
-
-                    # Defining identifiers to locate charge simulation files for corners
-                    identifier_BL = ('_wg_width-' + str(Variability_Dict['Waveguide Width Range'])
-                                     + Variability_Dict['Waveguide Width Units'] +
-                                     '_doping-' +
-                                     str(Variability_Dict['Doping Concentration Range']) +
-                                     Variability_Dict['Doping Concentration Units'])
-
-                    identifier_BR = ('_wg_width+' + str(Variability_Dict['Waveguide Width Range'])
-                                     + Variability_Dict['Waveguide Width Units'] +
-                                     '_doping-' +
-                                     str(Variability_Dict['Doping Concentration Range']) +
-                                     Variability_Dict['Doping Concentration Units'])
-
-                    identifier_TL = ('_wg_width-' + str(Variability_Dict['Waveguide Width Range'])
-                                     + Variability_Dict['Waveguide Width Units'] +
-                                     '_doping+' +
-                                     str(Variability_Dict['Doping Concentration Range']) +
-                                     Variability_Dict['Doping Concentration Units'])
-
-                    identifier_TR = ('_wg_width+' + str(Variability_Dict['Waveguide Width Range'])
-                                     + Variability_Dict['Waveguide Width Units'] +
-                                     '_doping+' +
-                                     str(Variability_Dict['Doping Concentration Range']) +
-                                     Variability_Dict['Doping Concentration Units'])
-
-                    identifier_BL = identifier_BL.replace('.', 'p')
-                    identifier_BR = identifier_BR.replace('.', 'p')
-                    identifier_TL = identifier_TL.replace('.', 'p')
-                    identifier_TR = identifier_TR.replace('.', 'p')
-
-                    # Constucting path to file from name, this got a little convoluted
-                    charge_file = str(CHARGE_file).split('\\')[-1]
-                    charge_file = charge_file.split('.')[0]
-                    CHARGE_file_BL = Path(str(CHARGE_file).replace(
-                        charge_file, charge_file + identifier_BL))
-                    CHARGE_file_BR = Path(str(CHARGE_file).replace(
-                        charge_file, charge_file + identifier_BR))
-                    CHARGE_file_TL = Path(str(CHARGE_file).replace(
-                        charge_file, charge_file + identifier_TL))
-                    CHARGE_file_TR = Path(str(CHARGE_file).replace(
-                        charge_file, charge_file + identifier_TR))
-
-                    if bool_critical_couple == 1:
-                        saved_results_BL = sim.CriticalCouplingAutomation(
-                            Radius_SI, Gap_SI, slab_height_SI, CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BL, prop_loss,
-                            wg_height_SI, var_wg_width_SI[0])
-                        Gap_BL = round(saved_results_BL.CriticalCoupleGap/1e-9)
-                    else:
-                        saved_results_BL = sim.runSimulation(
-                            Radius_SI, Gap_SI, slab_height_SI, CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BL, prop_loss,
-                            wg_height_SI, var_wg_width_SI[0])
-                    if bool_critical_couple == 1:
-                        saved_results_BR = sim.CriticalCouplingAutomation(
-                            Radius_SI, Gap_SI, slab_height_SI, CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BL, prop_loss,
-                            wg_height_SI, var_wg_width_SI[0])
-                        Gap_BR = round(saved_results_BR.CriticalCoupleGap/1e-9)
-                    else:
-                        saved_results_BR = sim.runSimulation(
-                            Radius_SI, Gap_SI, slab_height_SI, CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BR, prop_loss,
-                            wg_height_SI, var_wg_width_SI[0])
-                    if bool_critical_couple == 1:
-                        saved_results_TL = sim.CriticalCouplingAutomation(
-                            Radius_SI, Gap_SI, slab_height_SI, CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BL, prop_loss,
-                            wg_height_SI, var_wg_width_SI[1])
-                        Gap_TL = round(saved_results_TL.CriticalCoupleGap/1e-9)
-                    else:
-                        saved_results_TL = sim.runSimulation(
-                            Radius_SI, Gap_SI, slab_height_SI, CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_TL, prop_loss,
-                            wg_height_SI, var_wg_width_SI[1])
-                    if bool_critical_couple == 1:
-                        saved_results_TR = sim.CriticalCouplingAutomation(
-                            Radius_SI, Gap_SI, slab_height_SI, CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BL, prop_loss,
-                            wg_height_SI, var_wg_width_SI[1])
-                        Gap_TR = round(saved_results_TR.CriticalCoupleGap/1e-9)
-                    else:
-                        saved_results_TR = sim.runSimulation(
-                            Radius_SI, Gap_SI, slab_height_SI, CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_TR, prop_loss,
-                            wg_height_SI, var_wg_width_SI[1])
-                # Case 6
-                elif (Variability_Dict['[ID] Slab Height'] and
-                        Variability_Dict['[ID] Doping Concentration']):
-
-                    # Defining identifiers to locate charge simulation files for corners
-                    identifier_BL = ('_slab_height-' + str(Variability_Dict['Slab Height Range'])
-                                     + Variability_Dict['Slab Height Units'] +
-                                     '_doping-' +
-                                     str(Variability_Dict['Doping Concentration Range']) +
-                                     Variability_Dict['Doping Concentration Units'])
-
-                    identifier_BR = ('_slab_height+' + str(Variability_Dict['Slab Height Range'])
-                                     + Variability_Dict['Slab Height Units'] +
-                                     '_doping-' +
-                                     str(Variability_Dict['Doping Concentration Range']) +
-                                     Variability_Dict['Doping Concentration Units'])
-
-                    identifier_TL = ('_slab_height-' + str(Variability_Dict['Slab Height Range'])
-                                     + Variability_Dict['Slab Height Units'] +
-                                     '_doping+' +
-                                     str(Variability_Dict['Doping Concentration Range']) +
-                                     Variability_Dict['Doping Concentration Units'])
-
-                    identifier_TR = ('_slab_height+' + str(Variability_Dict['Slab Height Range'])
-                                     + Variability_Dict['Slab Height Units'] +
-                                     '_doping+' +
-                                     str(Variability_Dict['Doping Concentration Range']) +
-                                     Variability_Dict['Doping Concentration Units'])
-
-                    identifier_BL = identifier_BL.replace('.', 'p')
-                    identifier_BR = identifier_BR.replace('.', 'p')
-                    identifier_TL = identifier_TL.replace('.', 'p')
-                    identifier_TR = identifier_TR.replace('.', 'p')
-
-                    # Constucting path to file from name, this got a little convoluted
-                    charge_file = str(CHARGE_file).split('\\')[-1]
-                    charge_file = charge_file.split('.')[0]
-                    CHARGE_file_BL = Path(str(CHARGE_file).replace(
-                        charge_file, charge_file + identifier_BL))
-                    CHARGE_file_BR = Path(str(CHARGE_file).replace(
-                        charge_file, charge_file + identifier_BR))
-                    CHARGE_file_TL = Path(str(CHARGE_file).replace(
-                        charge_file, charge_file + identifier_TL))
-                    CHARGE_file_TR = Path(str(CHARGE_file).replace(
-                        charge_file, charge_file + identifier_TR))
-
-                    if bool_critical_couple == 1:
-                        saved_results_BL = sim.CriticalCouplingAutomation(
-                            Radius_SI, Gap_SI, var_slab_height_SI[0], CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BL, prop_loss,
-                            wg_height_SI, wg_width_SI)
-                        Gap_BL = round(saved_results_BL.CriticalCoupleGap/1e-9)
-                    else:
-                        saved_results_BL = sim.runSimulation(
-                            Radius_SI, Gap_SI, var_slab_height_SI[0], CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BL, prop_loss,
-                            wg_height_SI, wg_width_SI)
-                    if bool_critical_couple == 1:
-                        saved_results_BR = sim.CriticalCouplingAutomation(
-                            Radius_SI, Gap_SI, var_slab_height_SI[0], CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BL, prop_loss,
-                            wg_height_SI, wg_width_SI)
-                        Gap_BR = round(saved_results_BR.CriticalCoupleGap/1e-9)
-                    else:
-                        saved_results_BR = sim.runSimulation(
-                            Radius_SI, Gap_SI, var_slab_height_SI[0], CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BR, prop_loss,
-                            wg_height_SI, wg_width_SI)
-                    if bool_critical_couple == 1:
-                        saved_results_TL = sim.CriticalCouplingAutomation(
-                            Radius_SI, Gap_SI, var_slab_height_SI[1], CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BL, prop_loss,
-                            wg_height_SI, wg_width_SI)
-                        Gap_TL = round(saved_results_TL.CriticalCoupleGap/1e-9)
-                    else:
-                        saved_results_TL = sim.runSimulation(
-                            Radius_SI, Gap_SI, var_slab_height_SI[1], CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_TL, prop_loss,
-                            wg_height_SI, wg_width_SI)
-                    if bool_critical_couple == 1:
-                        saved_results_TR = sim.CriticalCouplingAutomation(
-                            Radius_SI, Gap_SI, var_slab_height_SI[1], CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_BL, prop_loss,
-                            wg_height_SI, wg_width_SI)
-                        Gap_TR = round(saved_results_TR.CriticalCoupleGap/1e-9)
-                    else:
-                        saved_results_TR = sim.runSimulation(
-                            Radius_SI, Gap_SI, var_slab_height_SI[1], CouplingLength_SI,
-                            LambdaStart, LambdaEnd, band, CHARGE_file_TR, prop_loss,
-                            wg_height_SI, wg_width_SI)
+                # Generating the process samples, the same ones as the CHARGE corner run
+                dimensions = Variability.Dimensions(Variability_Dict)
+                samples = Variability.Samples(dimensions, sampling_method, sampling_count)
+
+                # Simulating every distinct sample concurrently, each sample is its own pipeline
+                if bool_critical_couple == 1:
+                    sample_results = Variability.runRingSamples(
+                        dimensions, samples, CHARGE_file, Radius_SI, Gap_SI, slab_height_SI,
+                        CouplingLength_SI, LambdaStart, LambdaEnd, band, prop_loss,
+                        wg_height_SI, wg_width_SI, search='adaptive',
+                        gap_tolerance=gap_tolerance_SI)
+                    variability_table = Variability.FOMTable(dimensions, samples, sample_results)
+                else:
+                    sample_results = Variability.runRingSamples(
+                        dimensions, samples, CHARGE_file, Radius_SI, Gap_SI, slab_height_SI,
+                        CouplingLength_SI, LambdaStart, LambdaEnd, band, prop_loss,
+                        wg_height_SI, wg_width_SI)
+                    variability_table = Variability.FOMTable(dimensions, samples, sample_results,
+                                                             Gap_SI)
+                print(Variability.FormatTable(variability_table))
+
+                if sampling_method == 'montecarlo':
+                    # Fitting the yield surrogate to the samples and the stored records of the
+                    # same design, the resonance tolerance is around the nominal resonance
+                    record_file = YieldAnalysis.RecordFile(
+                        CHARGE_file, Radius_SI, Gap_SI, CouplingLength_SI, band, slab_height_SI,
+                        wg_height_SI, wg_width_SI, prop_loss, LambdaStart, LambdaEnd)
+                    yield_specs = {}
+                    if resonance_tolerance is not None:
+                        nominal_resonance = variability_table['resonance'][0]
+                        yield_specs['resonance'] = (nominal_resonance - resonance_tolerance,
+                                                    nominal_resonance + resonance_tolerance)
+                    if min_extinction is not None:
+                        yield_specs['extinction'] = (min_extinction, None)
+                    yield_report = YieldAnalysis.runYield(
+                        dimensions, variability_table,
+                        YieldAnalysis.Distributions(dimensions, yield_distribution), yield_specs,
+                        record_file=record_file)
+                    print(YieldAnalysis.FormatReport(yield_report))
+
+                # Labelling the samples for the result selector
+                variability_results = {}
+                for record, sample_result in zip(variability_table, sample_results):
+                    label = 'Sample ' + str(record['sample']) + ' ' + record['identifier']
+                    variability_results[label] = sample_result
 
                 # If corner analysis was performed, the result windows are made visible
-                toggle_Corner_Analysis_Results(True)
+                toggle_Corner_Analysis_Results(True, list(variability_results))
 
                 if bool_critical_couple == 1:
                     # Updating gap display box to show a range of gaps
                     # that could be needed for critical
                     # coupling based on the corner analysis results
-                    critical_gaps = [Gap_BL, Gap_BR, Gap_TL, Gap_TR]
+                    critical_gaps = np.round(variability_table['gap']/1e-9).astype(int)
                     min_critical_gap = min(critical_gaps)
                     max_critical_gap = max(critical_gaps)
                     gap_box.update(str(min_critical_gap) + ' - ' + str(max_critical_gap))
                     sg.Popup(
-                        'Range of possible critical coupling gaps shown in gap display box'
-                        ' Bl = ' + str(Gap_BL) + ', BR = ' + str(Gap_BR) +
-                        ', Tl = ' + str(Gap_TL) + ', TR = ' + str(Gap_TR), keep_on_top=True)
+                        'Range of possible critical coupling gaps shown in gap display box ' +
+                        ', '.join('Sample ' + str(record['sample']) + ' = ' + str(gap)
+                                  for record, gap in zip(variability_table, critical_gaps)),
+                        keep_on_top=True)
 
             # Now that the data has been simulated we will plot it in the results tab.
             # Enabling result display buttons
@@ -2598,29 +1639,15 @@ while True:
 
     elif event == '-CC-':
         # This event handles plotting the coupling coefficient i.e the power coupling coefficient
-        if values['-NOMINAL-']:
-            plot_CC(saved_results, identifier='Nominal')
-        elif values['-CORNER_BL-']:
-            plot_CC(saved_results_BL, identifier='Bottom Left Corner')
-        elif values['-CORNER_BR-']:
-            plot_CC(saved_results_BR, identifier='Bottom Right Corner')
-        elif values['-CORNER_TL-']:
-            plot_CC(saved_results_TL, identifier='Top Left Corner')
-        elif values['-CORNER_TR-']:
-            plot_CC(saved_results_TR, identifier='Top Right Corner')
+        sample_results, sample_label = SelectedResults(values)
+        with Tracing.tracer.span('CC', 'plot'):
+            plot_CC(sample_results, identifier=sample_label)
 
     elif event == '-NEFF-':
         # This event handles the dneff/voltage plot
-        if values['-NOMINAL-']:
-            plot_NEFF(saved_results, identifier='Nominal')
-        elif values['-CORNER_BL-']:
-            plot_NEFF(saved_results_BL, identifier='Bottom Left Corner')
-        elif values['-CORNER_BR-']:
-            plot_NEFF(saved_results_BR, identifier='Bottom Right Corner')
-        elif values['-CORNER_TL-']:
-            plot_NEFF(saved_results_TL, identifier='Top Left Corner')
-        elif values['-CORNER_TR-']:
-            plot_NEFF(saved_results_TR, identifier='Top Right Corner')
+        sample_results, sample_label = SelectedResults(values)
+        with Tracing.tracer.span('NEFF', 'plot'):
+            plot_NEFF(sample_results, identifier=sample_label)
 
     elif event == '-PN_RESULT-':
 
@@ -2638,69 +1665,34 @@ while True:
 
     elif event == '-PHASE-':
         # This handles the phase shift plot
-        if values['-NOMINAL-']:
-            plot_Phase(saved_results, identifier='Nominal')
-        elif values['-CORNER_BL-']:
-            plot_Phase(saved_results_BL, identifier='Bottom Left Corner')
-        elif values['-CORNER_BR-']:
-            plot_Phase(saved_results_BR, identifier='Bottom Right Corner')
-        elif values['-CORNER_TL-']:
-            plot_Phase(saved_results_TL, identifier='Top Left Corner')
-        elif values['-CORNER_TR-']:
-            plot_Phase(saved_results_TR, identifier='Top Right Corner')
+        sample_results, sample_label = SelectedResults(values)
+        with Tracing.tracer.span('Phase', 'plot'):
+            plot_Phase(sample_results, identifier=sample_label)
 
     elif event == '-CAPACITANCE-':
         # This handles the capacitance plot
-        if values['-NOMINAL-']:
-            plot_Capacitance(saved_results, identifier='Nominal')
-        elif values['-CORNER_BL-']:
-            plot_Capacitance(saved_results_BL, identifier='Bottom Left Corner')
-        elif values['-CORNER_BR-']:
-            plot_Capacitance(saved_results_BR, identifier='Bottom Right Corner')
-        elif values['-CORNER_TL-']:
-            plot_Capacitance(saved_results_TL, identifier='Top Left Corner')
-        elif values['-CORNER_TR-']:
-            plot_Capacitance(saved_results_TR, identifier='Top Right Corner')
+        sample_results, sample_label = SelectedResults(values)
+        with Tracing.tracer.span('Capacitance', 'plot'):
+            plot_Capacitance(sample_results, identifier=sample_label)
 
     elif event == '-RESISTANCE-':
         # This handles the resistance plot
-        if values['-NOMINAL-']:
-            plot_Resistance(saved_results, identifier='Nominal')
-        elif values['-CORNER_BL-']:
-            plot_Resistance(saved_results_BL, identifier='Bottom Left Corner')
-        elif values['-CORNER_BR-']:
-            plot_Resistance(saved_results_BR, identifier='Bottom Right Corner')
-        elif values['-CORNER_TL-']:
-            plot_Resistance(saved_results_TL, identifier='Top Left Corner')
-        elif values['-CORNER_TR-']:
-            plot_Resistance(saved_results_TR, identifier='Top Right Corner')
+        sample_results, sample_label = SelectedResults(values)
+        with Tracing.tracer.span('Resistance', 'plot'):
+            plot_Resistance(sample_results, identifier=sample_label)
 
     elif event == '-BANDWIDTH-':
         # This handles the bandwidth plot
-        if values['-NOMINAL-']:
-            plot_Bandwidth(saved_results, identifier='Nominal')
-        elif values['-CORNER_BL-']:
-            plot_Bandwidth(saved_results_BL, identifier='Bottom Left Corner')
-        elif values['-CORNER_BR-']:
-            plot_Bandwidth(saved_results_BR, identifier='Bottom Right Corner')
-        elif values['-CORNER_TL-']:
-            plot_Bandwidth(saved_results_TL, identifier='Top Left Corner')
-        elif values['-CORNER_TR-']:
-            plot_Bandwidth(saved_results_TR, identifier='Top Right Corner')
+        sample_results, sample_label = SelectedResults(values)
+        with Tracing.tracer.span('Bandwidth', 'plot'):
+            plot_Bandwidth(sample_results, identifier=sample_label)
 
     elif event == '-T-':
         # This event handels the transmission spectra plotting
         # This event handles the dneff/voltage plot
-        if values['-NOMINAL-']:
-            plot_T(saved_results, identifier='Nominal')
-        elif values['-CORNER_BL-']:
-            plot_T(saved_results_BL, identifier='Bottom Left Corner')
-        elif values['-CORNER_BR-']:
-            plot_T(saved_results_BR, identifier='Bottom Right Corner')
-        elif values['-CORNER_TL-']:
-            plot_T(saved_results_TL, identifier='Top Left Corner')
-        elif values['-CORNER_TR-']:
-            plot_T(saved_results_TR, identifier='Top Right Corner')
+        sample_results, sample_label = SelectedResults(values)
+        with Tracing.tracer.span('T', 'plot'):
+            plot_T(sample_results, identifier=sample_label)
 
     elif event == '-NRZ-':
         # This event handles the NRZ eye diagram sub-simulation window
@@ -2792,6 +1784,16 @@ while True:
             fig = plt.gcf()
             fig.canvas.manager.window.attributes('-topmost', 1)
 
+            # Displaying the eye metrics
+            metrics = saved_results.EyeMetrics
+            result1_str = 'Eye Height [a.u.]: ' + str(round(float(metrics['eye_height']), 4))
+            result2_str = 'Eye Width [ps]: ' + str(round(float(metrics['eye_width'])*1e12, 2))
+            result3_str = ('Extinction Ratio [dB]: '
+                           + str(round(float(metrics['extinction_ratio']), 2)))
+            result4_str = 'OMA [a.u.]: ' + str(round(float(metrics['OMA']), 4))
+            result5_str = 'TDECQ [dB]: ' + str(round(float(metrics['TDECQ']), 2))
+            update_text_results(result1_str, result2_str, result3_str, result4_str, result5_str)
+
         else:
             print('Not updating Eye diagram until proper data is provided')
 
@@ -6,12 +6,28 @@ GUI and the scripts
 
 @author: AlexTofini
 """
+import os
+import itertools
+import numpy as np
 import Mode_SetUp
 import FDTD_SetUp
 import Interconnect_SetUp
 import CHARGE_SetUp
 import ConnectToDatabase as database
 import CriticalCoupling_Solver as CCs
+import EyeAnalysis
+import StageGraph
+import Tracing
+
+# Inputs each shareable pipeline stage depends on, their stage keys are built from these only
+geometry_stage_fields = ('radius', 'coupling_length', 'slab_height', 'band', 'wg_height',
+                         'wg_width')
+waveguide_stage_fields = geometry_stage_fields + ('charge_file',)
+sweep_stage_fields = geometry_stage_fields + ('gaps',)
+gap_stage_fields = geometry_stage_fields + ('gaps', 'waveguide', 'prop_loss', 'search',
+                                            'gap_tolerance')
+ring_stage_fields = ('coupler', 'waveguide', 'charge_file', 'prop_loss', 'lambda_start',
+                     'lambda_end', 'ring_engine')
 
 
 class Physical_Parameters():
@@ -87,6 +103,16 @@ class Simulation_Parameters():
                 Options: [no, yes, N/A]
             propagation_loss : float
                 Excess propagation loss supplied by the user.
+            ring_engine : str
+                Engine used for the ring transmission and the eye diagrams, defaults to the
+                RING_ENGINE variable.
+                Options: [interconnect, numpy]
+            neff : float
+                Unbiased effective index at the band center used by the numpy engine instead of
+                the MODE result. 0 uses the MODE result.
+            ng : float
+                Group index at the band center used by the numpy engine instead of the MODE
+                result. 0 uses the MODE result.
         """
         self.lambda_start = 0
         self.lambda_end = 0
@@ -98,6 +124,9 @@ class Simulation_Parameters():
         self.eye_vmax = 0
         self.staticNonLinCorrec = ''
         self.propagation_loss = 0
+        self.ring_engine = os.environ.get('RING_ENGINE', 'interconnect')
+        self.neff = 0
+        self.ng = 0
 
 # %% Charge parameters class constructor
 
@@ -209,6 +238,10 @@ class results():
                 Array containing the coupling coefficient component of the coupling result.
             dNeff : array
                 Array containing the results for the change in effective index v.s. voltage.
+            neff : float
+                Effective index of the unbiased waveguide at the band center from MODE.
+            ng : float
+                Group index of the unbiased waveguide at the band center from MODE.
             wavelength : array
                 Array containing the results for the wavl. component of the transmission spectra.
             T : array
@@ -225,6 +258,14 @@ class results():
                 List containing averaged resistance values v.s. voltage across ssac signal sweep
             bandwidth : list
                 List containing averaged bandwidth values v.s. voltage across ssac signal sweep
+            FOMs : structured array
+                Resonance figures of merit of every voltage of the transmission spectra.
+            EyeMetrics : structured record
+                Eye height, width, extinction ratio, OMA and TDECQ of the last eye diagram.
+            trace : dict
+                Span summary of the ring simulation run, see Tracing.Tracer.summary.
+            eye_trace : dict
+                Span summary of the last eye diagram run.
         """
         self.coupler_ID = 0
         self.waveguide_ID = 0
@@ -232,6 +273,8 @@ class results():
         self.f = []
         self.CC = []
         self.dNeff = []
+        self.neff = None
+        self.ng = None
         self.wavelength = []
         self.T = []
         self.NonLinVoltages = []
@@ -245,19 +288,50 @@ class results():
         self.capacitance = []
         self.resistance = []
         self.bandwidth = []
+        self.FOMs = []
+        self.EyeMetrics = None
+        self.trace = {}
+        self.eye_trace = {}
 
 
-def runSimulation(Radius, Gap, Slab_Height, CouplingLength, LambdaStart, LambdaEnd, Band,
-                  CHARGE_file, prop_loss, Waveguide_Height, Waveguide_Width):
+def QueryChargeRecord(CHARGE_file):
     """
-    Execute simulation pipeline to create requested micro-ring modulator.
+    Find the CHARGE record of a CHARGE result file, searching both foundries.
+
+    Parameters
+    ----------
+    CHARGE_file : WindowsPath
+        Path object pointing to to the CHARGE file.
+
+    Returns
+    -------
+    result : list
+        Query results from the CHARGE table of the foundry, empty if no foundry has the file.
+    foundry : str
+        Foundry of the record, None if no foundry has the file.
+        Options : [AMF, AIM]
+
+    """
+    charge_file = os.path.basename(str(CHARGE_file).replace('\\', '/'))
+    charge_file = charge_file.split('.')[0]
+    for foundry in ('AMF', 'AIM'):
+        result = database.QueryChargeFile(charge_file, foundry)
+        if result != []:
+            return result, foundry
+    return [], None
+
+
+def RingSetup(Radius, Gap, Slab_Height, CouplingLength, LambdaStart, LambdaEnd, Band, CHARGE_file,
+              prop_loss, Waveguide_Height, Waveguide_Width):
+    """
+    Initialize the classes of a ring simulation from its settings and CHARGE record.
 
     Parameters
     ----------
     Radius : float
         Ring radius.
-    Gap : float
-        Ring gap.
+    Gap : float or list
+        Ring gap, or the gaps of the critical coupling search.
     Slab_Height : float
         Slab height.
     CouplingLength : float
@@ -273,11 +347,26 @@ def runSimulation(Radius, Gap, Slab_Height, CouplingLength, LambdaStart, LambdaE
         Path object pointing to to CHARGE file used for the ring simulation.
     prop_loss : float
         Excess propagation loss supplied by the user.
+    Waveguide_Height : float
+        Waveguide height.
+    Waveguide_Width : float
+        Waveguide width.
+
+    Raises
+    ------
+    ValueError
+        If no foundry has a CHARGE record of the file.
 
     Returns
     -------
-    saved_results : result class
-        Populated saved_result class with results from the ring simulation process.
+    parameters : class
+        Populated physical parameter class.
+    simulation_setup : class
+        Populated simulation class.
+    charge_setup : class
+        Charge class populated from the CHARGE record.
+    saved_results : class
+        Result class holding the capacitance, resistance and bandwidth of the CHARGE record.
 
     """
     # Initializing classes
@@ -305,15 +394,9 @@ def runSimulation(Radius, Gap, Slab_Height, CouplingLength, LambdaStart, LambdaE
     simulation_setup.propagation_loss = prop_loss
 
     # Querying charge file to populate charge_setup, searching both foundries for the record
-    charge_file = str(CHARGE_file).split('\\')[-1]
-    charge_file = charge_file.split('.')[0]
-    result_check = database.QueryChargeFile(charge_file, 'AMF')
-    if result_check == []:
-        result = database.QueryChargeFile(charge_file, 'AIM')
-        charge_setup.foundry = 'AIM'
-    else:
-        result = result_check
-        charge_setup.foundry = 'AMF'
+    result, charge_setup.foundry = QueryChargeRecord(CHARGE_file)
+    if result == []:
+        raise ValueError('CHARGE file not in database: ' + str(CHARGE_file))
 
     # Populating CHARGE settings
     charge_setup.PN_type = result[0][1]
@@ -329,31 +412,58 @@ def runSimulation(Radius, Gap, Slab_Height, CouplingLength, LambdaStart, LambdaE
     charge_setup.vmax = result[0][17]
     charge_setup.charge_datapoints = result[0][18]
     charge_setup.bias = result[0][19]
-    saved_results.capacitance = database.ParseStringArray(result[0][21])
-    saved_results.resistance = database.ParseStringArray(result[0][22])
-    saved_results.bandwidth = database.ParseStringArray(result[0][23])
+    saved_results.capacitance = database.ParseArray(result[0][21])
+    saved_results.resistance = database.ParseArray(result[0][22])
+    saved_results.bandwidth = database.ParseArray(result[0][23])
     charge_setup.CHARGE_file = str(CHARGE_file)
 
-    # Executing coupling region simulation in FDTD and saving results to result class
-    coupling_coefficient, coupler_ID = FDTD_SetUp.calculate_coupling_coefficient(
-        parameters, simulation_setup)
-    saved_results.f = coupling_coefficient[0]
-    saved_results.CC = coupling_coefficient[1]
-    saved_results.coupler_ID = coupler_ID
+    return parameters, simulation_setup, charge_setup, saved_results
 
-    # Executing waveguide simulation in MODE and saving results to result class
-    dNeff, absorption_loss, phase_shift, waveguide_ID = Mode_SetUp.Active_Bent_Waveguide(
-        parameters, simulation_setup, charge_setup)
-    saved_results.dNeff = dNeff
-    saved_results.waveguide_ID = waveguide_ID
-    saved_results.absorption_loss = absorption_loss
-    saved_results.phase_shift = phase_shift
 
-    # Executing combined ring simulation in Interconnect and saving results to result class
-    [wavelength, T] = Interconnect_SetUp.Build_Ring(
-        parameters, simulation_setup, charge_setup, saved_results)
-    saved_results.wavelength = wavelength
-    saved_results.T = T
+def runSimulation(Radius, Gap, Slab_Height, CouplingLength, LambdaStart, LambdaEnd, Band,
+                  CHARGE_file, prop_loss, Waveguide_Height, Waveguide_Width):
+    """
+    Execute simulation pipeline to create requested micro-ring modulator.
+
+    Parameters
+    ----------
+    Radius : float
+        Ring radius.
+    Gap : float
+        Ring gap.
+    Slab_Height : float
+        Slab height.
+    CouplingLength : float
+        Ring coupling length, >0 for racetrack ring resonator.
+    LambdaStart : float
+        Start wavelength for ring simulation.
+    LambdaEnd : float
+        End wavelength for ring simulation.
+    Band : str
+        Optical band.
+        Options: [CL, O].
+    CHARGE_file : WindowsPath
+        Path object pointing to to CHARGE file used for the ring simulation.
+    prop_loss : float
+        Excess propagation loss supplied by the user.
+
+    Returns
+    -------
+    saved_results : result class
+        Populated saved_result class with results from the ring simulation process.
+
+    """
+    with Tracing.tracer.run('ring', radius=Radius, gap=Gap) as run:
+        parameters, simulation_setup, charge_setup, saved_results = RingSetup(
+            Radius, Gap, Slab_Height, CouplingLength, LambdaStart, LambdaEnd, Band, CHARGE_file,
+            prop_loss, Waveguide_Height, Waveguide_Width)
+
+        # The coupler simulation in FDTD and the waveguide simulation in MODE are independent, they
+        # run concurrently and the combined ring simulation in Interconnect waits on both
+        graph = StageGraph.StageGraph()
+        AddRingStages(graph, parameters, simulation_setup, charge_setup, saved_results)
+        graph.run()
+    saved_results.trace = run.summary
 
     return saved_results
 
@@ -467,12 +577,13 @@ def runPNJunctionSimulator(p_width_core, n_width_core, p_width_slab, n_width_sla
     charge_setup.doping_error = doping_error
 
     # Executing simulation depending on PN junction type
-    if PN_type == 'Lateral':
-        CHARGE_FILE, SimRun = CHARGE_SetUp.simulateLateral(
-            parameters, simulation_setup, charge_setup)
-    elif PN_type == 'L-Shaped':
-        CHARGE_FILE, SimRun = CHARGE_SetUp.simulateLShaped(
-            parameters, simulation_setup, charge_setup)
+    with Tracing.tracer.run('pn_junction', foundry=foundry, PN_type=PN_type):
+        if PN_type == 'Lateral':
+            CHARGE_FILE, SimRun = CHARGE_SetUp.simulateLateral(
+                parameters, simulation_setup, charge_setup)
+        elif PN_type == 'L-Shaped':
+            CHARGE_FILE, SimRun = CHARGE_SetUp.simulateLShaped(
+                parameters, simulation_setup, charge_setup)
 
     return CHARGE_FILE, SimRun
 
@@ -522,16 +633,177 @@ def runEye(Eye_type, Vmax, Vmin, Laser_Wavl, Radius, CouplingLength, LambdaStart
     Voltage_levels : TYPE
         DESCRIPTION.
 
+    """
+    with Tracing.tracer.run('eye', eye_type=Eye_type, bitrate=bitrate) as run:
+        # Initializing classes from the CHARGE record and the shared settings
+        parameters, simulation_setup, charge_setup = EyeSetup(Eye_type, Radius, CouplingLength,
+                                                              LambdaStart, LambdaEnd,
+                                                              staticNonLinCorrec, CHARGE_file,
+                                                              prop_loss)
+
+        # Populating eye diagram settings
+        simulation_setup.eye_vmax = Vmax
+        simulation_setup.eye_vmin = Vmin
+        simulation_setup.laser_wavl = Laser_Wavl
+        simulation_setup.bitrate = bitrate
+
+        # Determining voltage levels depending on eye type
+        if Eye_type == 'PAM4':
+            Voltage_levels = Interconnect_SetUp.PAM4_Voltage(simulation_setup,
+                                                             saved_results,
+                                                             charge_setup)
+            saved_results.NonLinVoltages = Voltage_levels
+        elif Eye_type == 'NRZ':
+            Voltage_levels = [simulation_setup.eye_vmin, simulation_setup.eye_vmax]
+
+        # Running eye diagram simulation in Interconnect
+        [amplitude, time] = Interconnect_SetUp.Eye_Diagrams(parameters, simulation_setup,
+                                                            saved_results)
+
+        # Extracting the eye metrics
+        saved_results.EyeMetrics = EyeAnalysis.EyeMetrics(amplitude, time, bitrate, Eye_type)[0]
+    saved_results.eye_trace = run.summary
+
+    return amplitude, time, Voltage_levels
+
+
+def runEyeAtlas(Eye_type, Swings, Laser_Wavls, bitrates, Radius, CouplingLength, LambdaStart,
+                LambdaEnd, staticNonLinCorrec, CHARGE_file, saved_results, prop_loss,
+                max_workers=None):
+    """
+    Execute eye diagram simulations over a grid of operating points, yielding them as they complete.
+
+    The grid is every combination of bitrate, voltage swing and laser wavelength. Eyes already in
+    the database are checked in one pass and yielded first, the others are simulated on a bounded
+    pool of Interconnect sessions. Every eye comes with its metrics, so the atlas can be ranked as
+    it is built, e.g. max(atlas, key=lambda eye: eye['metrics']['eye_height']).
+
+    Parameters
+    ----------
+    Eye_type : str
+        Eye diagram type.
+        Options: [NRZ, PAM4].
+    Swings : list
+        List of (Vmin, Vmax) voltage swings.
+    Laser_Wavls : list
+        List of laser wavelengths.
+    bitrates : list
+        List of bitrates.
+    Radius : float
+        Ring radius.
+    CouplingLength : float
+        Ring coupling length, >0 for racetrack ring resonator
+    LambdaStart : float
+        Start wavelenth from the ring simulation.
+    LambdaEnd : float
+        End wavelength from the ring simulation.
+    staticNonLinCorrec : str
+        Static non-linearity correction setting.
+        Options: [no, yes, N/A]
+    CHARGE_file : WindowsPath
+        Path object pointing to to CHARGE file used for the ring simulation.
+    saved_results : class
+        Result class with results from previous simulations.
+    prop_loss : float
+        Excess propagation loss supplied by the user.
+    max_workers : int, optional
+        Number of concurrent eye simulations. The default is None, which uses the Interconnect
+        session limit.
+
+    Yields
+    ------
+    eye : dict
+        Operating point (Eye_type, Vmin, Vmax, Laser_Wavl, bitrate), Voltage_levels, amplitude,
+        time, metrics from EyeAnalysis.EyeMetrics and cached, True if read from the database.
+
+    """
+    # The run stays open while the eyes are consumed, so it covers the whole atlas
+    with Tracing.tracer.run('eye_atlas', eye_type=Eye_type):
+        # Initializing classes from the CHARGE record and the shared settings
+        parameters, simulation_setup, charge_setup = EyeSetup(Eye_type, Radius, CouplingLength,
+                                                              LambdaStart, LambdaEnd,
+                                                              staticNonLinCorrec, CHARGE_file,
+                                                              prop_loss)
+
+        # Building the grid of operating points
+        grid = list(itertools.product(bitrates, Swings, Laser_Wavls))
+        Vmin = np.array([swing[0] for bitrate, swing, laser in grid], dtype=float)
+        Vmax = np.array([swing[1] for bitrate, swing, laser in grid], dtype=float)
+        laser = np.array([laser for bitrate, swing, laser in grid], dtype=float)
+
+        # Determining voltage levels of every point at once depending on eye type
+        if Eye_type == 'PAM4' and staticNonLinCorrec == 'yes':
+            voltage = np.linspace(charge_setup.vmin, charge_setup.vmax,
+                                  charge_setup.charge_datapoints)
+            Voltage_levels = Interconnect_SetUp.PAM4_VoltageLevels(voltage, saved_results.T,
+                                                                   saved_results.wavelength, laser,
+                                                                   Vmin, Vmax)
+        elif Eye_type == 'PAM4':
+            Voltage_levels = np.linspace(Vmin, Vmax, 4, axis=1)
+        else:
+            Voltage_levels = np.stack([Vmin, Vmax], axis=1)
+
+        points = [{'laser_wavl': laser[ii], 'eye_vmin': Vmin[ii], 'eye_vmax': Vmax[ii],
+                   'bitrate': grid[ii][0], 'voltage_levels': Voltage_levels[ii].tolist()}
+                  for ii in range(len(grid))]
+
+        # Streaming the eyes as they complete
+        eyes = Interconnect_SetUp.Eye_Atlas(parameters, simulation_setup, saved_results, points,
+                                            max_workers)
+        for ii, amplitude, time, cached in eyes:
+            point = points[ii]
+            metrics = EyeAnalysis.EyeMetrics(amplitude, time, point['bitrate'], Eye_type)[0]
+            yield {'Eye_type': Eye_type, 'Vmin': point['eye_vmin'], 'Vmax': point['eye_vmax'],
+                   'Laser_Wavl': point['laser_wavl'], 'bitrate': point['bitrate'],
+                   'Voltage_levels': point['voltage_levels'], 'amplitude': amplitude, 'time': time,
+                   'metrics': metrics, 'cached': cached}
+
+
+def EyeSetup(Eye_type, Radius, CouplingLength, LambdaStart, LambdaEnd, staticNonLinCorrec,
+             CHARGE_file, prop_loss):
+    """
+    Initialize the classes shared by the eye diagram simulations.
+
+    Parameters
+    ----------
+    Eye_type : str
+        Eye diagram type.
+        Options: [NRZ, PAM4].
+    Radius : float
+        Ring radius.
+    CouplingLength : float
+        Ring coupling length, >0 for racetrack ring resonator
+    LambdaStart : float
+        Start wavelenth from the ring simulation.
+    LambdaEnd : float
+        End wavelength from the ring simulation.
+    staticNonLinCorrec : str
+        Static non-linearity correction setting.
+        Options: [no, yes, N/A]
+    CHARGE_file : WindowsPath
+        Path object pointing to to CHARGE file used for the ring simulation.
+    prop_loss : float
+        Excess propagation loss supplied by the user.
+
+    Returns
+    -------
+    parameters : class
+        Physical parameter class.
+    simulation_setup : class
+        Simulation class, without the eye voltages, laser wavelength and bitrate.
+    charge_setup : class
+        Charge class populated with the CHARGE voltage sweep.
+
     """
     # Checking CHARGE file to determine what foundry it is associated with
-    foundry_check = str(CHARGE_file).split('\\')[-2]
+    foundry_check = str(CHARGE_file).replace('\\', '/').split('/')[-2]
     if foundry_check == 'Charge_AMF':
         foundry = 'AMF'
     elif foundry_check == 'Charge_AIM':
         foundry = 'AIM'
 
     # Querrying CHARGE data to determine relevant info to use as limitations on eye diagrams
-    charge_file = str(CHARGE_file).split('\\')[-1]
+    charge_file = os.path.basename(str(CHARGE_file).replace('\\', '/'))
     charge_file = charge_file.split('.')[0]
     charge_query = database.QueryChargeFile(charge_file, foundry)
 
@@ -547,36 +819,21 @@ def runEye(Eye_type, Vmax, Vmin, Laser_Wavl, Radius, CouplingLength, LambdaStart
     # Populating simulation settings
     simulation_setup.lambda_start = LambdaStart
     simulation_setup.lambda_end = LambdaEnd
-    simulation_setup.eye_vmax = Vmax
-    simulation_setup.eye_vmin = Vmin
-    simulation_setup.laser_wavl = Laser_Wavl
     simulation_setup.eye_type = Eye_type
-    simulation_setup.bitrate = bitrate
     simulation_setup.staticNonLinCorrec = staticNonLinCorrec
     simulation_setup.propagation_loss = prop_loss
 
-    # Populating CHARGE settings
-    charge_setup.vmin = charge_query[0][14]
-    charge_setup.vmax = charge_query[0][15]
-    charge_setup.charge_datapoints = charge_query[0][16]
-
-    # Determining voltage levels depending on eye type
-    if Eye_type == 'PAM4':
-        Voltage_levels = Interconnect_SetUp.PAM4_Voltage(simulation_setup,
-                                                         saved_results,
-                                                         charge_setup)
-        saved_results.NonLinVoltages = Voltage_levels
-    elif Eye_type == 'NRZ':
-        Voltage_levels = [simulation_setup.eye_vmin, simulation_setup.eye_vmax]
-
-    # Running eye diagram simulation in Interconnect
-    [amplitude, time] = Interconnect_SetUp.Eye_Diagrams(parameters, simulation_setup, saved_results)
+    # Populating CHARGE settings, Min_Voltage, Max_Voltage and N of the CHARGE record
+    charge_setup.vmin = charge_query[0][16]
+    charge_setup.vmax = charge_query[0][17]
+    charge_setup.charge_datapoints = charge_query[0][18]
 
-    return amplitude, time, Voltage_levels
+    return parameters, simulation_setup, charge_setup
 
 
 def CriticalCouplingAutomation(Radius, Gaps, Slab_Height, CouplingLength, LambdaStart, LambdaEnd,
-                               Band, CHARGE_file, prop_loss, wg_height, wg_width):
+                               Band, CHARGE_file, prop_loss, wg_height, wg_width, search='sweep',
+                               gap_tolerance=1e-9):
     """
     Execute critical coupling automation.
 
@@ -584,8 +841,8 @@ def CriticalCouplingAutomation(Radius, Gaps, Slab_Height, CouplingLength, Lambda
     ----------
     Radius : float
         Ring radius.
-    Gaps : float
-        Ring gap.
+    Gaps : list
+        Gaps simulated by the sweep, only their minimum and maximum bound the adaptive search.
     Slab_Height : float
         Slab height.
     CouplingLength : float
@@ -601,8 +858,16 @@ def CriticalCouplingAutomation(Radius, Gaps, Slab_Height, CouplingLength, Lambda
         Path object pointing to to CHARGE file used for the ring simulation.
     prop_loss : flaot
         Excess propagation loss supplied by the user.
-    saved_charge_results : class
-        Result class with only populated charge data
+    wg_height : float
+        Waveguide height.
+    wg_width : float
+        Waveguide width.
+    search : str, optional
+        Critical gap search method, the adaptive search usually needs 3-5 coupler simulations.
+        Options : [sweep, adaptive]
+        The default is 'sweep'.
+    gap_tolerance : float, optional
+        Resolution of the critical gap for the adaptive search. The default is 1e-9.
 
     Returns
     -------
@@ -610,90 +875,387 @@ def CriticalCouplingAutomation(Radius, Gaps, Slab_Height, CouplingLength, Lambda
         Populated class with saved results to be used in the rest of the simulation.
 
     """
-    # Initializing classes
-    parameters = Physical_Parameters()
-    simulation_setup = Simulation_Parameters()
-    saved_results = results()
-    charge_setup = charge_params()
+    with Tracing.tracer.run('critical_coupling', radius=Radius, search=search) as run:
+        parameters, simulation_setup, charge_setup, saved_results = RingSetup(
+            Radius, Gaps, Slab_Height, CouplingLength, LambdaStart, LambdaEnd, Band, CHARGE_file,
+            prop_loss, wg_height, wg_width)
+
+        # Begining critical coupling automation sequence
+        graph = StageGraph.StageGraph()
+        AddCriticalCouplingStages(graph, parameters, simulation_setup, charge_setup, saved_results,
+                                  Gaps, search, gap_tolerance)
+        graph.run()
+    saved_results.trace = run.summary
 
-    # Populating physical parameters
-    parameters.radius = Radius
-    parameters.gap = Gaps
-    parameters.slab_height = Slab_Height
-    parameters.coupling_length = CouplingLength
-    parameters.wg_height = wg_height
-    parameters.wg_width = wg_width
+    return saved_results
 
-    # Populating simulation settings
-    simulation_setup.lambda_start = LambdaStart
-    simulation_setup.lambda_end = LambdaEnd
-    simulation_setup.Band = Band
-    simulation_setup.propagation_loss = prop_loss
 
-    # Querying charge file to populate charge_setup
-    charge_file = str(CHARGE_file).split('\\')[-1]
-    charge_file = charge_file.split('.')[0]
+def runCorners(corners, Radius, Gap, CouplingLength, LambdaStart, LambdaEnd, Band, prop_loss,
+               search=None, gap_tolerance=1e-9, max_workers=None):
+    """
+    Execute the ring simulation pipeline of every process corner as a single stage graph.
 
-    result_check = database.QueryChargeFile(charge_file, 'AMF')
-    if result_check == []:
-        result = database.QueryChargeFile(charge_file, 'AIM')
-        charge_setup.foundry = 'AIM'
-    else:
-        result = result_check
-        charge_setup.foundry = 'AMF'
+    The stages of every corner are keyed by the inputs they depend on, so a stage requested by
+    several corners, e.g. the coupler of corners differing only by their doping, runs once and its
+    result is shared. The plan, with the number of stage runs avoided, is printed before running.
 
-    # Populating CHARGE settings
-    charge_setup.PN_type = result[0][1]
-    charge_setup.p_width_core = result[0][7]
-    charge_setup.n_width_core = result[0][8]
-    charge_setup.p_width_slab = result[0][9]
-    charge_setup.n_width_slab = result[0][10]
-    charge_setup.pp_width = result[0][11]
-    charge_setup.np_width = result[0][12]
-    charge_setup.ppp_width = result[0][13]
-    charge_setup.npp_width = result[0][14]
-    charge_setup.vmin = result[0][16]
-    charge_setup.vmax = result[0][17]
-    charge_setup.charge_datapoints = result[0][18]
-    charge_setup.bias = result[0][19]
-    saved_results.capacitance = database.ParseStringArray(result[0][21])
-    saved_results.resistance = database.ParseStringArray(result[0][22])
-    saved_results.bandwidth = database.ParseStringArray(result[0][23])
-    charge_setup.CHARGE_file = str(CHARGE_file)
+    Parameters
+    ----------
+    corners : dict
+        Corner settings keyed by corner name, each a tuple of
+        (Slab_Height, CHARGE_file, Waveguide_Height, Waveguide_Width).
+    Radius : float
+        Ring radius.
+    Gap : float or list
+        Ring gap, or the gaps bounding the critical coupling search.
+    CouplingLength : float
+        Ring coupling length, >0 for racetrack ring resonator.
+    LambdaStart : float
+        Start wavelength for ring simulation.
+    LambdaEnd : float
+        End wavelength for ring simulation.
+    Band : str
+        Optical band.
+        Options: [CL, O].
+    prop_loss : float
+        Excess propagation loss supplied by the user.
+    search : str, optional
+        Critical gap search method, see CriticalCouplingAutomation.
+        Options : [None, sweep, adaptive]
+        The default is None, which simulates the supplied gap as runSimulation.
+    gap_tolerance : float, optional
+        Resolution of the critical gap for the adaptive search. The default is 1e-9.
+    max_workers : int, optional
+        Maximum number of stages running at the same time. The default is None, see StageGraph.
 
-    # Begining critical coupling automation sequence
+    Returns
+    -------
+    corner_results : dict
+        Populated saved_results class of every corner, keyed by corner name.
 
-    # Step 1 determine the loss of the current waveguide and charge configuration
-    dNeff, absorption_losses, phase_shift, waveguide_ID = Mode_SetUp.Active_Bent_Waveguide(
-        parameters, simulation_setup, charge_setup)
-    saved_results.dNeff = dNeff
-    saved_results.waveguide_ID = waveguide_ID
-    saved_results.absorption_loss = absorption_losses
-    saved_results.phase_shift = phase_shift
+    """
+    with Tracing.tracer.run('corners', corners=len(corners)) as run:
+        graph = StageGraph.StageGraph(max_workers)
+        rings = {}
+        for corner, (Slab_Height, CHARGE_file, wg_height, wg_width) in corners.items():
+            parameters, simulation_setup, charge_setup, saved_results = RingSetup(
+                Radius, Gap, Slab_Height, CouplingLength, LambdaStart, LambdaEnd, Band, CHARGE_file,
+                prop_loss, wg_height, wg_width)
+            if search is None:
+                rings[corner] = AddRingStages(graph, parameters, simulation_setup, charge_setup,
+                                              saved_results)
+            else:
+                rings[corner] = AddCriticalCouplingStages(
+                    graph, parameters, simulation_setup, charge_setup, saved_results, Gap, search,
+                    gap_tolerance)
+
+        print(graph.plan_report())
+        stage_results = graph.run()
+
+    # Every corner shares the summary of the run, its stages are not attributed to single corners
+    corner_results = {corner: stage_results[ring.name] for corner, ring in rings.items()}
+    for saved_results in corner_results.values():
+        saved_results.trace = run.summary
+    return corner_results
+
+
+def StageKey(kind, fields, values):
+    """
+    Build the name of a shareable stage from the inputs the stage depends on.
+
+    Parameters
+    ----------
+    kind : str
+        Kind of stage, e.g. coupler or waveguide.
+    fields : tuple
+        Names of the inputs, quantized as the database keys, see database.key_quantization.
+    values : tuple
+        Values of the inputs.
+
+    Returns
+    -------
+    name : str
+        Stage name, 'kind:key'.
+
+    """
+    return kind + ':' + database.ParameterKey(fields, values)
+
+
+def GeometryValues(parameters, simulation_setup):
+    """
+    Return the ring geometry the coupler simulations depend on, the gap excepted.
+
+    Parameters
+    ----------
+    parameters : class
+        Physical parameter class.
+    simulation_setup : class
+        Simulation class.
+
+    Returns
+    -------
+    values : tuple
+        Values of geometry_stage_fields.
+
+    """
+    return (parameters.radius, parameters.coupling_length, parameters.slab_height,
+            simulation_setup.Band, parameters.wg_height, parameters.wg_width)
+
+
+def AddWaveguideStage(graph, parameters, simulation_setup, charge_setup):
+    """
+    Add the MODE waveguide simulation to a stage graph, sharing it if already requested.
+
+    Parameters
+    ----------
+    graph : StageGraph
+        Stage graph of the pipeline.
+    parameters : class
+        Physical parameter class.
+    simulation_setup : class
+        Simulation class.
+    charge_setup : class
+        Charge class, only the CHARGE file enters the stage key.
+
+    Returns
+    -------
+    waveguide : StageResult
+        Placeholder for the result of Mode_SetUp.Active_Bent_Waveguide.
+
+    """
+    charge_file = os.path.basename(str(charge_setup.CHARGE_file).replace('\\', '/'))
+    name = StageKey('waveguide', waveguide_stage_fields,
+                    GeometryValues(parameters, simulation_setup) + (charge_file,))
+    return graph.share(name, Mode_SetUp.Active_Bent_Waveguide, parameters, simulation_setup,
+                       charge_setup)
+
+
+def AddRingStages(graph, parameters, simulation_setup, charge_setup, saved_results, coupler=None,
+                  waveguide=None, gap=None):
+    """
+    Add the stages of a ring simulation at the gap of the parameters to a stage graph.
+
+    Stages already requested with the same inputs are shared, the ring stage also depends on the
+    CHARGE record and the wavelength span.
+
+    Parameters
+    ----------
+    graph : StageGraph
+        Stage graph of the pipeline.
+    parameters : class
+        Physical parameter class.
+    simulation_setup : class
+        Simulation class.
+    charge_setup : class
+        Charge class.
+    saved_results : class
+        Result class populated by the ring stage.
+    coupler : StageResult, optional
+        Coupler stage to use. The default is None, which adds the coupler at parameters.gap.
+    waveguide : StageResult, optional
+        Waveguide stage to use. The default is None, which adds the waveguide stage.
+    gap : StageResult, optional
+        Critical gap stage setting the gap of the ring. The default is None.
+
+    Returns
+    -------
+    ring : StageResult
+        Placeholder for the populated saved_results class.
+
+    """
+    if coupler is None:
+        name = StageKey('coupler', database.coupler_key_fields,
+                        (parameters.radius, parameters.gap, parameters.coupling_length,
+                         parameters.slab_height, simulation_setup.Band, parameters.wg_height,
+                         parameters.wg_width))
+        coupler = graph.share(name, FDTD_SetUp.calculate_coupling_coefficient, parameters,
+                              simulation_setup)
+    if waveguide is None:
+        waveguide = AddWaveguideStage(graph, parameters, simulation_setup, charge_setup)
+
+    # The ring results are a class populated in place, so a shared ring stage returns the class of
+    # the first pipeline requesting it
+    charge_file = os.path.basename(str(charge_setup.CHARGE_file).replace('\\', '/'))
+    name = StageKey('ring', ring_stage_fields,
+                    (coupler.name, waveguide.name, charge_file, simulation_setup.propagation_loss,
+                     simulation_setup.lambda_start, simulation_setup.lambda_end,
+                     simulation_setup.ring_engine))
+    return graph.share(name, RingStage, parameters, simulation_setup, charge_setup, saved_results,
+                       coupler, waveguide, gap=gap)
+
+
+def AddCriticalCouplingStages(graph, parameters, simulation_setup, charge_setup, saved_results,
+                              Gaps, search, gap_tolerance):
+    """
+    Add the stages of the critical coupling automation to a stage graph.
+
+    Parameters
+    ----------
+    graph : StageGraph
+        Stage graph of the pipeline.
+    parameters : class
+        Physical parameter class.
+    simulation_setup : class
+        Simulation class.
+    charge_setup : class
+        Charge class.
+    saved_results : class
+        Result class populated by the ring stage.
+    Gaps : list
+        Gaps simulated by the sweep, only their minimum and maximum bound the adaptive search.
+    search : str
+        Critical gap search method.
+        Options : [sweep, adaptive]
+    gap_tolerance : float
+        Resolution of the critical gap for the adaptive search.
+
+    Returns
+    -------
+    ring : StageResult
+        Placeholder for the populated saved_results class.
+
+    """
+    geometry = GeometryValues(parameters, simulation_setup)
+    gaps = database.ParameterKey(('gap',)*len(Gaps), Gaps)
+
+    # Step 1 determine the loss of the current waveguide and charge configuration, the gap sweep
+    # does not depend on the waveguide simulation so both run concurrently
+    waveguide = AddWaveguideStage(graph, parameters, simulation_setup, charge_setup)
+    sweep = None
+    if search != 'adaptive':
+        name = StageKey('sweep', sweep_stage_fields, geometry + (gaps,))
+        sweep = graph.share(name, CCs.runSweep, parameters, simulation_setup)
+
+    # Steps 2 to 4 estimate the critical coupling condition and search for the critical gap
+    name = StageKey('gap', gap_stage_fields,
+                    geometry + (gaps, waveguide.name, simulation_setup.propagation_loss, search,
+                                gap_tolerance))
+    gap = graph.share(name, CriticalGapStage, parameters, simulation_setup, waveguide, sweep, Gaps,
+                      search, gap_tolerance)
+
+    # Step 5 Running final coupler simulation at critically coupled gap, its key is the gap stage
+    coupler = graph.share('critical_coupler:' + name.split(':')[1],
+                          FDTD_SetUp.calculate_coupling_coefficient, parameters, simulation_setup,
+                          gap=gap)
+
+    # Step 6 Running transmission sweep for the previous settings
+    return AddRingStages(graph, parameters, simulation_setup, charge_setup, saved_results,
+                         coupler=coupler, waveguide=waveguide, gap=gap)
+
+
+def CriticalGapStage(parameters, simulation_setup, waveguide, sweep, Gaps, search, gap_tolerance):
+    """
+    Pipeline stage searching for the critically coupled gap once the waveguide loss is known.
+
+    Parameters
+    ----------
+    parameters : class
+        Physical parameter class, left unchanged so the stage can be shared.
+    simulation_setup : class
+        Simulation class containing relevant information about the simulation settings.
+    waveguide : tuple
+        Result of Mode_SetUp.Active_Bent_Waveguide.
+    sweep : tuple or None
+        Result of CriticalCoupling_Solver.runSweep, None for the adaptive search.
+    Gaps : list
+        Swept gaps, only their minimum and maximum bound the adaptive search.
+    search : str
+        Critical gap search method.
+        Options : [sweep, adaptive]
+    gap_tolerance : float
+        Resolution of the critical gap for the adaptive search.
+
+    Returns
+    -------
+    optimal_gap : float
+        Critically coupled gap.
+
+    """
+    waveguide_results = results()
+    StoreWaveguide(waveguide_results, waveguide)
 
     # Step 2 estimate critical coupling condition
-    power_coupling = CCs.EstimateCC_Condition(parameters, simulation_setup, saved_results)
+    power_coupling = CCs.EstimateCC_Condition(parameters, simulation_setup, waveguide_results)
+
+    # Step 3 Searching for the critical coupling condition
+    if search == 'adaptive':
+        optimal_gap, evaluations = CCs.AdaptiveGapSearch(
+            parameters, simulation_setup, power_coupling, gap_min=min(Gaps), gap_max=max(Gaps),
+            gap_tolerance=gap_tolerance)
+    else:
+        sweep_results, coupler_IDs = sweep
+        optimal_gap = CCs.FindOptimalGap(
+            Gaps, sweep_results, simulation_setup, power_coupling)
+    return optimal_gap
+
+
+def RingStage(parameters, simulation_setup, charge_setup, saved_results, coupler, waveguide,
+              gap=None):
+    """
+    Pipeline stage running the combined ring simulation once the coupler and waveguide are known.
 
-    # Step 3 Sweeping to find critical coupling condition
-    sweep_results, coupler_IDs = CCs.runSweep(parameters, simulation_setup)
-    optimal_gap = CCs.FindOptimalGap(
-        Gaps, sweep_results, simulation_setup, power_coupling)
+    Parameters
+    ----------
+    parameters : class
+        Physical parameter class containing relevant about the physical parameters of the ring.
+    simulation_setup : class
+        Simulation class containing relevant information about the simulation settings.
+    charge_setup : class
+        Charge class containing relevant information about the CHARGE simulation.
+    saved_results : class
+        Result class, populated with the coupler, waveguide and transmission results.
+    coupler : tuple
+        Result of FDTD_SetUp.calculate_coupling_coefficient.
+    waveguide : tuple
+        Result of Mode_SetUp.Active_Bent_Waveguide.
+    gap : float, optional
+        Critically coupled gap of the ring. The default is None, which keeps parameters.gap.
 
-    # Step 4 Setting class object gap to critically coupled result above
-    parameters.gap = optimal_gap
-    saved_results.CriticalCoupleGap = optimal_gap
+    Returns
+    -------
+    saved_results : class
+        The populated result class.
+
+    """
+    # Setting class object gap to critically coupled result
+    if gap is not None:
+        parameters.gap = gap
+        saved_results.CriticalCoupleGap = gap
 
-    # Step 5 Running final coupler simulation at critically coupled gap
-    coupling_coefficient, coupler_ID = FDTD_SetUp.calculate_coupling_coefficient(
-        parameters, simulation_setup, gap=optimal_gap)
+    # Saving coupler and waveguide results to result class
+    coupling_coefficient, coupler_ID = coupler
     saved_results.f = coupling_coefficient[0]
     saved_results.CC = coupling_coefficient[1]
     saved_results.coupler_ID = coupler_ID
+    StoreWaveguide(saved_results, waveguide)
 
-    # Step 6 Running transmission sweep for the previous settings
+    # Executing combined ring simulation in Interconnect and saving results to result class
     [wavelength, T] = Interconnect_SetUp.Build_Ring(
         parameters, simulation_setup, charge_setup, saved_results)
     saved_results.wavelength = wavelength
     saved_results.T = T
-
     return saved_results
+
+
+def StoreWaveguide(saved_results, waveguide):
+    """
+    Save the waveguide simulation results to the result class.
+
+    Parameters
+    ----------
+    saved_results : class
+        Result class.
+    waveguide : tuple
+        Result of Mode_SetUp.Active_Bent_Waveguide.
+
+    Returns
+    -------
+    None.
+
+    """
+    dNeff, absorption_loss, phase_shift, waveguide_ID, index = waveguide
+    saved_results.dNeff = dNeff
+    saved_results.neff, saved_results.ng = index
+    saved_results.waveguide_ID = waveguide_ID
+    saved_results.absorption_loss = absorption_loss
+    saved_results.phase_shift = phase_shift
@@ -0,0 +1,236 @@
+"""
+Created on Fri Oct 16 09:12:40 2026.
+
+This script extracts the resonance figures of merit (resonance wavelength, FSR, 3dB bandwidth,
+Q factor and insertion loss) from transmission spectra. It is shared by Build_Ring in
+Interconnect_SetUp and plot_T in RINGgui.
+
+Every voltage row of the transmission is processed at once. Resonances are the local minima of the
+whole array, the 3dB crossings of every row are located in a single pass and each resonance is
+paired with the crossings directly on each side of it with a searchsorted, so a resonance clipped
+by the band edge gets a NaN bandwidth instead of shifting the pairing of the following ones.
+Crossings are linearly interpolated between samples.
+
+With fit=True, a Lorentzian is fitted around every resonance for sub-grid accuracy. The reciprocal
+of the dip depth 1/(1 - T) of a Lorentzian is a parabola in wavelength, so all the fits reduce to
+batched 3x3 least squares solves. The fitted Lorentzian keeps the meaning of the sampled figures of
+merit, its bandwidth is measured where it crosses the same level below the 0 dB off-resonance
+baseline and its insertion loss is its minimum transmission.
+
+@author: AlexTofini
+"""
+
+# Importing relevant packages
+import numpy as np
+
+# Layout of the returned structured array, one record per resonance
+fom_dtype = np.dtype([
+    ('voltage_index', int),
+    ('resonance', float),
+    ('FSR', float),
+    ('bandwidth_3dB', float),
+    ('Q', float),
+    ('insertion_loss', float),
+])
+
+
+def ExtractFOMs(wavelength, T, height=0.01, level=-3, fit=False, fit_points=10):
+    """
+    Extract the figures of merit of every resonance in every voltage row of T.
+
+    Parameters
+    ----------
+    wavelength : array
+        Wavelength samples, increasing. Results are in the same units.
+    T : array
+        Transmission in dB, shape (voltage, wavelength) or (wavelength,).
+    height : float, optional
+        Minimum dip depth in dB for a minimum to count as a resonance. The default is 0.01.
+    level : float, optional
+        Transmission level in dB where the bandwidth is measured. The default is -3.
+    fit : bool, optional
+        Refine resonance, bandwidth and insertion loss with a Lorentzian fit. The default is False.
+    fit_points : int, optional
+        Number of samples on each side of the minimum used by the fit. The default is 10.
+
+    Returns
+    -------
+    foms : structured array
+        One record per resonance, ordered by voltage row then wavelength, with fields
+        voltage_index, resonance, FSR, bandwidth_3dB, Q and insertion_loss. FSR is the distance
+        to the next resonance of the row and bandwidth_3dB is NaN when a crossing is missing,
+        both propagate to Q.
+
+    """
+    wavelength = np.asarray(wavelength, dtype=float)
+    T = np.atleast_2d(np.asarray(T, dtype=float))
+    rows, points = T.shape
+
+    # Local minima of every row, strict on the left so a flat bottom is only counted once
+    center = T[:, 1:-1]
+    is_min = (center < T[:, :-2]) & (center <= T[:, 2:]) & (-center >= height)
+    row, column = np.nonzero(is_min)
+    column = column + 1
+
+    # Sign changes of T - level in every row, as flat indices of the sample before the crossing
+    above = T > level
+    crossing_row, crossing_column = np.nonzero(above[:, 1:] != above[:, :-1])
+    crossings = crossing_row*points + crossing_column
+
+    # Interpolated crossing wavelengths
+    left_T = T[crossing_row, crossing_column]
+    right_T = T[crossing_row, crossing_column + 1]
+    fraction = (level - left_T)/(right_T - left_T)
+    crossing_wavelength = wavelength[crossing_column] + fraction*(
+        wavelength[crossing_column + 1] - wavelength[crossing_column])
+
+    # Pairing every resonance with the crossing right before and right after it in its row
+    right = np.searchsorted(crossings, row*points + column)
+    left = right - 1
+    right_valid = right < len(crossings)
+    left_valid = left >= 0
+    right = np.minimum(right, len(crossings) - 1)
+    left = np.maximum(left, 0)
+    valid = right_valid & left_valid & (T[row, column] < level)
+    if len(crossings) > 0:
+        valid &= (crossing_row[right] == row) & (crossing_row[left] == row)
+        bandwidth = np.where(valid, crossing_wavelength[right] - crossing_wavelength[left], np.nan)
+    else:
+        bandwidth = np.full(len(row), np.nan)
+
+    resonance = wavelength[column]
+    insertion_loss = -T[row, column]
+
+    if fit and len(row) > 0:
+        resonance, bandwidth, insertion_loss = FitLorentzians(wavelength, T, row, column,
+                                                               fit_points, level, resonance,
+                                                               bandwidth, insertion_loss)
+
+    # Distance to the next resonance of the same row
+    FSR = np.full(len(row), np.nan)
+    same_row = row[1:] == row[:-1]
+    FSR[:-1] = np.where(same_row, resonance[1:] - resonance[:-1], np.nan)
+
+    # Filling the structured array
+    foms = np.zeros(len(row), dtype=fom_dtype)
+    foms['voltage_index'] = row
+    foms['resonance'] = resonance
+    foms['FSR'] = FSR
+    foms['bandwidth_3dB'] = bandwidth
+    foms['Q'] = resonance/bandwidth
+    foms['insertion_loss'] = insertion_loss
+    return foms
+
+
+def FitLorentzians(wavelength, T, row, column, fit_points, level, resonance, bandwidth,
+                   insertion_loss):
+    """
+    Refine the resonances with a Lorentzian fit of the samples around each minimum.
+
+    A Lorentzian dip 1 - T = A/(1 + ((x - x0)/h)^2) gives 1/(1 - T) = (1 + ((x - x0)/h)^2)/A, a
+    parabola in x, fitted by least squares for every resonance at once. Fits that do not give an
+    upward parabola keep the sampled values.
+
+    The Lorentzian is referenced to the 0 dB off-resonance baseline, as the level crossings of
+    ExtractFOMs, so the bandwidth is its width at level and the insertion loss is -T at its minimum.
+
+    Parameters
+    ----------
+    wavelength : array
+        Wavelength samples.
+    T : array
+        Transmission in dB, shape (voltage, wavelength).
+    row : array
+        Voltage row of every resonance.
+    column : array
+        Wavelength index of every resonance.
+    fit_points : int
+        Number of samples on each side of the minimum used by the fit.
+    level : float
+        Transmission level in dB where the bandwidth is measured.
+    resonance : array
+        Sampled resonance wavelengths.
+    bandwidth : array
+        Bandwidths from the level crossings.
+    insertion_loss : array
+        Sampled insertion losses in dB.
+
+    Returns
+    -------
+    resonance : array
+        Fitted resonance wavelengths.
+    bandwidth : array
+        Width of the fitted Lorentzians at level, NaN when the fitted dip does not reach it.
+    insertion_loss : array
+        Fitted insertion losses in dB.
+
+    """
+    points = T.shape[1]
+
+    # Gathering the window of every resonance, clipped to the row
+    offsets = np.arange(-fit_points, fit_points + 1)
+    window = np.clip(column[:, np.newaxis] + offsets[np.newaxis, :], 0, points - 1)
+    x = wavelength[window] - resonance[:, np.newaxis]
+    scale = np.max(np.abs(x), axis=1, keepdims=True)
+    scale[scale == 0] = 1
+    x = x/scale
+    y = 1/np.maximum(1 - 10**(T[row[:, np.newaxis], window]/10), 1e-12)
+
+    # Weighting the samples by the dip depth so the bottom of the resonance dominates
+    weight = 1/y**2
+    basis = np.stack([np.ones_like(x), x, x**2], axis=2)
+    normal = np.einsum('rni,rn,rnj->rij', basis, weight, basis)
+    target = np.einsum('rni,rn,rn->ri', basis, weight, y)
+    solvable = np.abs(np.linalg.det(normal)) > 1e-300
+    normal[~solvable] = np.eye(3)
+    c0, c1, c2 = np.moveaxis(np.linalg.solve(normal, target[..., np.newaxis])[..., 0], 1, 0)
+
+    # Vertex of the parabola, y at the vertex is 1/A, and half width where y reaches 1/(1 - T) at
+    # level, NaN when the fitted dip is shallower than level
+    y_level = 1/(1 - 10**(level/10))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vertex = -c1/(2*c2)
+        y_min = c0 - c1**2/(4*c2)
+        depth = 1/y_min
+        half_width = np.where(y_level >= y_min, np.sqrt((y_level - y_min)/c2), np.nan)
+    good = solvable & (c2 > 0) & (y_min >= 1) & (np.abs(vertex) <= 1)
+
+    scale = scale[:, 0]
+    resonance = np.where(good, resonance + vertex*scale, resonance)
+    bandwidth = np.where(good, 2*half_width*scale, bandwidth)
+    insertion_loss = np.where(good, -10*np.log10(np.maximum(1 - depth, 1e-30)), insertion_loss)
+    return resonance, bandwidth, insertion_loss
+
+
+def SummarizeRow(foms, voltage_index=0):
+    """
+    Return the figures of merit of one voltage row as rounded lists, as stored in saved_results.
+
+    Parameters
+    ----------
+    foms : structured array
+        Result of ExtractFOMs.
+    voltage_index : int, optional
+        Voltage row to summarize. The default is 0, the unbiased spectrum.
+
+    Returns
+    -------
+    resonances : list
+        Resonance wavelengths rounded to 3 decimals.
+    FSRs : list
+        Spacing between consecutive resonances rounded to 2 decimals, one less than resonances.
+    bandwidths_3dB : list
+        3dB bandwidths rounded to 3 decimals, NaN for resonances clipped by the band edge.
+    QFactors : list
+        Quality factors rounded to the hundred.
+    InsertionLosses : list
+        Insertion losses rounded to 2 decimals.
+
+    """
+    foms = foms[foms['voltage_index'] == voltage_index]
+    resonances = np.round(foms['resonance'], 3).tolist()
+    FSRs = np.round(foms['FSR'][:-1], 2).tolist()
+    bandwidths_3dB = np.round(foms['bandwidth_3dB'], 3).tolist()
+    QFactors = np.round(foms['Q'], -2).tolist()
+    InsertionLosses = np.round(foms['insertion_loss'], 2).tolist()
+    return resonances, FSRs, bandwidths_3dB, QFactors, InsertionLosses
@@ -0,0 +1,160 @@
+"""
+Created on Thu Oct 15 14:21:07 2026.
+
+This script contains the native NumPy ring transmission engine, a fast alternative to the
+Interconnect voltage sweep run by Interconnect_SetUp.Build_Ring
+
+The ring is modelled as an all-pass ring with a single point coupler. The field transmission is
+
+    t(lambda, V) = (tau - a*exp(i*phi)) / (1 - tau*a*exp(i*phi))
+
+where tau = sqrt(1 - kappa^2) comes from the FDTD power coupling kappa^2(f), a is the round trip
+field amplitude given by the propagation loss and the MODE absorption loss at V, which already
+accounts for the imaginary dNeff, and phi = 2*pi*neff(lambda, V)*L/lambda is the round trip phase
+with the real dNeff at V. The whole wavelength x voltage grid is evaluated in a single vectorized
+expression.
+
+Interconnect reads the dispersion of the unbiased waveguide from the MODE .ldf file, the engine
+uses a first order dispersion model built from the neff and ng MODE finds at the band center,
+stored with the waveguide record. Waveguide records written before they were stored fall back to
+typical values for a 220 nm SOI waveguide, and simulation_setup.neff and simulation_setup.ng
+override both. They set the resonance positions, so the Interconnect engine remains the
+reference, CompareSpectra() reports the difference between both.
+
+@author: AlexTofini
+"""
+
+# Importing relevant packages
+import os
+import numpy as np
+
+# Defining speed of light
+c = 299792458
+
+# Center wavelength, effective index and group index used when none are supplied, per band
+band_defaults = {
+    'CL': (1550e-9, 2.44, 4.18),
+    'O': (1310e-9, 2.62, 4.30),
+}
+
+# Number of wavelength samples, the 3dB crossings need several samples per resonance linewidth
+wavelength_points = int(os.environ.get('RING_ENGINE_POINTS', '20001'))
+
+
+def Transmission(parameters, simulation_setup, charge_setup, saved_results, points=None):
+    """
+    Compute the transmission spectrum of the ring for every voltage of the CHARGE sweep.
+
+    Parameters
+    ----------
+    parameters : class
+        Physical parameter class containing relevant about the physical parameters of the ring.
+    simulation_setup : class
+        Simulation class containing relevant information about the simulation settings.
+    charge_setup : class
+        Charge class containing relevant information about the CHARGE simulation.
+    saved_results : class
+        Class object containing the coupler (f, CC), waveguide (dNeff, neff, ng) and
+        absorption_loss results.
+    points : int, optional
+        Number of wavelength samples. The default is None, which uses wavelength_points.
+
+    Returns
+    -------
+    wavelength : array
+        Wavelength samples in m.
+    voltage : array
+        Voltages of the sweep in V.
+    T : array
+        Transmission in dB, shape (voltage, wavelength), same layout as the Interconnect result.
+
+    """
+    if points is None:
+        points = wavelength_points
+
+    # Sweep voltages, matching the Interconnect voltage sweep
+    N = int(charge_setup.charge_datapoints)
+    voltage = np.linspace(charge_setup.vmin, charge_setup.vmax, N)
+    wavelength = np.linspace(simulation_setup.lambda_start, simulation_setup.lambda_end, points)
+
+    # Power coupling interpolated from the coupler frequency samples onto the wavelength grid
+    f = np.asarray(saved_results.f, dtype=float)
+    CC = np.asarray(saved_results.CC, dtype=float)
+    order = np.argsort(f)
+    kappa2 = np.interp(c/wavelength, f[order], CC[order])
+    tau = np.sqrt(np.clip(1 - kappa2, 0, 1))
+
+    # Voltage dependent index change interpolated onto the sweep voltages
+    dNeff = np.asarray(saved_results.dNeff, dtype=float)
+    order = np.argsort(dNeff[0])
+    dneff_real = np.interp(voltage, dNeff[0][order], dNeff[1][order])
+
+    # Absorption loss per sweep voltage in dB/m, padded with the last value if it is shorter
+    absorption_loss = np.atleast_1d(np.asarray(saved_results.absorption_loss, dtype=float))
+    absorption_loss = np.resize(absorption_loss, N) if absorption_loss.size < N \
+        else absorption_loss[:N]
+
+    # Unbiased effective index with first order dispersion, from the user, MODE or band defaults
+    center, neff, ng = band_defaults.get(simulation_setup.Band, band_defaults['CL'])
+    neff = getattr(simulation_setup, 'neff', 0) or getattr(saved_results, 'neff', None) or neff
+    ng = getattr(simulation_setup, 'ng', 0) or getattr(saved_results, 'ng', None) or ng
+    neff_0 = neff - (ng - neff)*(wavelength - center)/center
+
+    # Round trip length, the modulator covers the whole ring as in the Interconnect model
+    length = 2*np.pi*parameters.radius + 2*parameters.coupling_length
+
+    # Broadcasting voltage along rows and wavelength along columns
+    neff_V = neff_0[np.newaxis, :] + dneff_real[:, np.newaxis]
+    phi = 2*np.pi*neff_V*length/wavelength[np.newaxis, :]
+    # The MODE absorption loss is the loss of the imaginary dNeff, so it is applied once, as the
+    # propagation and voltage dependent losses given to the Interconnect waveguide
+    loss_dB = simulation_setup.propagation_loss + absorption_loss[:, np.newaxis]
+    a = 10**(-loss_dB*length/20)
+
+    # All-pass ring field transmission
+    loop = a*np.exp(1j*phi)
+    t = (tau - loop)/(1 - tau*loop)
+    T = 10*np.log10(np.maximum(np.abs(t)**2, 1e-30))
+
+    return wavelength, voltage, T
+
+
+def CompareSpectra(wavelength_ref, T_ref, wavelength, T):
+    """
+    Compare an engine spectrum with the Interconnect reference.
+
+    Parameters
+    ----------
+    wavelength_ref : array
+        Wavelength samples of the reference.
+    T_ref : array
+        Reference transmission in dB, shape (voltage, wavelength).
+    wavelength : array
+        Wavelength samples of the engine result, same units as the reference.
+    T : array
+        Engine transmission in dB, shape (voltage, wavelength).
+
+    Returns
+    -------
+    comparison : dict
+        'max_error_dB' : largest difference on the reference grid.
+        'rms_error_dB' : RMS difference on the reference grid.
+        'resonance_shift' : wavelength offset of the deepest 0V resonance, same units as input.
+
+    """
+    wavelength_ref = np.asarray(wavelength_ref, dtype=float)
+    wavelength = np.asarray(wavelength, dtype=float)
+    T_ref = np.atleast_2d(np.asarray(T_ref, dtype=float))
+    T = np.atleast_2d(np.asarray(T, dtype=float))
+    rows = min(T_ref.shape[0], T.shape[0])
+
+    # Interpolating the engine spectra onto the reference grid
+    T_interp = np.array([np.interp(wavelength_ref, wavelength, T[ii]) for ii in range(rows)])
+    error = T_interp - T_ref[:rows]
+
+    comparison = {
+        'max_error_dB': float(np.max(np.abs(error))),
+        'rms_error_dB': float(np.sqrt(np.mean(error**2))),
+        'resonance_shift': float(wavelength[np.argmin(T[0])] - wavelength_ref[np.argmin(T_ref[0])]),
+    }
+    return comparison
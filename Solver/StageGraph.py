@@ -0,0 +1,329 @@
+"""
+Created on Sun Oct 18 14:05:32 2026.
+
+This script contains a small dependency-graph executor for the simulation pipeline stages
+
+A pipeline is described as named stages, each a function call whose arguments may be the results
+of other stages. Every stage is started as soon as the stages it depends on have completed, so
+independent stages, e.g. the FDTD coupler and the MODE waveguide simulations, run concurrently and
+each holds its own solver session from lumerical_tools.session_pool, which also keeps the number of
+open sessions per solver within the license limits.
+
+Example
+-------
+    graph = StageGraph()
+    coupler = graph.add('coupler', FDTD_SetUp.calculate_coupling_coefficient, parameters, setup)
+    waveguide = graph.add('waveguide', Mode_SetUp.Active_Bent_Waveguide, parameters, setup, charge)
+    graph.add('ring', RingStage, coupler, waveguide)
+    results = graph.run()
+
+@author: AlexTofini
+"""
+
+# Importing relevant packages
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import Tracing
+
+# Maximum number of stages running at the same time, 1 runs the stages serially in insertion order
+stage_workers = int(os.environ.get('RING_STAGE_WORKERS', '0')) or None
+
+
+class StageResult():
+    """
+    A class to represent the result of a stage, used as an argument of the stages depending on it.
+
+    ...
+
+    """
+
+    def __init__(self, name):
+        """
+        Construct the placeholder.
+
+        Parameters
+        ----------
+            name : str
+                Name of the stage producing the result.
+        """
+        self.name = name
+
+
+class StageGraph():
+    """
+    A class to represent a graph of pipeline stages and execute it.
+
+    Dependencies are the StageResult arguments of a stage and the stages listed in after, for
+    stages communicating through a shared object instead of their return values. When a stage
+    raises, no further stage is started, the running ones are awaited and the exception is raised
+    by run().
+
+    ...
+
+    """
+
+    def __init__(self, max_workers=None):
+        """
+        Construct an empty graph.
+
+        Parameters
+        ----------
+            max_workers : int, optional
+                Maximum number of stages running at the same time. The default is None, which uses
+                RING_STAGE_WORKERS if set and otherwise allows every ready stage to run.
+        """
+        self.max_workers = max_workers if max_workers is not None else stage_workers
+        self.stages = {}
+        self.requests = {}
+        self.results = {}
+        self.timings = {}
+        self.lock = threading.Lock()
+
+    def add(self, name, function, *args, after=(), **kwargs):
+        """
+        Add a stage to the graph.
+
+        Parameters
+        ----------
+        name : str
+            Unique name of the stage.
+        function : callable
+            Function executed by the stage.
+        *args : any
+            Positional arguments of the function, StageResult arguments are replaced by the result
+            of their stage.
+        after : tuple, optional
+            Names or StageResults of extra stages that must complete first. The default is ().
+        **kwargs : any
+            Keyword arguments of the function, StageResult arguments are replaced as for args.
+
+        Raises
+        ------
+        ValueError
+            If a stage with the same name was already added.
+
+        Returns
+        -------
+        StageResult
+            Placeholder for the result of the stage.
+
+        """
+        if name in self.stages:
+            raise ValueError("Stage '" + name + "' was already added to the graph")
+
+        # Collecting the dependencies from the placeholders and the explicit ordering
+        requires = [arg.name for arg in list(args) + list(kwargs.values())
+                    if isinstance(arg, StageResult)]
+        requires += [stage.name if isinstance(stage, StageResult) else stage for stage in after]
+        self.stages[name] = (function, args, kwargs, list(dict.fromkeys(requires)))
+        self.requests[name] = 1
+        return StageResult(name)
+
+    def share(self, name, function, *args, after=(), **kwargs):
+        """
+        Add a stage unless a stage with the same name exists, in which case that stage is reused.
+
+        The name must be a cache key built from every input the stage depends on, so pipelines
+        requesting the same stage, e.g. process corners sharing their geometry, run it once.
+
+        Parameters
+        ----------
+        name : str
+            Cache key of the stage, 'kind:key', the kind groups stages in plan().
+        function : callable
+            Function executed by the stage.
+        *args : any
+            Positional arguments of the function, see add().
+        after : tuple, optional
+            Extra stages that must complete first, see add(). The default is ().
+        **kwargs : any
+            Keyword arguments of the function, see add().
+
+        Returns
+        -------
+        StageResult
+            Placeholder for the result of the stage.
+
+        """
+        if name in self.stages:
+            self.requests[name] = self.requests[name] + 1
+            return StageResult(name)
+        return self.add(name, function, *args, after=after, **kwargs)
+
+    def plan(self):
+        """
+        Summarize how many stages of every kind were requested and how many will run.
+
+        Returns
+        -------
+        plan : dict
+            (requested, distinct) stage counts keyed by kind, the part of the name before ':'.
+
+        """
+        plan = {}
+        for name, requests in self.requests.items():
+            kind = name.split(':')[0]
+            requested, distinct = plan.get(kind, (0, 0))
+            plan[kind] = (requested + requests, distinct + 1)
+        return plan
+
+    def plan_report(self):
+        """
+        Describe the plan and the number of stage runs avoided by sharing.
+
+        Returns
+        -------
+        report : str
+            One line per kind and a total.
+
+        """
+        lines = []
+        avoided = 0
+        for kind, (requested, distinct) in self.plan().items():
+            lines.append(kind + ': ' + str(requested) + ' requested, ' + str(distinct) +
+                         ' to run')
+            avoided = avoided + requested - distinct
+        lines.append('Stage runs avoided by sharing: ' + str(avoided))
+        return '\n'.join(lines)
+
+    def order(self):
+        """
+        Return the stages in a valid execution order.
+
+        Raises
+        ------
+        ValueError
+            If a stage depends on an unknown stage or the dependencies contain a cycle.
+
+        Returns
+        -------
+        order : list
+            Stage names, every stage after the stages it depends on.
+
+        """
+        for name, (function, args, kwargs, requires) in self.stages.items():
+            for required in requires:
+                if required not in self.stages:
+                    raise ValueError("Stage '" + name + "' depends on unknown stage '" +
+                                     required + "'")
+
+        # Kahn's algorithm, keeping the insertion order between independent stages
+        pending = {name: set(stage[3]) for name, stage in self.stages.items()}
+        order = []
+        while pending:
+            ready = [name for name, requires in pending.items() if not requires]
+            if ready == []:
+                raise ValueError("Stage dependencies contain a cycle between: " +
+                                 ", ".join(pending))
+            for name in ready:
+                order.append(name)
+                del pending[name]
+            for requires in pending.values():
+                requires.difference_update(ready)
+        return order
+
+    def resolve(self, value):
+        """
+        Replace a StageResult by the result of its stage.
+
+        Parameters
+        ----------
+        value : any
+            Stage argument.
+
+        Returns
+        -------
+        value : any
+            The argument, or the result it stands for.
+
+        """
+        if isinstance(value, StageResult):
+            return self.results[value.name]
+        return value
+
+    def execute(self, name):
+        """
+        Execute a single stage whose dependencies have completed.
+
+        Parameters
+        ----------
+        name : str
+            Name of the stage.
+
+        Returns
+        -------
+        result : any
+            Return value of the stage function.
+
+        """
+        function, args, kwargs, requires = self.stages[name]
+        args = [self.resolve(arg) for arg in args]
+        kwargs = {key: self.resolve(value) for key, value in kwargs.items()}
+
+        start = time.perf_counter()
+        with Tracing.tracer.span(name.split(':')[0], 'stage', stage=name):
+            result = function(*args, **kwargs)
+        with self.lock:
+            self.timings[name] = time.perf_counter() - start
+        return result
+
+    def run(self):
+        """
+        Execute every stage, starting each one as soon as its dependencies have completed.
+
+        Raises
+        ------
+        ValueError
+            If the graph is invalid, see order().
+        Exception
+            The first exception raised by a stage.
+
+        Returns
+        -------
+        results : dict
+            Return value of every stage, keyed by stage name.
+
+        """
+        order = self.order()
+        remaining = {name: set(self.stages[name][3]) for name in order}
+
+        # Running serially when a single worker is requested, avoids threads while debugging
+        if self.max_workers == 1 or len(order) <= 1:
+            for name in order:
+                self.results[name] = self.execute(name)
+            return self.results
+
+        max_workers = self.max_workers or len(order)
+        error = None
+
+        # Stages run in the pool threads are traced as part of the span of the caller
+        execute = Tracing.tracer.bind(self.execute)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            running = {}
+            while remaining or running:
+                # Starting every stage whose dependencies are done, unless a stage failed
+                if error is None:
+                    ready = [name for name in order if name in remaining and not remaining[name]]
+                    for name in ready:
+                        del remaining[name]
+                        running[executor.submit(execute, name)] = name
+                elif not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        self.results[name] = future.result()
+                    except Exception as e:
+                        if error is None:
+                            error = e
+                        continue
+                    for requires in remaining.values():
+                        requires.discard(name)
+
+        if error is not None:
+            raise error
+        return self.results
@@ -0,0 +1,846 @@
+"""
+Created on Sun Oct 18 23:12:40 2026.
+
+This script contains a deterministic stand-in for the Lumerical Python API (lumapi)
+
+It implements the part of lumapi used by lumerical_tools, open, evalScript, getVar, putv and close,
+so the simulation pipeline, the database cache, the session pool and the job queue run on machines
+without a Lumerical install, e.g. to test or benchmark them. It is selected with
+RING_LUMAPI_BACKEND=standin, see lumerical_tools.solver_backends.
+
+Scripts are not interpreted. Assignments, setnamed and setglobalsource calls are recorded as
+session variables and the analysis scripts of the Solver folder are replaced by analytical models
+producing the same outputs:
+    ExtractCouplingCoefficient : f, power_coupling, evanescent coupling decaying with the gap
+    ActiveBentWaveguide : V, dneff_real, dneff_imag, phase, loss, neff_real, ng_real, plasma
+        dispersion of the depletion region of the PN junction
+    Build_Lateral_AMF, Build_Lateral_AIM, Build_LSHaped_AIM : cap_avg, res_avg, bw_avg, depletion
+        capacitance and slab resistance
+    SimulateSpectrum : transmission_<ID>.mat, all-pass ring of RingEngine
+    NRZ_Eye_Analysis, PAM4_Eye_Analysis : Eye_<type>_<ID>.mat, EyeSimulator
+Result files are written where the real scripts write them, .mat files in the MATLAB v7.3 layout.
+
+The models follow the physical trends, e.g. the coupling falls with the gap and the tuning grows
+with the reverse bias, but their values are not those of Lumerical, so a database filled by the
+stand-in must not be mixed with one filled by Lumerical, see RING_DATABASE_PATH.
+
+Every analysis script waits for an artificial latency set by RING_STANDIN_LATENCY, either seconds
+for every solver or seconds per solver, e.g. 'fdtd=2,mode=1,device=1,interconnect=0.5,open=3'
+where open is the startup time of a session. Closing a session interrupts its script. Every
+evalScript, getVar and putv call also waits for RING_STANDIN_CALL_LATENCY seconds, the round trip
+to the solver process, and is counted in calls.
+
+@author: AlexTofini
+"""
+
+# Importing relevant packages
+import os
+import re
+import ast
+import builtins
+import itertools
+import threading
+from collections import Counter
+from types import SimpleNamespace
+import numpy as np
+import h5py
+import RingEngine
+import EyeSimulator
+
+# Defining speed of light
+c = 299792458
+
+# Vacuum permittivity and relative permittivity of silicon
+eps_0 = 8.854187817e-12
+eps_Si = 11.7
+
+# Solvers that can be opened
+products = ('fdtd', 'mode', 'device', 'interconnect')
+
+# Artificial latency of the analysis scripts in s, per solver or for every solver
+latency_setting = os.environ.get('RING_STANDIN_LATENCY', '0')
+
+# Round trip time of every API call in s
+call_latency = float(os.environ.get('RING_STANDIN_CALL_LATENCY', '0'))
+
+# Number of frequency samples of the coupler result
+coupler_points = 101
+
+# Waveguide geometry the models are calibrated for, width, height and slab height
+reference_geometry = (500e-9, 220e-9, 90e-9)
+
+# Coupler model, field coupling per unit length at the reference gap and decay length of the field
+# outside the waveguide at 1550 nm
+reference_gap = 200e-9
+reference_coupling = 1.2e5
+decay_length = 55e-9
+
+# PN junction model, built-in voltage and 0V depletion width
+built_in_voltage = 0.7
+depletion_width = 100e-9
+
+# Real dneff per unit of depletion growth and 0V absorption loss in dB/m, at 1550 nm
+dneff_depletion = 6e-5
+absorption_loss = 1000
+
+# Change of the effective and group index per m of width, height and slab height away from the
+# reference geometry, where they take the band defaults of RingEngine
+neff_sensitivity = (1.0e6, 2.5e6, 0.5e6)
+ng_sensitivity = (-0.8e6, -1.5e6, 0)
+
+# Resistivity in Ohm.m of the lightly doped slab and of the contact regions
+slab_resistivity = 1e-3
+contact_resistivity = 1e-4
+
+# Junction area relative to a lateral junction, L-shaped junctions add a horizontal section
+junction_area = {'Lateral': 1.0, 'L-Shaped': 1.5}
+
+# MATLAB v7.3 files are HDF5 files behind a 512 byte header
+mat_header = b'MATLAB 7.3 MAT-file, Platform: GLNXA64, Created by: StandinLumapi HDF5 schema 1.00 .'
+
+
+class LumApiError(Exception):
+    """Error raised by the stand-in where lumapi raises its LumApiError."""
+
+
+class StandinSession():
+    """
+    A class to represent an open stand-in solver.
+
+    ...
+
+    """
+
+    def __init__(self, product):
+        """
+        Construct an empty session.
+
+        Parameters
+        ----------
+            product : str
+                Solver type.
+                Options : [fdtd, mode, device, interconnect]
+        """
+        self.product = product
+        self.cwd = os.getcwd()
+        self.project = None
+        self.variables = {}
+        self.closed = threading.Event()
+
+
+# Open sessions keyed by handle
+sessions = {}
+sessions_lock = threading.Lock()
+handles = itertools.count(1)
+
+# Number of calls per API function, e.g. calls['evalScript']
+calls = Counter()
+
+
+def Latency(key):
+    """
+    Return the artificial latency of a solver.
+
+    Parameters
+    ----------
+    key : str
+        Solver type, or open for the session startup.
+
+    Returns
+    -------
+    latency : float
+        Latency in s.
+
+    """
+    setting = latency_setting.strip()
+    if '=' not in setting:
+        return float(setting or 0)
+    for item in setting.split(','):
+        name, _, value = item.partition('=')
+        if name.strip() == key:
+            return float(value)
+    return 0.0
+
+
+def Wait(session, seconds):
+    """
+    Wait for the latency of a script, interrupted if the session is closed.
+
+    Parameters
+    ----------
+    session : StandinSession
+        Session running the script.
+    seconds : float
+        Latency in s.
+
+    Raises
+    ------
+    LumApiError
+        If the session was closed.
+
+    """
+    if seconds > 0 and session.closed.wait(seconds):
+        raise LumApiError('Session was closed while running a script')
+    if session.closed.is_set():
+        raise LumApiError('Session is closed')
+
+
+def Session(handle):
+    """
+    Return the open session of a handle.
+
+    Parameters
+    ----------
+    handle : int
+        Handle returned by open().
+
+    Raises
+    ------
+    LumApiError
+        If the handle is unknown or closed.
+
+    Returns
+    -------
+    session : StandinSession
+        The session.
+
+    """
+    with sessions_lock:
+        session = sessions.get(handle)
+    if session is None or session.closed.is_set():
+        raise LumApiError('Invalid or closed session handle: ' + str(handle))
+    return session
+
+
+def Call(handle, function):
+    """
+    Count an API call and wait for its round trip.
+
+    Parameters
+    ----------
+    handle : int
+        Handle returned by open().
+    function : str
+        Name of the API function.
+
+    Returns
+    -------
+    session : StandinSession
+        The session of the handle.
+
+    """
+    session = Session(handle)
+    with sessions_lock:
+        calls[function] = calls[function] + 1
+    Wait(session, call_latency)
+    return session
+
+
+def open(product, key=None, hide=False, serverArgs=None, remoteArgs=None):
+    """
+    Open a stand-in solver.
+
+    Parameters
+    ----------
+    product : str
+        Solver type.
+        Options : [fdtd, mode, device, interconnect]
+    key, hide, serverArgs, remoteArgs : any, optional
+        Accepted for compatibility with lumapi.open, unused.
+
+    Raises
+    ------
+    LumApiError
+        If the solver type is unknown.
+
+    Returns
+    -------
+    handle : int
+        Handle of the session.
+
+    """
+    if product not in products:
+        raise LumApiError('Unknown product: ' + str(product))
+    session = StandinSession(product)
+    Wait(session, Latency('open'))
+    with sessions_lock:
+        handle = next(handles)
+        sessions[handle] = session
+    return handle
+
+
+def close(handle):
+    """
+    Close a stand-in solver, interrupting the script it is running.
+
+    Parameters
+    ----------
+    handle : int
+        Handle returned by open().
+
+    Returns
+    -------
+    None.
+
+    """
+    with sessions_lock:
+        session = sessions.pop(handle, None)
+    if session is not None:
+        session.closed.set()
+
+
+def getVar(handle, varname):
+    """
+    Return a session variable.
+
+    Parameters
+    ----------
+    handle : int
+        Handle returned by open().
+    varname : str
+        Variable name.
+
+    Raises
+    ------
+    LumApiError
+        If the variable is not defined.
+
+    Returns
+    -------
+    value : any
+        Copy of the variable, numeric results are 2D arrays as returned by lumapi.
+
+    """
+    session = Call(handle, 'getVar')
+    if varname not in session.variables:
+        raise LumApiError("Variable '" + varname + "' is not defined")
+    value = session.variables[varname]
+    return value.copy() if isinstance(value, np.ndarray) else value
+
+
+def putv(handle, varname, value):
+    """
+    Set a session variable.
+
+    Parameters
+    ----------
+    handle : int
+        Handle returned by open().
+    varname : str
+        Variable name.
+    value : any
+        Value of the variable.
+
+    Returns
+    -------
+    None.
+
+    """
+    Call(handle, 'putv').variables[varname] = value
+
+
+def Split(script, separator=';'):
+    """
+    Split a script into statements, or arguments, ignoring separators inside strings and brackets.
+
+    Parameters
+    ----------
+    script : str
+        Lumerical script.
+    separator : str, optional
+        Separator character. The default is ';'.
+
+    Returns
+    -------
+    statements : list
+        Stripped non-empty statements.
+
+    """
+    statements = []
+    current = ''
+    quote = None
+    depth = 0
+    for char in script:
+        if quote is not None:
+            quote = None if char == quote else quote
+        elif char in '\'"':
+            quote = char
+        elif char in '([':
+            depth = depth + 1
+        elif char in ')]':
+            depth = depth - 1
+        elif char == separator and depth == 0:
+            statements.append(current.strip())
+            current = ''
+            continue
+        current = current + char
+    statements.append(current.strip())
+    return [statement for statement in statements if statement != '']
+
+
+def Literal(text):
+    """
+    Convert a script value to a Python value, keeping it as text if it is not a literal.
+
+    Lumerical strings have no escape sequences, quoted text is returned as is, e.g. Windows paths,
+    and strings concatenated with + and endl, as written by lumerical_tools.format_string, are
+    joined.
+
+    Parameters
+    ----------
+    text : str
+        Script value.
+
+    Returns
+    -------
+    value : any
+        Number, string, list or tuple.
+
+    """
+    text = text.strip()
+    parts = Split(text, '+')
+    if all(part == 'endl' or (len(part) > 1 and part[0] in '\'"' and part[-1] == part[0])
+           for part in parts):
+        return ''.join('\n' if part == 'endl' else part[1:-1] for part in parts)
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+
+def evalScript(handle, code):
+    """
+    Run a script in a stand-in solver.
+
+    Parameters
+    ----------
+    handle : int
+        Handle returned by open().
+    code : str
+        Lumerical script.
+
+    Raises
+    ------
+    LumApiError
+        If the session is closed or an analysis model is missing its inputs.
+
+    Returns
+    -------
+    None.
+
+    """
+    session = Call(handle, 'evalScript')
+    for statement in Split(code):
+        assignment = re.match(r'^([A-Za-z_]\w*)\s*=(?!=)(.*)$', statement, re.DOTALL)
+        call = re.match(r'^([A-Za-z_]\w*)\s*\((.*)\)$', statement, re.DOTALL)
+        if assignment:
+            session.variables[assignment.group(1)] = Literal(assignment.group(2))
+        elif call:
+            name = call.group(1)
+            args = [Literal(arg) for arg in Split(call.group(2), ',')]
+            if name == 'cd':
+                session.cwd = str(args[0])
+            elif name == 'load':
+                session.project = str(args[0])
+            elif name == 'setnamed':
+                session.variables[args[1]] = args[2]
+            elif name == 'setglobalsource':
+                session.variables[args[0]] = args[1]
+        elif statement == 'clear':
+            session.variables = {}
+        elif statement in analysis_scripts:
+            product, model, options = analysis_scripts[statement]
+            Wait(session, Latency(product))
+            try:
+                model(session, *options)
+            except KeyError as e:
+                raise LumApiError(statement + ' is missing the variable ' + str(e)) from None
+
+
+def Column(values):
+    """Return values as a column, the layout of lumapi vectors."""
+    return np.asarray(values, dtype=float).reshape(-1, 1)
+
+
+def WriteMat(filename, datasets):
+    """
+    Write datasets to the result group of a MATLAB v7.3 file, as matlabsave(filename, result).
+
+    Parameters
+    ----------
+    filename : str
+        Path of the .mat file, its folder is created if needed.
+    datasets : dict
+        Arrays of the result group keyed by name.
+
+    Returns
+    -------
+    None.
+
+    """
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    with h5py.File(filename, 'w', userblock_size=512) as data:
+        group = data.create_group('result')
+        for name, values in datasets.items():
+            group.create_dataset(name, data=np.asarray(values, dtype=float))
+    with builtins.open(filename, 'r+b') as f:
+        f.write(mat_header.ljust(116) + b'\x00'*8 + b'\x00\x02IM')
+
+
+def ReadTempData(session, folder, coupler_file, waveguide_file):
+    """
+    Read the temporary coupler and waveguide files written by CreateTempInterconnectData().
+
+    Parameters
+    ----------
+    session : StandinSession
+        Session running the script, its working directory contains the Database folder.
+    folder : str
+        Result folder of the Interconnect script.
+    coupler_file : str
+        Name of the coupler file, without extension.
+    waveguide_file : str
+        Name of the waveguide file, without extension.
+
+    Raises
+    ------
+    LumApiError
+        If a file does not exist.
+
+    Returns
+    -------
+    results : SimpleNamespace
+        f, CC and dNeff as stored in saved_results.
+
+    """
+    path = os.path.join(session.cwd, 'Database', folder)
+    try:
+        coupler = np.loadtxt(os.path.join(path, coupler_file + '.txt'), ndmin=2)
+        waveguide = np.loadtxt(os.path.join(path, waveguide_file + '.txt'), ndmin=2)
+    except OSError as e:
+        raise LumApiError('Cannot load ' + str(e)) from None
+    return SimpleNamespace(f=coupler[:, 0], CC=coupler[:, 1], dNeff=waveguide.T.tolist())
+
+
+def ModeProfile(session, waveguide_file):
+    """
+    Read the loss and indices of the unbiased mode from the .ldf file written by WaveguideModel().
+
+    Parameters
+    ----------
+    session : StandinSession
+        Session running the script, its working directory contains the Database folder.
+    waveguide_file : str
+        Name of the temporary waveguide file, waveguide_<ID>, the .ldf file is Waveguide_<ID>.
+
+    Raises
+    ------
+    LumApiError
+        If the file does not exist or was not written by the stand-in.
+
+    Returns
+    -------
+    profile : dict
+        Absorption loss in dB/m under 'loss', effective index under 'neff' and group index under
+        'ng', the indices are missing from files written before they were kept.
+
+    """
+    filename = os.path.join(session.cwd, 'Database', 'Mode', waveguide_file.capitalize() + '.ldf')
+    try:
+        with builtins.open(filename, 'r') as f:
+            fields = f.read().split()
+        profile = dict(zip(fields[::2], map(float, fields[1::2])))
+    except (OSError, ValueError):
+        profile = {}
+    if 'loss' not in profile:
+        raise LumApiError('Cannot load the mode profile ' + filename)
+    return profile
+
+
+def Band(wavelength):
+    """Return the optical band of a wavelength in m."""
+    return 'O' if wavelength < 1.4e-6 else 'CL'
+
+
+def CouplerModel(session):
+    """
+    Model of ExtractCouplingCoefficient, power coupling of the directional coupler vs frequency.
+
+    The field coupling per unit length decays exponentially with the gap, faster for thicker and
+    wider cores and shorter wavelengths. The bend adds sqrt(2*pi*R*d) of interaction length, the
+    length over which the gap grows by the decay length d.
+
+    Parameters
+    ----------
+    session : StandinSession
+        FDTD session.
+
+    Returns
+    -------
+    None.
+
+    """
+    var = session.variables
+    width, height, slab = reference_geometry
+    wavelength = np.linspace(var['wavelength start'], var['wavelength stop'], coupler_points)
+    decay = (decay_length*(wavelength/1550e-9)**2*np.sqrt(width/var['wg_width']) *
+             np.sqrt(height/var['wg_height'])*(1 + var['slab_height']/var['wg_height']) /
+             (1 + slab/height))
+    kappa = reference_coupling*np.exp(-(var['gap'] - reference_gap)/decay)
+    length = var['coupling_length'] + np.sqrt(2*np.pi*var['radius']*decay)
+    var['f'] = Column(c/wavelength)
+    var['power_coupling'] = Column(np.sin(np.minimum(kappa*length, np.pi/2))**2)
+
+
+def Depletion(V, bias):
+    """
+    Return the relative growth of the depletion width, sqrt(1 + Vr/Vbi) - 1.
+
+    Parameters
+    ----------
+    V : array
+        Applied voltage.
+    bias : str
+        PN-junction modulation bias.
+        Options: [Forward, Reverse]
+
+    Returns
+    -------
+    growth : array
+        Relative depletion width growth, negative in forward bias.
+
+    """
+    reverse = V if bias == 'Reverse' else -V
+    return np.sqrt(np.maximum(1 + reverse/built_in_voltage, 0.05)) - 1
+
+
+def WaveguideModel(session):
+    """
+    Model of ActiveBentWaveguide, dneff and loss of the PN junction waveguide vs voltage.
+
+    The depletion region removes free carriers, raising the index and lowering the absorption in
+    proportion to its growth. Plasma dispersion scales with the square of the wavelength.
+
+    Parameters
+    ----------
+    session : StandinSession
+        MODE session.
+
+    Returns
+    -------
+    None.
+
+    """
+    var = session.variables
+    V = np.linspace(var['V_start'], var['V_stop'], int(var['N']))
+    wavelength = 1.55e-6 if var['Band'] == 'CL' else 1.31e-6
+    dispersion = (wavelength/1550e-9)**2
+    growth = Depletion(V, var['bias'])
+
+    # Indices of the unbiased mode, linear in the deviation from the reference geometry
+    deviation = np.subtract((var['wg_width'], var['wg_height'], var['slab_height']),
+                            reference_geometry)
+    _, neff_0, ng_0 = RingEngine.band_defaults[var['Band']]
+    neff_0 = neff_0 + np.dot(neff_sensitivity, deviation)
+    ng_0 = ng_0 + np.dot(ng_sensitivity, deviation)
+
+    # Narrower cores confine less of the mode, the depletion region covers more of it
+    neff = dneff_depletion*dispersion*reference_geometry[0]/var['wg_width']*growth
+    loss = absorption_loss*dispersion*(1 - 0.3*growth/(1 + growth))
+    kappa = loss*wavelength/(4*np.pi*10*np.log10(np.e))
+
+    length = 2*np.pi*var['Radius'] + 2*var['Coupling_Length']
+    var['V'] = Column(V)
+    var['dneff_real'] = Column(neff - neff[0])
+    var['dneff_imag'] = Column(kappa - kappa[0])
+    var['phase'] = Column(2*np.pi*(neff - neff[0])/wavelength*length)
+    var['loss'] = Column(loss)
+    var['neff_real'] = Column(neff_0 + neff - neff[0])
+    var['ng_real'] = Column(np.full(len(V), ng_0))
+
+    # Mode profile read by Interconnect, the stand-in only keeps the loss and indices of the
+    # unbiased mode
+    path = os.path.join(session.cwd, 'Database', 'Mode')
+    os.makedirs(path, exist_ok=True)
+    with builtins.open(os.path.join(path, 'Waveguide_' + str(var['Waveguide_ID']) + '.ldf'),
+                       'w') as f:
+        f.write('loss ' + repr(float(loss[0])) + '\nneff ' + repr(float(neff_0)) + '\nng ' +
+                repr(float(ng_0)) + '\n')
+
+
+def JunctionModel(session, foundry, PN_type):
+    """
+    Model of the CHARGE build scripts, capacitance, resistance and bandwidth vs voltage.
+
+    The capacitance per unit length is the depletion capacitance of the junction, the resistance
+    the series resistance of the doped slab regions, both scaled by the doping error.
+
+    Parameters
+    ----------
+    session : StandinSession
+        CHARGE session.
+    foundry : str
+        Foundry of the build script.
+        Options: [AMF, AIM]
+    PN_type : str
+        PN-junction type of the build script.
+        Options: [Lateral, L-Shaped]
+
+    Returns
+    -------
+    None.
+
+    """
+    var = session.variables
+    V = np.linspace(var['v_min'], var['v_max'], int(var['N']))
+    doping = 1 + var['doping_error']/100
+    growth = Depletion(V, var['bias'])
+
+    cap = (eps_0*eps_Si*var['wg_height']*junction_area[PN_type]*np.sqrt(doping) /
+           (depletion_width*(1 + growth)))
+    res = ((slab_resistivity*(var['p_width_slab'] + var['n_width_slab'] + var['wg_width']) +
+            contact_resistivity*(var['pp_width'] + var['np_width'] + var['ppp_width'] +
+                                 var['npp_width']))/var['slab_height']/doping)*(1 + 0.05*growth)
+    var['cap_avg'] = np.atleast_2d(cap)
+    var['res_avg'] = np.atleast_2d(res)
+    var['bw_avg'] = np.atleast_2d(1/(2*np.pi*res*cap))
+
+    # PN junction data imported by MODE, saved under the user specified name
+    WriteMat(os.path.join(session.cwd, 'Database', 'Charge_' + foundry,
+                          str(var['save_name']) + '.mat'), {'V': V, 'cap': cap, 'res': res})
+
+
+def RingSpectrum(results, var, radius, length, voltage, absorption):
+    """
+    Compute the transmission of the ring with RingEngine.
+
+    Parameters
+    ----------
+    results : SimpleNamespace
+        f, CC and dNeff read by ReadTempData(), with the neff and ng of the mode profile.
+    var : dict
+        Session variables, with the wavelength range and propagation loss.
+    radius : float
+        Ring radius.
+    length : float
+        Coupling length.
+    voltage : array
+        Sweep voltages.
+    absorption : array
+        Absorption loss in dB/m added at every voltage.
+
+    Returns
+    -------
+    wavelength : array
+        Wavelength samples in m.
+    T : array
+        Transmission in dB, shape (voltage, wavelength).
+
+    """
+    parameters = SimpleNamespace(radius=radius, coupling_length=length)
+    simulation_setup = SimpleNamespace(lambda_start=var['start_wavelength'],
+                                       lambda_end=var['stop_wavelength'],
+                                       Band=Band(var['start_wavelength']),
+                                       propagation_loss=var['propagation_loss'])
+    charge_setup = SimpleNamespace(vmin=voltage[0], vmax=voltage[-1],
+                                   charge_datapoints=len(voltage))
+    results.absorption_loss = absorption
+    wavelength, _, T = RingEngine.Transmission(parameters, simulation_setup, charge_setup,
+                                               results)
+    return wavelength, T
+
+
+def SpectrumModel(session):
+    """
+    Model of SimulateSpectrum, transmission of the ring for every voltage.
+
+    Parameters
+    ----------
+    session : StandinSession
+        Interconnect session.
+
+    Returns
+    -------
+    None.
+
+    """
+    var = session.variables
+    results = ReadTempData(session, 'Transmission', var['coupler_file'], var['waveguide_file'])
+    voltage = np.linspace(var['vmin'], var['vmax'], int(var['N']))
+
+    # The script receives the loss differences between consecutive voltages, the unbiased loss is
+    # part of the mode profile
+    profile = ModeProfile(session, var['waveguide_file'])
+    absorption = profile['loss'] + np.cumsum(
+        np.resize(np.asarray(var['absorption_loss'], dtype=float), len(voltage)))
+    results.neff, results.ng = profile.get('neff'), profile.get('ng')
+    wavelength, T = RingSpectrum(results, var, var['radius'], var['L'], voltage, absorption)
+
+    WriteMat(os.path.join(session.cwd, 'Database', 'Transmission',
+                          'transmission_' + str(var['transmission_ID']) + '.mat'),
+             {'wavelength': wavelength[np.newaxis, :], 'voltage': voltage[np.newaxis, :],
+              'TE_gain__dB_': T})
+
+
+def EyeModel(session, eye_type):
+    """
+    Model of the eye analysis scripts, eye diagram of the ring driven at the voltage levels.
+
+    The script receives no CHARGE results, so the junction is driven without RC filtering and only
+    the photon lifetime of the ring limits the transitions.
+
+    Parameters
+    ----------
+    session : StandinSession
+        Interconnect session.
+    eye_type : str
+        Eye diagram type.
+        Options: [NRZ, PAM4]
+
+    Returns
+    -------
+    None.
+
+    """
+    var = session.variables
+    folder = 'Eye_' + eye_type
+    results = ReadTempData(session, folder, var['coupler_file'], var['waveguide_file'])
+    if eye_type == 'NRZ':
+        levels = [var['Vmin'], var['Vmax']]
+    else:
+        levels = [var['V0'], var['V1'], var['V2'], var['V3']]
+
+    voltage = np.asarray(results.dNeff[0], dtype=float)
+    profile = ModeProfile(session, var['waveguide_file'])
+    absorption = profile['loss']
+    results.neff, results.ng = profile.get('neff'), profile.get('ng')
+    wavelength, T = RingSpectrum(results, var, var['radius'], var['L'], voltage,
+                                 np.full(len(voltage), absorption))
+
+    # Photon lifetime, round trip time over the power lost per round trip at the laser wavelength
+    length = 2*np.pi*var['radius'] + 2*var['L']
+    ng = results.ng or RingEngine.band_defaults[Band(var['start_wavelength'])][2]
+    order = np.argsort(results.f)
+    kappa2 = np.interp(c/(var['laser_lambda']*1e-9), results.f[order], results.CC[order])
+    loss = 1 - 10**(-(var['propagation_loss'] + absorption)*length/10)
+    tau_photon = ng*length/c/(kappa2 + loss)
+
+    amplitude, time = EyeSimulator.SimulateEyes(voltage, T, wavelength*1e9, var['laser_lambda'],
+                                                levels, var['bitrate'], 0, tau_photon, eye_type)
+    WriteMat(os.path.join(session.cwd, 'Database', folder,
+                          folder + '_' + str(var['Eye_Data_ID']) + '.mat'),
+             {'amplitude__a.u._': amplitude[0],
+              'time': np.broadcast_to(time[0], amplitude[0].shape)})
+
+
+# Analysis scripts replaced by a model, (solver, model, model arguments)
+analysis_scripts = {
+    'ExtractCouplingCoefficient': ('fdtd', CouplerModel, ()),
+    'ActiveBentWaveguide': ('mode', WaveguideModel, ()),
+    'Build_Lateral_AMF': ('device', JunctionModel, ('AMF', 'Lateral')),
+    'Build_Lateral_AIM': ('device', JunctionModel, ('AIM', 'Lateral')),
+    'Build_LSHaped_AIM': ('device', JunctionModel, ('AIM', 'L-Shaped')),
+    'SimulateSpectrum': ('interconnect', SpectrumModel, ()),
+    'NRZ_Eye_Analysis': ('interconnect', EyeModel, ('NRZ',)),
+    'PAM4_Eye_Analysis': ('interconnect', EyeModel, ('PAM4',)),
+}
@@ -0,0 +1,577 @@
+"""
+Created on Mon Oct 19 00:26:14 2026.
+
+This script contains the timing and tracing instrumentation of the simulation pipeline
+
+Work is recorded as spans, named and timed sections of code nested within each other, e.g. a ring
+run containing its coupler stage, containing the FDTD job, containing the session open, the solve
+and the transfer of the results with getVar. Spans belong to the run they were started in, also
+when the work is handed to another thread by StageGraph or JobQueue, and count the database cache
+hits and misses of the stage they cover.
+
+Categories used by the pipeline :
+    run : RINGsimulation entry points, one per user request
+    stage : StageGraph stages, named by their kind
+    queue, job : JobQueue wait and execution of a solver job
+    fdtd, mode, device, interconnect : session open and setup, solve, the job script carrying the
+        project load, and transfer
+    database : queries and writes of ConnectToDatabase
+    mat : parsing of the .mat result files
+    analysis, plot : figure of merit extraction and GUI plots
+
+When a run completes, the summary of its spans, the count, total, mean and maximum time and the
+cache hits and misses per span name, is kept in the .trace.json file next to every result file the
+run produced, e.g. Database/Transmission/transmission_7.trace.json.
+
+Environment variables :
+    RING_TRACE : 0 disables the tracing.
+    RING_TRACE_FILE : JSON lines file every completed span is appended to.
+    RING_TRACE_SPANS : number of completed spans kept in memory for the summaries and exports.
+
+Example
+-------
+    with Tracing.tracer.run('ring') as run:
+        with Tracing.tracer.span('solve', 'fdtd') as span:
+            span.set(script='ExtractCouplingCoefficient')
+    print(Tracing.FormatSummary(run.summary))
+    Tracing.tracer.export_chrome('trace.json')
+
+@author: AlexTofini
+"""
+
+# Importing relevant packages
+import os
+import json
+import time
+import itertools
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+# Spans are recorded unless disabled
+trace_enabled = os.environ.get('RING_TRACE', '1') != '0'
+
+# JSON lines file receiving every completed span, none if empty
+trace_file = os.environ.get('RING_TRACE_FILE', '')
+
+# Number of completed spans kept in memory
+trace_spans = int(os.environ.get('RING_TRACE_SPANS', '100000'))
+
+# Suffix of the run summary stored next to a result file
+summary_suffix = '.trace.json'
+
+
+class Span():
+    """
+    A class to represent a timed section of code.
+
+    ...
+
+    """
+
+    def __init__(self, name, category, attributes, span_ID=None, parent_ID=None, run_ID=None):
+        """
+        Construct the span and start its clock.
+
+        Parameters
+        ----------
+            name : str
+                Name of the span, spans of the same category and name are summarized together.
+            category : str
+                Category of the span, e.g. the solver or database.
+            attributes : dict
+                Extra information on the span, e.g. the cache hits and misses.
+            span_ID : int, optional
+                Unique ID of the span. The default is None, for spans that are not recorded.
+            parent_ID : int, optional
+                ID of the enclosing span. The default is None.
+            run_ID : int, optional
+                ID of the run span the span belongs to. The default is None.
+        """
+        self.name = name
+        self.category = category
+        self.attributes = attributes
+        self.span_ID = span_ID
+        self.parent_ID = parent_ID
+        self.run_ID = run_ID
+        self.thread = threading.current_thread().name
+        self.start = time.perf_counter()
+        self.end = None
+        self.summary = {}
+
+    def set(self, **attributes):
+        """
+        Add or replace attributes of the span.
+
+        Parameters
+        ----------
+        **attributes : any
+            Attributes to set.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.attributes.update(attributes)
+
+    def duration(self):
+        """
+        Return the elapsed time of the span.
+
+        Returns
+        -------
+        duration : float
+            Time in s from the start to the end of the span, or to now if it is still open.
+
+        """
+        end = self.end if self.end is not None else time.perf_counter()
+        return end - self.start
+
+
+class Tracer():
+    """
+    A class to represent the span recorder of the process.
+
+    Every thread keeps the stack of its open spans, a new span is nested in the top one. Other
+    threads join a stack through attach() or bind(), so the work they do for a run is part of it.
+
+    ...
+
+    """
+
+    def __init__(self, enabled=True, path='', max_spans=100000):
+        """
+        Construct the recorder.
+
+        Parameters
+        ----------
+            enabled : bool, optional
+                Record spans. The default is True.
+            path : str, optional
+                JSON lines file every completed span is appended to, none if empty. The default
+                is ''.
+            max_spans : int, optional
+                Number of completed spans kept in memory. The default is 100000.
+        """
+        self.enabled = enabled
+        self.path = path
+        self.spans = deque(maxlen=max_spans)
+        self.outputs = {}
+        self.ids = itertools.count(1)
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+        # Wall clock time of the performance counter origin, to export absolute times
+        self.origin = time.time() - time.perf_counter()
+
+    def stack(self):
+        """
+        Return the stack of open spans of the calling thread.
+
+        Returns
+        -------
+        stack : list
+            Open spans, innermost last.
+
+        """
+        if not hasattr(self.local, 'stack'):
+            self.local.stack = []
+        return self.local.stack
+
+    def current(self):
+        """
+        Return the innermost open span of the calling thread.
+
+        Returns
+        -------
+        span : Span or None
+            The span, None outside of any span.
+
+        """
+        stack = self.stack()
+        return stack[-1] if stack else None
+
+    @contextmanager
+    def span(self, name, category='', **attributes):
+        """
+        Record the enclosed code as a span nested in the current one.
+
+        Parameters
+        ----------
+        name : str
+            Name of the span.
+        category : str, optional
+            Category of the span. The default is ''.
+        **attributes : any
+            Attributes of the span.
+
+        Yields
+        ------
+        span : Span
+            The open span, its attributes can be set while it runs.
+
+        """
+        if not self.enabled:
+            yield Span(name, category, attributes)
+            return
+
+        parent = self.current()
+        span = Span(name, category, attributes, next(self.ids),
+                    parent.span_ID if parent is not None else None,
+                    parent.run_ID if parent is not None else None)
+        if category == 'run':
+            span.run_ID = span.span_ID
+
+        stack = self.stack()
+        stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set(error=repr(e))
+            raise
+        finally:
+            # A generator closed after its consumer opened other spans leaves them on the stack
+            if span in stack:
+                stack.remove(span)
+            span.end = time.perf_counter()
+            self.finish(span)
+
+    @contextmanager
+    def run(self, name, **attributes):
+        """
+        Record the enclosed code as a run, the unit the summaries are made for.
+
+        When the run completes its summary is stored in span.summary and next to the result files
+        registered with record().
+
+        Parameters
+        ----------
+        name : str
+            Name of the run.
+        **attributes : any
+            Attributes of the run.
+
+        Yields
+        ------
+        span : Span
+            The run span.
+
+        """
+        with self.span(name, 'run', **attributes) as span:
+            yield span
+        if self.enabled:
+            span.summary = self.summary(span.run_ID)
+            with self.lock:
+                outputs = self.outputs.pop(span.run_ID, [])
+            for path in outputs:
+                self.write_summary(path, span)
+
+    def context(self):
+        """
+        Return the span that work handed to another thread must be nested in.
+
+        Returns
+        -------
+        span : Span or None
+            Innermost open span of the calling thread.
+
+        """
+        return self.current()
+
+    @contextmanager
+    def attach(self, context):
+        """
+        Nest the spans of the enclosed code in a span of another thread.
+
+        Parameters
+        ----------
+        context : Span or None
+            Span returned by context(), None leaves the stack unchanged.
+
+        Yields
+        ------
+        None.
+
+        """
+        if context is None or not self.enabled:
+            yield
+            return
+        stack = self.stack()
+        stack.append(context)
+        try:
+            yield
+        finally:
+            stack.remove(context)
+
+    def bind(self, function):
+        """
+        Wrap a function so it runs nested in the current span, whatever thread calls it.
+
+        Parameters
+        ----------
+        function : callable
+            Function handed to another thread, e.g. by an executor.
+
+        Returns
+        -------
+        bound : callable
+            Function attaching the current span before calling function.
+
+        """
+        context = self.context()
+
+        def bound(*args, **kwargs):
+            with self.attach(context):
+                return function(*args, **kwargs)
+        return bound
+
+    def cache(self, hit):
+        """
+        Count a database cache hit or miss in the current span.
+
+        Parameters
+        ----------
+        hit : bool
+            True if the result was found in the database.
+
+        Returns
+        -------
+        None.
+
+        """
+        span = self.current()
+        if span is not None and self.enabled:
+            key = 'hits' if hit else 'misses'
+            with self.lock:
+                span.attributes[key] = span.attributes.get(key, 0) + 1
+
+    def record(self, path):
+        """
+        Register a result file of the current run, its summary is stored next to it.
+
+        Parameters
+        ----------
+        path : str
+            Path of the result file.
+
+        Returns
+        -------
+        None.
+
+        """
+        span = self.current()
+        if span is not None and span.run_ID is not None and self.enabled:
+            with self.lock:
+                self.outputs.setdefault(span.run_ID, []).append(path)
+
+    def finish(self, span):
+        """
+        Keep a completed span and append it to the JSON lines file.
+
+        Parameters
+        ----------
+        span : Span
+            Completed span.
+
+        Returns
+        -------
+        None.
+
+        """
+        with self.lock:
+            self.spans.append(span)
+            if self.path:
+                with open(self.path, 'a') as f:
+                    f.write(json.dumps(self.as_dict(span), default=str) + '\n')
+
+    def as_dict(self, span):
+        """
+        Convert a span to a JSON serializable record.
+
+        Parameters
+        ----------
+        span : Span
+            Span to convert.
+
+        Returns
+        -------
+        record : dict
+            Name, category, IDs, thread, start time in s since the epoch, duration in s and
+            attributes of the span.
+
+        """
+        return {'name': span.name, 'category': span.category, 'span': span.span_ID,
+                'parent': span.parent_ID, 'run': span.run_ID, 'thread': span.thread,
+                'start': self.origin + span.start, 'duration': span.duration(),
+                'attributes': span.attributes}
+
+    def completed(self, run_ID=None):
+        """
+        Return the completed spans kept in memory.
+
+        Parameters
+        ----------
+        run_ID : int, optional
+            Only return the spans of this run. The default is None, every span.
+
+        Returns
+        -------
+        spans : list
+            Completed spans in completion order.
+
+        """
+        with self.lock:
+            spans = list(self.spans)
+        if run_ID is None:
+            return spans
+        return [span for span in spans if span.run_ID == run_ID]
+
+    def summary(self, run_ID=None):
+        """
+        Summarize the completed spans per category and name.
+
+        Parameters
+        ----------
+        run_ID : int, optional
+            Only summarize the spans of this run. The default is None, every span.
+
+        Returns
+        -------
+        summary : dict
+            Count, total, mean and max time in s and cache hits and misses, keyed by
+            'category:name'.
+
+        """
+        summary = {}
+        for span in self.completed(run_ID):
+            row = summary.setdefault(span.category + ':' + span.name,
+                                     {'count': 0, 'total': 0.0, 'mean': 0.0, 'max': 0.0,
+                                      'hits': 0, 'misses': 0})
+            duration = span.duration()
+            row['count'] = row['count'] + 1
+            row['total'] = row['total'] + duration
+            row['max'] = max(row['max'], duration)
+            row['hits'] = row['hits'] + span.attributes.get('hits', 0)
+            row['misses'] = row['misses'] + span.attributes.get('misses', 0)
+        for row in summary.values():
+            row['mean'] = row['total']/row['count']
+        return summary
+
+    def write_summary(self, path, run):
+        """
+        Store the summary of a run next to one of its result files.
+
+        Parameters
+        ----------
+        path : str
+            Path of the result file, the summary replaces its extension by summary_suffix.
+        run : Span
+            Completed run span.
+
+        Returns
+        -------
+        None.
+
+        """
+        filename = os.path.splitext(path)[0] + summary_suffix
+        try:
+            with open(filename, 'w') as f:
+                json.dump({'run': run.name, 'start': self.origin + run.start,
+                           'duration': run.duration(), 'attributes': run.attributes,
+                           'summary': run.summary}, f, indent=1, default=str)
+        except OSError as e:
+            print('Could not store the run summary ' + filename + ': ' + str(e))
+
+    def export_jsonl(self, path, run_ID=None):
+        """
+        Write the completed spans as JSON lines, one span per line.
+
+        Parameters
+        ----------
+        path : str
+            Output file.
+        run_ID : int, optional
+            Only export the spans of this run. The default is None, every span.
+
+        Returns
+        -------
+        None.
+
+        """
+        with open(path, 'w') as f:
+            for span in self.completed(run_ID):
+                f.write(json.dumps(self.as_dict(span), default=str) + '\n')
+
+    def export_chrome(self, path, run_ID=None):
+        """
+        Write the completed spans in the Chrome trace event format.
+
+        The file opens in chrome://tracing or https://ui.perfetto.dev, with one track per thread.
+
+        Parameters
+        ----------
+        path : str
+            Output file.
+        run_ID : int, optional
+            Only export the spans of this run. The default is None, every span.
+
+        Returns
+        -------
+        None.
+
+        """
+        pid = os.getpid()
+        spans = self.completed(run_ID)
+        threads = {thread: tid for tid, thread in
+                   enumerate(dict.fromkeys(span.thread for span in spans))}
+        events = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                   'args': {'name': thread}} for thread, tid in threads.items()]
+        for span in spans:
+            args = dict(span.attributes, span=span.span_ID, parent=span.parent_ID,
+                        run=span.run_ID)
+            events.append({'name': span.name, 'cat': span.category, 'ph': 'X',
+                           'ts': span.start*1e6, 'dur': span.duration()*1e6, 'pid': pid,
+                           'tid': threads[span.thread], 'args': args})
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, default=str)
+
+    def clear(self):
+        """
+        Forget the completed spans.
+
+        Returns
+        -------
+        None.
+
+        """
+        with self.lock:
+            self.spans.clear()
+
+
+def FormatSummary(summary):
+    """
+    Format a summary as a table, the most expensive spans first.
+
+    Parameters
+    ----------
+    summary : dict
+        Summary returned by Tracer.summary().
+
+    Returns
+    -------
+    table : str
+        One line per span name.
+
+    """
+    lines = ['%-36s %6s %11s %11s %11s %6s %6s' % ('Span', 'Count', 'Total (ms)', 'Mean (ms)',
+                                                  'Max (ms)', 'Hits', 'Misses')]
+    for name, row in sorted(summary.items(), key=lambda item: -item[1]['total']):
+        lines.append('%-36s %6d %11.1f %11.1f %11.1f %6d %6d'
+                     % (name, row['count'], 1e3*row['total'], 1e3*row['mean'], 1e3*row['max'],
+                        row['hits'], row['misses']))
+    return '\n'.join(lines)
+
+
+# Recorder used by the whole pipeline
+tracer = Tracer(trace_enabled, trace_file, trace_spans)
@@ -0,0 +1,427 @@
+"""
+Created on Sun Oct 18 16:42:09 2026.
+
+This script contains the process variability engine used by the corner analysis
+
+Any subset of the process parameters (waveguide height, waveguide width, slab height and doping
+concentration error) can be varied, each within +- its range. The process samples are either the
+full factorial corners of the selected parameters, 2^N of them, N-dimensional Latin hypercube or
+Sobol samples of the ranges, or the central composite design the Monte Carlo yield surrogate of
+YieldAnalysis is fitted to. Samples are seeded, so the CHARGE run and the ring run of a corner
+analysis generate the same samples.
+
+Every sample is named by the suffix appended to the nominal CHARGE file, e.g.
+'_wg_height-25p0nm_wg_width+50p0nm'. Samples sharing a suffix share their simulations, and the
+distinct ones are simulated concurrently by the stage graph executor. The figures of merit of every
+sample are collected into a structured array, one record per sample.
+
+@author: AlexTofini
+"""
+
+# Importing relevant packages
+import csv
+import itertools
+from pathlib import Path
+import numpy as np
+from scipy.stats import qmc
+import RINGsimulation as sim
+import ResonanceFOM
+import EyeSimulator
+import StageGraph
+
+# Process parameters that can be varied, with their Variability_Dict name and CHARGE file tag
+process_parameters = {
+    'wg_height': ('Waveguide Height', '_wg_height'),
+    'wg_width': ('Waveguide Width', '_wg_width'),
+    'slab_height': ('Slab Height', '_slab_height'),
+    'doping_error': ('Doping Concentration', '_doping'),
+}
+
+# Conversion of the range units to the units used by the solvers
+unit_scale = {'nm': 1e-9, '%': 1}
+
+# Sampling methods
+# Options: [Corners, Latin Hypercube, Sobol, Monte Carlo]
+sampling_methods = {'Corners': 'corners', 'Latin Hypercube': 'lhs', 'Sobol': 'sobol',
+                    'Monte Carlo': 'montecarlo'}
+
+
+def Dimensions(Variability_Dict):
+    """
+    Return the process parameters selected for the variability analysis.
+
+    Parameters
+    ----------
+    Variability_Dict : dict
+        Dictionairy containing all variability set up information.
+
+    Returns
+    -------
+    dimensions : dict
+        (range, units) of every selected parameter with a non zero range, keyed by process
+        parameter, in the order of process_parameters.
+
+    """
+    dimensions = {}
+    for key, (name, tag) in process_parameters.items():
+        if Variability_Dict.get('[ID] ' + name) and Variability_Dict.get(name + ' Range', 0) != 0:
+            dimensions[key] = (Variability_Dict[name + ' Range'], Variability_Dict[name + ' Units'])
+    return dimensions
+
+
+def Samples(dimensions, method='corners', count=None, seed=0):
+    """
+    Generate the process samples.
+
+    Parameters
+    ----------
+    dimensions : dict
+        Selected process parameters, see Dimensions().
+    method : str, optional
+        Sampling method, montecarlo is the face centered central composite design (center,
+        corners and axial points) fitted by the yield surrogate.
+        Options: [corners, lhs, sobol, montecarlo]. The default is 'corners'.
+    count : int, optional
+        Number of Latin hypercube or Sobol samples, or of Latin hypercube samples added to the
+        central composite design. The default is None, which uses 2^N as for the corners and no
+        additional samples for the central composite design.
+    seed : int, optional
+        Seed of the Latin hypercube and Sobol generators. The default is 0.
+
+    Raises
+    ------
+    ValueError
+        If the sampling method is unknown.
+
+    Returns
+    -------
+    deltas : array
+        Deviation of every parameter from its nominal value in the range units, shape
+        (samples, parameters), parameters in the order of dimensions.
+
+    """
+    ranges = np.array([float(Range) for Range, units in dimensions.values()])
+    d = len(ranges)
+    if d == 0:
+        return np.zeros((0, 0))
+
+    if method in ('corners', 'montecarlo'):
+        # Full factorial, the first parameter varying fastest as in BL, BR, TL, TR
+        unit = np.array(list(itertools.product([-1, 1], repeat=d)))[:, ::-1]
+        if method == 'montecarlo':
+            # Center and axial points so every quadratic term is determined
+            unit = np.vstack([np.zeros((1, d)), unit, -np.eye(d), np.eye(d)])
+            if count is not None:
+                unit = np.vstack([unit, 2*qmc.LatinHypercube(d=d, seed=seed).random(count) - 1])
+    elif method in ('lhs', 'sobol'):
+        if count is None:
+            count = 2**d
+        if method == 'lhs':
+            sampler = qmc.LatinHypercube(d=d, seed=seed)
+        else:
+            sampler = qmc.Sobol(d=d, scramble=True, seed=seed)
+        unit = 2*sampler.random(int(count)) - 1
+    else:
+        raise ValueError("Unknown sampling method '" + str(method) + "'")
+
+    return unit*ranges[np.newaxis, :]
+
+
+def Identifier(dimensions, delta):
+    """
+    Return the suffix appended to the nominal CHARGE file name for a process sample.
+
+    Parameters
+    ----------
+    dimensions : dict
+        Selected process parameters, see Dimensions().
+    delta : array
+        Deviation of every parameter from its nominal value in the range units.
+
+    Returns
+    -------
+    identifier : str
+        Suffix, e.g. '_wg_height-25p0nm_wg_width+50p0nm', '.' replaced by 'p'.
+
+    """
+    identifier = ''
+    for (key, (Range, units)), value in zip(dimensions.items(), delta):
+        sign = '-' if value < 0 else '+'
+        magnitude = abs(float(value))
+        if np.isclose(magnitude, float(Range)):
+            magnitude = Range
+        else:
+            magnitude = round(magnitude, 3)
+        identifier += process_parameters[key][1] + sign + str(magnitude) + units
+    return identifier.replace('.', 'p')
+
+
+def SampleValues(dimensions, delta, nominal):
+    """
+    Return the process parameters of a sample in solver units.
+
+    Parameters
+    ----------
+    dimensions : dict
+        Selected process parameters, see Dimensions().
+    delta : array
+        Deviation of every parameter from its nominal value in the range units.
+    nominal : dict
+        Nominal value of every process parameter in solver units, i.e. m and % for doping_error.
+
+    Returns
+    -------
+    values : dict
+        Value of every process parameter of the sample.
+
+    """
+    values = dict(nominal)
+    for (key, (Range, units)), value in zip(dimensions.items(), delta):
+        values[key] = round(nominal[key] + value*unit_scale[units], 10)
+    return values
+
+
+def runChargeSamples(dimensions, deltas, charge_arguments, max_workers=None):
+    """
+    Execute the CHARGE simulation of every distinct process sample concurrently.
+
+    Parameters
+    ----------
+    dimensions : dict
+        Selected process parameters, see Dimensions().
+    deltas : array
+        Process samples, see Samples().
+    charge_arguments : dict
+        Keyword arguments of RINGsimulation.runPNJunctionSimulator for the nominal PN junction.
+    max_workers : int, optional
+        Maximum number of samples simulated at the same time. The default is None, every sample.
+
+    Returns
+    -------
+    charge_files : dict
+        (CHARGE_FILE, SimRun) returned by runPNJunctionSimulator, keyed by sample identifier.
+
+    """
+    nominal = {key: charge_arguments.get(key, 0) for key in process_parameters}
+
+    graph = StageGraph.StageGraph(max_workers)
+    for delta in deltas:
+        identifier = Identifier(dimensions, delta)
+        if identifier in graph.stages:
+            continue
+        arguments = dict(charge_arguments)
+        arguments.update(SampleValues(dimensions, delta, nominal))
+        arguments['save_name'] = charge_arguments['save_name'] + identifier
+        graph.add(identifier, sim.runPNJunctionSimulator, **arguments)
+    return graph.run()
+
+
+def runRingSamples(dimensions, deltas, CHARGE_file, Radius, Gap, Slab_Height, CouplingLength,
+                   LambdaStart, LambdaEnd, Band, prop_loss, wg_height, wg_width, search=None,
+                   gap_tolerance=1e-9, max_workers=None):
+    """
+    Execute the ring simulation of every distinct process sample concurrently.
+
+    The CHARGE file of every sample is the nominal CHARGE file with the sample identifier appended,
+    as generated by runChargeSamples().
+
+    Parameters
+    ----------
+    dimensions : dict
+        Selected process parameters, see Dimensions().
+    deltas : array
+        Process samples, see Samples().
+    CHARGE_file : WindowsPath
+        Path object pointing to to the nominal CHARGE file.
+    Radius : float
+        Ring radius.
+    Gap : float or list
+        Ring gap, or the gaps bounding the critical coupling search.
+    Slab_Height : float
+        Nominal slab height.
+    CouplingLength : float
+        Ring coupling length, >0 for racetrack ring resonator.
+    LambdaStart : float
+        Start wavelength for ring simulation.
+    LambdaEnd : float
+        End wavelength for ring simulation.
+    Band : str
+        Optical band.
+        Options: [CL, O].
+    prop_loss : float
+        Excess propagation loss supplied by the user.
+    wg_height : float
+        Nominal waveguide height.
+    wg_width : float
+        Nominal waveguide width.
+    search : str, optional
+        Critical gap search method, see RINGsimulation.runCorners(). The default is None.
+    gap_tolerance : float, optional
+        Resolution of the critical gap for the adaptive search. The default is 1e-9.
+    max_workers : int, optional
+        Maximum number of samples simulated at the same time. The default is None, every sample.
+
+    Returns
+    -------
+    sample_results : list
+        Populated saved_results class of every sample, samples sharing an identifier share it.
+
+    """
+    nominal = {'wg_height': wg_height, 'wg_width': wg_width, 'slab_height': Slab_Height,
+               'doping_error': 0}
+    charge_file = str(CHARGE_file).split('\\')[-1]
+    charge_file = charge_file.split('.')[0]
+
+    # Describing every distinct sample for the corner runner
+    corners = {}
+    identifiers = []
+    for delta in deltas:
+        identifier = Identifier(dimensions, delta)
+        identifiers.append(identifier)
+        if identifier not in corners:
+            values = SampleValues(dimensions, delta, nominal)
+            corners[identifier] = (values['slab_height'],
+                                   Path(str(CHARGE_file).replace(charge_file,
+                                                                 charge_file + identifier)),
+                                   values['wg_height'], values['wg_width'])
+    print("Simulating " + str(len(corners)) + " distinct process samples out of " +
+          str(len(deltas)))
+
+    corner_results = sim.runCorners(corners, Radius, Gap, CouplingLength, LambdaStart, LambdaEnd,
+                                    Band, prop_loss, search=search, gap_tolerance=gap_tolerance,
+                                    max_workers=max_workers)
+    return [corner_results[identifier] for identifier in identifiers]
+
+
+def TableType(dimensions):
+    """
+    Return the structured array type of the figure of merit table.
+
+    Parameters
+    ----------
+    dimensions : dict
+        Selected process parameters, see Dimensions().
+
+    Returns
+    -------
+    dtype
+        Structured array type.
+
+    """
+    return np.dtype([('sample', int), ('identifier', 'U128')] +
+                    [(key, float) for key in dimensions] +
+                    [('gap', float),
+                     ('resonance', float),
+                     ('FSR', float),
+                     ('bandwidth_3dB', float),
+                     ('Q', float),
+                     ('insertion_loss', float),
+                     ('extinction', float),
+                     ('tuning', float)])
+
+
+def FOMTable(dimensions, deltas, sample_results, nominal_gap=np.nan):
+    """
+    Collect the figures of merit of every process sample.
+
+    The resonance of a sample is its unbiased resonance closest to the center of the simulated
+    band, and the tuning is the shift of that resonance over the voltage sweep per volt.
+
+    Parameters
+    ----------
+    dimensions : dict
+        Selected process parameters, see Dimensions().
+    deltas : array
+        Process samples, see Samples().
+    sample_results : list
+        Result class of every sample, see runRingSamples().
+    nominal_gap : float, optional
+        Gap of the samples without a critical coupling search. The default is NaN.
+
+    Returns
+    -------
+    table : structured array
+        One record per sample with the sample index and identifier, the deviation of every varied
+        parameter in the range units, the gap, resonance, FSR, bandwidth_3dB, Q, insertion_loss,
+        all in the units of saved_results, the extinction of the resonance dip in dB from the
+        highest transmission of the row, and the tuning in wavelength units per volt.
+
+    """
+    table = np.zeros(len(sample_results), dtype=TableType(dimensions))
+    for ii, (delta, saved_results) in enumerate(zip(deltas, sample_results)):
+        table[ii]['sample'] = ii
+        table[ii]['identifier'] = Identifier(dimensions, delta)
+        for key, value in zip(dimensions, delta):
+            table[ii][key] = value
+        table[ii]['gap'] = saved_results.CriticalCoupleGap or nominal_gap
+
+        # Figures of merit of every row, keeping the resonance closest to the band center
+        wavelength = np.asarray(saved_results.wavelength, dtype=float)
+        foms = ResonanceFOM.ExtractFOMs(wavelength, saved_results.T)
+        unbiased = foms[foms['voltage_index'] == 0]
+        if len(unbiased) == 0:
+            for field in ('resonance', 'FSR', 'bandwidth_3dB', 'Q', 'insertion_loss', 'extinction',
+                          'tuning'):
+                table[ii][field] = np.nan
+            continue
+        center = (wavelength[0] + wavelength[-1])/2
+        fom = unbiased[np.argmin(np.abs(unbiased['resonance'] - center))]
+        for field in ('resonance', 'FSR', 'bandwidth_3dB', 'Q', 'insertion_loss'):
+            table[ii][field] = fom[field]
+        table[ii]['extinction'] = np.max(np.atleast_2d(saved_results.T)[0]) + fom['insertion_loss']
+
+        # Tuning from the same resonance in the last voltage row
+        voltage = EyeSimulator.SweepVoltages(saved_results)
+        last = foms[foms['voltage_index'] == len(voltage) - 1]
+        if len(last) > 0 and len(voltage) > 1:
+            shifted = last['resonance'][np.argmin(np.abs(last['resonance'] - fom['resonance']))]
+            table[ii]['tuning'] = (shifted - fom['resonance'])/(voltage[-1] - voltage[0])
+        else:
+            table[ii]['tuning'] = np.nan
+    return table
+
+
+def WriteTable(table, filename):
+    """
+    Write a figure of merit table to a csv file.
+
+    Parameters
+    ----------
+    table : structured array
+        Table returned by FOMTable().
+    filename : str
+        Path of the csv file.
+
+    Returns
+    -------
+    None.
+
+    """
+    with open(filename, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(table.dtype.names)
+        for record in table:
+            writer.writerow(record.tolist())
+
+
+def FormatTable(table):
+    """
+    Format a figure of merit table as text, one line per sample.
+
+    Parameters
+    ----------
+    table : structured array
+        Table returned by FOMTable().
+
+    Returns
+    -------
+    text : str
+        Aligned table.
+
+    """
+    names = [name for name in table.dtype.names if name != 'identifier']
+    lines = ['  '.join('%12s' % name for name in names)]
+    for record in table:
+        lines.append('  '.join('%12d' % record[name] if name == 'sample'
+                               else '%12.6g' % record[name] for name in names))
+    return '\n'.join(lines)
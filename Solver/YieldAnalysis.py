@@ -0,0 +1,527 @@
+"""
+Created on Sun Oct 18 19:26:48 2026.
+
+This script contains the Monte Carlo yield analysis built on the process variability engine
+
+Solver runs take minutes, so the process samples are not simulated directly. A quadratic response
+surface of every figure of merit (resonance, Q, extinction and 3dB bandwidth) is fitted to the
+variability samples of the nominal design, by default a face centered central composite design
+(center, corners and axial points), together with every sample record stored by previous analyses
+of the same nominal design and ring engine. Records are unique per process deviation, so a sample
+run again counts once in the fit instead of weighting it towards the analyses run most often. The
+samples already in the database are served from it by the pipeline, so only the missing ones are
+new solver runs. The surrogate is then evaluated on 10^5 Monte Carlo samples drawn from the process
+distributions in milliseconds.
+
+Deviations are in the range units of Variability, nm and % for the doping error. Normal
+distributions are not truncated, samples beyond the fitted ranges are extrapolated.
+
+@author: AlexTofini
+"""
+
+# Importing relevant packages
+import os
+import csv
+import numpy as np
+import ConnectToDatabase as database
+import Variability
+
+# Figures of merit modelled by the surrogate, fields of the Variability table
+yield_foms = ('resonance', 'Q', 'extinction', 'bandwidth_3dB')
+
+# Process distributions, the range of a parameter is 3 sigma for normal distributions
+# Options: [Normal, Uniform]
+distribution_types = {'Normal': 'normal', 'Uniform': 'uniform'}
+
+# Folder storing the sample records of every nominal design
+record_folder = 'Variability'
+
+# Parameters identifying a nominal design, in order
+record_fields = ('charge_file', 'radius', 'gaps', 'coupling_length', 'band', 'slab_height',
+                 'wg_height', 'wg_width', 'prop_loss', 'lambda_start', 'lambda_end', 'ring_engine')
+
+# Decimals of the deviations compared when matching records of the same sample
+record_decimals = 6
+
+
+def Distributions(dimensions, kind='normal'):
+    """
+    Return the process distributions of the selected parameters from their ranges.
+
+    Parameters
+    ----------
+    dimensions : dict
+        Selected process parameters, see Variability.Dimensions().
+    kind : str, optional
+        Distribution of every parameter.
+        Options: [normal, uniform]. The default is 'normal', with the range as 3 sigma.
+
+    Raises
+    ------
+    ValueError
+        If the distribution is unknown.
+
+    Returns
+    -------
+    distributions : dict
+        (kind, spread) keyed by process parameter, spread is the standard deviation of normal
+        distributions and the half width of uniform ones, in the range units.
+
+    """
+    if kind == 'normal':
+        return {key: ('normal', float(Range)/3) for key, (Range, units) in dimensions.items()}
+    if kind == 'uniform':
+        return {key: ('uniform', float(Range)) for key, (Range, units) in dimensions.items()}
+    raise ValueError("Unknown distribution '" + str(kind) + "'")
+
+
+def Draw(dimensions, distributions, count=100000, seed=0):
+    """
+    Draw Monte Carlo process samples.
+
+    Parameters
+    ----------
+    dimensions : dict
+        Selected process parameters, see Variability.Dimensions().
+    distributions : dict
+        (kind, spread) of every selected parameter, see Distributions().
+    count : int, optional
+        Number of samples. The default is 100000.
+    seed : int, optional
+        Seed of the generator. The default is 0.
+
+    Raises
+    ------
+    ValueError
+        If a distribution is unknown.
+
+    Returns
+    -------
+    deltas : array
+        Deviation of every parameter from its nominal value in the range units, shape
+        (count, parameters), parameters in the order of dimensions.
+
+    """
+    generator = np.random.default_rng(seed)
+    deltas = np.zeros((int(count), len(dimensions)))
+    for ii, key in enumerate(dimensions):
+        kind, spread = distributions[key]
+        if kind == 'normal':
+            deltas[:, ii] = generator.normal(0, spread, int(count))
+        elif kind == 'uniform':
+            deltas[:, ii] = generator.uniform(-spread, spread, int(count))
+        else:
+            raise ValueError("Unknown distribution '" + str(kind) + "' for " + key)
+    return deltas
+
+
+def Features(x, degree):
+    """
+    Return the polynomial features of normalized process samples.
+
+    Parameters
+    ----------
+    x : array
+        Samples normalized by the parameter ranges, shape (samples, parameters).
+    degree : int
+        Polynomial degree.
+        Options: [1, 2].
+
+    Returns
+    -------
+    features : array
+        Constant, linear and for degree 2 the squared and cross terms, shape (samples, features).
+
+    """
+    columns = [np.ones(len(x))] + [x[:, ii] for ii in range(x.shape[1])]
+    if degree == 2:
+        columns += [x[:, ii]*x[:, jj] for ii in range(x.shape[1])
+                    for jj in range(ii, x.shape[1])]
+    return np.stack(columns, axis=1)
+
+
+class Surrogate():
+    """
+    A class to represent the response surface of the figures of merit over the process parameters.
+
+    A quadratic is fitted to every figure of merit by least squares, falling back to a linear fit
+    when there are not enough finite records for the quadratic terms.
+
+    ...
+
+    """
+
+    def __init__(self, dimensions, table, foms=yield_foms):
+        """
+        Fit the response surface to the sample records.
+
+        Parameters
+        ----------
+            dimensions : dict
+                Selected process parameters, see Variability.Dimensions().
+            table : structured array
+                Sample records with a field per selected parameter and per figure of merit, see
+                Variability.FOMTable().
+            foms : tuple, optional
+                Figures of merit to model. The default is yield_foms.
+
+        Raises
+        ------
+            ValueError
+                If a figure of merit has fewer finite records than a linear fit needs.
+        """
+        self.dimensions = dimensions
+        self.ranges = np.array([float(Range) for Range, units in dimensions.values()])
+        self.coefficients = {}
+        self.degree = {}
+        self.rms = {}
+
+        x = self.normalize(np.stack([table[key] for key in dimensions], axis=1)
+                           if dimensions else np.zeros((len(table), 0)))
+        for fom in foms:
+            y = np.asarray(table[fom], dtype=float)
+            finite = np.isfinite(y)
+
+            # Choosing the highest degree the finite records support
+            degree = 2
+            if finite.sum() < Features(x[:1], 2).shape[1]:
+                degree = 1
+            if finite.sum() < Features(x[:1], 1).shape[1]:
+                raise ValueError("Only " + str(finite.sum()) + " finite " + fom +
+                                 " records, the surrogate needs at least " +
+                                 str(Features(x[:1], 1).shape[1]))
+
+            features = Features(x[finite], degree)
+            coefficients = np.linalg.lstsq(features, y[finite], rcond=None)[0]
+            self.coefficients[fom] = coefficients
+            self.degree[fom] = degree
+            self.rms[fom] = np.sqrt(np.mean((features @ coefficients - y[finite])**2))
+
+    def normalize(self, deltas):
+        """
+        Normalize deviations by the parameter ranges.
+
+        Parameters
+        ----------
+        deltas : array
+            Deviations in the range units, shape (samples, parameters).
+
+        Returns
+        -------
+        x : array
+            Deviations in units of the ranges.
+
+        """
+        return np.asarray(deltas, dtype=float)/np.where(self.ranges == 0, 1, self.ranges)
+
+    def predict(self, deltas):
+        """
+        Evaluate the figures of merit of process samples.
+
+        Parameters
+        ----------
+        deltas : array
+            Deviations in the range units, shape (samples, parameters).
+
+        Returns
+        -------
+        predictions : dict
+            Array of every figure of merit, keyed by figure of merit.
+
+        """
+        x = self.normalize(np.atleast_2d(deltas))
+        features = {degree: Features(x, degree) for degree in set(self.degree.values())}
+        return {fom: features[self.degree[fom]] @ coefficients
+                for fom, coefficients in self.coefficients.items()}
+
+
+def RecordFile(CHARGE_file, Radius, Gap, CouplingLength, Band, Slab_Height, wg_height, wg_width,
+               prop_loss, LambdaStart, LambdaEnd, ring_engine=None):
+    """
+    Return the file storing the sample records of a nominal design.
+
+    Parameters
+    ----------
+    CHARGE_file : WindowsPath
+        Path object pointing to to the nominal CHARGE file.
+    Radius : float
+        Ring radius.
+    Gap : float or list
+        Ring gap, or the gaps bounding the critical coupling search.
+    CouplingLength : float
+        Ring coupling length.
+    Band : str
+        Optical band.
+    Slab_Height : float
+        Nominal slab height.
+    wg_height : float
+        Nominal waveguide height.
+    wg_width : float
+        Nominal waveguide width.
+    prop_loss : float
+        Excess propagation loss supplied by the user.
+    LambdaStart : float
+        Start wavelength for ring simulation.
+    LambdaEnd : float
+        End wavelength for ring simulation.
+    ring_engine : str, optional
+        Engine computing the ring transmission, the records of both engines are kept apart.
+        The default is None, the RING_ENGINE variable used by the simulation classes.
+        Options: [interconnect, numpy]
+
+    Returns
+    -------
+    filename : str
+        Path of the csv file in the Database folder.
+
+    """
+    if ring_engine is None:
+        ring_engine = os.environ.get('RING_ENGINE', 'interconnect')
+    charge_file = str(CHARGE_file).split('\\')[-1]
+    charge_file = os.path.basename(charge_file).split('.')[0]
+    key = database.ParameterKey(record_fields, (charge_file, Radius, str(Gap), CouplingLength,
+                                                Band, Slab_Height, wg_height, wg_width, prop_loss,
+                                                LambdaStart, LambdaEnd, ring_engine))
+    return os.getcwd() + '/Database/' + record_folder + '/' + charge_file + '_' + key[:12] + '.csv'
+
+
+def RecordKey(deviations):
+    """
+    Return the key identifying the sample of a record.
+
+    Parameters
+    ----------
+    deviations : iterable
+        Deviation of every process parameter.
+
+    Returns
+    -------
+    key : tuple
+        Deviations rounded to record_decimals.
+
+    """
+    return tuple(round(float(value), record_decimals) + 0.0 for value in deviations)
+
+
+def StoreRecords(table, filename):
+    """
+    Append the sample records missing from the record file of a nominal design.
+
+    Samples already stored are skipped, the pipeline served them from the database so their
+    figures of merit are the stored ones.
+
+    Parameters
+    ----------
+    table : structured array
+        Table returned by Variability.FOMTable().
+    filename : str
+        Record file, see RecordFile().
+
+    Returns
+    -------
+    None.
+
+    """
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    new = not os.path.exists(filename)
+    stored = set()
+    if not new:
+        with open(filename, newline='') as file:
+            stored = {RecordKey(row[key] for key in Variability.process_parameters)
+                      for row in csv.DictReader(file)}
+
+    with open(filename, 'a', newline='') as file:
+        writer = csv.writer(file)
+        if new:
+            writer.writerow(('wg_height', 'wg_width', 'slab_height', 'doping_error') + yield_foms)
+        for record in table:
+            deviations = [record[key] if key in table.dtype.names else 0
+                          for key in Variability.process_parameters]
+            if RecordKey(deviations) in stored:
+                continue
+            stored.add(RecordKey(deviations))
+            writer.writerow(deviations + [record[fom] for fom in yield_foms])
+
+
+def ReadRecords(dimensions, filename):
+    """
+    Read the stored sample records of a nominal design usable with the selected parameters.
+
+    Records deviating in a parameter that is not selected are skipped, the other parameters are
+    nominal in every stored record. A sample stored more than once, by files written before the
+    records were unique, is read once with its last record.
+
+    Parameters
+    ----------
+    dimensions : dict
+        Selected process parameters, see Variability.Dimensions().
+    filename : str
+        Record file, see RecordFile().
+
+    Returns
+    -------
+    table : structured array
+        Usable records with a field per selected parameter and per figure of merit.
+
+    """
+    dtype = np.dtype([(key, float) for key in dimensions] + [(fom, float) for fom in yield_foms])
+    if not os.path.exists(filename):
+        return np.zeros(0, dtype=dtype)
+
+    rows = {}
+    with open(filename, newline='') as file:
+        for row in csv.DictReader(file):
+            if any(float(row[key]) != 0 for key in Variability.process_parameters
+                   if key not in dimensions):
+                continue
+            rows[RecordKey(row[key] for key in dimensions)] = tuple(float(row[name])
+                                                                   for name in dtype.names)
+    return np.array(list(rows.values()), dtype=dtype)
+
+
+def Statistics(predictions):
+    """
+    Summarize the distribution of every figure of merit.
+
+    Parameters
+    ----------
+    predictions : dict
+        Array of every figure of merit, see Surrogate.predict().
+
+    Returns
+    -------
+    statistics : dict
+        Mean, standard deviation, minimum, 1st, 50th and 99th percentiles and maximum of every
+        figure of merit, keyed by figure of merit then statistic.
+
+    """
+    statistics = {}
+    for fom, values in predictions.items():
+        p1, p50, p99 = np.percentile(values, [1, 50, 99])
+        statistics[fom] = {'mean': np.mean(values), 'std': np.std(values), 'min': np.min(values),
+                           'p1': p1, 'p50': p50, 'p99': p99, 'max': np.max(values)}
+    return statistics
+
+
+def Yield(predictions, specs):
+    """
+    Return the fraction of the samples meeting the specifications.
+
+    Parameters
+    ----------
+    predictions : dict
+        Array of every figure of merit, see Surrogate.predict().
+    specs : dict
+        (low, high) limits keyed by figure of merit, None for an open limit.
+
+    Returns
+    -------
+    total : float
+        Fraction of the samples meeting every specification.
+    partial : dict
+        Fraction of the samples meeting each specification, keyed by figure of merit.
+
+    """
+    count = len(next(iter(predictions.values())))
+    passing = np.ones(count, dtype=bool)
+    partial = {}
+    for fom, (low, high) in specs.items():
+        meets = np.ones(count, dtype=bool)
+        if low is not None:
+            meets &= predictions[fom] >= low
+        if high is not None:
+            meets &= predictions[fom] <= high
+        partial[fom] = meets.mean()
+        passing &= meets
+    return passing.mean(), partial
+
+
+def runYield(dimensions, table, distributions, specs, count=100000, seed=0, record_file=None):
+    """
+    Estimate the yield of a nominal design by Monte Carlo on the surrogate.
+
+    Parameters
+    ----------
+    dimensions : dict
+        Selected process parameters, see Variability.Dimensions().
+    table : structured array
+        Sample records of the current analysis, see Variability.FOMTable().
+    distributions : dict
+        (kind, spread) of every selected parameter, see Distributions().
+    specs : dict
+        (low, high) limits keyed by figure of merit, see Yield().
+    count : int, optional
+        Number of Monte Carlo samples. The default is 100000.
+    seed : int, optional
+        Seed of the Monte Carlo samples. The default is 0.
+    record_file : str, optional
+        Record file of the nominal design, see RecordFile(). The default is None, which fits the
+        surrogate to table only. Otherwise the stored records of the samples missing from table
+        are used too and the new samples of table are appended.
+
+    Returns
+    -------
+    report : dict
+        Keys: records (number of records fitted), rms (fit residual of every figure of merit),
+        nominal (figures of merit at the nominal design), statistics, yield, partial_yield,
+        yield_error (standard error of the yield), samples and specs.
+
+    """
+    # Collecting the records of the current analysis and of the previous ones
+    records = np.zeros(len(table), dtype=np.dtype([(key, float) for key in dimensions] +
+                                                  [(fom, float) for fom in yield_foms]))
+    for name in records.dtype.names:
+        records[name] = table[name]
+    if record_file is not None:
+        stored = ReadRecords(dimensions, record_file)
+        current = {RecordKey(record[key] for key in dimensions) for record in records}
+        previous = [RecordKey(record[key] for key in dimensions) not in current
+                    for record in stored]
+        records = np.concatenate([stored[np.array(previous, dtype=bool)], records])
+        StoreRecords(table, record_file)
+
+    # Fitting the surrogate and evaluating the Monte Carlo samples
+    surrogate = Surrogate(dimensions, records)
+    predictions = surrogate.predict(Draw(dimensions, distributions, count, seed))
+    total, partial = Yield(predictions, specs)
+
+    return {'records': len(records),
+            'rms': surrogate.rms,
+            'nominal': {fom: values[0] for fom, values in
+                        surrogate.predict(np.zeros((1, len(dimensions)))).items()},
+            'statistics': Statistics(predictions),
+            'yield': total,
+            'partial_yield': partial,
+            'yield_error': np.sqrt(total*(1 - total)/count),
+            'samples': count,
+            'specs': specs}
+
+
+def FormatReport(report):
+    """
+    Format a yield report as text.
+
+    Parameters
+    ----------
+    report : dict
+        Report returned by runYield().
+
+    Returns
+    -------
+    text : str
+        Statistics table followed by the yield.
+
+    """
+    names = ('nominal', 'fit rms', 'mean', 'std', 'p1', 'p50', 'p99')
+    lines = ['Monte Carlo yield over ' + str(report['samples']) + ' samples, surrogate fitted to ' +
+             str(report['records']) + ' records',
+             '%14s' % 'FOM' + ''.join('%12s' % name for name in names)]
+    for fom, statistics in report['statistics'].items():
+        values = [report['nominal'][fom], report['rms'][fom]] + [statistics[name]
+                                                                  for name in names[2:]]
+        lines.append('%14s' % fom + ''.join('%12.6g' % value for value in values))
+    for fom, (low, high) in report['specs'].items():
+        lines.append(fom + ' in [' + str(low) + ', ' + str(high) + ']: ' +
+                     '%.2f' % (100*report['partial_yield'][fom]) + '%')
+    lines.append('Yield: %.2f +- %.2f%%' % (100*report['yield'], 100*report['yield_error']))
+    return '\n'.join(lines)
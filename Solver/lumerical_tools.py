@@ -9,36 +9,683 @@ This script contains all the LumAPI communication functions to execute all the r
 # Import dependenciess
 import sys
 import os
+import re
+import numbers
 import platform
+import threading
+import importlib
+import atexit
+from contextlib import contextmanager
 import numpy as np
+import Tracing
 
 
-# Saving current working directory
-cwd = os.getcwd()
-
 # Searching for Lumerical API location
 if platform.system() == 'Windows':
-    # try:
     lumapi_path = 'C:/Program Files/Lumerical/v212/api/python'
-    os.chdir(lumapi_path)
-    import lumapi
-
 else:
     lumapi_path = '/CMC/tools/lumerical/v211/api/python'
-    os.chdir(lumapi_path)
-    temp = os.getcwd()
-    print("Searching for lumapi in the following directory: "+temp)
-    import lumapi
 
 dir_path = os.path.dirname(os.path.realpath(__file__))
-if os.path.exists(os.path.join(lumapi_path, 'lumapi.py')):
-    print('Found lumapi path at' + ': ' + lumapi_path)
-    sys.path.append(lumapi_path)
-else:
-    print('lumapi path does not exist, edit lumapi_path variable')
 
-# Returning to original directory
-os.chdir(cwd)
+# Solver backend providing the lumapi functions, open, evalScript, getVar, putv and close
+# Options: [lumerical, standin] or the name of any module providing them
+lumapi_backend = os.environ.get('RING_LUMAPI_BACKEND', 'lumerical')
+
+# Modules of the named backends, the Lumerical one is imported from lumapi_path
+solver_backends = {'lumerical': 'lumapi', 'standin': 'StandinLumapi'}
+
+
+class LazyLumapi():
+    """
+    A class to represent the lumapi module, imported on first use.
+
+    Importing lumapi starts the Lumerical Python API, which is slow and not needed to browse results
+    that are already in the database, so the import is deferred until a solver is opened. Other
+    backends, e.g. the StandinLumapi models used without a Lumerical install, are plain modules.
+
+    ...
+
+    """
+
+    def __init__(self, path, backend='lumerical'):
+        """
+        Construct the accessor without importing lumapi.
+
+        Parameters
+        ----------
+            path : str
+                Folder of the Lumerical Python API.
+            backend : str, optional
+                Solver backend, a key of solver_backends or a module name. The default is
+                'lumerical'.
+        """
+        self.path = path
+        self.backend = backend
+        self.module = None
+        self.lock = threading.Lock()
+
+    def load(self):
+        """
+        Import lumapi if it has not been imported yet.
+
+        Returns
+        -------
+        module : module
+            The lumapi module.
+
+        """
+        with self.lock:
+            if self.module is None and self.backend != 'lumerical':
+                print('Using the ' + self.backend + ' solver backend')
+                self.module = importlib.import_module(solver_backends.get(self.backend,
+                                                                          self.backend))
+            elif self.module is None:
+                if os.path.exists(os.path.join(self.path, 'lumapi.py')):
+                    print('Found lumapi path at' + ': ' + self.path)
+                else:
+                    print('lumapi path does not exist, edit lumapi_path variable')
+
+                # lumapi locates the Lumerical binaries from its own file, so the working
+                # directory, which the solver threads rely on, is left untouched
+                if self.path not in sys.path:
+                    sys.path.insert(0, self.path)
+                import lumapi as module
+                self.module = module
+        return self.module
+
+    def __getattr__(self, name):
+        """Forward attribute access to the lumapi module, importing it on first use."""
+        # Special attributes are looked up by copy and pickle before __init__ has run
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.load(), name)
+
+
+# Accessor used by all simulation methods, lumapi is imported on the first call
+lumapi = LazyLumapi(lumapi_path, lumapi_backend)
+
+# Maximum number of open sessions per solver, every session holds a license
+session_limits = {'fdtd': 1, 'mode': 1, 'device': 1, 'interconnect': 1}
+if 'RING_SESSION_LIMIT' in os.environ:
+    session_limits = dict.fromkeys(session_limits, int(os.environ['RING_SESSION_LIMIT']))
+
+# Number of jobs after which a session is closed and reopened, 1 reopens the solver for every job
+session_max_uses = int(os.environ.get('RING_SESSION_MAX_USES', '25'))
+
+# Script used to return a session to a clean state between jobs
+session_reset = 'switchtolayout; clear;'
+
+# Job scripts are sent in one evalScript call, RING_BATCH_SCRIPTS=0 sends every block of a script
+# in its own call as the simulation methods used to
+batch_scripts = os.environ.get('RING_BATCH_SCRIPTS', '1') != '0'
+
+
+def format_string(value):
+    """
+    Format text as a Lumerical string expression.
+
+    Lumerical strings have no escape sequences, so single quotes and line breaks are concatenated
+    to the quoted text as "'" and endl. Backslashes are kept as is, e.g. in Windows paths.
+
+    Parameters
+    ----------
+    value : str
+        Text to format.
+
+    Returns
+    -------
+    expression : str
+        Lumerical expression evaluating to the text.
+
+    """
+    pieces = []
+    for token in re.split(r"(['\n])", value):
+        if token == "'":
+            pieces.append('"\'"')
+        elif token == '\n':
+            pieces.append('endl')
+        elif token != '':
+            pieces.append("'" + token + "'")
+    return ' + '.join(pieces) or "''"
+
+
+def format_value(value):
+    """
+    Format a Python value as a Lumerical script literal.
+
+    Parameters
+    ----------
+    value : str, path, bool, int, float, list or array
+        Value to format, numpy scalars and 1D arrays included.
+
+    Raises
+    ------
+    ValueError
+        If a number is not finite, Lumerical scripts have no literal for it.
+    TypeError
+        If the value has no Lumerical literal.
+
+    Returns
+    -------
+    literal : str
+        Lumerical literal, e.g. 'name', 1, 2.5e-06 or [0.0, 0.1].
+
+    """
+    if isinstance(value, (str, os.PathLike)):
+        return format_string(os.fspath(value))
+    if isinstance(value, (bool, np.bool_)):
+        return '1' if value else '0'
+    if isinstance(value, numbers.Integral):
+        return str(int(value))
+    if isinstance(value, numbers.Real):
+        if not np.isfinite(value):
+            raise ValueError('Cannot pass the non-finite value ' + str(value) + ' to Lumerical')
+        return repr(float(value))
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return '[' + ', '.join(format_value(item) for item in np.ravel(value).tolist()) + ']'
+    raise TypeError('Cannot pass ' + type(value).__name__ + ' values to Lumerical')
+
+
+class LumericalScript():
+    """
+    A class to represent the script of a solver job, sent to the solver in one call.
+
+    Every lumapi.evalScript call is a round trip to the solver process, so the session setup, the
+    parameters and the analysis script of a job are composed here and evaluated together by
+    evaluate_script. Values are formatted by format_value instead of being pasted in as text.
+
+    Example
+    -------
+        script = LumericalScript()
+        script.assign(radius=10e-6, Band='CL')
+        script.run('SimulateSpectrum')
+        evaluate_script(handle, script)
+        # radius = 1e-05; Band = 'CL'; SimulateSpectrum;
+
+    ...
+
+    """
+
+    def __init__(self):
+        """Construct an empty script."""
+        self.blocks = []
+
+    def __str__(self):
+        """Return the script as the text sent to the solver."""
+        return ' '.join(self.blocks)
+
+    def __len__(self):
+        """Return the number of blocks of the script."""
+        return len(self.blocks)
+
+    def command(self, text):
+        """
+        Append script text as is, e.g. 'switchtolayout;'.
+
+        Parameters
+        ----------
+        text : str
+            Lumerical statements, terminated by ';'.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.blocks.append(text)
+
+    def call(self, function, *arguments):
+        """
+        Append a function call, e.g. call('load', 'Waveguide.lms').
+
+        Parameters
+        ----------
+        function : str
+            Lumerical function name.
+        *arguments : any
+            Arguments, formatted by format_value.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.blocks.append(function + '(' + ', '.join(format_value(argument)
+                                                      for argument in arguments) + ');')
+
+    def assign(self, **variables):
+        """
+        Append the assignment of script variables, in the order given.
+
+        Parameters
+        ----------
+        **variables : any
+            Values keyed by variable name, formatted by format_value.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.blocks.append(' '.join(name + ' = ' + format_value(value) + ';'
+                                    for name, value in variables.items()))
+
+    def setnamed(self, name, **properties):
+        """
+        Append setnamed calls setting properties of a simulation object.
+
+        Parameters
+        ----------
+        name : str
+            Object name, e.g. '::model'.
+        **properties : any
+            Values keyed by property name, formatted by format_value.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.blocks.append(' '.join('setnamed(' + format_value(name) + ', '
+                                    + format_value(key) + ', ' + format_value(value) + ');'
+                                    for key, value in properties.items()))
+
+    def run(self, script):
+        """
+        Append the run of a script file of the working directory, e.g. run('SimulateSpectrum').
+
+        Parameters
+        ----------
+        script : str
+            Script name without its extension.
+
+        Raises
+        ------
+        ValueError
+            If the name is not a script name.
+
+        Returns
+        -------
+        None.
+
+        """
+        if not re.fullmatch(r'[A-Za-z_]\w*', script):
+            raise ValueError('Invalid Lumerical script name: ' + script)
+        self.blocks.append(script + ';')
+
+
+def evaluate_script(handle, script):
+    """
+    Evaluate a script in a solver session, in one call unless batch_scripts is off.
+
+    Parameters
+    ----------
+    handle : object
+        lumapi handle of the session.
+    script : LumericalScript
+        Script to evaluate, emptied once evaluated so it can be reused by the job.
+
+    Returns
+    -------
+    None.
+
+    """
+    if len(script) == 0:
+        return
+    if batch_scripts:
+        lumapi.evalScript(handle, str(script))
+    else:
+        for block in script.blocks:
+            lumapi.evalScript(handle, block)
+    script.blocks = []
+
+
+# Job owning the sessions acquired by the current thread, set by JobQueue so a job past its
+# timeout can have its sessions closed
+session_owner = threading.local()
+
+
+class SolverSession():
+    """
+    A class to represent an open Lumerical session owned by the session pool.
+
+    ...
+
+    """
+
+    def __init__(self, solver, handle):
+        """
+        Construct the session around an open lumapi handle.
+
+        Parameters
+        ----------
+            solver : str
+                Solver type passed to lumapi.open().
+            handle : object
+                Handle returned by lumapi.open().
+        """
+        self.solver = solver
+        self.handle = handle
+        self.uses = 0
+        self.project = None
+        self.owner = None
+        self.killed = False
+        self.reset = False
+
+
+class SessionPool():
+    """
+    A class to represent a pool of warm Lumerical sessions, kept per solver type.
+
+    Opening a solver costs the application startup and a license checkout, so sessions are reused
+    between jobs. A job acquires a session, optionally with a project file that the pool loads,
+    and returns it when done. Sessions are reset between jobs, reopened after max_uses jobs or
+    after a failed job, and at most limits[solver] sessions are open at the same time, further
+    requests wait for a session to be returned. Sessions acquired on behalf of a job are registered
+    to it, so kill() can close them when the job hangs. The reset and project load are added to the
+    script of the next job when it is given one, so they cost no extra round trip.
+
+    ...
+
+    """
+
+    def __init__(self, limits, max_uses):
+        """
+        Construct an empty pool.
+
+        Parameters
+        ----------
+            limits : dict
+                Maximum number of open sessions per solver type.
+            max_uses : int
+                Number of jobs after which a session is reopened.
+        """
+        self.limits = limits
+        self.max_uses = max_uses
+        self.idle = {}
+        self.opened = {}
+        self.owned = {}
+        self.condition = threading.Condition()
+
+    def limit(self, solver):
+        """
+        Return the maximum number of open sessions of a solver type.
+
+        Parameters
+        ----------
+        solver : str
+            Solver type.
+
+        Returns
+        -------
+        limit : int
+            Maximum number of open sessions.
+
+        """
+        return max(1, self.limits.get(solver, 1))
+
+    def acquire(self, solver, project=None, script=None):
+        """
+        Take a session out of the pool, opening one if the limit allows it.
+
+        Parameters
+        ----------
+        solver : str
+            Solver type.
+            Options : [fdtd, mode, device, interconnect]
+        project : str, optional
+            Project file that must be loaded in the session. The default is None.
+        script : LumericalScript, optional
+            Script of the job, the session setup is added to it instead of being evaluated
+            separately. The default is None.
+
+        Returns
+        -------
+        session : SolverSession
+            Session reserved for the caller.
+
+        """
+        with self.condition:
+            while True:
+                if self.idle.get(solver):
+                    session = self.idle[solver].pop()
+                    break
+                if self.opened.get(solver, 0) < self.limit(solver):
+                    # Reserving the slot before opening so the lock is not held during startup
+                    self.opened[solver] = self.opened.get(solver, 0) + 1
+                    session = None
+                    break
+                self.condition.wait()
+
+        try:
+            if session is None:
+                with Tracing.tracer.span('open', solver):
+                    session = SolverSession(solver, lumapi.open(solver))
+
+            # Clearing what the previous job left, then moving to the working directory since
+            # solvers resolve relative paths from their own directory, not the Python one
+            setup = script if script is not None else LumericalScript()
+            if session.reset:
+                setup.command(session_reset)
+            setup.call('cd', os.getcwd())
+            if project is not None and session.project != project:
+                setup.call('load', project)
+            if script is None:
+                with Tracing.tracer.span('setup', solver, project=project):
+                    evaluate_script(session.handle, setup)
+            session.reset = False
+            if project is not None:
+                session.project = project
+        except Exception:
+            if session is not None:
+                self.discard(session)
+            else:
+                with self.condition:
+                    self.opened[solver] = self.opened[solver] - 1
+                    self.condition.notify_all()
+            raise
+
+        # Registering the session to the job of the calling thread
+        session.owner = getattr(session_owner, 'job', None)
+        if session.owner is not None:
+            with self.condition:
+                self.owned.setdefault(session.owner, []).append(session)
+        return session
+
+    def release(self, session, failed=False, dirty=True, detach=False):
+        """
+        Return a session to the pool.
+
+        Parameters
+        ----------
+        session : SolverSession
+            Session returned by acquire().
+        failed : bool, optional
+            The job failed, the session is closed since its state is unknown. The default is False.
+        dirty : bool, optional
+            The job changed the loaded project, so it is loaded again by the next job asking for
+            it. The default is True.
+        detach : bool, optional
+            Leave the session open and remove it from the pool, used to inspect a simulation in
+            the solver window. The default is False.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.disown(session):
+            return
+        session.uses = session.uses + 1
+        if detach:
+            with self.condition:
+                self.opened[session.solver] = self.opened[session.solver] - 1
+                self.condition.notify_all()
+            return
+        if failed or session.uses >= self.max_uses:
+            self.discard(session)
+            return
+
+        # Results and script variables left by the job are cleared by the next job
+        session.reset = True
+        if dirty:
+            session.project = None
+
+        with self.condition:
+            self.idle.setdefault(session.solver, []).append(session)
+            self.condition.notify_all()
+        return
+
+    def discard(self, session):
+        """
+        Close a session and free its slot.
+
+        Parameters
+        ----------
+        session : SolverSession
+            Session to close.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.disown(session):
+            return
+        try:
+            lumapi.close(session.handle)
+        except Exception as e:
+            print('Failed to close ' + session.solver + ' session: ' + str(e))
+        with self.condition:
+            self.opened[session.solver] = self.opened[session.solver] - 1
+            self.condition.notify_all()
+        return
+
+    def disown(self, session):
+        """
+        Remove a session from the sessions of its job.
+
+        Parameters
+        ----------
+        session : SolverSession
+            Session returned by acquire().
+
+        Returns
+        -------
+        killed : bool
+            The session was closed by kill(), so it must not be used or closed again.
+
+        """
+        with self.condition:
+            if session.owner is not None and session in self.owned.get(session.owner, []):
+                self.owned[session.owner].remove(session)
+                if self.owned[session.owner] == []:
+                    del self.owned[session.owner]
+            session.owner = None
+            return session.killed
+
+    def kill(self, owner):
+        """
+        Close every session of a job, ending any solver call blocked in them.
+
+        Parameters
+        ----------
+        owner : tuple
+            Job owning the sessions, see session_owner.
+
+        Returns
+        -------
+        None.
+
+        """
+        with self.condition:
+            sessions = self.owned.pop(owner, [])
+            for session in sessions:
+                session.killed = True
+                session.owner = None
+        for session in sessions:
+            try:
+                lumapi.close(session.handle)
+            except Exception as e:
+                print('Failed to close ' + session.solver + ' session: ' + str(e))
+            with self.condition:
+                self.opened[session.solver] = self.opened[session.solver] - 1
+                self.condition.notify_all()
+        return
+
+    @contextmanager
+    def session(self, solver, project=None, dirty=True, detach=False, script=None):
+        """
+        Acquire a session for the duration of a with block.
+
+        The session is discarded if the block raises, e.g. when the script carrying its setup
+        fails, see acquire() and release() for the arguments.
+
+        Yields
+        ------
+        handle : object
+            lumapi handle of the session.
+
+        """
+        session = self.acquire(solver, project, script)
+        try:
+            yield session.handle
+        except BaseException:
+            self.release(session, failed=True)
+            raise
+        self.release(session, dirty=dirty, detach=detach)
+
+    def warm(self, solver, count=1, project=None):
+        """
+        Open sessions ahead of time so the first jobs do not wait for the solver to start.
+
+        Parameters
+        ----------
+        solver : str
+            Solver type.
+        count : int, optional
+            Number of sessions to have ready, capped by the limit. The default is 1.
+        project : str, optional
+            Project file to preload. The default is None.
+
+        Returns
+        -------
+        None.
+
+        """
+        sessions = []
+        with self.condition:
+            missing = min(count, self.limit(solver)) - len(self.idle.get(solver, []))
+        for ii in range(max(0, missing)):
+            sessions.append(self.acquire(solver, project))
+        for session in sessions:
+            # Returned without a job so the preloaded project is kept
+            session.uses = session.uses - 1
+            self.release(session, dirty=False)
+        return
+
+    def close(self):
+        """
+        Close every idle session, sessions in use are closed when they are returned.
+
+        Returns
+        -------
+        None.
+
+        """
+        with self.condition:
+            sessions = [session for idle in self.idle.values() for session in idle]
+            self.idle = {}
+        for session in sessions:
+            self.discard(session)
+        return
+
+
+# Pool shared by all simulation methods, closed when Python exits
+session_pool = SessionPool(session_limits, session_max_uses)
+atexit.register(session_pool.close)
+
 # %%  Simulation methods
 
 
@@ -72,66 +719,50 @@ def run_FDTD(parameters, simulation_setup, close=True, **kwargs):
     else:
         sweep = False
 
-    # Saving current working directory
-    cwd = os.getcwd()
-
-    # Opening blank FDTD simulation
-    print('Current Directory Before Openning' + ': ' + cwd)
-    fdtd = lumapi.open('fdtd')
-
-    # Loading .FSP file containing model for coupling region
-    print('Current Directory After Openning' + ': ' + cwd)
+    # Taking a warm FDTD session from the pool with the coupler model loaded, the model is kept
+    # loaded for the next job since every model parameter is set again below
     filename = 'DirectionalCoupler.fsp'
-
-    # Changing back to initial directory
-    lumapi.evalScript(fdtd, "cd('%s');"
-                      % (cwd))
-
-    if sweep:
-        # If critical coupling sweep is being done use gap override
-        lumapi.evalScript(fdtd, ("load('%s'); setnamed('::model','gap',%s); "
-                                 "setnamed('::model','radius',%s); "
-                                 "setnamed('::model','coupling_length',%s);")
-                          % (filename, gap,  parameters.radius, parameters.coupling_length))
-    if not sweep:
-        # If critical coupling sweep is not being done use gap in the parameter class
-        lumapi.evalScript(fdtd, ("load('%s'); setnamed('::model','gap',%s); "
-                                 "setnamed('::model','radius',%s); "
-                                 "setnamed('::model','coupling_length',%s);")
-                          % (filename, parameters.gap,  parameters.radius,
-                             parameters.coupling_length))
-
-    # Pass waveguide parameters to simulation
-    lumapi.evalScript(fdtd, ("setnamed('::model','wg_width',%s); "
-                             "setnamed('::model','wg_height',%s); "
-                             "setnamed('::model','slab_height',%s);")
-                      % (parameters.wg_width, parameters.wg_height, parameters.slab_height))
-
-    # Due to how lumerical handles the port object I manually set it via the console for simplicity
-    command = ("switchtolayout; setglobalsource('wavelength start', %s); "
-               "setglobalsource('wavelength stop', %s);")
-    lumapi.evalScript(fdtd, command
-                      % (simulation_setup.lambda_start, simulation_setup.lambda_end))
-
-    # Running analysis script to extract results from monitors
-    lumapi.evalScript(fdtd, 'ExtractCouplingCoefficient;')
-
-    # Exporting results from FDTD
-    f = lumapi.getVar(fdtd, 'f')
-    CC = lumapi.getVar(fdtd, 'power_coupling')
-
-    # Converting result arrays to lists
-    f = f.tolist()
-    CC = CC.tolist()
-
-    # Cleaning up lists
-    for ii in range(len(f)):
-        f[ii] = f[ii][0]
-        CC[ii] = CC[ii][0]
-
-    # Closing FDTD simulation if close is True
-    if close:
-        lumapi.close(fdtd)
+    script = LumericalScript()
+    with session_pool.session('fdtd', project=filename, dirty=False, detach=not close,
+                              script=script) as fdtd:
+        if sweep:
+            # If critical coupling sweep is being done use gap override
+            script.setnamed('::model', gap=gap, radius=parameters.radius,
+                            coupling_length=parameters.coupling_length)
+        if not sweep:
+            # If critical coupling sweep is not being done use gap in the parameter class
+            script.setnamed('::model', gap=parameters.gap, radius=parameters.radius,
+                            coupling_length=parameters.coupling_length)
+
+        # Pass waveguide parameters to simulation
+        script.setnamed('::model', wg_width=parameters.wg_width, wg_height=parameters.wg_height,
+                        slab_height=parameters.slab_height)
+
+        # Due to how lumerical handles the port object I manually set it via the console for
+        # simplicity
+        script.command('switchtolayout;')
+        script.call('setglobalsource', 'wavelength start', simulation_setup.lambda_start)
+        script.call('setglobalsource', 'wavelength stop', simulation_setup.lambda_end)
+
+        # Running analysis script to extract results from monitors, the whole job in one call
+        script.run('ExtractCouplingCoefficient')
+        with Tracing.tracer.span('solve', 'fdtd', script='ExtractCouplingCoefficient',
+                                 blocks=len(script)):
+            evaluate_script(fdtd, script)
+
+        # Exporting results from FDTD
+        with Tracing.tracer.span('transfer', 'fdtd'):
+            f = lumapi.getVar(fdtd, 'f')
+            CC = lumapi.getVar(fdtd, 'power_coupling')
+
+        # Converting result arrays to lists
+        f = f.tolist()
+        CC = CC.tolist()
+
+        # Cleaning up lists
+        for ii in range(len(f)):
+            f[ii] = f[ii][0]
+            CC[ii] = CC[ii][0]
 
     return f, CC
 
@@ -164,79 +795,66 @@ def run_active_bent_wg(parameters, simulation_setup, charge_setup, waveguide_ID,
         List of imaginary components of dNeff from the change in effective index voltage sweep.
     loss_cleaned : list
         List of losses from the change in effective index voltage sweep.
+    neff : float
+        Real effective index of the unbiased waveguide at the band center.
+    ng : float
+        Real group index of the unbiased waveguide at the band center.
 
     """
-    # Saving current working directory
-    cwd = os.getcwd()
-    print('Current Directory Before Openning' + ': ' + cwd)
-
-    # Loading blank MODE simulation
-    mode = lumapi.open('mode')
-    print('Current Directory After Openning' + ': ' + cwd)
-
-    # Chaning directory back to starting location
-    lumapi.evalScript(mode, "cd('%s');"
-                      % (cwd))
-    # Defining waveguide model name to load
+    # Taking a warm MODE session from the pool with the waveguide model loaded
     filename = 'Waveguide.lms'
-
-    # Loading waveguide model
-    lumapi.evalScript(mode, "load('%s'); "
-                      % (filename))
-
-    # Defining physical parameters
-    command = "wg_height = %s; wg_width = %s; Radius = %s; slab_height = %s; Coupling_Length = %s;"
-    lumapi.evalScript(mode, command
-                      % (parameters.wg_height, parameters.wg_width, parameters.radius,
-                         parameters.slab_height, parameters.coupling_length))
-
-    # Defining simulation paramters
-    command = "Band = '%s'; Waveguide_ID = '%s';"
-    lumapi.evalScript(mode, command
-                      % (simulation_setup.Band, waveguide_ID))
-
-    # Passing CHARGE data to waveguide model
-    command = ("CHARGE_filename = '%s'; V_start = %s; V_stop = %s; N = %s; p_width_slab = %s; "
-               "n_width_slab = %s; pp_width = %s; np_width = %s; ppp_width =%s; npp_width = %s; "
-               "bias = '%s';")
-    lumapi.evalScript(mode, command
-                      % (charge_setup.CHARGE_file, charge_setup.vmin,
-                         charge_setup.vmax, charge_setup.charge_datapoints,
-                         charge_setup.p_width_slab, charge_setup.n_width_slab,
-                         charge_setup.pp_width, charge_setup.np_width,
-                         charge_setup.ppp_width, charge_setup.npp_width,
-                         charge_setup.bias))
-
-    # Loading analysis script
-    lumapi.evalScript(mode, 'ActiveBentWaveguide;')
-
-    # Extracting data from completed simulation
-    voltage = lumapi.getVar(mode, 'V')
-    dneff_real = lumapi.getVar(mode, 'dneff_real')
-    dneff_imag = lumapi.getVar(mode, 'dneff_imag')
-    phase = lumapi.getVar(mode, 'phase')
-    loss = lumapi.getVar(mode, 'loss')
-
-    # Initializing new areas for cleaned up data
-    dneff_real_cleaned = []
-    dneff_imag_cleaned = []
-    voltage_cleaned = []
-    phase_cleaned = []
-    loss_cleaned = []
-
-    # Cleaning data
-    for ii in range(len(dneff_real)):
-        voltage_cleaned.append(voltage[ii][0])
-        dneff_real_cleaned.append(dneff_real[ii][0])
-        dneff_imag_cleaned.append(dneff_imag[ii][0])
-        phase_cleaned.append(phase[ii][0])
-        loss_cleaned.append(loss[ii][0])
-
-    # Closing simulation if close is True
-    if close:
-        lumapi.close(mode)
-
-    return [voltage_cleaned, dneff_real_cleaned, dneff_imag_cleaned, phase_cleaned, loss_cleaned]
+    script = LumericalScript()
+    with session_pool.session('mode', project=filename, detach=not close, script=script) as mode:
+        # Defining physical parameters
+        script.assign(wg_height=parameters.wg_height, wg_width=parameters.wg_width,
+                      Radius=parameters.radius, slab_height=parameters.slab_height,
+                      Coupling_Length=parameters.coupling_length)
+
+        # Defining simulation paramters, the waveguide ID is passed as text
+        script.assign(Band=simulation_setup.Band, Waveguide_ID=str(waveguide_ID))
+
+        # Passing CHARGE data to waveguide model
+        script.assign(CHARGE_filename=charge_setup.CHARGE_file, V_start=charge_setup.vmin,
+                      V_stop=charge_setup.vmax, N=charge_setup.charge_datapoints,
+                      p_width_slab=charge_setup.p_width_slab,
+                      n_width_slab=charge_setup.n_width_slab, pp_width=charge_setup.pp_width,
+                      np_width=charge_setup.np_width, ppp_width=charge_setup.ppp_width,
+                      npp_width=charge_setup.npp_width, bias=charge_setup.bias)
+
+        # Loading analysis script, the whole job in one call
+        script.run('ActiveBentWaveguide')
+        with Tracing.tracer.span('solve', 'mode', script='ActiveBentWaveguide',
+                                 blocks=len(script)):
+            evaluate_script(mode, script)
+
+        # Extracting data from completed simulation
+        with Tracing.tracer.span('transfer', 'mode'):
+            voltage = lumapi.getVar(mode, 'V')
+            dneff_real = lumapi.getVar(mode, 'dneff_real')
+            dneff_imag = lumapi.getVar(mode, 'dneff_imag')
+            phase = lumapi.getVar(mode, 'phase')
+            loss = lumapi.getVar(mode, 'loss')
+            neff_real = lumapi.getVar(mode, 'neff_real')
+            ng_real = lumapi.getVar(mode, 'ng_real')
+
+        # Initializing new areas for cleaned up data
+        dneff_real_cleaned = []
+        dneff_imag_cleaned = []
+        voltage_cleaned = []
+        phase_cleaned = []
+        loss_cleaned = []
+
+        # Cleaning data
+        for ii in range(len(dneff_real)):
+            voltage_cleaned.append(voltage[ii][0])
+            dneff_real_cleaned.append(dneff_real[ii][0])
+            dneff_imag_cleaned.append(dneff_imag[ii][0])
+            phase_cleaned.append(phase[ii][0])
+            loss_cleaned.append(loss[ii][0])
+
+    # Keeping the indices at the first sweep voltage, the one dneff is relative to
+    return [voltage_cleaned, dneff_real_cleaned, dneff_imag_cleaned, phase_cleaned, loss_cleaned,
+            float(neff_real[0][0]), float(ng_real[0][0])]
 
 
 def run_charge(parameters, simulation_setup, charge_params, close=True):
@@ -265,68 +883,57 @@ def run_charge(parameters, simulation_setup, charge_params, close=True):
         List containing averaged bandwidth values v.s. voltage across ssac signal sweep
 
     """
-    # Saving current working directory
-    cwd = os.getcwd()
-    print('Current Directory Before Openning' + ': ' + cwd)
-
-    # Opening blank CHARGE simulation
-    device = lumapi.open('device')
-    print('Current Directory After Openning' + ': ' + cwd)
-
-    # Returning to previous path in case it changed
-    lumapi.evalScript(device, "cd('%s');"
-                      % (cwd))
-
-    # Passing doping dimensions to simulation
-    command = ("p_width_core =%s; n_width_core =%s; p_width_slab =%s; n_width_slab =%s; "
-               "pp_width = %s; np_width = %s; ppp_width = %s; npp_width = %s;")
-    lumapi.evalScript(device, command
-                      % (charge_params.p_width_core, charge_params.n_width_core,
-                         charge_params.p_width_slab, charge_params.n_width_slab,
-                         charge_params.pp_width, charge_params.np_width,
-                         charge_params.ppp_width, charge_params.npp_width))
-
-    # Passing in simulation parameters
-    command = ("slab_height = %s; radius = %s; coupling_length = %s; band = '%s'; wg_height = %s; "
-               "wg_width = %s;")
-    lumapi.evalScript(device, command %
-                      (parameters.slab_height, parameters.radius, parameters.coupling_length,
-                       simulation_setup.Band, parameters.wg_height, parameters.wg_width))
-
-    # Passing in charge settings
-    command = "v_min = %s; v_max =%s; N =%s; bias = '%s'; save_name = '%s'; doping_error = %s;"
-    lumapi.evalScript(device, command
-                      % (charge_params.vmin, charge_params.vmax, charge_params.charge_datapoints,
-                         charge_params.bias, charge_params.save_name, charge_params.doping_error))
-
-    # Select and use PN junction build script depending on foundry and PN type
-    if charge_params.foundry == 'AMF':
-        lumapi.evalScript(device, 'Build_Lateral_AMF;')
-    elif charge_params.foundry == 'AIM':
-        if charge_params.PN_type == 'Lateral':
-            lumapi.evalScript(device, 'Build_Lateral_AIM;')
-        elif charge_params.PN_type == 'L-Shaped':
-            lumapi.evalScript(device, 'Build_LSHaped_AIM;')
-
-    # Exporting results from FDTD
-    capacitance_avg = lumapi.getVar(device, 'cap_avg')
-    resistance_avg = lumapi.getVar(device, 'res_avg')
-    bandwidth_avg = lumapi.getVar(device, 'bw_avg')
-
-    # Converting result arrays to lists
-    capacitance_avg = capacitance_avg.tolist()
-    resistance_avg = resistance_avg.tolist()
-    bandwidth_avg = bandwidth_avg.tolist()
-
-    # Cleaning up lists
-
-    capacitance_avg = capacitance_avg[0]
-    resistance_avg = resistance_avg[0]
-    bandwidth_avg = bandwidth_avg[0]
-
-    # Close simualtion if close is True
-    if close:
-        lumapi.close(device)
+    # Taking a warm CHARGE session from the pool, the build scripts start from an empty layout
+    script = LumericalScript()
+    with session_pool.session('device', detach=not close, script=script) as device:
+        # Passing doping dimensions to simulation
+        script.assign(p_width_core=charge_params.p_width_core,
+                      n_width_core=charge_params.n_width_core,
+                      p_width_slab=charge_params.p_width_slab,
+                      n_width_slab=charge_params.n_width_slab, pp_width=charge_params.pp_width,
+                      np_width=charge_params.np_width, ppp_width=charge_params.ppp_width,
+                      npp_width=charge_params.npp_width)
+
+        # Passing in simulation parameters
+        script.assign(slab_height=parameters.slab_height, radius=parameters.radius,
+                      coupling_length=parameters.coupling_length, band=simulation_setup.Band,
+                      wg_height=parameters.wg_height, wg_width=parameters.wg_width)
+
+        # Passing in charge settings
+        script.assign(v_min=charge_params.vmin, v_max=charge_params.vmax,
+                      N=charge_params.charge_datapoints, bias=charge_params.bias,
+                      save_name=charge_params.save_name, doping_error=charge_params.doping_error)
+
+        # Select and use PN junction build script depending on foundry and PN type
+        if charge_params.foundry == 'AMF':
+            script.run('Build_Lateral_AMF')
+        elif charge_params.foundry == 'AIM':
+            if charge_params.PN_type == 'Lateral':
+                script.run('Build_Lateral_AIM')
+            elif charge_params.PN_type == 'L-Shaped':
+                script.run('Build_LSHaped_AIM')
+
+        # Running the whole job in one call
+        with Tracing.tracer.span('solve', 'device', foundry=charge_params.foundry,
+                                 PN_type=charge_params.PN_type, blocks=len(script)):
+            evaluate_script(device, script)
+
+        # Exporting results from FDTD
+        with Tracing.tracer.span('transfer', 'device'):
+            capacitance_avg = lumapi.getVar(device, 'cap_avg')
+            resistance_avg = lumapi.getVar(device, 'res_avg')
+            bandwidth_avg = lumapi.getVar(device, 'bw_avg')
+
+        # Converting result arrays to lists
+        capacitance_avg = capacitance_avg.tolist()
+        resistance_avg = resistance_avg.tolist()
+        bandwidth_avg = bandwidth_avg.tolist()
+
+        # Cleaning up lists
+
+        capacitance_avg = capacitance_avg[0]
+        resistance_avg = resistance_avg[0]
+        bandwidth_avg = bandwidth_avg[0]
     return capacitance_avg, resistance_avg, bandwidth_avg
 
 
@@ -360,64 +967,42 @@ def run_interconnect(parameters, simulation_setup, charge_setup,
     coupler_file = 'coupler_' + str(saved_results.coupler_ID)
     waveguide_file = 'waveguide_' + str(saved_results.waveguide_ID)
 
-    # Saving current working directory
-    cwd = os.getcwd()
-    print('Current Directory Before Openning' + ': ' + cwd)
-
-    # Opening empty Interconnect simulation
-    interc = lumapi.open('interconnect')
-    print('Current Directory After Openning' + ': ' + cwd)
-
-    # Changing back to previous path in case it changed.
-    lumapi.evalScript(interc, "cd('%s');"
-                      % (cwd))
-
-    # Specifying filename to load, PAM4 is complicated so a model is used
+    # Taking a warm Interconnect session from the pool with the ring model loaded
     filename = 'TransmissionSpectrum.icp'
-
-    # Loading model into simulation
-    lumapi.evalScript(interc, "load('%s');"
-                      % (filename))
-
-    # Passing physical parameters to simulation
-    command = "radius =%s; gap =%s; L = %s; slab_height = %s;"
-    lumapi.evalScript(interc, command
-                      % (parameters.radius, parameters.gap, parameters.coupling_length,
-                         parameters.slab_height))
-
-    # Passing loss parameters to simulation
-    # First taking the difference between the 0 volt case and the rest
-    voltage_dependent_loss = [0.0]
-    for ii in range(len(saved_results.absorption_loss) - 1):
-        voltage_dependent_loss.append(saved_results.absorption_loss[ii+1] -
-                                      saved_results.absorption_loss[ii])
-
-    command = "propagation_loss = %s; absorption_loss = %s;"
-    lumapi.evalScript(interc, command
-                      % (simulation_setup.propagation_loss, voltage_dependent_loss))
-
-    # Passing voltage information to simulation
-    command = "vmin = %s; vmax = %s; N = %s;"
-    lumapi.evalScript(interc, command
-                      % (charge_setup.vmin, charge_setup.vmax, charge_setup.charge_datapoints))
-
-    # Passing file names to simulation
-    command = "waveguide_file = '%s'; coupler_file = '%s';"
-    lumapi.evalScript(interc, command
-                      % (waveguide_file, coupler_file))
-
-    # Passing wavelength and transmission file ID to simulation
-    command = "start_wavelength = %s; stop_wavelength =%s; transmission_ID = %s;"
-    lumapi.evalScript(interc, command
-                      % (simulation_setup.lambda_start, simulation_setup.lambda_end,
-                         transmission_ID))
-    # Running ring building script and executing transmission sweep
-    # lumapi.evalScript(interc, 'Transmission;')
-    lumapi.evalScript(interc, 'SimulateSpectrum;')
-
-    # Closing simulation if close is True
-    if close:
-        lumapi.close(interc)
+    script = LumericalScript()
+    with session_pool.session('interconnect', project=filename, detach=not close,
+                              script=script) as interc:
+        # Passing physical parameters to simulation
+        script.assign(radius=parameters.radius, gap=parameters.gap,
+                      L=parameters.coupling_length, slab_height=parameters.slab_height)
+
+        # Passing loss parameters to simulation
+        # First taking the difference between the 0 volt case and the rest
+        voltage_dependent_loss = [0.0]
+        for ii in range(len(saved_results.absorption_loss) - 1):
+            voltage_dependent_loss.append(saved_results.absorption_loss[ii+1] -
+                                          saved_results.absorption_loss[ii])
+
+        script.assign(propagation_loss=simulation_setup.propagation_loss,
+                      absorption_loss=voltage_dependent_loss)
+
+        # Passing voltage information to simulation
+        script.assign(vmin=charge_setup.vmin, vmax=charge_setup.vmax,
+                      N=charge_setup.charge_datapoints)
+
+        # Passing file names to simulation
+        script.assign(waveguide_file=waveguide_file, coupler_file=coupler_file)
+
+        # Passing wavelength and transmission file ID to simulation
+        script.assign(start_wavelength=simulation_setup.lambda_start,
+                      stop_wavelength=simulation_setup.lambda_end,
+                      transmission_ID=transmission_ID)
+
+        # Running ring building script and executing transmission sweep, the whole job in one call
+        script.run('SimulateSpectrum')
+        with Tracing.tracer.span('solve', 'interconnect', script='SimulateSpectrum',
+                                 blocks=len(script)):
+            evaluate_script(interc, script)
     return
 
 
@@ -447,45 +1032,28 @@ def run_interconnect_EYE_NRZ(parameters, simulation_setup, saved_results, eye_ID
     coupler_file = 'coupler_' + str(saved_results.coupler_ID)
     waveguide_file = 'waveguide_' + str(saved_results.waveguide_ID)
 
-    # Saving current working directory
-    cwd = os.getcwd()
-    print('Current Directory Before Openning' + ': ' + cwd)
-
-    # Opening empty Interconnect simulation
-    interc = lumapi.open('interconnect')
-    print('Current Directory After Openning' + ': ' + cwd)
-
-    # Changing back to previous path in case it changed.
-    lumapi.evalScript(interc, "cd('%s');"
-                      % (cwd))
-
-    # This command used to state automation is being used, this is for debugging the script
-    command = "Running_Script = %s;"
-    lumapi.evalScript(interc, command
-                      % (1))
-
-    # Passing in simulation parameters
-    command = ("radius =%s; L = %s;  Eye_Data_ID = %s; propagation_loss = %s; "
-               "start_wavelength = %s; stop_wavelength =%s; bitrate = %s; "
-               "Vmin = %s; Vmax =%s; laser_lambda =%s;")
-    lumapi.evalScript(interc, command
-                      % (parameters.radius, parameters.coupling_length, eye_ID,
-                         simulation_setup.propagation_loss, simulation_setup.lambda_start,
-                         simulation_setup.lambda_end, simulation_setup.bitrate,
-                         simulation_setup.eye_vmin, simulation_setup.eye_vmax,
-                         simulation_setup.laser_wavl))
-
-    # Passing wavelength and transmission file ID to simulationi
-    command = "waveguide_file = '%s'; coupler_file = '%s';"
-    lumapi.evalScript(interc, command
-                      % (waveguide_file, coupler_file))
-
-    # Executing NRZ eye diagram building script and running simulation
-    lumapi.evalScript(interc, 'NRZ_Eye_Analysis;')
-
-    # Closing simulation if close is True
-    if close:
-        lumapi.close(interc)
+    # Taking a warm Interconnect session from the pool, the analysis script builds the circuit
+    script = LumericalScript()
+    with session_pool.session('interconnect', detach=not close, script=script) as interc:
+        # This command used to state automation is being used, this is for debugging the script
+        script.assign(Running_Script=1)
+
+        # Passing in simulation parameters
+        script.assign(radius=parameters.radius, L=parameters.coupling_length, Eye_Data_ID=eye_ID,
+                      propagation_loss=simulation_setup.propagation_loss,
+                      start_wavelength=simulation_setup.lambda_start,
+                      stop_wavelength=simulation_setup.lambda_end,
+                      bitrate=simulation_setup.bitrate, Vmin=simulation_setup.eye_vmin,
+                      Vmax=simulation_setup.eye_vmax, laser_lambda=simulation_setup.laser_wavl)
+
+        # Passing wavelength and transmission file ID to simulationi
+        script.assign(waveguide_file=waveguide_file, coupler_file=coupler_file)
+
+        # Executing NRZ eye diagram building script and running simulation, in one call
+        script.run('NRZ_Eye_Analysis')
+        with Tracing.tracer.span('solve', 'interconnect', script='NRZ_Eye_Analysis',
+                                 blocks=len(script)):
+            evaluate_script(interc, script)
     return
 
 
@@ -515,58 +1083,36 @@ def run_interconnect_EYE_PAM4(parameters, simulation_setup, saved_results, eye_I
     coupler_file = 'coupler_' + str(saved_results.coupler_ID)
     waveguide_file = 'waveguide_' + str(saved_results.waveguide_ID)
 
-    # Saving current working directory
-    cwd = os.getcwd()
-    print('Current Directory Before Openning' + ': ' + cwd)
-
-    # Opening empty Interconnect simulationi
-    interc = lumapi.open('interconnect')
-    print('Current Directory After Openning' + ': ' + cwd)
-
-    # Changing back to previous path in case it changed.
-    lumapi.evalScript(interc, "cd('%s');"
-                      % (cwd))
-
-    # Specifying filename to load, PAM4 is complicated so a model is used
+    # Taking a warm Interconnect session from the pool with the PAM4 model loaded, PAM4 is
+    # complicated so a model is used
     filename = 'PAM4_Eye_Diagram.icp'
-
-    # This command used to state automation is being used, this is for debugging the script
-    command = "Running_Script = %s;"
-    lumapi.evalScript(interc, command
-                      % (1))
-
-    # Loading model into simulation
-    lumapi.evalScript(interc, "load('%s');"
-                      % (filename))
-
-    # Passing in simulation parameters
-    command = ("radius =%s; L = %s;  Eye_Data_ID = %s; propagation_loss = %s; "
-               "start_wavelength = %s; stop_wavelength =%s; bitrate = %s;")
-    lumapi.evalScript(interc, command
-                      % (parameters.radius, parameters.coupling_length,
-                         eye_ID,  simulation_setup.propagation_loss, simulation_setup.lambda_start,
-                         simulation_setup.lambda_end, simulation_setup.bitrate))
-
-    # Passing in voltage levels for PAM4
-    if simulation_setup.staticNonLinCorrec == 'yes':
-        v_space = np.array(saved_results.NonLinVoltages)
-    else:
-        v_space = np.linspace(simulation_setup.eye_vmin, simulation_setup.eye_vmax, 4)
-    command = "V0 = %s; V1 =%s; V2 = %s; V3 =%s; laser_lambda =%s; "
-    lumapi.evalScript(interc, command
-                      % (v_space[0], v_space[1],
-                         v_space[2], v_space[3],
-                         simulation_setup.laser_wavl))
-
-    # Pasing in filenames for temporary data loading
-    command = "waveguide_file = '%s'; coupler_file = '%s';"
-    lumapi.evalScript(interc, command
-                      % (waveguide_file, coupler_file))
-
-    # Executing anysis script
-    lumapi.evalScript(interc, 'PAM4_Eye_Analysis;')
-
-    # Closing simulation if close is True
-    if close:
-        lumapi.close(interc)
+    script = LumericalScript()
+    with session_pool.session('interconnect', project=filename, detach=not close,
+                              script=script) as interc:
+        # This command used to state automation is being used, this is for debugging the script
+        script.assign(Running_Script=1)
+
+        # Passing in simulation parameters
+        script.assign(radius=parameters.radius, L=parameters.coupling_length, Eye_Data_ID=eye_ID,
+                      propagation_loss=simulation_setup.propagation_loss,
+                      start_wavelength=simulation_setup.lambda_start,
+                      stop_wavelength=simulation_setup.lambda_end,
+                      bitrate=simulation_setup.bitrate)
+
+        # Passing in voltage levels for PAM4
+        if simulation_setup.staticNonLinCorrec == 'yes':
+            v_space = np.array(saved_results.NonLinVoltages)
+        else:
+            v_space = np.linspace(simulation_setup.eye_vmin, simulation_setup.eye_vmax, 4)
+        script.assign(V0=v_space[0], V1=v_space[1], V2=v_space[2], V3=v_space[3],
+                      laser_lambda=simulation_setup.laser_wavl)
+
+        # Pasing in filenames for temporary data loading
+        script.assign(waveguide_file=waveguide_file, coupler_file=coupler_file)
+
+        # Executing anysis script, the whole job in one call
+        script.run('PAM4_Eye_Analysis')
+        with Tracing.tracer.span('solve', 'interconnect', script='PAM4_Eye_Analysis',
+                                 blocks=len(script)):
+            evaluate_script(interc, script)
     return